@@ -9,6 +9,7 @@ import app_settings_cache
 from config import *
 from semantic_kernel import Kernel
 from semantic_kernel_loader import initialize_semantic_kernel
+from functions_kernel_pool import release_kernel_lease
 
 #from azure.monitor.opentelemetry import configure_azure_monitor
 
@@ -210,6 +211,10 @@ def before_first_request():
 
     initialize_clients(settings)
     ensure_custom_logo_file_exists(app, settings)
+
+    # Warm the model deployment catalog so the model pickers don't wait on ARM
+    from functions_model_catalog import prefetch_model_catalog
+    prefetch_model_catalog(settings)
     # Enable Application Insights logging globally if configured
     print("Setting up Application Insights logging...")
     setup_appinsights_logging(settings)
@@ -384,6 +389,12 @@ def before_first_request():
     retention_thread.start()
     print("Retention policy background task started.")
 
+    # Durable ingestion queue workers (no-op unless enable_durable_ingestion_queue is on)
+    from functions_ingestion_queue import start_embedded_ingestion_workers
+    ingestion_threads = start_embedded_ingestion_workers(settings)
+    if ingestion_threads:
+        print(f"Ingestion queue started with {len(ingestion_threads)} embedded worker(s).")
+
     # Initialize Semantic Kernel and plugins
     enable_semantic_kernel = settings.get('enable_semantic_kernel', False)
     per_user_semantic_kernel = settings.get('per_user_semantic_kernel', False)
@@ -433,6 +444,11 @@ def reload_kernel_if_needed():
         """
         setattr(builtins, "kernel_reload_needed", False)
 
+@app.teardown_request
+def release_pooled_kernel(exc):
+    # Return the per-user kernel leased by initialize_semantic_kernel() to the pool
+    release_kernel_lease()
+
 @app.after_request
 def add_security_headers(response):
     """
@@ -5,6 +5,7 @@ ALWAYS import app_settings_cache and use app_settings_cache.get_settings_cache()
 This supports the dynamic selection of redis or in-memory caching of settings.
 """
 import json
+import time
 from redis import Redis
 from azure.identity import DefaultAzureCredential
 
@@ -12,10 +13,15 @@ _settings = None
 APP_SETTINGS_CACHE = {}
 update_settings_cache = None
 get_settings_cache = None
+# Other values shared by every worker (e.g. the model deployment catalog), with a TTL
+update_shared_cache_entry = None
+get_shared_cache_entry = None
+delete_shared_cache_entry = None
 app_cache_is_using_redis = False
 
 def configure_app_cache(settings, redis_cache_endpoint=None):
     global _settings, update_settings_cache, get_settings_cache, APP_SETTINGS_CACHE, app_cache_is_using_redis
+    global update_shared_cache_entry, get_shared_cache_entry, delete_shared_cache_entry
     _settings = settings
     use_redis = _settings.get('enable_redis_cache', False)
 
@@ -57,6 +63,20 @@ def configure_app_cache(settings, redis_cache_endpoint=None):
         update_settings_cache = update_settings_cache_redis
         get_settings_cache = get_settings_cache_redis
 
+        def update_shared_cache_entry_redis(key, value, ttl_seconds):
+            redis_client.set(f'APP_SHARED_CACHE:{key}', json.dumps(value), ex=max(1, int(ttl_seconds)))
+
+        def get_shared_cache_entry_redis(key):
+            cached = redis_client.get(f'APP_SHARED_CACHE:{key}')
+            return json.loads(cached) if cached else None
+
+        def delete_shared_cache_entry_redis(key):
+            redis_client.delete(f'APP_SHARED_CACHE:{key}')
+
+        update_shared_cache_entry = update_shared_cache_entry_redis
+        get_shared_cache_entry = get_shared_cache_entry_redis
+        delete_shared_cache_entry = delete_shared_cache_entry_redis
+
     else:
         def update_settings_cache_mem(new_settings):
             global APP_SETTINGS_CACHE
@@ -66,4 +86,22 @@ def configure_app_cache(settings, redis_cache_endpoint=None):
             return APP_SETTINGS_CACHE
 
         update_settings_cache = update_settings_cache_mem
-        get_settings_cache = get_settings_cache_mem
\ No newline at end of file
+        get_settings_cache = get_settings_cache_mem
+
+        shared_entries = {}
+
+        def update_shared_cache_entry_mem(key, value, ttl_seconds):
+            shared_entries[key] = (time.time() + ttl_seconds, value)
+
+        def get_shared_cache_entry_mem(key):
+            entry = shared_entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return None
+            return entry[1]
+
+        def delete_shared_cache_entry_mem(key):
+            shared_entries.pop(key, None)
+
+        update_shared_cache_entry = update_shared_cache_entry_mem
+        get_shared_cache_entry = get_shared_cache_entry_mem
+        delete_shared_cache_entry = delete_shared_cache_entry_mem
\ No newline at end of file
@@ -88,7 +88,7 @@ load_dotenv()
 EXECUTOR_TYPE = 'thread'
 EXECUTOR_MAX_WORKERS = 30
 SESSION_TYPE = 'filesystem'
-VERSION = "0.237.004"
+VERSION = "0.237.029"
 
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -213,6 +213,7 @@ def get_redis_cache_infrastructure_endpoint(redis_hostname: str) -> str:
 storage_account_user_documents_container_name = "user-documents"
 storage_account_group_documents_container_name = "group-documents"
 storage_account_public_documents_container_name = "public-documents"
+storage_account_images_container_name = "chat-images"
 
 # =============================================================================
 # Storage Backend Configuration
@@ -241,6 +242,7 @@ ANF_SERVICE_LEVEL = os.getenv("ANF_SERVICE_LEVEL", "Premium")
 ANF_USER_DOCUMENTS_BUCKET = os.getenv("ANF_USER_DOCUMENTS_BUCKET", "user-documents")
 ANF_GROUP_DOCUMENTS_BUCKET = os.getenv("ANF_GROUP_DOCUMENTS_BUCKET", "group-documents")
 ANF_PUBLIC_DOCUMENTS_BUCKET = os.getenv("ANF_PUBLIC_DOCUMENTS_BUCKET", "public-documents")
+ANF_IMAGES_BUCKET = os.getenv("ANF_IMAGES_BUCKET", "chat-images")
 
 def is_anf_storage_enabled():
     """Check if Azure NetApp Files storage backend is enabled and configured."""
@@ -463,6 +465,33 @@ cosmos_approvals_container = cosmos_database.create_container_if_not_exists(
     default_ttl=-1  # TTL disabled by default, enabled per-document for auto-cleanup
 )
 
+cosmos_ingestion_jobs_container_name = "ingestion_jobs"
+cosmos_ingestion_jobs_container = cosmos_database.create_container_if_not_exists(
+    id=cosmos_ingestion_jobs_container_name,
+    partition_key=PartitionKey(path="/id"),
+    default_ttl=-1  # TTL disabled by default, set on finished jobs for auto-cleanup
+)
+
+cosmos_bulk_operation_jobs_container_name = "bulk_operation_jobs"
+cosmos_bulk_operation_jobs_container = cosmos_database.create_container_if_not_exists(
+    id=cosmos_bulk_operation_jobs_container_name,
+    partition_key=PartitionKey(path="/id"),
+    default_ttl=-1  # TTL disabled by default, set on finished jobs for auto-cleanup
+)
+
+cosmos_listing_counters_container_name = "listing_counters"
+cosmos_listing_counters_container = cosmos_database.create_container_if_not_exists(
+    id=cosmos_listing_counters_container_name,
+    partition_key=PartitionKey(path="/id")
+)
+
+cosmos_content_hash_cache_container_name = "content_hash_cache"
+cosmos_content_hash_cache_container = cosmos_database.create_container_if_not_exists(
+    id=cosmos_content_hash_cache_container_name,
+    partition_key=PartitionKey(path="/content_hash"),
+    default_ttl=30 * 24 * 60 * 60  # Cached embeddings / DI output expire after 30 days
+)
+
 def ensure_custom_logo_file_exists(app, settings):
     """
     If custom_logo_base64 or custom_logo_dark_base64 is present in settings, ensure the appropriate
@@ -751,7 +780,8 @@ def initialize_clients(settings):
                     for container_name in [
                         storage_account_user_documents_container_name, 
                         storage_account_group_documents_container_name, 
-                        storage_account_public_documents_container_name
+                        storage_account_public_documents_container_name,
+                        storage_account_images_container_name
                         ]:
                         try:
                             container_client = blob_service_client.get_container_client(container_name)
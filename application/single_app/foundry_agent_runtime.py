@@ -1,7 +1,6 @@
 # foundry_agent_runtime.py
 """Azure AI Foundry agent execution helpers."""
 
-import asyncio
 import logging
 import os
 from dataclasses import dataclass
@@ -16,6 +15,7 @@ from semantic_kernel.agents import AzureAIAgent
 from semantic_kernel.contents.chat_message_content import ChatMessageContent
 
 from functions_appinsights import log_event
+from functions_async_runtime import run_async
 from functions_debug import debug_print
 from functions_keyvault import (
     retrieve_secret_from_key_vault_by_full_name,
@@ -76,7 +76,7 @@ class AzureAIFoundryChatCompletionAgent:
         )
 
         try:
-            result = asyncio.run(
+            result = run_async(
                 execute_foundry_agent(
                     foundry_settings=self._foundry_settings,
                     global_settings=self._global_settings,
@@ -1,34 +1,26 @@
 # function_agents.py
 
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from functions_async_runtime import get_affinity_key, get_async_runtime
 from functions_settings import get_settings
 from semantic_kernel.agents.runtime.in_process.in_process_runtime import InProcessRuntime
 
-# Global executor for background orchestration
-executor = ThreadPoolExecutor(max_workers=4)  # Tune as needed
-
-def run_orchestration_in_thread(orchestrator, agent_message_history, run_sk_call):
-    def _runner():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        runtime = None
+def run_orchestration_in_thread(orchestrator, agent_message_history, run_sk_call, kernel):
+    """
+    Runs the orchestration on the shared async runtime; returns a Future that resolves to the result (or None on error).
+    It runs on the loop of the kernel its agents were loaded with, since they share that kernel's async clients.
+    """
+    async def _runner():
         try:
             runtime = InProcessRuntime()
-            result = loop.run_until_complete(
-                run_sk_call(
-                    orchestrator.invoke,
-                    agent_message_history,
-                    runtime=runtime,
-                )
+            return await run_sk_call(
+                orchestrator.invoke,
+                agent_message_history,
+                runtime=runtime,
             )
-            return result
         except Exception as e:
             print(f"Orchestration error: {e}")
             return None
-        finally:
-            loop.close()
-    return executor.submit(_runner)
+    return get_async_runtime().submit(_runner(), affinity_key=get_affinity_key(kernel))
 
 def get_agent_id_by_name(agent_name):
     """
@@ -0,0 +1,253 @@
+# functions_async_runtime.py
+"""
+Shared, long-lived event loops for Semantic Kernel / Foundry calls.
+
+Sync request handlers used to call asyncio.run() (or create a new event loop)
+for every kernel invocation, paying loop setup/teardown each time. Async HTTP
+clients (AsyncAzureOpenAI, aiohttp) also could not reuse connections across
+calls because their pools were bound to a loop that had just been closed.
+
+AsyncRuntime keeps a few event loops running in daemon threads. Coroutines are
+handed over with submit() (returns a concurrent.futures.Future) or run() (blocks
+for the result). Loops stay alive, so connection pools survive between requests.
+
+The caller's contextvars are copied into the task, which carries the Flask
+app/request context (Flask 2.2+ stores these in contextvars) so plugins can
+still read the session and `g`.
+
+Each loop records its pending task count and its scheduling lag. A blocking
+call inside a coroutine shows up as lag.
+
+Async clients bind their connection pools to the loop they first run on, so
+coroutines that use long-lived clients must always run on the same loop. Pass
+affinity_key=get_affinity_key(owner), where owner is the object that holds the
+clients (e.g. the Semantic Kernel whose services and agents are used). The
+global kernel is shared by every user, so all of its calls go to one loop,
+while each pooled per-user kernel gets its own. Semantic Kernel calls sync
+plugin functions (SQL, OpenAPI, storage, Graph, ...) inline on the loop, so
+offload_sync_kernel_functions() moves them to worker threads; a slow plugin
+call then only delays its own chat.
+"""
+
+import asyncio
+import functools
+import inspect
+import itertools
+import os
+import threading
+
+DEFAULT_ASYNC_RUNTIME_LOOPS = int(os.getenv("ASYNC_RUNTIME_LOOPS", "4"))
+LOOP_LAG_PROBE_INTERVAL_SECONDS = 1.0
+
+
+class _LoopWorker:
+    """One event loop running forever in a daemon thread."""
+
+    def __init__(self, name):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+        self.pending = 0
+        self.completed = 0
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        self._started.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.call_soon(self._probe_lag, self.loop.time())
+        self.loop.run_forever()
+
+    def _probe_lag(self, scheduled_at):
+        # How late this callback ran compared with when it was due
+        lag = max(0.0, self.loop.time() - scheduled_at)
+        self.lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        next_due = self.loop.time() + LOOP_LAG_PROBE_INTERVAL_SECONDS
+        self.loop.call_at(next_due, self._probe_lag, next_due)
+
+    def submit(self, coro):
+        with self._lock:
+            self.pending += 1
+        # call_soon_threadsafe copies the caller's contextvars into the scheduled callback,
+        # and the task created there inherits them.
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, _future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def stop(self):
+        def _shutdown():
+            # Let in-flight tasks see the cancellation before the loop stops
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.call_soon(self.loop.stop)
+        self.loop.call_soon_threadsafe(_shutdown)
+
+
+class AsyncRuntime:
+    """A small pool of persistent event loops with a submit(coro) API."""
+
+    def __init__(self, num_loops=DEFAULT_ASYNC_RUNTIME_LOOPS, name="async-runtime"):
+        self._workers = [_LoopWorker(f"{name}-{index}") for index in range(max(1, num_loops))]
+        self._round_robin = itertools.count()
+
+    def _pick_worker(self, affinity_key=None):
+        if affinity_key is not None:
+            return self._workers[hash(affinity_key) % len(self._workers)]
+        # Least pending work first; round robin breaks ties
+        offset = next(self._round_robin)
+        count = len(self._workers)
+        candidates = [self._workers[(offset + i) % count] for i in range(count)]
+        return min(candidates, key=lambda worker: worker.pending)
+
+    def is_runtime_thread(self):
+        current = threading.current_thread()
+        return any(worker.thread is current for worker in self._workers)
+
+    def submit(self, coro, affinity_key=None):
+        """
+        Schedules a coroutine on one of the runtime loops.
+
+        Args:
+            coro: Coroutine to run.
+            affinity_key: Optional key that always maps to the same loop, for objects
+                that must stay on one loop (see get_affinity_key()).
+
+        Returns:
+            concurrent.futures.Future: Resolves to the coroutine's result. Cancelling it
+            cancels the task.
+        """
+        return self._pick_worker(affinity_key).submit(coro)
+
+    def run(self, coro, timeout=None, affinity_key=None):
+        """
+        Runs a coroutine on the runtime and blocks for its result.
+
+        Like asyncio.run(), this cannot be called from a thread that is already
+        running an event loop (including the runtime's own loops), since blocking
+        there would deadlock.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() cannot be called from a running event loop; await the coroutine instead")
+        future = self.submit(coro, affinity_key=affinity_key)
+        try:
+            return future.result(timeout=timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def get_stats(self):
+        """Per-loop queue depth, completed count and scheduling lag (ms)."""
+        loops = [
+            {
+                "name": worker.name,
+                "pending": worker.pending,
+                "completed": worker.completed,
+                "lag_ms": round(worker.lag_seconds * 1000, 1),
+                "max_lag_ms": round(worker.max_lag_seconds * 1000, 1),
+                "alive": worker.thread.is_alive()
+            }
+            for worker in self._workers
+        ]
+        return {
+            "loops": loops,
+            "pending": sum(loop["pending"] for loop in loops),
+            "max_lag_ms": max(loop["max_lag_ms"] for loop in loops)
+        }
+
+    def stop(self):
+        for worker in self._workers:
+            worker.stop()
+
+
+_async_runtime = None
+_async_runtime_lock = threading.Lock()
+
+
+def get_async_runtime():
+    """Returns the process-wide AsyncRuntime, starting its loops on first use."""
+    global _async_runtime
+    if _async_runtime is None:
+        with _async_runtime_lock:
+            if _async_runtime is None:
+                _async_runtime = AsyncRuntime()
+    return _async_runtime
+
+
+def get_affinity_key(owner):
+    """
+    Affinity key for coroutines that use the async clients held by owner (a kernel,
+    agent or service). Keyed on the instance, so every caller sharing it uses one loop.
+    """
+    if owner is None:
+        return None
+    return ("instance", id(owner))
+
+
+def _offloaded_method(method):
+    @functools.wraps(method)
+    async def run_in_thread(**kwargs):
+        def call():
+            result = method(**kwargs)
+            # Sync generators are consumed in the worker thread too
+            return list(result) if inspect.isgenerator(result) else result
+        # to_thread copies contextvars, so the plugin still sees the Flask session and `g`
+        return await asyncio.to_thread(call)
+    run_in_thread._offloaded_sync_method = True
+    return run_in_thread
+
+
+def offload_sync_kernel_functions(kernel, agents=None):
+    """
+    Makes the sync native functions of a kernel's plugins (and of its agents'
+    kernels) run in a worker thread via asyncio.to_thread instead of blocking
+    the event loop. Safe to call again for a pooled or shared kernel.
+    """
+    kernels = [kernel]
+    agent_list = list(agents.values()) if isinstance(agents, dict) else list(agents or [])
+    kernels.extend(getattr(agent, "kernel", None) for agent in agent_list)
+
+    offloaded = 0
+    seen = set()
+    for each_kernel in kernels:
+        if each_kernel is None or id(each_kernel) in seen:
+            continue
+        seen.add(id(each_kernel))
+        for plugin in list((getattr(each_kernel, "plugins", None) or {}).values()):
+            for function in list(plugin.functions.values()):
+                method = getattr(function, "method", None)
+                if (
+                    method is None
+                    or getattr(method, "_offloaded_sync_method", False)
+                    or inspect.iscoroutinefunction(method)
+                    or inspect.isasyncgenfunction(method)
+                ):
+                    continue
+                function.method = _offloaded_method(method)
+                offloaded += 1
+    return offloaded
+
+
+def run_async(coro, timeout=None, affinity_key=None):
+    """Drop-in replacement for asyncio.run() that uses the shared runtime loops."""
+    return get_async_runtime().run(coro, timeout=timeout, affinity_key=affinity_key)
+
+
+def get_async_runtime_stats():
+    if _async_runtime is None:
+        return {"loops": [], "pending": 0, "max_lag_ms": 0.0}
+    return _async_runtime.get_stats()
@@ -0,0 +1,101 @@
+# functions_async_stream.py
+"""
+Bridge from an async iterator (e.g. a Semantic Kernel agent's invoke_stream) to a
+synchronous generator that a Flask streaming response can consume.
+
+The async iterator runs on the shared AsyncRuntime loops and feeds a bounded
+queue. Items are handed to the caller as soon as they are produced. When the
+queue is full the producer pauses (backpressure), and closing the generator
+(client disconnected) cancels the producer task.
+
+The producer task inherits the caller's contextvars, so plugins still see the
+Flask session and `g` (user, conversation) while the agent runs.
+"""
+
+import asyncio
+import queue
+import threading
+
+from functions_async_runtime import get_async_runtime
+
+DEFAULT_MAX_BUFFERED_ITEMS = 64
+BACKPRESSURE_POLL_SECONDS = 0.01
+
+_ITEM = "item"
+_ERROR = "error"
+_DONE = "done"
+
+
+def iterate_async_stream(async_iterable_factory, max_buffered_items=DEFAULT_MAX_BUFFERED_ITEMS, runtime=None, affinity_key=None):
+    """
+    Yields the items of an async iterable from synchronous code as they arrive.
+
+    Args:
+        async_iterable_factory (callable): Returns the async iterable. It is called on
+            the runtime loop so the iterable is bound to that loop.
+        max_buffered_items (int): Queue size; the producer waits while it is full.
+        runtime (AsyncRuntime): Runtime to run on. Defaults to the shared runtime.
+        affinity_key: Passed to AsyncRuntime.submit().
+
+    Raises:
+        Any exception raised by the async iterable, re-raised in the caller's thread.
+    """
+    items = queue.Queue(maxsize=max(1, max_buffered_items))
+    stop_requested = threading.Event()
+
+    async def put(entry):
+        while True:
+            if stop_requested.is_set():
+                return False
+            try:
+                items.put_nowait(entry)
+                return True
+            except queue.Full:
+                await asyncio.sleep(BACKPRESSURE_POLL_SECONDS)
+
+    async def pump():
+        stream = async_iterable_factory()
+        try:
+            async for item in stream:
+                if not await put((_ITEM, item)):
+                    return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await put((_ERROR, e))
+        else:
+            await put((_DONE, None))
+        finally:
+            # Stop the underlying stream (and its HTTP request) right away
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+
+    producer = (runtime or get_async_runtime()).submit(pump(), affinity_key=affinity_key)
+
+    def report_crash(future):
+        # pump() reports its own errors; this covers failures outside it (e.g. the factory)
+        if not future.cancelled() and future.exception() is not None:
+            try:
+                items.put_nowait((_ERROR, future.exception()))
+            except queue.Full:
+                pass
+
+    producer.add_done_callback(report_crash)
+
+    finished = False
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == _ITEM:
+                yield value
+            elif kind == _ERROR:
+                finished = True
+                raise value
+            else:
+                finished = True
+                return
+    finally:
+        if not finished:
+            # Consumer went away early (e.g. client disconnected): cancel the producer
+            stop_requested.set()
+            producer.cancel()
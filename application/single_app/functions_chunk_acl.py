@@ -0,0 +1,216 @@
+# functions_chunk_acl.py
+"""
+Bulk propagation of document sharing ACLs to AI Search chunks.
+
+Sharing used to read and re-upload every chunk (embedding vector included) one
+at a time. Here chunk ids are listed with a single id-only search and the ACL
+fields are applied with `merge` actions in large IndexDocumentsBatch requests,
+so only shared_user_ids / shared_group_ids travel over the wire.
+
+Propagation runs as a background job. Progress is written to the document's
+`acl_sync` field with a Cosmos patch, so any worker can report it.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from config import *
+
+# Azure AI Search accepts at most 1000 actions per indexing batch
+CHUNK_ACL_BATCH_SIZE = 1000
+# $top above 1000 makes the service page through results 1000 at a time
+CHUNK_ACL_MAX_CHUNKS = 100000
+
+# Background executor for ACL propagation jobs
+acl_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chunk-acl")
+_document_locks = {}
+_document_locks_guard = threading.Lock()
+
+
+def _get_document_lock(document_id):
+    with _document_locks_guard:
+        lock = _document_locks.get(document_id)
+        if lock is None:
+            lock = threading.Lock()
+            _document_locks[document_id] = lock
+        return lock
+
+
+def _get_scope(group_id=None, public_workspace_id=None):
+    """Returns (search_client, cosmos_container, acl_field) for a document scope."""
+    if public_workspace_id is not None:
+        return CLIENTS["search_client_public"], cosmos_public_documents_container, None
+    if group_id is not None:
+        return CLIENTS["search_client_group"], cosmos_group_documents_container, "shared_group_ids"
+    return CLIENTS["search_client_user"], cosmos_user_documents_container, "shared_user_ids"
+
+
+def list_chunk_ids(search_client, document_id):
+    """Lists all chunk ids for a document with a single id-only search."""
+    results = search_client.search(
+        search_text="*",
+        filter=f"document_id eq '{document_id}'",
+        select="id",
+        top=CHUNK_ACL_MAX_CHUNKS
+    )
+    return [result["id"] for result in results if result.get("id")]
+
+
+def merge_fields_into_chunks(search_client, chunk_ids, fields, batch_size=CHUNK_ACL_BATCH_SIZE, progress_callback=None):
+    """
+    Applies the same field values to many chunks using merge actions.
+
+    Only the given fields are sent, so embeddings and chunk text are untouched.
+    Chunks the service rejects, and batches that fail with an Azure error, are
+    logged and counted as failed; any other error is raised.
+
+    Args:
+        search_client: SearchClient for the index that holds the chunks.
+        chunk_ids (list): Chunk document keys.
+        fields (dict): Field values to merge into every chunk.
+        batch_size (int): Actions per IndexDocumentsBatch (max 1000).
+        progress_callback (callable): Called as progress_callback(processed, total) after each batch.
+
+    Returns:
+        dict: {"total": int, "succeeded": int, "failed": int}
+    """
+    total = len(chunk_ids)
+    succeeded = 0
+    failed = 0
+    batch_size = max(1, min(batch_size, CHUNK_ACL_BATCH_SIZE))
+
+    for start in range(0, total, batch_size):
+        batch_ids = chunk_ids[start:start + batch_size]
+        batch = IndexDocumentsBatch()
+        batch.add_merge_actions([{"id": chunk_id, **fields} for chunk_id in batch_ids])
+        try:
+            results = search_client.index_documents(batch)
+        except AzureError as e:
+            print(f"Error: Failed to merge fields {list(fields)} into chunks {batch_ids[0]}..{batch_ids[-1]} ({len(batch_ids)} chunks): {e}")
+            failed += len(batch_ids)
+        else:
+            rejected = [result for result in results if not result.succeeded]
+            succeeded += len(batch_ids) - len(rejected)
+            failed += len(rejected)
+            for result in rejected:
+                print(f"Error: Failed to merge fields {list(fields)} into chunk {result.key}: {result.status_code} {result.error_message}")
+
+        if progress_callback:
+            progress_callback(min(start + batch_size, total), total)
+
+    return {"total": total, "succeeded": succeeded, "failed": failed}
+
+
+def _set_acl_sync_state(cosmos_container, document_id, state):
+    try:
+        cosmos_container.patch_item(
+            item=document_id,
+            partition_key=document_id,
+            patch_operations=[{"op": "set", "path": "/acl_sync", "value": state}]
+        )
+    except Exception as e:
+        print(f"Warning: Failed to record ACL sync progress for document {document_id}: {e}")
+
+
+def propagate_chunk_acl(document_id, group_id=None, public_workspace_id=None, job_id=None):
+    """
+    Copies the document's current sharing ACL onto all of its search chunks.
+
+    The ACL is re-read from Cosmos when the job starts (and again when it ends),
+    so overlapping share/unshare requests always converge on the latest value.
+
+    Returns:
+        dict: Final acl_sync state for the document.
+    """
+    search_client, cosmos_container, acl_field = _get_scope(group_id, public_workspace_id)
+    job_id = job_id or str(uuid.uuid4())
+    state = {
+        "job_id": job_id,
+        "status": "running",
+        "processed": 0,
+        "total": 0,
+        "failed": 0,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+
+    if acl_field is None:
+        state["status"] = "not_applicable"
+        return state
+
+    with _get_document_lock(document_id):
+        try:
+            applied_acl = None
+            while True:
+                document_item = cosmos_container.read_item(item=document_id, partition_key=document_id)
+                current_acl = document_item.get(acl_field, []) or []
+
+                # A newer job is already queued and will apply the latest ACL
+                latest_job = document_item.get("acl_sync") or {}
+                if applied_acl is None and latest_job.get("status") == "queued" and latest_job.get("job_id") != job_id:
+                    state["status"] = "superseded"
+                    return state
+
+                if applied_acl is not None and current_acl == applied_acl:
+                    break
+
+                chunk_ids = list_chunk_ids(search_client, document_id)
+                state.update({"total": len(chunk_ids), "processed": 0})
+                _set_acl_sync_state(cosmos_container, document_id, state)
+
+                def on_progress(processed, total):
+                    state["processed"] = processed
+                    state["updated_at"] = datetime.now(timezone.utc).isoformat()
+                    _set_acl_sync_state(cosmos_container, document_id, state)
+
+                result = merge_fields_into_chunks(
+                    search_client,
+                    chunk_ids,
+                    {acl_field: current_acl},
+                    progress_callback=on_progress
+                )
+                state["failed"] = result["failed"]
+                applied_acl = current_acl
+
+            state["status"] = "completed" if state["failed"] == 0 else "completed_with_errors"
+        except Exception as e:
+            print(f"Error propagating ACL to chunks for document {document_id}: {e}")
+            state["status"] = "failed"
+            state["error"] = str(e)[:500]
+
+        state["updated_at"] = datetime.now(timezone.utc).isoformat()
+        _set_acl_sync_state(cosmos_container, document_id, state)
+
+    return state
+
+
+def submit_chunk_acl_propagation(document_id, group_id=None, public_workspace_id=None):
+    """
+    Queues propagate_chunk_acl on the background executor.
+
+    Returns:
+        str: Job id recorded in the document's acl_sync field.
+    """
+    job_id = str(uuid.uuid4())
+    _, cosmos_container, acl_field = _get_scope(group_id, public_workspace_id)
+    if acl_field is not None:
+        _set_acl_sync_state(cosmos_container, document_id, {
+            "job_id": job_id,
+            "status": "queued",
+            "processed": 0,
+            "total": 0,
+            "failed": 0,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        })
+    acl_executor.submit(
+        propagate_chunk_acl,
+        document_id,
+        group_id=group_id,
+        public_workspace_id=public_workspace_id,
+        job_id=job_id
+    )
+    return job_id
+
+
+def get_chunk_acl_sync_status(document_item):
+    """Returns the acl_sync progress for a document item, or an idle state."""
+    return document_item.get("acl_sync") or {"status": "idle", "processed": 0, "total": 0, "failed": 0}
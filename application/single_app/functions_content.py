@@ -306,17 +306,9 @@ def chunk_word_file_into_pages(di_pages):
     # Current logic returns empty list if no words.
     return new_pages
 
-def generate_embedding(
-    text,
-    max_retries=5,
-    initial_delay=1.0,
-    delay_multiplier=2.0
-):
-    settings = get_settings()
-
-    retries = 0
-    current_delay = initial_delay
-
+def _get_embedding_client(settings):
+    """Returns (embedding_client, embedding_model) for the configured embedding deployment."""
+    embedding_model = None
     enable_embedding_apim = settings.get('enable_embedding_apim', False)
 
     if enable_embedding_apim:
@@ -334,26 +326,45 @@ def generate_embedding(
                 azure_endpoint=settings.get('azure_openai_embedding_endpoint'),
                 azure_ad_token_provider=token_provider
             )
-        
-            embedding_model_obj = settings.get('embedding_model', {})
-            if embedding_model_obj and embedding_model_obj.get('selected'):
-                selected_embedding_model = embedding_model_obj['selected'][0]
-                embedding_model = selected_embedding_model['deploymentName']
         else:
             embedding_client = AzureOpenAI(
                 api_version=settings.get('azure_openai_embedding_api_version'),
                 azure_endpoint=settings.get('azure_openai_embedding_endpoint'),
                 api_key=settings.get('azure_openai_embedding_key')
             )
-            
-            embedding_model_obj = settings.get('embedding_model', {})
-            if embedding_model_obj and embedding_model_obj.get('selected'):
-                selected_embedding_model = embedding_model_obj['selected'][0]
-                embedding_model = selected_embedding_model['deploymentName']
+
+        embedding_model_obj = settings.get('embedding_model', {})
+        if embedding_model_obj and embedding_model_obj.get('selected'):
+            selected_embedding_model = embedding_model_obj['selected'][0]
+            embedding_model = selected_embedding_model['deploymentName']
+
+    return embedding_client, embedding_model
+
+
+def generate_embedding(
+    text,
+    max_retries=5,
+    initial_delay=1.0,
+    delay_multiplier=2.0,
+    pace_requests=True
+):
+    """
+    Embeds text, retrying with backoff on rate limits.
+
+    pace_requests sleeps 0.5-2s before each call to spread out bulk ingestion;
+    pass False for single interactive calls (e.g. embedding a chat message).
+    """
+    settings = get_settings()
+
+    retries = 0
+    current_delay = initial_delay
+
+    embedding_client, embedding_model = _get_embedding_client(settings)
 
     while True:
-        random_delay = random.uniform(0.5, 2.0)
-        time.sleep(random_delay)
+        if pace_requests:
+            random_delay = random.uniform(0.5, 2.0)
+            time.sleep(random_delay)
 
         try:
             response = embedding_client.embeddings.create(
@@ -385,3 +396,51 @@ def generate_embedding(
 
         except Exception as e:
             raise
+
+
+def generate_embeddings(
+    texts,
+    max_retries=5,
+    initial_delay=1.0,
+    delay_multiplier=2.0
+):
+    """
+    Embeds several texts with a single embeddings request.
+
+    Returns (embeddings, token_usage) with embeddings in the order of texts,
+    or None when the request is still rate limited after max_retries.
+    """
+    settings = get_settings()
+
+    retries = 0
+    current_delay = initial_delay
+
+    embedding_client, embedding_model = _get_embedding_client(settings)
+
+    while True:
+        try:
+            response = embedding_client.embeddings.create(
+                model=embedding_model,
+                input=list(texts)
+            )
+
+            embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+            token_usage = None
+            if hasattr(response, 'usage') and response.usage:
+                token_usage = {
+                    'prompt_tokens': response.usage.prompt_tokens,
+                    'total_tokens': response.usage.total_tokens,
+                    'model_deployment_name': embedding_model
+                }
+
+            return embeddings, token_usage
+
+        except RateLimitError as e:
+            retries += 1
+            if retries > max_retries:
+                return None
+
+            wait_time = current_delay * random.uniform(1.0, 1.5)
+            time.sleep(wait_time)
+            current_delay *= delay_multiplier
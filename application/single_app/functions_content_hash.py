@@ -0,0 +1,201 @@
+# functions_content_hash.py
+"""
+Content-hash deduplication for document ingestion.
+
+Re-uploading a document (a new version) or uploading the same file to several
+workspaces used to repeat Document Intelligence extraction and embed every
+chunk again. Files and chunks are now identified by SHA-256 content hashes:
+
+- The file hash is recorded on the document metadata (`file_hash`). Azure DI
+  output is cached per file hash, so an identical file is not re-analyzed.
+- Each chunk hash covers the embedding deployment plus the chunk text. The
+  embedding is cached per chunk hash, so unchanged chunks reuse their vector.
+
+Both caches live in the Cosmos `content_hash_cache` container (partition key
+/content_hash), which expires entries after 30 days.
+
+Caching is keyed only on content the uploader already holds, so reuse across
+users and workspaces does not expose anything new. Cache failures are logged
+and fall through to the normal Azure call.
+"""
+
+import hashlib
+
+from config import *
+from functions_settings import *
+from functions_content import extract_content_with_azure_di, generate_embedding
+
+HASH_READ_SIZE = 1024 * 1024
+# Bump when the DI model or page extraction logic changes to invalidate cached output
+DI_CACHE_VERSION = "prebuilt-read-v1"
+
+_dedup_counters = {}
+_dedup_counters_lock = threading.Lock()
+
+
+def compute_file_hash(file_path, read_size=HASH_READ_SIZE):
+    """Returns the SHA-256 hex digest of a file, read in buffered blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(read_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compute_chunk_hash(text, model_name):
+    """Hash of a chunk's text for a given embedding deployment."""
+    return hashlib.sha256(f"{model_name or ''}\n{text}".encode('utf-8')).hexdigest()
+
+
+def get_embedding_model_name(settings):
+    """Returns the embedding deployment name generate_embedding() will use."""
+    if settings.get('enable_embedding_apim', False):
+        return settings.get('azure_apim_embedding_deployment')
+    embedding_model_obj = settings.get('embedding_model', {})
+    if embedding_model_obj and embedding_model_obj.get('selected'):
+        return embedding_model_obj['selected'][0].get('deploymentName')
+    return None
+
+
+def is_content_dedup_enabled(settings=None):
+    settings = settings or get_settings() or {}
+    return bool(settings.get('enable_content_hash_dedup', True))
+
+
+def begin_content_dedup(document_id):
+    """Starts counting reused/embedded chunks for a document being processed."""
+    with _dedup_counters_lock:
+        _dedup_counters[document_id] = {"chunks_reused": 0, "chunks_embedded": 0, "di_reused": False}
+
+
+def end_content_dedup(document_id):
+    """Stops counting and returns the document's dedup counters (or None)."""
+    with _dedup_counters_lock:
+        return _dedup_counters.pop(document_id, None)
+
+
+def _count(document_id, key, value=1):
+    if document_id is None:
+        return
+    with _dedup_counters_lock:
+        counters = _dedup_counters.get(document_id)
+        if counters is not None:
+            counters[key] = value if isinstance(value, bool) else counters[key] + value
+
+
+def _read_cache_item(item_id, content_hash, container=None):
+    container = container or cosmos_content_hash_cache_container
+    try:
+        return container.read_item(item=item_id, partition_key=content_hash)
+    except CosmosResourceNotFoundError:
+        return None
+
+
+def _write_cache_item(item, container=None):
+    container = container or cosmos_content_hash_cache_container
+    try:
+        container.upsert_item(item)
+        return True
+    except Exception as e:
+        print(f"Warning: Failed to write content hash cache item {item.get('id')}: {e}")
+        return False
+
+
+def get_or_create_embedding(text, document_id=None, settings=None, container=None):
+    """
+    Returns (embedding, token_usage) for text, reusing a cached embedding when the
+    same chunk text was embedded before with the same deployment.
+
+    A reused embedding reports zero tokens so document token totals stay accurate.
+    """
+    settings = settings or get_settings() or {}
+    if not is_content_dedup_enabled(settings):
+        return generate_embedding(text)
+
+    model_name = get_embedding_model_name(settings)
+    chunk_hash = compute_chunk_hash(text, model_name)
+    item_id = f"emb:{chunk_hash}"
+
+    try:
+        cached = _read_cache_item(item_id, chunk_hash, container)
+    except Exception as e:
+        print(f"Warning: Embedding cache lookup failed: {e}")
+        cached = None
+
+    if cached and cached.get("embedding"):
+        _count(document_id, "chunks_reused")
+        return cached["embedding"], {
+            "prompt_tokens": 0,
+            "total_tokens": 0,
+            "model_deployment_name": cached.get("model_deployment_name") or model_name,
+            "cached": True
+        }
+
+    embedding, token_usage = generate_embedding(text)
+    _count(document_id, "chunks_embedded")
+    if embedding:
+        _write_cache_item({
+            "id": item_id,
+            "content_hash": chunk_hash,
+            "type": "embedding",
+            "model_deployment_name": (token_usage or {}).get("model_deployment_name") or model_name,
+            "embedding": embedding,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }, container)
+    return embedding, token_usage
+
+
+def extract_content_with_azure_di_cached(file_path, document_id=None, settings=None, container=None):
+    """
+    extract_content_with_azure_di() with results cached by file content hash.
+
+    Pages are stored one item per page (keeping each under the Cosmos item size
+    limit); a manifest item written last marks the cached output as complete.
+    """
+    settings = settings or get_settings() or {}
+    if not is_content_dedup_enabled(settings):
+        return extract_content_with_azure_di(file_path)
+
+    container = container or cosmos_content_hash_cache_container
+    file_hash = compute_file_hash(file_path)
+    manifest_id = f"di:{DI_CACHE_VERSION}:{file_hash}"
+
+    try:
+        manifest = _read_cache_item(manifest_id, file_hash, container)
+        if manifest:
+            pages = list(container.query_items(
+                query="SELECT c.page_number, c.content, c.page_index FROM c WHERE c.type = 'di_page' AND c.manifest_id = @manifest_id",
+                parameters=[{"name": "@manifest_id", "value": manifest_id}],
+                partition_key=file_hash
+            ))
+            if len(pages) == manifest.get("page_count"):
+                pages.sort(key=lambda page: page["page_index"])
+                _count(document_id, "di_reused", True)
+                return [{"page_number": page["page_number"], "content": page["content"]} for page in pages]
+    except Exception as e:
+        print(f"Warning: DI cache lookup failed for {file_hash}: {e}")
+
+    pages = extract_content_with_azure_di(file_path)
+
+    created_at = datetime.now(timezone.utc).isoformat()
+    all_written = True
+    for index, page in enumerate(pages):
+        all_written = _write_cache_item({
+            "id": f"{manifest_id}:{index}",
+            "content_hash": file_hash,
+            "type": "di_page",
+            "manifest_id": manifest_id,
+            "page_index": index,
+            "page_number": page.get("page_number"),
+            "content": page.get("content", ""),
+            "created_at": created_at
+        }, container) and all_written
+    if all_written:
+        _write_cache_item({
+            "id": manifest_id,
+            "content_hash": file_hash,
+            "type": "di_manifest",
+            "page_count": len(pages),
+            "created_at": created_at
+        }, container)
+    return pages
@@ -0,0 +1,353 @@
+# functions_conversation_deletion.py
+"""
+Batched conversation deletion and archival.
+
+Deleting a conversation used to copy each message into archived_messages and
+delete it from messages one request at a time, inside the HTTP request, and
+delete_multiple_conversations repeated that for every selected conversation.
+
+Messages share the conversation's partition key (/conversation_id in both the
+messages and archived_messages containers), so they are now archived and
+deleted with Cosmos transactional batches of up to 100 operations per
+partition. Bulk deletions run as a background job on flask_executor; the job
+document in the bulk_operation_jobs container records progress and is returned
+by get_bulk_deletion_job(). Deletion is idempotent, so a job interrupted by a
+restart can simply be submitted again: when a job is read and has not recorded
+progress for BULK_JOB_STALE_SECONDS it is treated as abandoned and resubmitted,
+up to BULK_JOB_MAX_RESUMES times, after which it is marked failed.
+"""
+
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosBatchOperationError
+
+from config import *
+from functions_settings import get_settings
+from functions_activity_logging import log_conversation_deletion, log_conversation_archival
+from functions_debug import debug_print
+
+# Cosmos limits a transactional batch to 100 operations and a 2MB request
+BATCH_MAX_OPERATIONS = 100
+BATCH_MAX_BYTES = 1800 * 1024
+
+BULK_JOB_STATUS_QUEUED = "queued"
+BULK_JOB_STATUS_RUNNING = "running"
+BULK_JOB_STATUS_COMPLETED = "completed"
+BULK_JOB_STATUS_FAILED = "failed"
+
+# Finished jobs are kept for a day, then removed by Cosmos TTL
+BULK_JOB_TTL_SECONDS = 24 * 60 * 60
+# Jobs run on the in-process executor, so a worker restart leaves them queued or
+# running without progress; after this long they are resubmitted
+BULK_JOB_STALE_SECONDS = 10 * 60
+BULK_JOB_MAX_RESUMES = 3
+
+_COSMOS_SYSTEM_PROPERTIES = ('_rid', '_self', '_etag', '_attachments', '_ts')
+
+
+def _iter_batches(documents, max_operations=BATCH_MAX_OPERATIONS, max_bytes=BATCH_MAX_BYTES):
+    """Splits documents into batches under the operation count and request size limits."""
+    batch = []
+    batch_bytes = 0
+    for doc in documents:
+        doc_bytes = len(json.dumps(doc, default=str))
+        if batch and (len(batch) >= max_operations or batch_bytes + doc_bytes > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(doc)
+        batch_bytes += doc_bytes
+    if batch:
+        yield batch
+
+
+def _archive_copy(doc, archived_at, archive_fields=None):
+    archived = {key: value for key, value in doc.items() if key not in _COSMOS_SYSTEM_PROPERTIES}
+    archived["archived_at"] = archived_at
+    if archive_fields:
+        archived.update(archive_fields)
+    return archived
+
+
+def _delete_batch(messages_container, conversation_id, message_ids):
+    try:
+        messages_container.execute_item_batch(
+            batch_operations=[("delete", (message_id,)) for message_id in message_ids],
+            partition_key=conversation_id
+        )
+    except CosmosBatchOperationError:
+        # A message was deleted concurrently and failed the whole batch; delete the rest one by one
+        for message_id in message_ids:
+            try:
+                messages_container.delete_item(message_id, partition_key=conversation_id)
+            except CosmosResourceNotFoundError:
+                debug_print(f"Message {message_id} already deleted (not found), skipping")
+
+
+def purge_conversation_messages(conversation_id, messages_container=None, archive=False, archive_fields=None):
+    """
+    Deletes every message of a conversation, archiving them first when requested.
+
+    Args:
+        conversation_id (str): Conversation (and partition key) to purge.
+        messages_container: Messages container (personal, group or public).
+        archive (bool): Copy messages to archived_messages before deleting them.
+        archive_fields (dict, optional): Extra fields set on the archived copies.
+
+    Returns:
+        int: Number of messages deleted.
+    """
+    messages_container = messages_container or cosmos_messages_container
+    # Only the ids are needed unless the messages are archived
+    projection = "*" if archive else "c.id"
+    messages = list(messages_container.query_items(
+        query=f"SELECT {projection} FROM c WHERE c.conversation_id = @conversation_id",
+        parameters=[{"name": "@conversation_id", "value": conversation_id}],
+        partition_key=conversation_id
+    ))
+
+    archived_at = datetime.utcnow().isoformat()
+    deleted = 0
+    for batch in _iter_batches(messages):
+        if archive:
+            cosmos_archived_messages_container.execute_item_batch(
+                batch_operations=[("upsert", (_archive_copy(doc, archived_at, archive_fields),)) for doc in batch],
+                partition_key=conversation_id
+            )
+        _delete_batch(messages_container, conversation_id, [doc["id"] for doc in batch])
+        deleted += len(batch)
+    return deleted
+
+
+def delete_conversation_with_messages(
+    conversation_item,
+    archiving_enabled=False,
+    workspace_type='personal',
+    conversations_container=None,
+    messages_container=None,
+    is_bulk_operation=False,
+    archive_fields=None,
+    additional_context=None
+):
+    """
+    Archives (when enabled) and deletes a conversation and all of its messages.
+
+    Returns:
+        int: Number of messages deleted.
+    """
+    conversations_container = conversations_container or cosmos_conversations_container
+    conversation_id = conversation_item['id']
+    title = conversation_item.get('title', 'Untitled')
+
+    if archiving_enabled:
+        cosmos_archived_conversations_container.upsert_item(
+            _archive_copy(conversation_item, datetime.utcnow().isoformat(), archive_fields)
+        )
+        log_conversation_archival(
+            user_id=conversation_item.get('user_id'),
+            conversation_id=conversation_id,
+            title=title,
+            workspace_type=workspace_type,
+            context=conversation_item.get('context', []),
+            tags=conversation_item.get('tags', []),
+            group_id=conversation_item.get('group_id'),
+            public_workspace_id=conversation_item.get('public_workspace_id')
+        )
+
+    message_count = purge_conversation_messages(
+        conversation_id,
+        messages_container,
+        archive=archiving_enabled,
+        archive_fields=archive_fields
+    )
+
+    log_conversation_deletion(
+        user_id=conversation_item.get('user_id'),
+        conversation_id=conversation_id,
+        title=title,
+        workspace_type=workspace_type,
+        context=conversation_item.get('context', []),
+        tags=conversation_item.get('tags', []),
+        is_archived=archiving_enabled,
+        is_bulk_operation=is_bulk_operation,
+        group_id=conversation_item.get('group_id'),
+        public_workspace_id=conversation_item.get('public_workspace_id'),
+        additional_context=additional_context
+    )
+
+    try:
+        conversations_container.delete_item(item=conversation_id, partition_key=conversation_id)
+    except CosmosResourceNotFoundError:
+        debug_print(f"Conversation {conversation_id} already deleted (not found during delete)")
+    return message_count
+
+
+def create_bulk_deletion_job(user_id, conversation_ids, jobs_container=None):
+    """Records a queued bulk deletion job and returns it."""
+    jobs_container = jobs_container or cosmos_bulk_operation_jobs_container
+    now = datetime.utcnow().isoformat()
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    job = {
+        "id": str(uuid.uuid4()),
+        "operation": "delete_conversations",
+        "user_id": user_id,
+        "conversation_ids": conversation_ids,
+        "status": BULK_JOB_STATUS_QUEUED,
+        "total": len(conversation_ids),
+        "processed": 0,
+        "deleted_count": 0,
+        "messages_deleted": 0,
+        "failed_ids": [],
+        "archived": False,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+        "error": None
+    }
+    return jobs_container.create_item(body=job)
+
+
+def run_bulk_deletion_job(job_id, jobs_container=None, settings=None):
+    """
+    Deletes the conversations of a bulk deletion job, recording progress on the
+    job document after each conversation. Conversations that don't exist or
+    don't belong to the job's user are reported in failed_ids.
+    """
+    jobs_container = jobs_container or cosmos_bulk_operation_jobs_container
+    job = jobs_container.read_item(item=job_id, partition_key=job_id)
+    if job["status"] in (BULK_JOB_STATUS_COMPLETED, BULK_JOB_STATUS_FAILED):
+        return job
+    settings = settings or get_settings() or {}
+    archiving_enabled = settings.get('enable_conversation_archiving', False)
+    user_id = job["user_id"]
+
+    job.update({"status": BULK_JOB_STATUS_RUNNING, "archived": archiving_enabled, "updated_at": datetime.utcnow().isoformat()})
+    job = jobs_container.upsert_item(job)
+
+    try:
+        for conversation_id in job["conversation_ids"][job["processed"]:]:
+            try:
+                conversation_item = cosmos_conversations_container.read_item(
+                    item=conversation_id,
+                    partition_key=conversation_id
+                )
+                if conversation_item.get('user_id') != user_id:
+                    job["failed_ids"].append(conversation_id)
+                else:
+                    job["messages_deleted"] += delete_conversation_with_messages(
+                        conversation_item,
+                        archiving_enabled=archiving_enabled,
+                        is_bulk_operation=True
+                    )
+                    job["deleted_count"] += 1
+            except CosmosResourceNotFoundError:
+                job["failed_ids"].append(conversation_id)
+            except Exception as e:
+                print(f"Error deleting conversation {conversation_id}: {str(e)}")
+                job["failed_ids"].append(conversation_id)
+
+            job["processed"] += 1
+            job["updated_at"] = datetime.utcnow().isoformat()
+            job = jobs_container.upsert_item(job)
+
+        job["status"] = BULK_JOB_STATUS_COMPLETED
+    except Exception as e:
+        print(f"Bulk deletion job {job_id} failed: {str(e)}")
+        job.update({"status": BULK_JOB_STATUS_FAILED, "error": str(e)[:1000]})
+
+    now = datetime.utcnow().isoformat()
+    job.update({"finished_at": now, "updated_at": now, "ttl": BULK_JOB_TTL_SECONDS})
+    return jobs_container.upsert_item(job)
+
+
+def submit_bulk_deletion_job(user_id, conversation_ids):
+    """Creates a bulk deletion job and runs it on flask_executor. Returns the queued job."""
+    job = create_bulk_deletion_job(user_id, conversation_ids)
+    _submit_to_executor(job['id'])
+    return job
+
+
+def _submit_to_executor(job_id):
+    current_app.extensions['executor'].submit(run_bulk_deletion_job, job_id)
+
+
+def recover_stale_bulk_deletion_job(job, jobs_container=None, resubmit=None):
+    """
+    Resubmits a queued or running job that has recorded no progress for
+    BULK_JOB_STALE_SECONDS, or marks it failed once it was resumed
+    BULK_JOB_MAX_RESUMES times. The job document is replaced with its etag, so
+    only one reader resubmits it.
+
+    Returns:
+        dict: The job as stored after recovery (unchanged if it isn't stale).
+    """
+    jobs_container = jobs_container or cosmos_bulk_operation_jobs_container
+    if job["status"] not in (BULK_JOB_STATUS_QUEUED, BULK_JOB_STATUS_RUNNING):
+        return job
+    try:
+        updated_at = datetime.fromisoformat(job["updated_at"])
+    except (KeyError, TypeError, ValueError):
+        return job
+    if (datetime.utcnow() - updated_at).total_seconds() < BULK_JOB_STALE_SECONDS:
+        return job
+
+    now = datetime.utcnow().isoformat()
+    recovered = dict(job)
+    resumes = job.get("resume_count", 0)
+    if resumes >= BULK_JOB_MAX_RESUMES:
+        recovered.update({
+            "status": BULK_JOB_STATUS_FAILED,
+            "error": "The deletion job stopped making progress",
+            "finished_at": now,
+            "updated_at": now,
+            "ttl": BULK_JOB_TTL_SECONDS
+        })
+    else:
+        recovered.update({"status": BULK_JOB_STATUS_QUEUED, "resume_count": resumes + 1, "updated_at": now})
+
+    try:
+        recovered = jobs_container.replace_item(
+            item=job["id"],
+            body=recovered,
+            etag=job.get("_etag"),
+            match_condition=MatchConditions.IfNotModified
+        )
+    except CosmosAccessConditionFailedError:
+        # Another reader (or the job itself) updated it first
+        return jobs_container.read_item(item=job["id"], partition_key=job["id"])
+
+    if recovered["status"] == BULK_JOB_STATUS_QUEUED:
+        print(f"Bulk deletion job {job['id']} made no progress for {BULK_JOB_STALE_SECONDS}s, resubmitting (attempt {resumes + 1})")
+        (resubmit or _submit_to_executor)(job["id"])
+    else:
+        print(f"Bulk deletion job {job['id']} made no progress after {resumes} resumes, marking it failed")
+    return recovered
+
+
+def get_bulk_deletion_job(job_id, user_id, jobs_container=None, resubmit=None):
+    """
+    Returns the job's progress if it belongs to user_id, otherwise None.
+
+    Abandoned jobs are resubmitted or failed (see recover_stale_bulk_deletion_job).
+    """
+    jobs_container = jobs_container or cosmos_bulk_operation_jobs_container
+    try:
+        job = jobs_container.read_item(item=job_id, partition_key=job_id)
+    except CosmosResourceNotFoundError:
+        return None
+    if job.get("user_id") != user_id:
+        return None
+    job = recover_stale_bulk_deletion_job(job, jobs_container, resubmit)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "total": job["total"],
+        "processed": job["processed"],
+        "deleted_count": job["deleted_count"],
+        "messages_deleted": job.get("messages_deleted", 0),
+        "failed_ids": job.get("failed_ids", []),
+        "archived": job.get("archived", False),
+        "created_at": job.get("created_at"),
+        "updated_at": job.get("updated_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error")
+    }
@@ -0,0 +1,144 @@
+# functions_document_versions.py
+"""
+Maintained "latest version" flag for workspace documents.
+
+Re-uploading a file creates a new document (new id, version + 1) next to the
+previous ones. Finding the current version used to mean reading every version
+of every file in scope and keeping the highest `version` per `file_name` in
+Python.
+
+Each document now carries `is_latest`:
+
+- create_document() writes the new version with is_latest=True and then
+  clears the flag on the versions it supersedes,
+- delete_document() hands the flag back to the highest remaining version when
+  the current one is deleted,
+- listings filter on LATEST_VERSION_CONDITION in the query, so they page over
+  current versions only.
+
+Documents are partitioned by id, so the flag can't be moved in one Cosmos
+transaction; the new version is written first so a file never disappears from
+listings. Documents written before the flag existed count as latest until
+their file is uploaded again.
+"""
+
+from config import *
+
+LATEST_VERSION_CONDITION = "(NOT IS_DEFINED(c.is_latest) OR c.is_latest = true)"
+
+
+def get_version_scope(user_id=None, group_id=None, public_workspace_id=None):
+    """Returns the (field, value) that scopes a file's versions to its owning workspace."""
+    if public_workspace_id is not None:
+        return "public_workspace_id", public_workspace_id
+    if group_id is not None:
+        return "group_id", group_id
+    return "user_id", user_id
+
+
+def _latest_versions_query(scope_field, exclude_id=None):
+    query = f"""
+        SELECT *
+        FROM c
+        WHERE c.file_name = @file_name
+            AND c.{scope_field} = @scope_value
+            AND {LATEST_VERSION_CONDITION}
+    """
+    if exclude_id:
+        query += " AND c.id != @exclude_id"
+    return query
+
+
+def get_latest_document(container, file_name, scope_field, scope_value):
+    """Returns the current version of a file in a workspace, or None."""
+    query = f"""
+        SELECT TOP 1 *
+        FROM c
+        WHERE c.file_name = @file_name
+            AND c.{scope_field} = @scope_value
+            AND {LATEST_VERSION_CONDITION}
+        ORDER BY c.version DESC
+    """
+    results = list(container.query_items(
+        query=query,
+        parameters=[
+            {"name": "@file_name", "value": file_name},
+            {"name": "@scope_value", "value": scope_value}
+        ],
+        enable_cross_partition_query=True
+    ))
+    return results[0] if results else None
+
+
+def _set_is_latest(container, document_id, value):
+    container.patch_item(
+        item=document_id,
+        partition_key=document_id,
+        patch_operations=[{"op": "set", "path": "/is_latest", "value": value}]
+    )
+
+
+def supersede_previous_versions(container, document, scope_field):
+    """
+    Clears is_latest on the other versions of document's file.
+
+    Returns the documents that were superseded (normally one; more only for
+    files uploaded before the flag existed).
+    """
+    previous = list(container.query_items(
+        query=_latest_versions_query(scope_field, exclude_id=document["id"]),
+        parameters=[
+            {"name": "@file_name", "value": document["file_name"]},
+            {"name": "@scope_value", "value": document.get(scope_field)},
+            {"name": "@exclude_id", "value": document["id"]}
+        ],
+        enable_cross_partition_query=True
+    ))
+    superseded = []
+    for doc in previous:
+        if doc.get("version", 0) > document.get("version", 0):
+            continue
+        try:
+            _set_is_latest(container, doc["id"], False)
+            superseded.append(doc)
+        except CosmosResourceNotFoundError:
+            pass
+    return superseded
+
+
+def promote_previous_version(container, deleted_document, scope_field):
+    """
+    Sets is_latest on the highest remaining version after the current version
+    of a file was deleted. Returns the promoted document, or None.
+    """
+    if deleted_document.get("is_latest") is False:
+        return None
+
+    query = f"""
+        SELECT TOP 1 *
+        FROM c
+        WHERE c.file_name = @file_name
+            AND c.{scope_field} = @scope_value
+            AND c.id != @deleted_id
+        ORDER BY c.version DESC
+    """
+    results = list(container.query_items(
+        query=query,
+        parameters=[
+            {"name": "@file_name", "value": deleted_document.get("file_name")},
+            {"name": "@scope_value", "value": deleted_document.get(scope_field)},
+            {"name": "@deleted_id", "value": deleted_document["id"]}
+        ],
+        enable_cross_partition_query=True
+    ))
+    if not results or results[0].get("is_latest") is not False:
+        # Nothing left, or the remaining version is already listed
+        return None
+
+    promoted = results[0]
+    try:
+        _set_is_latest(container, promoted["id"], True)
+    except CosmosResourceNotFoundError:
+        return None
+    promoted["is_latest"] = True
+    return promoted
@@ -7,6 +7,39 @@ from functions_search import *
 from functions_logging import *
 from functions_authentication import *
 from functions_debug import *
+from functions_content_hash import (
+    begin_content_dedup,
+    compute_file_hash,
+    end_content_dedup,
+    extract_content_with_azure_di_cached,
+    get_or_create_embedding,
+)
+from functions_listing_pagination import adjust_listing_count, document_count_key, invalidate_listing_count
+from functions_document_versions import (
+    LATEST_VERSION_CONDITION,
+    get_latest_document,
+    get_version_scope,
+    promote_previous_version,
+    supersede_previous_versions,
+)
+from functions_image_preprocessing import prepare_image_file_for_di, prepare_image_for_vision
+from functions_metadata_sample import (
+    add_metadata_sample_chunk,
+    begin_metadata_sample,
+    end_metadata_sample,
+    get_metadata_sample,
+    is_inline_metadata_extraction_enabled,
+)
+from functions_ingestion_queue import submit_ingestion_task, PRIORITY_LOW
+from functions_chunk_acl import get_chunk_acl_sync_status, list_chunk_ids, merge_fields_into_chunks, submit_chunk_acl_propagation
+from functions_text_chunking import (
+    estimate_chunk_count,
+    is_markdown_header,
+    iter_line_chunks,
+    iter_text_chunks_from_string,
+    iter_word_chunks,
+    refine_chunk_estimate,
+)
 import azure.cognitiveservices.speech as speechsdk
 
 def allowed_file(filename, allowed_extensions=None):
@@ -28,49 +61,11 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
     else:
         cosmos_container = cosmos_user_documents_container
 
-    if is_public_workspace:
-        query = """
-            SELECT * 
-            FROM c
-            WHERE c.file_name = @file_name 
-                AND c.public_workspace_id = @public_workspace_id
-        """
-        parameters = [
-            {"name": "@file_name", "value": file_name},
-            {"name": "@public_workspace_id", "value": public_workspace_id}
-        ]
-    elif is_group:
-        query = """
-            SELECT * 
-            FROM c
-            WHERE c.file_name = @file_name 
-                AND c.group_id = @group_id
-        """
-        parameters = [
-            {"name": "@file_name", "value": file_name},
-            {"name": "@group_id", "value": group_id}
-        ]
-    else:
-        query = """
-            SELECT * 
-            FROM c
-            WHERE c.file_name = @file_name 
-                AND c.user_id = @user_id
-        """
-        parameters = [
-            {"name": "@file_name", "value": file_name},
-            {"name": "@user_id", "value": user_id}
-        ]
+    scope_field, scope_value = get_version_scope(user_id, group_id, public_workspace_id)
 
     try:
-        existing_document = list(
-            cosmos_container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True
-            )
-        )
-        version = existing_document[0]['version'] + 1 if existing_document else 1
+        latest_document = get_latest_document(cosmos_container, file_name, scope_field, scope_value)
+        version = latest_document['version'] + 1 if latest_document else 1
         
         if is_public_workspace:
             document_metadata = {
@@ -83,6 +78,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "upload_date": current_time,
                 "last_updated": current_time,
                 "version": version,
+                "is_latest": True,
                 "status": status,
                 "percentage_complete": 0,
                 "document_classification": "None",
@@ -101,6 +97,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "upload_date": current_time,
                 "last_updated": current_time,
                 "version": version,
+                "is_latest": True,
                 "status": status,
                 "percentage_complete": 0,
                 "document_classification": "None",
@@ -119,6 +116,7 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
                 "upload_date": current_time,
                 "last_updated": current_time,
                 "version": version,
+                "is_latest": True,
                 "status": status,
                 "percentage_complete": 0,
                 "document_classification": "None",
@@ -131,6 +129,12 @@ def create_document(file_name, user_id, document_id, num_file_chunks, status, gr
 
         cosmos_container.upsert_item(document_metadata)
 
+        # The new version replaces the previous one in listings
+        superseded = supersede_previous_versions(cosmos_container, document_metadata, scope_field)
+        adjust_listing_count(document_count_key(user_id, group_id, public_workspace_id), 1 - len(superseded))
+        for previous in superseded:
+            _invalidate_shared_listing_counts(previous)
+
         add_file_task_to_file_processing_log(
             document_id,
             user_id,
@@ -192,7 +196,8 @@ def get_document_metadata(document_id, user_id, group_id=None, public_workspace_
     add_file_task_to_file_processing_log(
         document_id=document_id, 
         user_id=public_workspace_id if is_public_workspace else (group_id if is_group else user_id),
-        content=f"Query is {query}, parameters are {parameters}."
+        content=f"Query is {query}, parameters are {parameters}.",
+        sampled=True
     )
     try:
         document_items = list(
@@ -205,7 +210,8 @@ def get_document_metadata(document_id, user_id, group_id=None, public_workspace_
         add_file_task_to_file_processing_log(
             document_id=document_id,
             user_id=public_workspace_id if is_public_workspace else (group_id if is_group else user_id),
-            content=f"Document metadata retrieved: {document_items}."
+            content=f"Document metadata retrieved: {document_items}.",
+            sampled=True
         )
         return document_items[0] if document_items else None
 
@@ -1092,7 +1098,7 @@ def process_video_document(
 
     # Extract metadata if enabled and chunks were processed
     settings = get_settings()
-    enable_extract_meta_data = settings.get('enable_extract_meta_data', False)
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -1266,7 +1272,8 @@ def update_document(**kwargs):
     add_file_task_to_file_processing_log(
         document_id=document_id,
         user_id=public_workspace_id if is_public_workspace else (group_id if is_group else user_id),
-        content=f"Query is {query}, parameters are {parameters}."
+        content=f"Query is {query}, parameters are {parameters}.",
+        sampled=True
     )
 
     try:
@@ -1368,34 +1375,22 @@ def update_document(**kwargs):
         # However, it's better to only do this if the relevant fields *actually* changed.
         if update_occurred and updated_fields_requiring_chunk_sync:
             try:
-                chunks_to_update = get_all_chunks(document_id, user_id)
-                for chunk in chunks_to_update:
-                    chunk_updates = {}
-                    if 'title' in updated_fields_requiring_chunk_sync:
-                        chunk_updates['title'] = existing_document.get('title')
-                    if 'authors' in updated_fields_requiring_chunk_sync:
-                         # Ensure authors is a list for the chunk metadata if needed
-                        chunk_updates['author'] = existing_document.get('authors')
-                    if 'file_name' in updated_fields_requiring_chunk_sync:
-                        chunk_updates['file_name'] = existing_document.get('file_name')
-                    if 'document_classification' in updated_fields_requiring_chunk_sync:
-                        chunk_updates['document_classification'] = existing_document.get('document_classification')
-
-                    if chunk_updates: # Only call update if there's something to change
-                        # Build the call parameters
-                        update_params = {
-                            'chunk_id': chunk['id'],
-                            'user_id': user_id,
-                            'document_id': document_id,
-                            'group_id': group_id,
-                            **chunk_updates
-                        }
-                        
-                        # Only include shared_group_ids for group workspaces 
-                        if is_group and 'shared_group_ids' in updated_fields_requiring_chunk_sync:
-                            update_params['shared_group_ids'] = existing_document.get('shared_group_ids')
-                        
-                        update_chunk_metadata(**update_params)
+                chunk_updates = {}
+                if 'title' in updated_fields_requiring_chunk_sync:
+                    chunk_updates['title'] = existing_document.get('title')
+                if 'authors' in updated_fields_requiring_chunk_sync:
+                     # Ensure authors is a list for the chunk metadata if needed
+                    chunk_updates['author'] = existing_document.get('authors')
+                if 'file_name' in updated_fields_requiring_chunk_sync:
+                    chunk_updates['file_name'] = existing_document.get('file_name')
+                if 'document_classification' in updated_fields_requiring_chunk_sync:
+                    chunk_updates['document_classification'] = existing_document.get('document_classification')
+
+                if chunk_updates: # Only call update if there's something to change
+                    # Merge only the changed fields; embeddings and chunk text are not re-sent
+                    search_client = CLIENTS["search_client_public"] if is_public_workspace else CLIENTS["search_client_group"] if is_group else CLIENTS["search_client_user"]
+                    merge_fields_into_chunks(search_client, list_chunk_ids(search_client, document_id), chunk_updates)
+
                 add_file_task_to_file_processing_log(
                     document_id=document_id,
                     user_id=public_workspace_id if is_public_workspace else (group_id if is_group else user_id),
@@ -1416,6 +1411,14 @@ def update_document(**kwargs):
         if update_occurred:
             cosmos_container.upsert_item(existing_document)
 
+            # Sharing ACL changes are applied to the chunks in bulk by a background job,
+            # which reads the ACL back from the document just written
+            if is_group and 'shared_group_ids' in updated_fields_requiring_chunk_sync:
+                try:
+                    submit_chunk_acl_propagation(document_id, group_id=group_id)
+                except Exception as e:
+                    print(f"Warning: Failed to queue chunk ACL update for document {document_id}: {e}")
+
     except CosmosResourceNotFoundError as e:
         # Error already logged where it was first detected
         print(f"Document {document_id} not found or access denied: {e}")
@@ -1465,7 +1468,8 @@ def save_chunks(page_text_content, page_number, file_name, user_id, document_id,
         add_file_task_to_file_processing_log(
             document_id=document_id, 
             user_id=public_workspace_id if is_public_workspace else (group_id if is_group else user_id), 
-            content=f"Saving chunk, cosmos_container:{cosmos_container}, page_text_content:{page_text_content}, page_number:{page_number}, file_name:{file_name}, user_id:{user_id}, document_id:{document_id}, group_id:{group_id}, public_workspace_id:{public_workspace_id}"
+            content=f"Saving chunk, cosmos_container:{cosmos_container.id}, page_text_length:{len(page_text_content)}, page_number:{page_number}, file_name:{file_name}, user_id:{user_id}, document_id:{document_id}, group_id:{group_id}, public_workspace_id:{public_workspace_id}",
+            sampled=True
         )
 
         if is_public_workspace:
@@ -1501,7 +1505,7 @@ def save_chunks(page_text_content, page_number, file_name, user_id, document_id,
     try:
         #status = f"Generating embedding for page {page_number}"
         #update_document(document_id=document_id, user_id=user_id, status=status)
-        embedding, token_usage = generate_embedding(page_text_content)
+        embedding, token_usage = get_or_create_embedding(page_text_content, document_id=document_id)
     except Exception as e:
         print(f"Error generating embedding for page {page_number} of document {document_id}: {e}")
         raise
@@ -1633,6 +1637,9 @@ def save_chunks(page_text_content, page_number, file_name, user_id, document_id,
     except Exception as e:
         print(f"Error uploading chunk document for document {document_id}: {e}")
         raise
+
+    # Keep the first chunks for metadata extraction so it doesn't have to search for them
+    add_metadata_sample_chunk(document_id, page_number, page_text_content)
     
     # Return token usage information for accumulation
     return token_usage
@@ -1899,34 +1906,38 @@ def get_documents(user_id, group_id=None, public_workspace_id=None):
         cosmos_container = cosmos_user_documents_container
 
     if is_public_workspace:
-        query = """
-            SELECT TOP 1 * 
+        query = f"""
+            SELECT *
             FROM c
             WHERE c.public_workspace_id = @public_workspace_id
+                AND {LATEST_VERSION_CONDITION}
         """
         parameters = [
             {"name": "@public_workspace_id", "value": public_workspace_id}
         ]
     elif is_group:
-        query = """
+        query = f"""
             SELECT *
             FROM c
-            WHERE c.group_id = @group_id OR ARRAY_CONTAINS(c.shared_group_ids, @group_id)
+            WHERE (c.group_id = @group_id OR ARRAY_CONTAINS(c.shared_group_ids, @group_id))
+                AND {LATEST_VERSION_CONDITION}
         """
         parameters = [
             {"name": "@group_id", "value": group_id}
         ]
     else:
-        query = """
+        query = f"""
             SELECT *
             FROM c
-            WHERE c.user_id = @user_id OR ARRAY_CONTAINS(c.shared_user_ids, @user_id)
+            WHERE (c.user_id = @user_id OR ARRAY_CONTAINS(c.shared_user_ids, @user_id))
+                AND {LATEST_VERSION_CONDITION}
         """
         parameters = [
             {"name": "@user_id", "value": user_id}
         ]
     
     try:       
+        # Only current versions are returned; see functions_document_versions
         documents = list(
             cosmos_container.query_items(
                 query=query,
@@ -1935,14 +1946,7 @@ def get_documents(user_id, group_id=None, public_workspace_id=None):
             )
         )
 
-        latest_documents = {}
-
-        for doc in documents:
-            file_name = doc['file_name']
-            if file_name not in latest_documents or doc['version'] > latest_documents[file_name]['version']:
-                latest_documents[file_name] = doc
-                
-        return jsonify({"documents": list(latest_documents.values())}), 200
+        return jsonify({"documents": documents}), 200
     except Exception as e:
         return jsonify({'error': f'Error retrieving documents: {str(e)}'}), 500
 
@@ -2017,11 +2021,33 @@ def get_document(user_id, document_id, group_id=None, public_workspace_id=None):
     except Exception as e:
         return jsonify({'error': f'Error retrieving document: {str(e)}'}), 500
 
+def _read_document_in_scope(cosmos_container, document_id, user_id, group_id=None, public_workspace_id=None):
+    """Point-reads a document and returns it if it is visible in the given workspace, otherwise None."""
+    try:
+        document_item = cosmos_container.read_item(item=document_id, partition_key=document_id)
+    except CosmosResourceNotFoundError:
+        return None
+
+    if public_workspace_id is not None:
+        return document_item if document_item.get('public_workspace_id') == public_workspace_id else None
+    if group_id is not None:
+        owner_field, owner_id, shared_field = 'group_id', group_id, 'shared_group_ids'
+    else:
+        owner_field, owner_id, shared_field = 'user_id', user_id, 'shared_user_ids'
+
+    if document_item.get(owner_field) == owner_id:
+        return document_item
+    for entry in document_item.get(shared_field) or []:
+        if entry == owner_id or entry.startswith(f"{owner_id},"):
+            return document_item
+    return None
+
 def get_latest_version(document_id, user_id, group_id=None, public_workspace_id=None):
+    """Returns the current version number of a document's file, or None."""
     is_group = group_id is not None
     is_public_workspace = public_workspace_id is not None
 
-    # Choose the correct cosmos_container and query parameters
+    # Choose the correct cosmos_container
     if is_public_workspace:
         cosmos_container = cosmos_public_documents_container
     elif is_group:
@@ -2029,56 +2055,22 @@ def get_latest_version(document_id, user_id, group_id=None, public_workspace_id=
     else:
         cosmos_container = cosmos_user_documents_container
 
-    if is_public_workspace:
-        query = """
-            SELECT TOP 1 * 
-            FROM c
-            WHERE c.id = @document_id 
-                AND c.public_workspace_id = @public_workspace_id
-            ORDER BY c.version DESC
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@public_workspace_id", "value": public_workspace_id}
-        ]
-    elif is_group:
-        query = """
-            SELECT c.version
-            FROM c
-            WHERE c.id = @document_id
-                AND (c.group_id = @group_id OR ARRAY_CONTAINS(c.shared_group_ids, @group_id))
-            ORDER BY c.version DESC
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@group_id", "value": group_id}
-        ]
-    else:
-        query = """
-            SELECT c.version
-            FROM c
-            WHERE c.id = @document_id
-                AND (c.user_id = @user_id OR ARRAY_CONTAINS(c.shared_user_ids, @user_id))
-            ORDER BY c.version DESC
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@user_id", "value": user_id}
-        ]
-
     try:
-        results = list(
-            cosmos_container.query_items(
-                query=query, 
-                parameters=parameters, 
-                enable_cross_partition_query=True
-            )
-        )
-
-        if results:
-            return results[0]['version']
-        else:
+        document_item = _read_document_in_scope(cosmos_container, document_id, user_id, group_id, public_workspace_id)
+        if not document_item:
             return None
+        if document_item.get('is_latest') is True:
+            return document_item['version']
+
+        # Versions live in the owning workspace, which may not be the caller's for shared documents
+        scope_field, _ = get_version_scope(user_id, group_id, public_workspace_id)
+        latest_document = get_latest_document(
+            cosmos_container,
+            document_item.get('file_name'),
+            scope_field,
+            document_item.get(scope_field)
+        )
+        return (latest_document or document_item)['version']
 
     except Exception as e:
         return None
@@ -2204,6 +2196,13 @@ def delete_from_blob_storage(document_id, user_id, file_name, group_id=None, pub
         # Don't raise the exception, as we want the Cosmos DB deletion to proceed
         # even if blob deletion fails
 
+def _invalidate_shared_listing_counts(document_item):
+    """Drops the listing counts of the users and groups a document is shared with."""
+    for entry in document_item.get('shared_user_ids') or []:
+        invalidate_listing_count(document_count_key(user_id=entry.split(',')[0]))
+    for entry in document_item.get('shared_group_ids') or []:
+        invalidate_listing_count(document_count_key(group_id=entry.split(',')[0]))
+
 def delete_document(user_id, document_id, group_id=None, public_workspace_id=None):
     """Delete a document from the user's documents in Cosmos DB and blob storage if enhanced citations are enabled."""
     from functions_debug import debug_print
@@ -2288,6 +2287,17 @@ def delete_document(user_id, document_id, group_id=None, public_workspace_id=Non
             partition_key=document_id
         )
 
+        # The previous version of the file takes its place in listings
+        scope_field, _ = get_version_scope(user_id, group_id, public_workspace_id)
+        promoted = promote_previous_version(cosmos_container, document_item, scope_field)
+
+        # Keep listing counts in step; workspaces the document was shared with recount
+        if document_item.get('is_latest') is not False and not promoted:
+            adjust_listing_count(document_count_key(user_id, group_id, public_workspace_id), -1)
+        _invalidate_shared_listing_counts(document_item)
+        if promoted:
+            _invalidate_shared_listing_counts(promoted)
+
     except CosmosResourceNotFoundError:
         raise Exception("Document not found")
     except Exception as e:
@@ -2338,7 +2348,7 @@ def delete_document_version_chunks(document_id, version, group_id=None, public_w
     )
 
 def get_document_versions(user_id, document_id, group_id=None, public_workspace_id=None):
-    """ Get all versions of a document for a user."""
+    """ Get all versions of a document's file, newest first."""
     is_group = group_id is not None
     is_public_workspace = public_workspace_id is not None
 
@@ -2349,44 +2359,23 @@ def get_document_versions(user_id, document_id, group_id=None, public_workspace_
     else:
         cosmos_container = cosmos_user_documents_container
 
-    if is_public_workspace:
-        query = """
-            SELECT c.id, c.file_name, c.version, c.upload_date
-            FROM c
-            WHERE c.id = @document_id 
-                AND c.public_workspace_id = @public_workspace_id
-            ORDER BY c.version DESC
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@public_workspace_id", "value": public_workspace_id}
-        ]
-    elif is_group:
-        query = """
-            SELECT c.id, c.file_name, c.version, c.upload_date
-            FROM c
-            WHERE c.id = @document_id
-                AND (c.group_id = @group_id OR ARRAY_CONTAINS(c.shared_group_ids, @group_id))
-            ORDER BY c.version DESC
-        """
-        parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@group_id", "value": group_id}
-        ]
-    else:
-        query = """
-            SELECT c.id, c.file_name, c.version, c.upload_date
+    try:
+        document_item = _read_document_in_scope(cosmos_container, document_id, user_id, group_id, public_workspace_id)
+        if not document_item:
+            return []
+
+        scope_field, _ = get_version_scope(user_id, group_id, public_workspace_id)
+        query = f"""
+            SELECT c.id, c.file_name, c.version, c.upload_date, c.is_latest
             FROM c
-            WHERE c.id = @document_id
-                AND (c.user_id = @user_id OR ARRAY_CONTAINS(c.shared_user_ids, @user_id))
+            WHERE c.file_name = @file_name
+                AND c.{scope_field} = @scope_value
             ORDER BY c.version DESC
         """
         parameters = [
-            {"name": "@document_id", "value": document_id},
-            {"name": "@user_id", "value": user_id}
+            {"name": "@file_name", "value": document_item.get('file_name')},
+            {"name": "@scope_value", "value": document_item.get(scope_field)}
         ]
-
-    try:
         versions_results = list(
             cosmos_container.query_items(
                 query=query, 
@@ -2394,9 +2383,6 @@ def get_document_versions(user_id, document_id, group_id=None, public_workspace_
                 enable_cross_partition_query=True
             )
         )
-
-        if not versions_results:
-            return []
         return versions_results
 
     except Exception as e:
@@ -2497,7 +2483,7 @@ def process_metadata_extraction_background(document_id, user_id, group_id=None,
 
             return
 
-        # Persist the returned metadata fields back into Cosmos
+        # Persist the returned metadata fields back into Cosmos (the ingestion sample is no longer needed)
         args_metadata = {
             "document_id": document_id,
             "user_id": user_id,
@@ -2506,7 +2492,8 @@ def process_metadata_extraction_background(document_id, user_id, group_id=None,
             "abstract": metadata.get('abstract'),
             "keywords": metadata.get('keywords'),
             "publication_date": metadata.get('publication_date'),
-            "organization": metadata.get('organization')
+            "organization": metadata.get('organization'),
+            "metadata_sample": ""
         }
 
         if is_public_workspace:
@@ -2545,12 +2532,17 @@ def process_metadata_extraction_background(document_id, user_id, group_id=None,
 
         update_document(**args)
       
-def extract_document_metadata(document_id, user_id, group_id=None, public_workspace_id=None):
+def extract_document_metadata(document_id, user_id, group_id=None, public_workspace_id=None, content_sample=None):
     """
     Extract metadata from a document stored in Cosmos DB.
     This function is called in the background after the document is uploaded.
     It retrieves the document from Cosmos DB, extracts metadata, and performs
     content safety checks.
+
+    The model is given content_sample, the chunk sample collected while the
+    document is being ingested, or the `metadata_sample` stored on the document
+    for deferred extraction. Only documents with none of these fall back to a
+    hybrid search of the index.
     """
 
     settings = get_settings()
@@ -2764,9 +2756,21 @@ def extract_document_metadata(document_id, user_id, group_id=None, public_worksp
             )
             print(f"Error checking content safety for document metadata: {e}")
 
-    # --- Step 4: Hybrid Search ---
+    # --- Step 4: Document content (ingestion sample, else Hybrid Search) ---
+    content_sample = (
+        content_sample
+        or get_metadata_sample(document_id)
+        or document_metadata.get("metadata_sample")
+    )
     try:
-        if enable_user_workspace or enable_group_workspaces:
+        if content_sample:
+            add_file_task_to_file_processing_log(
+                document_id=document_id, 
+                user_id=group_id if is_group else user_id,
+                content=f"Using {len(content_sample)} characters of ingested content to generate metadata for document {document_id}"
+            )
+            search_results = content_sample
+        elif enable_user_workspace or enable_group_workspaces:
             add_file_task_to_file_processing_log(
                 document_id=document_id, 
                 user_id=group_id if is_group else user_id,
@@ -2888,7 +2892,7 @@ def extract_document_metadata(document_id, user_id, group_id=None, public_worksp
             {
                 "role": "user", 
                 "content": (
-                    f"Search results from AI search index:\n{search_results}\n\n"
+                    f"{'Document content' if content_sample else 'Search results from AI search index'}:\n{search_results}\n\n"
                     f"Current known metadata:\n{json.dumps(meta_data, indent=2)}\n\n"
                     f"Desired metadata structure:\n{json.dumps(meta_data_example, indent=2)}\n\n"
                     f"Please attempt to fill in any missing, or empty values."
@@ -3091,20 +3095,16 @@ def analyze_image_with_vision_model(image_path, user_id, document_id, settings):
 
         
     try:
-        # Convert image to base64
-        with open(image_path, 'rb') as img_file:
-            image_bytes = img_file.read()
-            base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        # Downsample/re-encode (when enabled) and convert image to base64
+        image_bytes, mime_type = prepare_image_for_vision(image_path, settings)
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
         
         image_size = len(image_bytes)
         base64_size = len(base64_image)
         debug_print(f"[VISION_ANALYSIS] Image conversion for {document_id}:")
         debug_print(f"  Image path: {image_path}")
-        debug_print(f"  Original size: {image_size:,} bytes ({image_size / 1024 / 1024:.2f} MB)")
+        debug_print(f"  Size sent: {image_size:,} bytes ({image_size / 1024 / 1024:.2f} MB)")
         debug_print(f"  Base64 size: {base64_size:,} characters")
-        
-        # Determine image mime type
-        mime_type = mimetypes.guess_type(image_path)[0] or 'image/jpeg'
         debug_print(f"  MIME type: {mime_type}")
         
         # Get vision model settings
@@ -3511,24 +3511,43 @@ def upload_to_storage(temp_file_path, user_id, document_id, blob_filename, updat
         public_workspace_id=public_workspace_id
     )
 
-def process_txt(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes plain text files."""
+def _save_streamed_text_chunks(chunks, total_bytes, initial_estimate, original_filename, user_id, document_id, update_callback, group_id=None, public_workspace_id=None):
+    """
+    Saves chunks produced by the streaming chunkers in functions_text_chunking.
+
+    Chunks are embedded and indexed as they are yielded, so only one chunk is held
+    in memory at a time. The chunk-count estimate shown in the UI is refined from
+    the byte offset of each chunk as processing advances.
+
+    Returns:
+        tuple: (total_chunks_saved, total_embedding_tokens, embedding_model_name)
+    """
     is_group = group_id is not None
     is_public_workspace = public_workspace_id is not None
 
-    update_callback(status="Processing TXT file...")
     total_chunks_saved = 0
     total_embedding_tokens = 0
     embedding_model_name = None
-    target_words_per_chunk = 400
+    estimated_chunks = initial_estimate
+    update_callback(number_of_pages=estimated_chunks) # Use number_of_pages for chunk count
 
-    if enable_enhanced_citations:
+    for chunk in chunks:
+        if not chunk.text.strip():
+            continue
+
+        chunk_index = total_chunks_saved + 1
+        estimated_chunks = max(chunk_index, refine_chunk_estimate(chunk, total_bytes))
+        update_callback(
+            current_file_chunk=chunk_index,
+            number_of_pages=estimated_chunks,
+            status=f"Saving chunk {chunk_index}/{estimated_chunks}..."
+        )
         args = {
-            "temp_file_path": temp_file_path,
+            "page_text_content": chunk.text,
+            "page_number": chunk_index,
+            "file_name": original_filename,
             "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
+            "document_id": document_id
         }
 
         if is_public_workspace:
@@ -3536,723 +3555,140 @@ def process_txt(document_id, user_id, temp_file_path, original_filename, enable_
         elif is_group:
             args["group_id"] = group_id
 
-        upload_to_blob(**args)
+        token_usage = save_chunks(**args)
+        total_chunks_saved += 1
 
-    try:
-        with open(temp_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        words = content.split()
-        num_words = len(words)
-        num_chunks_estimated = math.ceil(num_words / target_words_per_chunk)
-        update_callback(number_of_pages=num_chunks_estimated) # Use number_of_pages for chunk count
-
-        for i in range(0, num_words, target_words_per_chunk):
-            chunk_words = words[i : i + target_words_per_chunk]
-            chunk_content = " ".join(chunk_words)
-            chunk_index = (i // target_words_per_chunk) + 1
-
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=chunk_index,
-                    status=f"Saving chunk {chunk_index}/{num_chunks_estimated}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": chunk_index,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
+        # Accumulate embedding tokens
+        if token_usage:
+            total_embedding_tokens += token_usage.get('total_tokens', 0)
+            if not embedding_model_name:
+                embedding_model_name = token_usage.get('model_deployment_name')
 
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
+    # Final update with actual chunks saved
+    if total_chunks_saved != estimated_chunks:
+        update_callback(number_of_pages=total_chunks_saved)
 
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-                
-                # Accumulate embedding tokens
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
+    return total_chunks_saved, total_embedding_tokens, embedding_model_name
+
+def _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id=None, public_workspace_id=None):
+    """Uploads the original file for enhanced citations (shared by the plain-text handlers)."""
+    args = {
+        "temp_file_path": temp_file_path,
+        "user_id": user_id,
+        "document_id": document_id,
+        "blob_filename": original_filename,
+        "update_callback": update_callback
+    }
+
+    if public_workspace_id is not None:
+        args["public_workspace_id"] = public_workspace_id
+    elif group_id is not None:
+        args["group_id"] = group_id
+
+    upload_to_blob(**args)
+
+def process_txt(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
+    """Processes plain text files with the streaming word chunker."""
+    update_callback(status="Processing TXT file...")
+    target_words_per_chunk = 400
+
+    if enable_enhanced_citations:
+        _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id, public_workspace_id)
 
+    try:
+        total_bytes = os.path.getsize(temp_file_path)
+        with open(temp_file_path, 'rb') as f:
+            return _save_streamed_text_chunks(
+                iter_word_chunks(f, words_per_chunk=target_words_per_chunk),
+                total_bytes,
+                estimate_chunk_count(total_bytes, words_per_chunk=target_words_per_chunk),
+                original_filename, user_id, document_id, update_callback,
+                group_id=group_id, public_workspace_id=public_workspace_id
+            )
     except Exception as e:
         raise Exception(f"Failed processing TXT file {original_filename}: {e}")
 
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
 def process_xml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes XML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
+    """Processes XML files with line-preserving chunks capped by size for structured content."""
     update_callback(status="Processing XML file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
-    # Character-based chunking for XML structure preservation
-    max_chunk_size_chars = 4000
+    # Size-based chunking on line boundaries for XML structure preservation
+    max_chunk_size_bytes = 4000
 
     if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
+        _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id, public_workspace_id)
 
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
+    try:
+        total_bytes = os.path.getsize(temp_file_path)
+        with open(temp_file_path, 'rb') as f:
+            return _save_streamed_text_chunks(
+                iter_line_chunks(f, max_bytes=max_chunk_size_bytes),
+                total_bytes,
+                estimate_chunk_count(total_bytes, bytes_per_chunk=max_chunk_size_bytes),
+                original_filename, user_id, document_id, update_callback,
+                group_id=group_id, public_workspace_id=public_workspace_id
+            )
+    except Exception as e:
+        print(f"Error during XML processing for {original_filename}: {type(e).__name__}: {e}")
+        raise Exception(f"Failed processing XML file {original_filename}: {e}")
 
-        upload_to_blob(**args)
+def process_yaml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
+    """Processes YAML files with line-preserving chunks capped by size for structured content."""
+    update_callback(status="Processing YAML file...")
+    # Size-based chunking on line boundaries for YAML structure preservation
+    max_chunk_size_bytes = 4000
+
+    if enable_enhanced_citations:
+        _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id, public_workspace_id)
 
     try:
-        # Read XML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading XML file {original_filename}: {e}")
+        total_bytes = os.path.getsize(temp_file_path)
+        with open(temp_file_path, 'rb') as f:
+            return _save_streamed_text_chunks(
+                iter_line_chunks(f, max_bytes=max_chunk_size_bytes),
+                total_bytes,
+                estimate_chunk_count(total_bytes, bytes_per_chunk=max_chunk_size_bytes),
+                original_filename, user_id, document_id, update_callback,
+                group_id=group_id, public_workspace_id=public_workspace_id
+            )
+    except Exception as e:
+        print(f"Error during YAML processing for {original_filename}: {type(e).__name__}: {e}")
+        raise Exception(f"Failed processing YAML file {original_filename}: {e}")
 
-        # Use RecursiveCharacterTextSplitter with XML-aware separators
-        # This preserves XML structure better than simple word splitting
-        xml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", ">", " ", ""],  # XML-friendly separators
-            is_separator_regex=False
-        )
+def process_log(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
+    """Processes LOG files using line-based chunking to maintain log record integrity."""
+    update_callback(status="Processing LOG file...")
+    target_words_per_chunk = 1000  # Word-based chunking for better semantic grouping
 
-        # Split the XML content
-        final_chunks = xml_splitter.split_text(xml_content)
+    if enable_enhanced_citations:
+        _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id, public_workspace_id)
 
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
+    try:
+        total_bytes = os.path.getsize(temp_file_path)
+        if total_bytes == 0:
+            raise Exception(f"LOG file {original_filename} is empty")
 
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty XML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
-
-    except Exception as e:
-        print(f"Error during XML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing XML file {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_yaml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes YAML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing YAML file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
-    # Character-based chunking for YAML structure preservation
-    max_chunk_size_chars = 4000
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        # Read YAML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                yaml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading YAML file {original_filename}: {e}")
-
-        # Use RecursiveCharacterTextSplitter with YAML-aware separators
-        # This preserves YAML structure better than simple word splitting
-        yaml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", "- ", " ", ""],  # YAML-friendly separators
-            is_separator_regex=False
-        )
-
-        # Split the YAML content
-        final_chunks = yaml_splitter.split_text(yaml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty YAML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
-
-    except Exception as e:
-        print(f"Error during YAML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing YAML file {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_log(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes LOG files using line-based chunking to maintain log record integrity."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing LOG file...")
-    total_chunks_saved = 0
-    total_embedding_tokens = 0
-    embedding_model_name = None
-    target_words_per_chunk = 1000  # Word-based chunking for better semantic grouping
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        with open(temp_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Split by lines to maintain log record integrity
-        lines = content.splitlines(keepends=True)  # Keep line endings
-        
-        if not lines:
-            raise Exception(f"LOG file {original_filename} is empty")
-
-        # Chunk by accumulating lines until reaching target word count
-        final_chunks = []
-        current_chunk_lines = []
-        current_chunk_word_count = 0
-
-        for line in lines:
-            line_word_count = len(line.split())
-            
-            # If adding this line exceeds target AND we already have content
-            if current_chunk_word_count + line_word_count > target_words_per_chunk and current_chunk_lines:
-                # Finalize current chunk
-                final_chunks.append("".join(current_chunk_lines))
-                # Start new chunk with current line
-                current_chunk_lines = [line]
-                current_chunk_word_count = line_word_count
-            else:
-                # Add line to current chunk
-                current_chunk_lines.append(line)
-                current_chunk_word_count += line_word_count
-
-        # Add the last remaining chunk if it has content
-        if current_chunk_lines:
-            final_chunks.append("".join(current_chunk_lines))
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-                
-                # Accumulate embedding tokens
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
-
-    except Exception as e:
-        raise Exception(f"Failed processing LOG file {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_doc(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """
-    Processes .doc and .docm files using docx2txt library.
-    Note: .docx files still use Document Intelligence for better formatting preservation.
-    """
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status=f"Processing {original_filename.split('.')[-1].upper()} file...")
-    total_chunks_saved = 0
-    target_words_per_chunk = 400  # Consistent with other text-based chunking
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        # Import docx2txt here to avoid dependency issues if not installed
-        try:
-            import docx2txt
-        except ImportError:
-            raise Exception("docx2txt library is required for .doc and .docm file processing. Install with: pip install docx2txt")
-
-        # Extract text from .doc or .docm file
-        try:
-            text_content = docx2txt.process(temp_file_path)
-        except Exception as e:
-            raise Exception(f"Error extracting text from {original_filename}: {e}")
-
-        if not text_content or not text_content.strip():
-            raise Exception(f"No text content extracted from {original_filename}")
-
-        # Split into words for chunking
-        words = text_content.split()
-        if not words:
-            raise Exception(f"No text content found in {original_filename}")
-
-        # Create chunks of target_words_per_chunk words
-        final_chunks = []
-        for i in range(0, len(words), target_words_per_chunk):
-            chunk_words = words[i:i + target_words_per_chunk]
-            chunk_text = " ".join(chunk_words)
-            final_chunks.append(chunk_text)
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                token_usage = save_chunks(**args)
-                total_chunks_saved += 1
-                
-                # Accumulate embedding tokens
-                if token_usage:
-                    total_embedding_tokens += token_usage.get('total_tokens', 0)
-                    if not embedding_model_name:
-                        embedding_model_name = token_usage.get('model_deployment_name')
-
-    except Exception as e:
-        raise Exception(f"Failed processing {original_filename}: {e}")
-
-    return total_chunks_saved, total_embedding_tokens, embedding_model_name
-
-def process_xml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes XML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing XML file...")
-    total_chunks_saved = 0
-    # Character-based chunking for XML structure preservation
-    max_chunk_size_chars = 4000
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-
-        upload_to_blob(**args)
-
-    try:
-        # Read XML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading XML file {original_filename}: {e}")
-
-        # Use RecursiveCharacterTextSplitter with XML-aware separators
-        # This preserves XML structure better than simple word splitting
-        xml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", ">", " ", ""],  # XML-friendly separators
-            is_separator_regex=False
-        )
-
-        # Split the XML content
-        final_chunks = xml_splitter.split_text(xml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty XML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
-            )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            save_chunks(**args)
-            total_chunks_saved += 1
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
-
-    except Exception as e:
-        print(f"Error during XML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing XML file {original_filename}: {e}")
-
-    return total_chunks_saved
-
-def process_yaml(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes YAML files using RecursiveCharacterTextSplitter for structured content."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing YAML file...")
-    total_chunks_saved = 0
-    # Character-based chunking for YAML structure preservation
-    max_chunk_size_chars = 4000
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        # Read YAML content
-        try:
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                yaml_content = f.read()
-        except Exception as e:
-            raise Exception(f"Error reading YAML file {original_filename}: {e}")
-
-        # Use RecursiveCharacterTextSplitter with YAML-aware separators
-        # This preserves YAML structure better than simple word splitting
-        yaml_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size_chars,
-            chunk_overlap=0,
-            length_function=len,
-            separators=["\n\n", "\n", "- ", " ", ""],  # YAML-friendly separators
-            is_separator_regex=False
-        )
-
-        # Split the YAML content
-        final_chunks = yaml_splitter.split_text(yaml_content)
-
-        initial_chunk_count = len(final_chunks)
-        update_callback(number_of_pages=initial_chunk_count)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            # Skip empty chunks
-            if not chunk_content or not chunk_content.strip():
-                print(f"Skipping empty YAML chunk {idx}/{initial_chunk_count}")
-                continue
-
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{initial_chunk_count}..."
+        # Lines are streamed and accumulated until reaching the target word count
+        with open(temp_file_path, 'rb') as f:
+            return _save_streamed_text_chunks(
+                iter_line_chunks(f, max_words=target_words_per_chunk),
+                total_bytes,
+                estimate_chunk_count(total_bytes, words_per_chunk=target_words_per_chunk),
+                original_filename, user_id, document_id, update_callback,
+                group_id=group_id, public_workspace_id=public_workspace_id
             )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": total_chunks_saved + 1,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            save_chunks(**args)
-            total_chunks_saved += 1
-
-        # Final update with actual chunks saved
-        if total_chunks_saved != initial_chunk_count:
-            update_callback(number_of_pages=total_chunks_saved)
-            print(f"Adjusted final chunk count from {initial_chunk_count} to {total_chunks_saved} after skipping empty chunks.")
-
-    except Exception as e:
-        print(f"Error during YAML processing for {original_filename}: {type(e).__name__}: {e}")
-        raise Exception(f"Failed processing YAML file {original_filename}: {e}")
-
-    return total_chunks_saved
-
-def process_log(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes LOG files using line-based chunking to maintain log record integrity."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
-    update_callback(status="Processing LOG file...")
-    total_chunks_saved = 0
-    target_words_per_chunk = 1000  # Word-based chunking for better semantic grouping
-
-    if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
-
-    try:
-        with open(temp_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Split by lines to maintain log record integrity
-        lines = content.splitlines(keepends=True)  # Keep line endings
-        
-        if not lines:
-            raise Exception(f"LOG file {original_filename} is empty")
-
-        # Chunk by accumulating lines until reaching target word count
-        final_chunks = []
-        current_chunk_lines = []
-        current_chunk_word_count = 0
-
-        for line in lines:
-            line_word_count = len(line.split())
-            
-            # If adding this line exceeds target AND we already have content
-            if current_chunk_word_count + line_word_count > target_words_per_chunk and current_chunk_lines:
-                # Finalize current chunk
-                final_chunks.append("".join(current_chunk_lines))
-                # Start new chunk with current line
-                current_chunk_lines = [line]
-                current_chunk_word_count = line_word_count
-            else:
-                # Add line to current chunk
-                current_chunk_lines.append(line)
-                current_chunk_word_count += line_word_count
-
-        # Add the last remaining chunk if it has content
-        if current_chunk_lines:
-            final_chunks.append("".join(current_chunk_lines))
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                save_chunks(**args)
-                total_chunks_saved += 1
-
     except Exception as e:
         raise Exception(f"Failed processing LOG file {original_filename}: {e}")
 
-    return total_chunks_saved
-
 def process_doc(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """
     Processes .doc and .docm files using docx2txt library.
     Note: .docx files still use Document Intelligence for better formatting preservation.
     """
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
     update_callback(status=f"Processing {original_filename.split('.')[-1].upper()} file...")
-    total_chunks_saved = 0
     target_words_per_chunk = 400  # Consistent with other text-based chunking
 
     if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-        elif is_group:
-            args["group_id"] = group_id
-
-        upload_to_blob(**args)
+        _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id, public_workspace_id)
 
     try:
         # Import docx2txt here to avoid dependency issues if not installed
@@ -4270,48 +3706,18 @@ def process_doc(document_id, user_id, temp_file_path, original_filename, enable_
         if not text_content or not text_content.strip():
             raise Exception(f"No text content extracted from {original_filename}")
 
-        # Split into words for chunking
-        words = text_content.split()
-        if not words:
-            raise Exception(f"No text content found in {original_filename}")
-
-        # Create chunks of target_words_per_chunk words
-        final_chunks = []
-        for i in range(0, len(words), target_words_per_chunk):
-            chunk_words = words[i:i + target_words_per_chunk]
-            chunk_text = " ".join(chunk_words)
-            final_chunks.append(chunk_text)
-
-        num_chunks = len(final_chunks)
-        update_callback(number_of_pages=num_chunks)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            if chunk_content.strip():
-                update_callback(
-                    current_file_chunk=idx,
-                    status=f"Saving chunk {idx}/{num_chunks}..."
-                )
-                args = {
-                    "page_text_content": chunk_content,
-                    "page_number": idx,
-                    "file_name": original_filename,
-                    "user_id": user_id,
-                    "document_id": document_id
-                }
-
-                if is_public_workspace:
-                    args["public_workspace_id"] = public_workspace_id
-                elif is_group:
-                    args["group_id"] = group_id
-
-                save_chunks(**args)
-                total_chunks_saved += 1
-
+        # docx2txt returns the full text, so chunk it in place without building a word list
+        total_bytes = len(text_content.encode('utf-8'))
+        return _save_streamed_text_chunks(
+            iter_text_chunks_from_string(text_content, words_per_chunk=target_words_per_chunk),
+            total_bytes,
+            estimate_chunk_count(total_bytes, words_per_chunk=target_words_per_chunk),
+            original_filename, user_id, document_id, update_callback,
+            group_id=group_id, public_workspace_id=public_workspace_id
+        )
     except Exception as e:
         raise Exception(f"Failed processing {original_filename}: {e}")
 
-    return total_chunks_saved
-
 def process_html(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
     """Processes HTML files."""
     is_group = group_id is not None
@@ -4413,7 +3819,7 @@ def process_html(document_id, user_id, temp_file_path, original_filename, enable
 
     # Extract metadata if enabled and chunks were processed
     settings = get_settings()
-    enable_extract_meta_data = settings.get('enable_extract_meta_data', False)
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total_chunks_saved > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -4443,10 +3849,7 @@ def process_html(document_id, user_id, temp_file_path, original_filename, enable
     return total_chunks_saved, total_embedding_tokens, embedding_model_name
 
 def process_md(document_id, user_id, temp_file_path, original_filename, enable_enhanced_citations, update_callback, group_id=None, public_workspace_id=None):
-    """Processes Markdown files."""
-    is_group = group_id is not None
-    is_public_workspace = public_workspace_id is not None
-
+    """Processes Markdown files with the streaming header-aware line chunker."""
     update_callback(status="Processing Markdown file...")
     total_chunks_saved = 0
     total_embedding_tokens = 0
@@ -4455,101 +3858,38 @@ def process_md(document_id, user_id, temp_file_path, original_filename, enable_e
     min_chunk_words = 600 # Minimum size based on requirement
 
     if enable_enhanced_citations:
-        args = {
-            "temp_file_path": temp_file_path,
-            "user_id": user_id,
-            "document_id": document_id,
-            "blob_filename": original_filename,
-            "update_callback": update_callback
-        }
-
-        if is_group:
-            args["group_id"] = group_id
-        elif is_public_workspace:
-            args["public_workspace_id"] = public_workspace_id
-
-        upload_to_blob(**args)
+        _upload_text_file_for_citations(temp_file_path, user_id, document_id, original_filename, update_callback, group_id, public_workspace_id)
 
     try:
-        with open(temp_file_path, 'r', encoding='utf-8') as f:
-            md_content = f.read()
-
-        headers_to_split_on = [
-            ("#", "Header 1"),
-            ("##", "Header 2"),
-            ("###", "Header 3"),
-            ("####", "Header 4"),
-            ("#####", "Header 5"),
-        ]
-
-        # Use MarkdownHeaderTextSplitter first
-        md_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on, return_each_line=False)
-        md_header_splits = md_splitter.split_text(md_content)
-
-        initial_chunks_content = [doc.page_content for doc in md_header_splits]
-
+        # Stream the file in header-delimited sections. A header (# to #####) starts a
+        # new chunk once the current one holds min_chunk_words, so small sections are
+        # merged, and target_chunk_words caps oversized sections.
         # TODO: Advanced Table/Code Block Handling:
         # - Table header replication requires identifying markdown tables (`|---|`),
         #   detecting splits, and injecting headers.
         # - Code block wrapping requires detecting ``` blocks split across chunks and
         #   adding start/end fences.
-        # This requires complex regex or stateful parsing during/after splitting.
-        # For now, we focus on the text splitting and minimum size merging.
-
-        # Post-processing: Merge small chunks based on word count
-        final_chunks = []
-        buffer_chunk = ""
-        for i, chunk_text in enumerate(initial_chunks_content):
-            current_chunk_text = buffer_chunk + chunk_text # Combine with buffer first
-            current_word_count = estimate_word_count(current_chunk_text)
-
-            # Merge if current chunk alone (without buffer) is too small, UNLESS it's the last one
-            # Or, more simply, accumulate until the buffer meets the minimum size
-            if current_word_count >= min_chunk_words or i == len(initial_chunks_content) - 1:
-                 # If the combined chunk meets min size OR it's the last chunk, save it
-                if current_chunk_text.strip():
-                     final_chunks.append(current_chunk_text)
-                buffer_chunk = "" # Reset buffer
-            else:
-                # Accumulate in buffer if below min size and not the last chunk
-                buffer_chunk = current_chunk_text + "\n\n" # Add separator when buffering
-
-        num_chunks_final = len(final_chunks)
-        update_callback(number_of_pages=num_chunks_final)
-
-        for idx, chunk_content in enumerate(final_chunks, start=1):
-            update_callback(
-                current_file_chunk=idx,
-                status=f"Saving chunk {idx}/{num_chunks_final}..."
+        total_bytes = os.path.getsize(temp_file_path)
+        with open(temp_file_path, 'rb') as f:
+            total_chunks_saved, total_embedding_tokens, embedding_model_name = _save_streamed_text_chunks(
+                iter_line_chunks(
+                    f,
+                    max_words=target_chunk_words,
+                    min_words=min_chunk_words,
+                    is_boundary=is_markdown_header
+                ),
+                total_bytes,
+                estimate_chunk_count(total_bytes, words_per_chunk=target_chunk_words),
+                original_filename, user_id, document_id, update_callback,
+                group_id=group_id, public_workspace_id=public_workspace_id
             )
-            args = {
-                "page_text_content": chunk_content,
-                "page_number": idx,
-                "file_name": original_filename,
-                "user_id": user_id,
-                "document_id": document_id
-            }
-
-            if is_public_workspace:
-                args["public_workspace_id"] = public_workspace_id
-            elif is_group:
-                args["group_id"] = group_id
-
-            token_usage = save_chunks(**args)
-            total_chunks_saved += 1
-            
-            # Accumulate embedding tokens
-            if token_usage:
-                total_embedding_tokens += token_usage.get('total_tokens', 0)
-                if not embedding_model_name:
-                    embedding_model_name = token_usage.get('model_deployment_name')
 
     except Exception as e:
         raise Exception(f"Failed processing Markdown file {original_filename}: {e}")
 
     # Extract metadata if enabled and chunks were processed
     settings = get_settings()
-    enable_extract_meta_data = settings.get('enable_extract_meta_data', False)
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total_chunks_saved > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -4685,7 +4025,7 @@ def process_json(document_id, user_id, temp_file_path, original_filename, enable
 
     # Extract metadata if enabled and chunks were processed
     settings = get_settings()
-    enable_extract_meta_data = settings.get('enable_extract_meta_data', False)
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total_chunks_saved > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -4915,7 +4255,7 @@ def process_tabular(document_id, user_id, temp_file_path, original_filename, fil
 
     # Extract metadata if enabled and chunks were processed
     settings = get_settings()
-    enable_extract_meta_data = settings.get('enable_extract_meta_data', False)
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total_chunks_saved > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -5050,8 +4390,9 @@ def process_di_document(document_id, user_id, temp_file_path, original_filename,
         # Send chunk to Azure DI
         update_callback(status=f"Sending {chunk_effective_filename} to Azure Document Intelligence...")
         di_extracted_pages = []
+        di_input_path = prepare_image_file_for_di(chunk_path, settings) if is_image else None
         try:
-            di_extracted_pages = extract_content_with_azure_di(chunk_path)
+            di_extracted_pages = extract_content_with_azure_di_cached(di_input_path or chunk_path, document_id=document_id)
             num_di_pages = len(di_extracted_pages)
             conceptual_pages = num_di_pages if not is_image else 1 # Image is one conceptual item
 
@@ -5068,6 +4409,9 @@ def process_di_document(document_id, user_id, temp_file_path, original_filename,
 
         except Exception as e:
             raise Exception(f"Error extracting content from {chunk_effective_filename} with Azure DI: {str(e)}")
+        finally:
+            if di_input_path and os.path.exists(di_input_path):
+                os.remove(di_input_path)
 
         # --- Multi-Modal Vision Analysis (for images only) - Must happen BEFORE save_chunks ---
         if is_image and enable_enhanced_citations and idx == 1:  # Only run once for first chunk
@@ -5198,7 +4542,7 @@ def process_di_document(document_id, user_id, temp_file_path, original_filename,
 
     # --- Final Metadata Extraction (Optional, moved outside loop) ---
     settings = get_settings() # Re-get in case it changed? Or pass it down.
-    enable_extract_meta_data = settings.get('enable_extract_meta_data')
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total_final_chunks_processed > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -5422,7 +4766,7 @@ def process_audio_document(
 
     # Extract metadata if enabled and chunks were processed
     settings = get_settings()
-    enable_extract_meta_data = settings.get('enable_extract_meta_data', False)
+    enable_extract_meta_data = is_inline_metadata_extraction_enabled(settings)
     if enable_extract_meta_data and total_pages > 0:
         try:
             update_callback(status="Extracting final metadata...")
@@ -5508,7 +4852,13 @@ def process_document_upload_background(document_id, user_id, temp_file_path, ori
         if file_size > max_file_size_bytes:
             raise ValueError(f"File exceeds maximum allowed size ({max_file_size_bytes / (1024*1024):.1f} MB).")
 
-        update_doc_callback(status=f"Processing file {original_filename}, type: {file_ext}")
+        # File hash lets re-versions and duplicate uploads reuse DI output and chunk embeddings
+        begin_content_dedup(document_id)
+        begin_metadata_sample(document_id)
+        update_doc_callback(
+            status=f"Processing file {original_filename}, type: {file_ext}",
+            file_hash=compute_file_hash(temp_file_path)
+        )
 
         # --- 1. Dispatch to appropriate handler based on file type ---
         # Note: .doc and .docm are handled separately by process_doc() using docx2txt
@@ -5645,9 +4995,37 @@ def process_document_upload_background(document_id, user_id, temp_file_path, ori
             final_update_args["embedding_tokens"] = total_embedding_tokens
         if embedding_model_name:
             final_update_args["embedding_model_deployment_name"] = embedding_model_name
+        content_dedup = end_content_dedup(document_id)
+        if content_dedup:
+            final_update_args["content_dedup"] = content_dedup
+
+        # Deferred metadata extraction reads the ingested sample from the document later
+        defer_metadata_extraction = (
+            enable_extract_meta_data
+            and settings.get('enable_deferred_metadata_extraction', False)
+            and total_chunks_saved > 0
+        )
+        metadata_sample = end_metadata_sample(document_id)
+        if defer_metadata_extraction and metadata_sample:
+            final_update_args["metadata_sample"] = metadata_sample
             
         update_doc_callback(**final_update_args)
 
+        if defer_metadata_extraction:
+            try:
+                # A distinct key per run, so it can't collide with the extract_metadata routes' "<id>_metadata" future
+                submit_ingestion_task(
+                    "metadata_extraction",
+                    f"{document_id}_deferred_metadata_{uuid.uuid4().hex}",
+                    user_id=user_id,
+                    group_id=group_id,
+                    public_workspace_id=public_workspace_id,
+                    document_id=document_id,
+                    priority=PRIORITY_LOW
+                )
+            except Exception as e:
+                print(f"Warning: Failed to queue metadata extraction for document {document_id}: {e}")
+
         print(f"Document {document_id} ({original_filename}) processed successfully with {total_chunks_saved} chunks saved and {total_embedding_tokens} embedding tokens used.")
         
         # Log document creation transaction to activity_logs container
@@ -5837,6 +5215,9 @@ def process_document_upload_background(document_id, user_id, temp_file_path, ori
             print(f"Critical Error: Failed to update document status to error for {document_id}: {update_e}")
 
     finally:
+        end_content_dedup(document_id)
+        end_metadata_sample(document_id)
+
         # --- 3. Cleanup ---
         # Clean up the original temporary file path regardless of success or failure
         if temp_file_path and os.path.exists(temp_file_path):
@@ -5981,27 +5362,13 @@ def share_document_with_user(document_id, owner_user_id, target_user_id):
             
             # Update the document
             cosmos_user_documents_container.upsert_item(document_item)
+            invalidate_listing_count(document_count_key(user_id=target_user_id))
             
-            # Update all chunks with the new shared_user_ids
+            # Propagate the new shared_user_ids to all chunks in the background
             try:
-                chunks = get_all_chunks(document_id, owner_user_id)
-                for chunk in chunks:
-                    chunk_id = chunk.get('id')
-                    if chunk_id:
-                        try:
-                            update_chunk_metadata(
-                                chunk_id=chunk_id,
-                                user_id=owner_user_id,
-                                group_id=None,
-                                public_workspace_id=None,
-                                document_id=document_id,
-                                shared_user_ids=shared_user_ids
-                            )
-                        except Exception as chunk_e:
-                            print(f"Warning: Failed to update chunk {chunk_id}: {chunk_e}")
-                            # Continue with other chunks
+                submit_chunk_acl_propagation(document_id)
             except Exception as e:
-                print(f"Warning: Failed to update chunks for document {document_id}: {e}")
+                print(f"Warning: Failed to queue chunk ACL update for document {document_id}: {e}")
                 # Don't fail the whole operation if chunk update fails
             
             return True
@@ -6045,27 +5412,13 @@ def unshare_document_from_user(document_id, owner_user_id, target_user_id):
             document_item['last_updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
             # Update the document
             cosmos_user_documents_container.upsert_item(document_item)
+            invalidate_listing_count(document_count_key(user_id=target_user_id))
             
-            # Update all chunks with the new shared_user_ids
+            # Propagate the new shared_user_ids to all chunks in the background
             try:
-                chunks = get_all_chunks(document_id, owner_user_id)
-                for chunk in chunks:
-                    chunk_id = chunk.get('id')
-                    if chunk_id:
-                        try:
-                            update_chunk_metadata(
-                                chunk_id=chunk_id,
-                                user_id=owner_user_id,
-                                group_id=None,
-                                public_workspace_id=None,
-                                document_id=document_id,
-                                shared_user_ids=new_shared_user_ids
-                            )
-                        except Exception as chunk_e:
-                            print(f"Warning: Failed to update chunk {chunk_id}: {chunk_e}")
-                            # Continue with other chunks
+                submit_chunk_acl_propagation(document_id)
             except Exception as e:
-                print(f"Warning: Failed to update chunks for document {document_id}: {e}")
+                print(f"Warning: Failed to queue chunk ACL update for document {document_id}: {e}")
                 # Don't fail the whole operation if chunk update fails
 
         return True
@@ -6208,6 +5561,13 @@ def share_document_with_group(document_id, owner_group_id, target_group_id):
             
             # Update the document
             cosmos_group_documents_container.upsert_item(document_item)
+            invalidate_listing_count(document_count_key(group_id=target_group_id))
+
+            # Propagate the new shared_group_ids to all chunks in the background
+            try:
+                submit_chunk_acl_propagation(document_id, group_id=owner_group_id)
+            except Exception as e:
+                print(f"Warning: Failed to queue chunk ACL update for document {document_id}: {e}")
             return True
 
         return True  # Already shared
@@ -6247,6 +5607,13 @@ def unshare_document_from_group(document_id, owner_group_id, target_group_id):
             
             # Update the document
             cosmos_group_documents_container.upsert_item(document_item)
+            invalidate_listing_count(document_count_key(group_id=target_group_id))
+
+            # Propagate the new shared_group_ids to all chunks in the background
+            try:
+                submit_chunk_acl_propagation(document_id, group_id=owner_group_id)
+            except Exception as e:
+                print(f"Warning: Failed to queue chunk ACL update for document {document_id}: {e}")
         
         return True
         
@@ -0,0 +1,236 @@
+# functions_fact_retrieval.py
+"""
+Relevance-ranked, budgeted fact memory retrieval.
+
+Every fact stored for a user or group used to be injected into the chat as a
+<Fact Memory> system message on every turn, so prompts grew without bound as
+facts accumulated. Now:
+
+- facts are embedded when they are written (set_fact). The vector is stored on
+  the fact as base64-encoded float32 (`embedding`, about a quarter of the size
+  of a JSON float list) with the deployment that produced it
+  (`embedding_model`). Facts written earlier, or with another embedding
+  deployment, are embedded in batched requests the first time their scope is
+  loaded. Nothing is backfilled while no embedding deployment is configured,
+  and a scope whose backfill failed is not retried for
+  FACT_MEMORY_BACKFILL_RETRY_SECONDS;
+- each scope's vectors are kept in process as one normalized NumPy matrix.
+  A cheap COUNT/MAX(_ts) query per turn detects facts added or removed by
+  other workers and reloads the scope only then;
+- select_facts_for_context() injects at most FACT_MEMORY_TOP_K facts, most
+  relevant to the user's message first, and stops at FACT_MEMORY_TOKEN_BUDGET
+  estimated tokens. Scopes whose facts all fit are injected without embedding
+  the message, and the message is embedded without the pacing delay used for
+  bulk ingestion.
+"""
+
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from functions_content import generate_embedding, generate_embeddings
+from functions_content_hash import get_embedding_model_name
+from functions_settings import get_settings
+
+FACT_MEMORY_TOP_K = int(os.getenv("FACT_MEMORY_TOP_K", "8"))
+FACT_MEMORY_TOKEN_BUDGET = int(os.getenv("FACT_MEMORY_TOKEN_BUDGET", "800"))
+FACT_MEMORY_MAX_CACHED_SCOPES = int(os.getenv("FACT_MEMORY_MAX_CACHED_SCOPES", "500"))
+FACT_MEMORY_BACKFILL_BATCH_SIZE = int(os.getenv("FACT_MEMORY_BACKFILL_BATCH_SIZE", "64"))
+FACT_MEMORY_BACKFILL_RETRY_SECONDS = int(os.getenv("FACT_MEMORY_BACKFILL_RETRY_SECONDS", "300"))
+# Only the start of long messages is embedded to rank facts
+FACT_MEMORY_QUERY_MAX_CHARS = 2000
+
+
+def estimate_fact_tokens(value):
+    """Rough token estimate for a fact line (~4 characters per token)."""
+    return len(value) // 4 + 2
+
+
+def encode_embedding(embedding):
+    return base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_embedding(encoded):
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+
+
+def embed_fact_value(value, settings=None):
+    """Returns the fields that store value's embedding on a fact, or {} if it can't be embedded now."""
+    settings = settings or get_settings() or {}
+    try:
+        result = generate_embedding(value, pace_requests=False)
+    except Exception as e:
+        print(f"[FactMemory] Failed to embed fact, it will be embedded on next load: {e}")
+        return {}
+    if not result or result[0] is None:
+        return {}
+    return {"embedding": encode_embedding(result[0]), "embedding_model": get_embedding_model_name(settings)}
+
+
+def _backfill_embeddings(store, scope_id, facts, model_name):
+    """
+    Embeds facts in batched requests and stores the vectors on them.
+
+    Returns (backfilled, failed): whether any fact was updated and whether an
+    embedding request failed.
+    """
+    backfilled = False
+    for start in range(0, len(facts), FACT_MEMORY_BACKFILL_BATCH_SIZE):
+        batch = facts[start:start + FACT_MEMORY_BACKFILL_BATCH_SIZE]
+        try:
+            result = generate_embeddings([fact["value"] for fact in batch], max_retries=1)
+        except Exception as e:
+            print(f"[FactMemory] Failed to backfill fact embeddings for scope {scope_id}: {e}")
+            return backfilled, True
+        if not result:
+            print(f"[FactMemory] Fact embedding backfill for scope {scope_id} is rate limited")
+            return backfilled, True
+        for fact, embedding in zip(batch, result[0]):
+            fields = {"embedding": encode_embedding(embedding), "embedding_model": model_name}
+            store.set_fact_embedding(scope_id, fact["id"], fields)
+            fact.update(fields)
+            backfilled = True
+    return backfilled, False
+
+
+class ScopeFactIndex:
+    """The facts of one scope with their normalized embeddings as a matrix (one row per fact)."""
+
+    def __init__(self, fingerprint, facts, matrix):
+        self.fingerprint = fingerprint
+        self.facts = facts
+        self.matrix = matrix
+
+    def rank(self, query_embedding):
+        """Fact positions ordered by cosine similarity to query_embedding."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if self.matrix is None or norm == 0 or query.shape[0] != self.matrix.shape[1]:
+            return None
+        scores = self.matrix @ (query / norm)
+        return [int(i) for i in np.argsort(-scores, kind="stable")]
+
+
+_scope_indexes = OrderedDict()
+_scope_indexes_lock = threading.Lock()
+# (scope_type, scope_id) -> monotonic time of the last failed backfill
+_backfill_failures = {}
+
+
+def invalidate_fact_scope(scope_id, scope_type=None):
+    """Drops the cached index of a scope (of every scope type when scope_type is None)."""
+    with _scope_indexes_lock:
+        for key in [key for key in _scope_indexes if key[1] == scope_id and scope_type in (None, key[0])]:
+            del _scope_indexes[key]
+
+
+def _build_scope_index(store, scope_type, scope_id, fingerprint, settings):
+    facts = [fact for fact in store.get_facts(scope_type=scope_type, scope_id=scope_id, include_embeddings=True) if fact.get("value")]
+    facts.sort(key=lambda fact: fact.get("created_at") or "")
+    model_name = get_embedding_model_name(settings)
+
+    backfilled = False
+    key = (scope_type, scope_id)
+    stale = [fact for fact in facts if not fact.get("embedding") or fact.get("embedding_model") != model_name]
+    with _scope_indexes_lock:
+        failed_at = _backfill_failures.get(key)
+    retry_due = failed_at is None or time.monotonic() - failed_at >= FACT_MEMORY_BACKFILL_RETRY_SECONDS
+    # Without a configured deployment there is nothing to embed with
+    if stale and model_name and retry_due:
+        backfilled, failed = _backfill_embeddings(store, scope_id, stale, model_name)
+        with _scope_indexes_lock:
+            if failed:
+                now = time.monotonic()
+                for expired in [k for k, t in _backfill_failures.items() if now - t >= FACT_MEMORY_BACKFILL_RETRY_SECONDS]:
+                    del _backfill_failures[expired]
+                _backfill_failures[key] = now
+            else:
+                _backfill_failures.pop(key, None)
+
+    vectors = []
+    for fact in facts:
+        encoded = fact.pop("embedding", None)
+        vectors.append(decode_embedding(encoded) if encoded and fact.get("embedding_model") == model_name else None)
+
+    dimension = next((vector.shape[0] for vector in vectors if vector is not None), 0)
+    matrix = None
+    if dimension:
+        matrix = np.zeros((len(facts), dimension), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            if vector is not None and vector.shape[0] == dimension:
+                norm = np.linalg.norm(vector)
+                if norm:
+                    matrix[row] = vector / norm
+
+    if backfilled:
+        # The backfill patches changed the scope's _ts
+        fingerprint = store.get_scope_fingerprint(scope_type, scope_id)
+    return ScopeFactIndex(fingerprint, facts, matrix)
+
+
+def get_scope_fact_index(store, scope_type, scope_id, settings=None):
+    """Returns the cached index for a scope, reloading it when its facts changed."""
+    settings = settings or get_settings() or {}
+    key = (scope_type, scope_id)
+    fingerprint = store.get_scope_fingerprint(scope_type, scope_id)
+    with _scope_indexes_lock:
+        index = _scope_indexes.get(key)
+        if index is not None and index.fingerprint == fingerprint:
+            _scope_indexes.move_to_end(key)
+            return index
+
+    index = _build_scope_index(store, scope_type, scope_id, fingerprint, settings)
+    with _scope_indexes_lock:
+        _scope_indexes[key] = index
+        _scope_indexes.move_to_end(key)
+        while len(_scope_indexes) > FACT_MEMORY_MAX_CACHED_SCOPES:
+            _scope_indexes.popitem(last=False)
+    return index
+
+
+def _take_within_budget(facts, top_k, token_budget):
+    selected = []
+    used = 0
+    for fact in facts:
+        if len(selected) >= top_k:
+            break
+        tokens = estimate_fact_tokens(fact["value"])
+        if used + tokens > token_budget:
+            continue
+        selected.append(fact)
+        used += tokens
+    return selected
+
+
+def select_facts_for_context(store, scope_type, scope_id, query_text, top_k=None, token_budget=None, settings=None):
+    """
+    Returns the facts to inject for a turn: up to top_k facts within
+    token_budget, ordered by relevance to query_text (newest first when the
+    message can't be embedded).
+    """
+    top_k = FACT_MEMORY_TOP_K if top_k is None else top_k
+    token_budget = FACT_MEMORY_TOKEN_BUDGET if token_budget is None else token_budget
+    index = get_scope_fact_index(store, scope_type, scope_id, settings)
+    facts = index.facts
+    if not facts:
+        return []
+
+    if len(facts) <= top_k and sum(estimate_fact_tokens(fact["value"]) for fact in facts) <= token_budget:
+        return list(facts)
+
+    order = None
+    if query_text and index.matrix is not None:
+        try:
+            # Interactive call: no pacing delay, and fall back to newest first rather than wait out rate limits
+            result = generate_embedding(query_text[:FACT_MEMORY_QUERY_MAX_CHARS], max_retries=1, pace_requests=False)
+            if result and result[0] is not None:
+                order = index.rank(result[0])
+        except Exception as e:
+            print(f"[FactMemory] Failed to embed message for fact ranking: {e}")
+
+    ranked = [facts[i] for i in order] if order else list(reversed(facts))
+    return _take_within_budget(ranked, top_k, token_budget)
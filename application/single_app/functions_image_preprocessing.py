@@ -0,0 +1,146 @@
+# functions_image_preprocessing.py
+"""
+Image pre-processing before vision analysis and Document Intelligence.
+
+analyze_image_with_vision_model() used to base64-encode the uploaded file as
+is, and Document Intelligence received the raw upload too. Phone photos and
+scans of 10-30 MB made those requests large and slow without improving the
+results: vision models downscale to about 2048px before looking at an image,
+and OCR does not need more than a few thousand pixels per side.
+
+When `enable_image_preprocessing` is on, images are prepared per consumer:
+
+- EXIF orientation is applied and all metadata (EXIF, GPS, ICC, comments) is
+  dropped,
+- the long edge is limited to `image_preprocessing_vision_max_dimension` for
+  vision requests and `image_preprocessing_di_max_dimension` for DI,
+- the result is re-encoded as JPEG at `image_preprocessing_jpeg_quality`, or
+  as PNG when the image has transparency.
+
+The prepared copy is only sent to the models. The original upload is what is
+stored in blob storage for enhanced citations. Images that can't be decoded,
+multi-page TIFFs, and images whose re-encoded copy would not be smaller are
+passed through unchanged.
+"""
+
+from config import *
+from functions_debug import debug_print
+
+IMAGE_PREPROCESSING_MIN_DIMENSION = 256
+
+
+def is_image_preprocessing_enabled(settings):
+    """True when images are pre-processed before being sent to vision analysis or DI."""
+    return bool((settings or {}).get('enable_image_preprocessing', False))
+
+
+def _setting_int(settings, key, default, minimum, maximum):
+    try:
+        value = int(settings.get(key, default))
+    except (TypeError, ValueError):
+        value = default
+    return min(max(value, minimum), maximum)
+
+
+def get_image_preprocessing_limits(settings, target):
+    """Returns (max_dimension, jpeg_quality) for target 'vision' or 'di'."""
+    settings = settings or {}
+    if target == 'di':
+        max_dimension = _setting_int(settings, 'image_preprocessing_di_max_dimension', 4096, IMAGE_PREPROCESSING_MIN_DIMENSION, 10000)
+    else:
+        max_dimension = _setting_int(settings, 'image_preprocessing_vision_max_dimension', 2048, IMAGE_PREPROCESSING_MIN_DIMENSION, 10000)
+    jpeg_quality = _setting_int(settings, 'image_preprocessing_jpeg_quality', 85, 30, 95)
+    return max_dimension, jpeg_quality
+
+
+def _has_transparency(image):
+    if image.mode in ('RGBA', 'LA'):
+        return image.getextrema()[-1][0] < 255
+    return image.mode == 'P' and 'transparency' in image.info
+
+
+def preprocess_image_bytes(image_bytes, max_dimension, jpeg_quality):
+    """
+    Downsamples, re-encodes and strips metadata from an encoded image.
+
+    Returns (bytes, mime_type), or None when the image should be sent as is.
+    """
+    from PIL import ImageOps
+
+    with Image.open(BytesIO(image_bytes)) as image:
+        if getattr(image, 'n_frames', 1) > 1:
+            # Multi-page TIFFs are read page by page by DI; keep every page
+            return None
+
+        image = ImageOps.exif_transpose(image)
+        if max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        output = BytesIO()
+        if _has_transparency(image):
+            image.convert('RGBA').save(output, format='PNG', optimize=True)
+            mime_type = 'image/png'
+        else:
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(output, format='JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+            mime_type = 'image/jpeg'
+
+    processed = output.getvalue()
+    if len(processed) >= len(image_bytes):
+        return None
+    return processed, mime_type
+
+
+def prepare_image_for_vision(image_path, settings):
+    """
+    Returns (bytes, mime_type) to send to the vision model for image_path:
+    the pre-processed copy when enabled and smaller, else the original file.
+    """
+    with open(image_path, 'rb') as image_file:
+        image_bytes = image_file.read()
+    mime_type = mimetypes.guess_type(image_path)[0] or 'image/jpeg'
+
+    if not is_image_preprocessing_enabled(settings):
+        return image_bytes, mime_type
+
+    max_dimension, jpeg_quality = get_image_preprocessing_limits(settings, 'vision')
+    try:
+        processed = preprocess_image_bytes(image_bytes, max_dimension, jpeg_quality)
+    except Exception as e:
+        print(f"[ImagePreprocessing] Sending original image to vision model, pre-processing failed: {e}")
+        return image_bytes, mime_type
+
+    if processed is None:
+        return image_bytes, mime_type
+    debug_print(f"[ImagePreprocessing] Vision image reduced from {len(image_bytes):,} to {len(processed[0]):,} bytes")
+    return processed
+
+
+def prepare_image_file_for_di(image_path, settings):
+    """
+    Writes a pre-processed copy of image_path for Document Intelligence.
+
+    Returns the path of the copy (the caller removes it), or None when the
+    original file should be sent.
+    """
+    if not is_image_preprocessing_enabled(settings):
+        return None
+
+    max_dimension, jpeg_quality = get_image_preprocessing_limits(settings, 'di')
+    try:
+        with open(image_path, 'rb') as image_file:
+            image_bytes = image_file.read()
+        processed = preprocess_image_bytes(image_bytes, max_dimension, jpeg_quality)
+    except Exception as e:
+        print(f"[ImagePreprocessing] Sending original image to Document Intelligence, pre-processing failed: {e}")
+        return None
+
+    if processed is None:
+        return None
+    processed_bytes, mime_type = processed
+    suffix = '.png' if mime_type == 'image/png' else '.jpg'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        tmp_file.write(processed_bytes)
+    debug_print(f"[ImagePreprocessing] DI image reduced from {len(image_bytes):,} to {len(processed_bytes):,} bytes")
+    return tmp_file.name
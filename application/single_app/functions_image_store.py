@@ -0,0 +1,233 @@
+# functions_image_store.py
+"""
+Binary storage for chat images (generated and uploaded).
+
+Images used to be stored as base64 data URLs inside `image` message documents,
+split across `image_chunk` documents when larger than 1.5MB. Every conversation
+load read all chunks from Cosmos and concatenated the strings in the worker.
+
+Images are now written once as binary to the configured storage backend (Azure
+Blob Storage, or Azure NetApp Files when STORAGE_BACKEND="anf") under a
+content-addressed key (SHA-256 of the bytes), together with a PNG thumbnail.
+The message document only holds a reference in `metadata.image_storage` and
+its content is the `/api/image/<message_id>` URL, which streams the binary.
+
+Identical images are stored once. When no storage backend is configured,
+store_image_data_url() returns None and callers keep the legacy chunked
+Cosmos documents, which /api/image/<message_id> still serves.
+"""
+
+import hashlib
+
+from azure.storage.blob import ContentSettings
+
+from config import *
+from functions_debug import debug_print
+
+IMAGE_STREAM_CHUNK_SIZE = 256 * 1024
+THUMBNAIL_MAX_SIZE = (320, 320)
+
+_IMAGE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/bmp': '.bmp',
+    'image/tiff': '.tiff',
+}
+
+_anf_client = None
+_anf_client_lock = threading.Lock()
+
+
+def _get_image_anf_client():
+    """One ANF client per process; get_anf_client() builds a new boto3 client per call."""
+    global _anf_client
+    if _anf_client is None:
+        with _anf_client_lock:
+            if _anf_client is None:
+                _anf_client = get_anf_client()
+    return _anf_client
+
+
+def get_image_storage_backend():
+    """Returns 'anf' or 'blob' for the backend images are written to, or None if neither is available."""
+    if is_anf_storage_enabled():
+        return 'anf' if _get_image_anf_client() else None
+    if CLIENTS.get("storage_account_office_docs_client"):
+        return 'blob'
+    return None
+
+
+def parse_image_data_url(data_url):
+    """Splits a `data:image/...;base64,` URL into (content_type, bytes). Returns (None, None) otherwise."""
+    if not isinstance(data_url, str) or not data_url.startswith('data:image/') or ',' not in data_url:
+        return None, None
+    header, encoded = data_url.split(',', 1)
+    if ';base64' not in header:
+        return None, None
+    content_type = header[len('data:'):].split(';')[0].lower()
+    try:
+        return content_type, base64.b64decode(encoded)
+    except Exception:
+        return None, None
+
+
+def get_image_keys(digest, content_type):
+    """Content-addressed object keys for an image and its thumbnail."""
+    extension = _IMAGE_EXTENSIONS.get(content_type, '.bin')
+    return f"{digest[:2]}/{digest}{extension}", f"thumbnails/{digest[:2]}/{digest}.png"
+
+
+def create_thumbnail(image_bytes, max_size=THUMBNAIL_MAX_SIZE):
+    """Returns (png_bytes, width, height) of the original image, or (None, None, None) if it can't be decoded."""
+    try:
+        with Image.open(BytesIO(image_bytes)) as img:
+            width, height = img.size
+            img.thumbnail(max_size)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA')
+            output = BytesIO()
+            img.save(output, format='PNG', optimize=True)
+            return output.getvalue(), width, height
+    except Exception as e:
+        debug_print(f"[ImageStore] Could not create thumbnail: {e}")
+        return None, None, None
+
+
+def _image_dimensions(image_bytes):
+    """Reads (width, height) from the image header without decoding the pixels."""
+    try:
+        with Image.open(BytesIO(image_bytes)) as img:
+            return img.size
+    except Exception:
+        return None, None
+
+
+def _object_exists(backend, key):
+    if backend == 'anf':
+        return _get_image_anf_client().object_exists(ANF_IMAGES_BUCKET, key)
+    blob_service_client = CLIENTS.get("storage_account_office_docs_client")
+    return blob_service_client.get_blob_client(
+        container=storage_account_images_container_name,
+        blob=key
+    ).exists()
+
+
+def _upload_object(backend, key, data, content_type):
+    if backend == 'anf':
+        _get_image_anf_client().upload_bytes(data, ANF_IMAGES_BUCKET, key, content_type=content_type)
+        return
+    blob_service_client = CLIENTS.get("storage_account_office_docs_client")
+    blob_client = blob_service_client.get_blob_client(
+        container=storage_account_images_container_name,
+        blob=key
+    )
+    blob_client.upload_blob(
+        data,
+        overwrite=True,
+        content_settings=ContentSettings(
+            content_type=content_type,
+            cache_control='private, max-age=31536000, immutable'
+        )
+    )
+
+
+def store_image_bytes(image_bytes, content_type):
+    """
+    Writes an image and its thumbnail to the storage backend.
+
+    Returns the reference stored on the message as `metadata.image_storage`.
+    Raises if no backend is available or the upload fails.
+    """
+    backend = get_image_storage_backend()
+    if not backend:
+        raise Exception("No image storage backend is configured.")
+
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    key, thumbnail_key = get_image_keys(digest, content_type)
+
+    # Content-addressed: an identical image is already stored
+    if _object_exists(backend, key):
+        debug_print(f"[ImageStore] Reusing stored image {key}")
+        thumbnail = None
+        width, height = _image_dimensions(image_bytes)
+        thumbnail_exists = _object_exists(backend, thumbnail_key)
+    else:
+        thumbnail, width, height = create_thumbnail(image_bytes)
+        _upload_object(backend, key, image_bytes, content_type)
+        thumbnail_exists = False
+        debug_print(f"[ImageStore] Stored image {key} ({len(image_bytes)} bytes) in {backend}")
+
+    if not thumbnail_exists:
+        if thumbnail is None:
+            thumbnail, width, height = create_thumbnail(image_bytes)
+        if thumbnail:
+            _upload_object(backend, thumbnail_key, thumbnail, 'image/png')
+            thumbnail_exists = True
+
+    return {
+        'backend': backend,
+        'key': key,
+        'thumbnail_key': thumbnail_key if thumbnail_exists else None,
+        'content_type': content_type,
+        'size': len(image_bytes),
+        'sha256': digest,
+        'width': width,
+        'height': height,
+    }
+
+
+def store_image_data_url(data_url):
+    """
+    Stores a base64 data URL image. Returns the reference, or None when the URL is
+    not a data URL, no backend is configured or the upload fails, in which case the
+    caller falls back to storing the data URL in Cosmos.
+    """
+    content_type, image_bytes = parse_image_data_url(data_url)
+    if not image_bytes:
+        return None
+    if not get_image_storage_backend():
+        return None
+    try:
+        return store_image_bytes(image_bytes, content_type)
+    except Exception as e:
+        print(f"[ImageStore] Failed to store image, falling back to Cosmos: {e}")
+        return None
+
+
+def get_image_url(message_id, thumbnail=False):
+    """URL the frontend uses to load an image message."""
+    url = f"/api/image/{message_id}"
+    return f"{url}?size=thumbnail" if thumbnail else url
+
+
+def open_image_stream(reference, thumbnail=False):
+    """
+    Opens a stored image for streaming.
+
+    Returns (chunks, size, content_type), where chunks is an iterator of bytes.
+    Serves the original image if a thumbnail was requested but none was stored.
+    """
+    key = reference.get('key')
+    content_type = reference.get('content_type') or 'application/octet-stream'
+    if thumbnail and reference.get('thumbnail_key'):
+        key = reference['thumbnail_key']
+        content_type = 'image/png'
+
+    if reference.get('backend') == 'anf':
+        anf_client = _get_image_anf_client()
+        if not anf_client:
+            raise Exception("ANF storage client not available.")
+        stream = anf_client.open_stream(ANF_IMAGES_BUCKET, key, chunk_size=IMAGE_STREAM_CHUNK_SIZE)
+        return stream['chunks'], stream.get('size'), content_type
+
+    blob_service_client = CLIENTS.get("storage_account_office_docs_client")
+    if not blob_service_client:
+        raise Exception("Blob service client not available or not configured.")
+    downloader = blob_service_client.get_blob_client(
+        container=storage_account_images_container_name,
+        blob=key
+    ).download_blob(max_concurrency=1)
+    return downloader.chunks(), downloader.size, content_type
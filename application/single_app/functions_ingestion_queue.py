@@ -0,0 +1,512 @@
+# functions_ingestion_queue.py
+"""
+Durable ingestion job queue.
+
+Document uploads and metadata extraction used to run on flask_executor threads
+inside the web process, so a restart or scale-in lost in-flight work and one
+tenant uploading hundreds of files could occupy every worker. When
+`enable_durable_ingestion_queue` is on, those tasks are written to the Cosmos
+`ingestion_jobs` container instead and executed by IngestionWorker instances,
+either embedded in the web process or run separately via ingestion_worker.py.
+
+- Claiming a job sets a lease with an optimistic-concurrency (etag) replace, so
+  only one worker runs it. Workers heartbeat while the handler runs; a lease
+  that expires (worker crashed or was scaled in) is returned to the queue until
+  max attempts is reached, after which the document is marked failed.
+- Jobs are ordered by priority, then enqueue time.
+- A tenant (user, group or public workspace) may only have
+  `ingestion_max_jobs_per_tenant` jobs running at once; other tenants' jobs are
+  claimed ahead of the excess.
+
+InMemoryJobStore implements the same store interface for tests and local runs.
+"""
+
+import importlib
+import socket
+from collections import Counter
+
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError
+
+from config import *
+from functions_settings import *
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 1
+PRIORITY_MAX = 99
+
+# Finished jobs are kept for a week, then removed by Cosmos TTL
+FINISHED_JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+# Delay before a failed job is retried, multiplied by the attempt number
+RETRY_BACKOFF_SECONDS = 30
+
+# job_type -> (module, function). Resolved lazily to avoid circular imports.
+INGESTION_JOB_HANDLERS = {
+    "document_upload": ("functions_documents", "process_document_upload_background"),
+    "metadata_extraction": ("functions_documents", "process_metadata_extraction_background"),
+}
+
+
+def get_tenant_id(user_id, group_id=None, public_workspace_id=None):
+    """Returns the concurrency-cap key for a workspace."""
+    if public_workspace_id:
+        return f"public:{public_workspace_id}"
+    if group_id:
+        return f"group:{group_id}"
+    return f"user:{user_id}"
+
+
+def _sort_key(priority, available_at):
+    # Single string field so Cosmos can ORDER BY it without a composite index
+    priority = min(max(int(priority), 0), PRIORITY_MAX)
+    return f"{PRIORITY_MAX - priority:02d}|{available_at:017.6f}"
+
+
+class InMemoryJobStore:
+    """Process-local job store with the same interface as CosmosJobStore."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            stored = dict(job, _etag=str(uuid.uuid4()))
+            self._jobs[job["id"]] = stored
+            return dict(stored)
+
+    def read(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def query(self, status, limit=None, exclude_tenants=None, available_by=None):
+        exclude_tenants = set(exclude_tenants or ())
+        with self._lock:
+            jobs = sorted(
+                (
+                    dict(j) for j in self._jobs.values()
+                    if j["status"] == status
+                    and j["tenant_id"] not in exclude_tenants
+                    and (available_by is None or j.get("available_at", 0) <= available_by)
+                ),
+                key=lambda j: j["sort_key"]
+            )
+        return jobs[:limit] if limit else jobs
+
+    def replace_if_unchanged(self, job):
+        """Writes job only if its _etag still matches. Returns the stored job or None."""
+        with self._lock:
+            current = self._jobs.get(job["id"])
+            if current is None or current["_etag"] != job.get("_etag"):
+                return None
+            stored = dict(job, _etag=str(uuid.uuid4()))
+            self._jobs[job["id"]] = stored
+            return dict(stored)
+
+
+class CosmosJobStore:
+    """Job store backed by the Cosmos ingestion_jobs container (partition key /id)."""
+
+    def __init__(self, container):
+        self.container = container
+
+    def create(self, job):
+        return self.container.create_item(body=job)
+
+    def read(self, job_id):
+        try:
+            return self.container.read_item(item=job_id, partition_key=job_id)
+        except CosmosResourceNotFoundError:
+            return None
+
+    def query(self, status, limit=None, exclude_tenants=None, available_by=None):
+        top = f"TOP {int(limit)} " if limit else ""
+        conditions = ["c.status = @status"]
+        parameters = [{"name": "@status", "value": status}]
+        if exclude_tenants:
+            conditions.append("NOT ARRAY_CONTAINS(@excluded_tenants, c.tenant_id)")
+            parameters.append({"name": "@excluded_tenants", "value": list(exclude_tenants)})
+        if available_by is not None:
+            conditions.append("c.available_at <= @available_by")
+            parameters.append({"name": "@available_by", "value": available_by})
+        return list(self.container.query_items(
+            query=f"SELECT {top}* FROM c WHERE {' AND '.join(conditions)} ORDER BY c.sort_key ASC",
+            parameters=parameters,
+            enable_cross_partition_query=True
+        ))
+
+    def replace_if_unchanged(self, job):
+        try:
+            return self.container.replace_item(
+                item=job["id"],
+                body=job,
+                etag=job.get("_etag"),
+                match_condition=MatchConditions.IfNotModified
+            )
+        except CosmosAccessConditionFailedError:
+            return None
+
+
+class IngestionQueue:
+    """Leased, prioritized job queue with per-tenant running caps."""
+
+    def __init__(self, store, lease_seconds=120, max_attempts=3, max_jobs_per_tenant=5, candidate_batch_size=50):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_jobs_per_tenant = max_jobs_per_tenant
+        self.candidate_batch_size = candidate_batch_size
+
+    def enqueue(self, job_type, tenant_id, payload, priority=PRIORITY_NORMAL, job_key=None):
+        """Adds a job to the queue and returns it."""
+        now = time.time()
+        job = {
+            "id": str(uuid.uuid4()),
+            "job_type": job_type,
+            "job_key": job_key,
+            "tenant_id": tenant_id,
+            "payload": payload,
+            "priority": priority,
+            "status": JOB_STATUS_QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "enqueued_at": now,
+            "available_at": now,
+            "sort_key": _sort_key(priority, now),
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": None
+        }
+        return self.store.create(job)
+
+    def get_running_counts(self, now=None):
+        """Returns {tenant_id: running job count} for jobs holding a live lease."""
+        now = now or time.time()
+        return Counter(
+            job["tenant_id"]
+            for job in self.store.query(JOB_STATUS_RUNNING)
+            if (job.get("lease_expires_at") or 0) > now
+        )
+
+    def claim(self, worker_id):
+        """
+        Leases the highest-priority runnable job whose tenant is under its cap.
+
+        Tenants at their cap and jobs still in retry backoff are excluded in the
+        query itself, so a capped tenant's backlog can't fill the candidate batch
+        and starve other tenants. The cap is enforced per claim, so concurrent
+        workers racing on the same tenant can briefly exceed it by at most
+        (workers - 1).
+
+        Returns:
+            dict: The claimed job, or None when nothing is runnable.
+        """
+        now = time.time()
+        running = self.get_running_counts(now)
+        capped_tenants = [
+            tenant_id for tenant_id, count in running.items()
+            if self.max_jobs_per_tenant and count >= self.max_jobs_per_tenant
+        ]
+
+        candidates = self.store.query(
+            JOB_STATUS_QUEUED,
+            limit=self.candidate_batch_size,
+            exclude_tenants=capped_tenants,
+            available_by=now
+        )
+        for candidate in candidates:
+
+            candidate.update({
+                "status": JOB_STATUS_RUNNING,
+                "lease_owner": worker_id,
+                "lease_expires_at": now + self.lease_seconds,
+                "attempts": candidate.get("attempts", 0) + 1,
+                "started_at": now
+            })
+            claimed = self.store.replace_if_unchanged(candidate)
+            if claimed:
+                return claimed
+            # Another worker claimed it first; try the next candidate
+
+        return None
+
+    def heartbeat(self, job):
+        """Extends the lease. Returns the updated job, or None if the lease was lost."""
+        if job.get("status") != JOB_STATUS_RUNNING:
+            return None
+        return self.store.replace_if_unchanged(dict(job, lease_expires_at=time.time() + self.lease_seconds))
+
+    def complete(self, job):
+        """Marks a leased job completed. Returns False if this worker no longer holds the lease."""
+        return self._finish(job, {"status": JOB_STATUS_COMPLETED, "ttl": FINISHED_JOB_TTL_SECONDS})
+
+    def fail(self, job, error):
+        """
+        Records a handler failure. The job is retried with backoff until
+        max_attempts is reached, then marked failed.
+
+        Returns:
+            dict: The updated job, or None if this worker no longer holds the lease.
+        """
+        now = time.time()
+        error = str(error)[:1000]
+        if job.get("attempts", 0) < job.get("max_attempts", self.max_attempts):
+            available_at = now + RETRY_BACKOFF_SECONDS * job.get("attempts", 1)
+            updates = {
+                "status": JOB_STATUS_QUEUED,
+                "available_at": available_at,
+                "sort_key": _sort_key(job.get("priority", PRIORITY_NORMAL), available_at),
+                "last_error": error
+            }
+        else:
+            updates = {"status": JOB_STATUS_FAILED, "last_error": error, "ttl": FINISHED_JOB_TTL_SECONDS}
+        return self._finish(job, updates)
+
+    def _finish(self, job, updates):
+        current = self.store.read(job["id"])
+        if not current or current.get("status") != JOB_STATUS_RUNNING or current.get("lease_owner") != job.get("lease_owner"):
+            return None
+        current.update(updates)
+        current.update({"lease_owner": None, "lease_expires_at": None, "finished_at": time.time()})
+        return self.store.replace_if_unchanged(current)
+
+    def recover_expired_leases(self):
+        """
+        Returns jobs whose worker stopped heartbeating to the queue.
+
+        Returns:
+            list: Jobs that exhausted max_attempts and were marked failed.
+        """
+        now = time.time()
+        exhausted = []
+        for job in self.store.query(JOB_STATUS_RUNNING):
+            if (job.get("lease_expires_at") or 0) > now:
+                continue
+
+            previous_owner = job.get("lease_owner")
+            if job.get("attempts", 0) >= job.get("max_attempts", self.max_attempts):
+                job.update({
+                    "status": JOB_STATUS_FAILED,
+                    "last_error": f"Lease expired on worker {previous_owner}",
+                    "finished_at": now,
+                    "ttl": FINISHED_JOB_TTL_SECONDS
+                })
+            else:
+                job.update({
+                    "status": JOB_STATUS_QUEUED,
+                    "available_at": now,
+                    "sort_key": _sort_key(job.get("priority", PRIORITY_NORMAL), now),
+                    "last_error": f"Lease expired on worker {previous_owner}"
+                })
+            job.update({"lease_owner": None, "lease_expires_at": None})
+
+            recovered = self.store.replace_if_unchanged(job)
+            if recovered:
+                print(f"[IngestionQueue] Recovered job {job['id']} ({job['job_type']}) from {previous_owner}; status={recovered['status']}")
+                if recovered["status"] == JOB_STATUS_FAILED:
+                    exhausted.append(recovered)
+        return exhausted
+
+    def get_stats(self):
+        running = self.get_running_counts()
+        return {
+            "queued": len(self.store.query(JOB_STATUS_QUEUED)),
+            "running": sum(running.values()),
+            "running_by_tenant": dict(running)
+        }
+
+
+def resolve_ingestion_handler(job_type, handlers=None):
+    """Returns the callable registered for job_type."""
+    module_name, function_name = (handlers or INGESTION_JOB_HANDLERS)[job_type]
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def mark_ingestion_job_failed(job):
+    """Records a permanently failed job on its document so it is not left mid-status."""
+    payload = job.get("payload", {})
+    if not payload.get("document_id"):
+        return
+    try:
+        from functions_documents import update_document
+        update_document(
+            document_id=payload["document_id"],
+            user_id=payload.get("user_id"),
+            group_id=payload.get("group_id"),
+            public_workspace_id=payload.get("public_workspace_id"),
+            status=f"Error: Processing failed after {job.get('attempts', 0)} attempt(s): {job.get('last_error')}"
+        )
+    except Exception as e:
+        print(f"[IngestionQueue] Failed to mark document {payload['document_id']} as failed: {e}")
+
+    temp_file_path = payload.get("temp_file_path")
+    if temp_file_path and os.path.exists(temp_file_path):
+        try:
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+
+
+class IngestionWorker:
+    """Claims and runs jobs from an IngestionQueue, heartbeating while each job runs."""
+
+    def __init__(self, ingestion_queue, worker_id=None, handlers=None, poll_interval_seconds=2.0,
+                 recovery_interval_seconds=30.0, on_job_failed=mark_ingestion_job_failed):
+        self.queue = ingestion_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.handlers = handlers
+        self.poll_interval_seconds = poll_interval_seconds
+        self.recovery_interval_seconds = recovery_interval_seconds
+        self.on_job_failed = on_job_failed
+        self._last_recovery = 0.0
+
+    def run_once(self):
+        """Runs at most one job. Returns True if a job was claimed."""
+        if time.time() - self._last_recovery >= self.recovery_interval_seconds:
+            self._last_recovery = time.time()
+            for job in self.queue.recover_expired_leases():
+                self._report_failed(job)
+
+        job = self.queue.claim(self.worker_id)
+        if not job:
+            return False
+        self._execute(job)
+        return True
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        print(f"[IngestionWorker] {self.worker_id} started")
+        while not stop_event.is_set():
+            try:
+                if not self.run_once():
+                    stop_event.wait(self.poll_interval_seconds)
+            except Exception as e:
+                print(f"[IngestionWorker] {self.worker_id} error: {e}")
+                stop_event.wait(self.poll_interval_seconds)
+
+    def _execute(self, job):
+        state = {"job": job}
+        state_lock = threading.Lock()
+        done = threading.Event()
+
+        def keep_lease():
+            while not done.wait(max(1.0, self.queue.lease_seconds / 3)):
+                with state_lock:
+                    renewed = self.queue.heartbeat(state["job"])
+                    if renewed:
+                        state["job"] = renewed
+                    else:
+                        print(f"[IngestionWorker] Lost lease on job {job['id']}")
+                        return
+
+        heartbeat_thread = threading.Thread(target=keep_lease, name=f"ingestion-heartbeat-{job['id']}", daemon=True)
+        heartbeat_thread.start()
+        error = None
+        try:
+            handler = resolve_ingestion_handler(job["job_type"], self.handlers)
+            handler(**job.get("payload", {}))
+        except Exception as e:
+            error = e
+            print(f"[IngestionWorker] Job {job['id']} ({job['job_type']}) failed: {e}")
+        finally:
+            done.set()
+            heartbeat_thread.join()
+
+        if error is None:
+            self.queue.complete(state["job"])
+            return
+
+        failed = self.queue.fail(state["job"], error)
+        if failed and failed["status"] == JOB_STATUS_FAILED:
+            self._report_failed(failed)
+
+    def _report_failed(self, job):
+        if self.on_job_failed:
+            self.on_job_failed(job)
+
+
+_ingestion_queue = None
+_ingestion_queue_lock = threading.Lock()
+
+
+def is_durable_ingestion_enabled(settings=None):
+    settings = settings or get_settings() or {}
+    return bool(settings.get('enable_durable_ingestion_queue', False))
+
+
+def get_ingestion_queue(settings=None):
+    """Returns the process-wide Cosmos-backed IngestionQueue."""
+    global _ingestion_queue
+    if _ingestion_queue is None:
+        with _ingestion_queue_lock:
+            if _ingestion_queue is None:
+                settings = settings or get_settings() or {}
+                _ingestion_queue = IngestionQueue(
+                    CosmosJobStore(cosmos_ingestion_jobs_container),
+                    lease_seconds=int(settings.get('ingestion_lease_seconds', 120)),
+                    max_attempts=int(settings.get('ingestion_max_attempts', 3)),
+                    max_jobs_per_tenant=int(settings.get('ingestion_max_jobs_per_tenant', 5))
+                )
+    return _ingestion_queue
+
+
+def submit_ingestion_task(job_type, job_key, user_id, group_id=None, public_workspace_id=None,
+                          priority=PRIORITY_NORMAL, store_future=True, **payload):
+    """
+    Runs an ingestion task on the durable queue when enabled, otherwise on flask_executor.
+
+    Args:
+        job_type (str): Key in INGESTION_JOB_HANDLERS.
+        job_key (str): Tracking key (flask_executor future key / job label).
+        user_id, group_id, public_workspace_id: Workspace scope; also passed to the handler.
+        priority (int): PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+        store_future (bool): Store the flask_executor future under job_key. Stored keys
+            must be unique, so pass False for tasks that can be queued again for the
+            same job_key while an earlier one is still stored.
+        **payload: Remaining JSON-serializable handler keyword arguments.
+    """
+    payload["user_id"] = user_id
+    if group_id is not None:
+        payload["group_id"] = group_id
+    if public_workspace_id is not None:
+        payload["public_workspace_id"] = public_workspace_id
+
+    if not is_durable_ingestion_enabled():
+        executor = current_app.extensions['executor']
+        if not store_future:
+            return executor.submit(resolve_ingestion_handler(job_type), **payload)
+        return executor.submit_stored(
+            job_key,
+            resolve_ingestion_handler(job_type),
+            **payload
+        )
+
+    return get_ingestion_queue().enqueue(
+        job_type,
+        get_tenant_id(user_id, group_id, public_workspace_id),
+        payload,
+        priority=priority,
+        job_key=job_key
+    )
+
+
+def start_embedded_ingestion_workers(settings=None):
+    """Starts `ingestion_embedded_workers` daemon worker threads in this process."""
+    settings = settings or get_settings() or {}
+    if not is_durable_ingestion_enabled(settings):
+        return []
+
+    threads = []
+    for index in range(int(settings.get('ingestion_embedded_workers', 4))):
+        worker = IngestionWorker(get_ingestion_queue(settings))
+        thread = threading.Thread(target=worker.run_forever, name=f"ingestion-worker-{index}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
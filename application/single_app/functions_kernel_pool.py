@@ -0,0 +1,222 @@
+# functions_kernel_pool.py
+"""
+Pool of ready Semantic Kernel instances for per-user (workspace) mode.
+
+With per_user_semantic_kernel enabled, every chat request used to rebuild the
+user's kernel: reload user settings, agents and actions from Cosmos, resolve
+Key Vault secrets, instantiate every plugin (parsing OpenAPI specs) and create
+the chat services. The pool keeps the built kernel and agents per user in a
+bounded LRU so warm chats skip all of that.
+
+Each entry is stored with a fingerprint of what it was built from:
+- the app settings,
+- the user's agent-related settings (enable_agents, selected_agent, active group),
+- the id and _etag of the user's personal agents and actions (and group or
+  global ones when they are in play),
+- per-request overrides (g.force_enable_agents / g.request_agent_name).
+
+Any save or delete changes an _etag or the id list, so the next request sees a
+different fingerprint and rebuilds the kernel. This works across instances.
+
+A kernel is leased to one request at a time because agents keep per-invocation
+state. A concurrent request from the same user gets a one-off kernel.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g
+
+from config import (
+    cosmos_personal_agents_container,
+    cosmos_personal_actions_container,
+    cosmos_group_agents_container,
+    cosmos_group_actions_container,
+    cosmos_global_agents_container,
+    cosmos_global_actions_container,
+)
+
+DEFAULT_KERNEL_POOL_SIZE = 100
+# Rebuild at least this often so rotated Key Vault secrets and tokens are picked up
+KERNEL_POOL_MAX_AGE_SECONDS = 3600
+
+
+class PooledKernel:
+    """A kernel and its agents built for one user, leased to one request at a time."""
+
+    def __init__(self, user_id, fingerprint, kernel, kernel_agents):
+        self.user_id = user_id
+        self.fingerprint = fingerprint
+        self.kernel = kernel
+        self.kernel_agents = kernel_agents
+        self.created_at = time.time()
+        self.in_use = False
+        self.discarded = False
+
+
+class KernelPool:
+    """Bounded LRU of PooledKernel entries keyed by user id."""
+
+    def __init__(self, max_size=DEFAULT_KERNEL_POOL_SIZE, max_age_seconds=KERNEL_POOL_MAX_AGE_SECONDS):
+        self.max_size = max(1, max_size)
+        self.max_age_seconds = max_age_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _is_expired(self, entry):
+        return self.max_age_seconds is not None and time.time() - entry.created_at > self.max_age_seconds
+
+    def checkout(self, user_id, fingerprint):
+        """Leases the user's pooled kernel if it matches the fingerprint; otherwise returns None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.fingerprint != fingerprint or self._is_expired(entry):
+                self._entries.pop(user_id)
+                entry.discarded = True
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            if entry.in_use:
+                self.misses += 1
+                return None
+            entry.in_use = True
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry
+
+    def add(self, user_id, fingerprint, kernel, kernel_agents):
+        """
+        Stores a freshly built kernel and returns it leased. Returns None (the
+        kernel is then used once and dropped) if the user's current entry is
+        leased by another request.
+        """
+        with self._lock:
+            current = self._entries.get(user_id)
+            if current is not None and current.in_use:
+                return None
+            if current is not None:
+                current.discarded = True
+            entry = PooledKernel(user_id, fingerprint, kernel, kernel_agents)
+            entry.in_use = True
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                evicted.discarded = True
+                self.evictions += 1
+            return entry
+
+    def release(self, entry):
+        with self._lock:
+            entry.in_use = False
+
+    def invalidate(self, user_id=None):
+        """Drops one user's kernel, or every kernel when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                entries = list(self._entries.values())
+                self._entries.clear()
+            else:
+                entry = self._entries.pop(user_id, None)
+                entries = [entry] if entry else []
+            for entry in entries:
+                entry.discarded = True
+            self.invalidations += len(entries)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "in_use": sum(1 for entry in self._entries.values() if entry.in_use),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+_kernel_pool = None
+_kernel_pool_lock = threading.Lock()
+
+
+def get_kernel_pool(settings):
+    """Returns the process-wide KernelPool, or None when per_user_kernel_pool_size is 0."""
+    global _kernel_pool
+    max_size = int(settings.get('per_user_kernel_pool_size', DEFAULT_KERNEL_POOL_SIZE) or 0)
+    if max_size <= 0:
+        return None
+    with _kernel_pool_lock:
+        if _kernel_pool is None:
+            _kernel_pool = KernelPool(max_size=max_size)
+        else:
+            _kernel_pool.max_size = max_size
+        return _kernel_pool
+
+
+def _document_versions(container, query, parameters, partition_key=None):
+    kwargs = {"partition_key": partition_key} if partition_key is not None else {"enable_cross_partition_query": True}
+    items = container.query_items(query=query, parameters=parameters, **kwargs)
+    return sorted((item.get("id"), item.get("_etag")) for item in items)
+
+
+def compute_kernel_fingerprint(user_id, settings, user_settings, force_enable_agents=False, request_agent_name=None):
+    """
+    Hashes everything load_user_semantic_kernel() builds from. Only ids and
+    _etags are read from the agent/action containers, so this is much cheaper
+    than loading the documents. The request's agent overrides
+    (g.force_enable_agents / g.request_agent_name) are passed in by the caller.
+    """
+    selected_agent = user_settings.get('selected_agent')
+    selected_agent_data = selected_agent if isinstance(selected_agent, dict) else {}
+    merge_global = settings.get('merge_global_semantic_kernel_with_workspace', False)
+
+    user_scope = "SELECT c.id, c._etag FROM c WHERE c.user_id = @user_id"
+    user_parameters = [{"name": "@user_id", "value": user_id}]
+    parts = {
+        "settings": hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest(),
+        "enable_agents": user_settings.get('enable_agents', True),
+        "selected_agent": selected_agent,
+        "active_group": user_settings.get('activeGroupOid'),
+        "force_enable_agents": force_enable_agents,
+        "request_agent_name": request_agent_name,
+        "personal_agents": _document_versions(cosmos_personal_agents_container, user_scope, user_parameters, user_id),
+        "personal_actions": _document_versions(cosmos_personal_actions_container, user_scope, user_parameters, user_id),
+    }
+
+    group_id = selected_agent_data.get('group_id') or user_settings.get('activeGroupOid')
+    if selected_agent_data.get('is_group') and group_id:
+        group_scope = "SELECT c.id, c._etag FROM c WHERE c.group_id = @group_id"
+        group_parameters = [{"name": "@group_id", "value": group_id}]
+        parts["group_agents"] = _document_versions(cosmos_group_agents_container, group_scope, group_parameters, group_id)
+        parts["group_actions"] = _document_versions(cosmos_group_actions_container, group_scope, group_parameters, group_id)
+
+    if merge_global:
+        global_scope = "SELECT c.id, c._etag FROM c"
+        parts["global_agents"] = _document_versions(cosmos_global_agents_container, global_scope, [])
+        parts["global_actions"] = _document_versions(cosmos_global_actions_container, global_scope, [])
+
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def release_kernel_lease():
+    """Returns the request's pooled kernel to the pool (called on request teardown)."""
+    entry = g.pop('kernel_pool_lease', None)
+    if entry is not None and _kernel_pool is not None:
+        _kernel_pool.release(entry)
+
+
+def get_kernel_pool_stats():
+    if _kernel_pool is None:
+        return {"size": 0, "max_size": 0, "in_use": 0, "hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+    return _kernel_pool.get_stats()
@@ -1,7 +1,12 @@
 # functions_keyvault.py
 
+import os
 import re
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functions_appinsights import log_event
 from config import *
 from functions_authentication import *
@@ -50,6 +55,85 @@ class SecretReturnType(Enum):
     TRIGGER = "trigger"
     NAME = "name"
 
+# Resolved secrets are cached per process. Saves and deletes made through this module
+# invalidate the cache right away. Changes made directly in Key Vault, or on other
+# instances, show up once the TTL expires.
+KEY_VAULT_SECRET_CACHE_TTL_SECONDS = int(os.getenv("KEY_VAULT_SECRET_CACHE_TTL_SECONDS", "300"))
+KEY_VAULT_SECRET_CACHE_MAX_SIZE = int(os.getenv("KEY_VAULT_SECRET_CACHE_MAX_SIZE", "1000"))
+KEY_VAULT_PREFETCH_MAX_WORKERS = 8
+
+class KeyVaultSecretCache:
+    """Size-bounded LRU of secret values keyed by (vault URL, full secret name), with a TTL."""
+
+    def __init__(self, ttl_seconds=KEY_VAULT_SECRET_CACHE_TTL_SECONDS, max_size=KEY_VAULT_SECRET_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key_vault_url, secret_name):
+        key = (key_vault_url, secret_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key_vault_url, secret_name, value):
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        key = (key_vault_url, secret_name)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, secret_name=None):
+        """Drops one secret (in every vault), or everything when secret_name is None."""
+        with self._lock:
+            if secret_name is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[1] == secret_name]:
+                del self._entries[key]
+
+_secret_cache = KeyVaultSecretCache()
+_keyvault_credentials = {}
+_secret_clients = {}
+_keyvault_clients_lock = threading.Lock()
+
+def get_keyvault_url(key_vault_name):
+    return f"https://{key_vault_name}{KEY_VAULT_DOMAIN}"
+
+def get_keyvault_secret_client(key_vault_url):
+    """
+    Get the shared SecretClient for a vault. Clients and credentials are created once per
+    process (and Key Vault identity) so the credential chain isn't probed on every secret read.
+    """
+    settings = app_settings_cache.get_settings_cache()
+    key_vault_identity = settings.get("key_vault_identity", None)
+    with _keyvault_clients_lock:
+        client = _secret_clients.get((key_vault_url, key_vault_identity))
+        if client is None:
+            client = SecretClient(vault_url=key_vault_url, credential=get_keyvault_credential())
+            _secret_clients[(key_vault_url, key_vault_identity)] = client
+        return client
+
+def invalidate_keyvault_secret_cache(full_secret_name=None):
+    """
+    Drop a cached secret value (or every cached value when full_secret_name is None).
+
+    Args:
+        full_secret_name (str): The full secret name to invalidate.
+    """
+    _secret_cache.invalidate(full_secret_name)
+
 def retrieve_secret_from_key_vault(secret_name, scope_value, scope="global", source="global"):
     """
     Retrieve a secret from Key Vault using a dynamic name based on source, scope, and scope_value.
@@ -99,12 +183,17 @@ def retrieve_secret_from_key_vault_by_full_name(full_secret_name):
     if not validate_secret_name_dynamic(full_secret_name):
         return full_secret_name
 
+    key_vault_url = get_keyvault_url(key_vault_name)
+    cached_value = _secret_cache.get(key_vault_url, full_secret_name)
+    if cached_value is not None:
+        return cached_value
+
     try:
-        key_vault_url = f"https://{key_vault_name}{KEY_VAULT_DOMAIN}"
-        secret_client = SecretClient(vault_url=key_vault_url, credential=get_keyvault_credential())
+        secret_client = get_keyvault_secret_client(key_vault_url)
 
         retrieved_secret = secret_client.get_secret(full_secret_name)
         print(f"Secret '{full_secret_name}' retrieved successfully from Key Vault.")
+        _secret_cache.set(key_vault_url, full_secret_name, retrieved_secret.value)
         return retrieved_secret.value
     except Exception as e:
         logging.error(f"Failed to retrieve secret '{full_secret_name}' from Key Vault: {str(e)}")
@@ -149,15 +238,75 @@ def store_secret_in_key_vault(secret_name, secret_value, scope_value, source="gl
     full_secret_name = build_full_secret_name(secret_name, scope_value, source, scope)
 
     try:
-        key_vault_url = f"https://{key_vault_name}{KEY_VAULT_DOMAIN}"
-        secret_client = SecretClient(vault_url=key_vault_url, credential=get_keyvault_credential())
+        key_vault_url = get_keyvault_url(key_vault_name)
+        secret_client = get_keyvault_secret_client(key_vault_url)
+        _secret_cache.invalidate(full_secret_name)
         secret_client.set_secret(full_secret_name, secret_value)
+        _secret_cache.set(key_vault_url, full_secret_name, secret_value)
         print(f"Secret '{full_secret_name}' stored successfully in Key Vault.")
         return full_secret_name
     except Exception as e:
         logging.error(f"Failed to store secret '{full_secret_name}' in Key Vault: {str(e)}")
         return secret_value
 
+def collect_keyvault_secret_references(value):
+    """
+    Collect every Key Vault secret reference (full secret name) in an agent or plugin
+    manifest, or a list of them.
+
+    Args:
+        value: A dict, list or string to search.
+
+    Returns:
+        set: The full secret names found.
+    """
+    references = set()
+    if isinstance(value, str):
+        if validate_secret_name_dynamic(value):
+            references.add(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            references |= collect_keyvault_secret_references(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            references |= collect_keyvault_secret_references(item)
+    return references
+
+def prefetch_keyvault_secrets(full_secret_names):
+    """
+    Load secrets into the cache concurrently, so resolving an agent and its plugins
+    makes one parallel batch of Key Vault reads instead of one read per field.
+
+    Args:
+        full_secret_names (iterable): Full secret names to load.
+
+    Returns:
+        dict: Secret name to value, for every name that was resolved.
+    """
+    settings = app_settings_cache.get_settings_cache()
+    key_vault_name = settings.get("key_vault_name", None)
+    if not settings.get("enable_key_vault_secret_storage", False) or not key_vault_name:
+        return {}
+
+    key_vault_url = get_keyvault_url(key_vault_name)
+    names = [name for name in set(full_secret_names) if isinstance(name, str) and validate_secret_name_dynamic(name)]
+    resolved = {}
+    missing = []
+    for name in names:
+        cached_value = _secret_cache.get(key_vault_url, name)
+        if cached_value is not None:
+            resolved[name] = cached_value
+        else:
+            missing.append(name)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(KEY_VAULT_PREFETCH_MAX_WORKERS, len(missing))) as executor:
+            for name, value in zip(missing, executor.map(retrieve_secret_from_key_vault_by_full_name, missing)):
+                # retrieve returns the name itself when the read fails
+                if value != name:
+                    resolved[name] = value
+    return resolved
+
 def build_full_secret_name(secret_name, scope_value, source, scope):
     """
     Build the full secret name for Key Vault and check its length.
@@ -455,10 +604,11 @@ def keyvault_plugin_delete_helper(plugin_dict, scope_value, scope="global"):
             secret_name = auth['key']
             if validate_secret_name_dynamic(secret_name):
                 try:
-                    key_vault_url = f"https://{key_vault_name}{KEY_VAULT_DOMAIN}"
+                    key_vault_url = get_keyvault_url(key_vault_name)
                     log_event(f"Deleting action secret '{secret_name}' for action '{plugin_name}' for '{scope}' '{scope_value}'", level="INFO")
-                    client = SecretClient(vault_url=key_vault_url, credential=get_keyvault_credential())
+                    client = get_keyvault_secret_client(key_vault_url)
                     client.begin_delete_secret(secret_name)
+                    _secret_cache.invalidate(secret_name)
                 except Exception as e:
                     logging.error(f"Error deleting action secret '{secret_name}' for action '{plugin_name}': {e}")
                     raise Exception(f"Error deleting action secret '{secret_name}' for action '{plugin_name}': {e}")
@@ -472,10 +622,11 @@ def keyvault_plugin_delete_helper(plugin_dict, scope_value, scope="global"):
                 akv_key = f"{plugin_name}-{base_field}".replace('__', '-')
                 try:
                     keyvault_secret_name = build_full_secret_name(akv_key, scope_value, addset_source, scope)
-                    key_vault_url = f"https://{key_vault_name}{KEY_VAULT_DOMAIN}"
+                    key_vault_url = get_keyvault_url(key_vault_name)
                     log_event(f"Deleting action additionalField secret '{k}' for action '{plugin_name}' for '{scope}' '{scope_value}'", level="INFO")
-                    client = SecretClient(vault_url=key_vault_url, credential=get_keyvault_credential())
+                    client = get_keyvault_secret_client(key_vault_url)
                     client.begin_delete_secret(keyvault_secret_name)
+                    _secret_cache.invalidate(keyvault_secret_name)
                 except Exception as e:
                     logging.error(f"Error deleting action additionalField secret '{k}' for action '{plugin_name}': {e}")
                     raise Exception(f"Error deleting action additionalField secret '{k}' for action '{plugin_name}': {e}")
@@ -510,10 +661,11 @@ def keyvault_agent_delete_helper(agent_dict, scope_value, scope="global"):
             secret_name = updated[key]
             if validate_secret_name_dynamic(secret_name):
                 try:
-                    key_vault_url = f"https://{key_vault_name}{KEY_VAULT_DOMAIN}"
+                    key_vault_url = get_keyvault_url(key_vault_name)
                     log_event(f"Deleting agent secret '{secret_name}' for agent '{agent_name}' for '{scope}' '{scope_value}'", level="INFO")
-                    client = SecretClient(vault_url=key_vault_url, credential=get_keyvault_credential())
+                    client = get_keyvault_secret_client(key_vault_url)
                     client.begin_delete_secret(secret_name)
+                    _secret_cache.invalidate(secret_name)
                 except Exception as e:
                     logging.error(f"Error deleting secret '{secret_name}' for agent '{agent_name}': {e}")
                     raise Exception(f"Error deleting secret '{secret_name}' for agent '{agent_name}': {e}")
@@ -522,16 +674,20 @@ def keyvault_agent_delete_helper(agent_dict, scope_value, scope="global"):
 def get_keyvault_credential():
     """
     Get the Key Vault credential using DefaultAzureCredential, optionally with a managed identity client ID.
+    One credential is shared per identity so its token cache is reused.
 
     Returns:
         DefaultAzureCredential: The credential object for Key Vault access.
     """
     settings = app_settings_cache.get_settings_cache()
     key_vault_identity = settings.get("key_vault_identity", None)
-    if key_vault_identity is not None:
-        credential = DefaultAzureCredential(managed_identity_client_id=key_vault_identity)
-    else:
-        credential = DefaultAzureCredential()
+    credential = _keyvault_credentials.get(key_vault_identity)
+    if credential is None:
+        if key_vault_identity is not None:
+            credential = DefaultAzureCredential(managed_identity_client_id=key_vault_identity)
+        else:
+            credential = DefaultAzureCredential()
+        credential = _keyvault_credentials.setdefault(key_vault_identity, credential)
     return credential
 
 def clean_name_for_keyvault(name):
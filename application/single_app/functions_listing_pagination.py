@@ -0,0 +1,198 @@
+# functions_listing_pagination.py
+"""
+Keyset pagination and maintained counts for workspace listings.
+
+Document and prompt listings used to run a `SELECT VALUE COUNT(1)` query and
+an `OFFSET n LIMIT m` query on every page. Cosmos DB charges OFFSET for every
+skipped row, so deep pages in large workspaces became linearly more expensive.
+
+- Listings return an opaque keyset cursor with each page. Passing it back as
+  `continuation_token` reads the next page with `TOP n` and a WHERE condition
+  on the sort field, so every page costs the same. `page` without a token
+  still works (OFFSET) for jumping straight to a page.
+
+  Cosmos continuation tokens can't be used for this: the listing containers
+  are partitioned on /id, and by_page(token) on a cross-partition ORDER BY
+  query skips or repeats rows once there is more than one physical partition.
+  The cursor holds the sort value of the page's last item and the ids of the
+  items already returned with that value (`_ts` has one-second resolution, so
+  ties are common). A two-field ORDER BY would need a composite index the
+  containers don't have.
+- Unfiltered listing totals are kept in the `listing_counters` container. A
+  counter is seeded with one COUNT query, incremented/decremented when items
+  are created or deleted, dropped when sharing changes what a scope can see,
+  and reseeded after LISTING_COUNTER_RESEED_SECONDS to correct any drift.
+  Filtered listings are counted on the first page only.
+"""
+
+from config import *
+
+LISTING_COUNTER_RESEED_SECONDS = 6 * 60 * 60
+
+
+def get_continuation_token(args):
+    """Returns the `continuation_token` request argument, or None."""
+    token = (args.get('continuation_token') or '').strip()
+    return token or None
+
+
+def encode_listing_cursor(last_value, seen_ids):
+    """Opaque token for the position after the item(s) sorted at last_value."""
+    cursor = json.dumps({"v": last_value, "ids": seen_ids}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii")
+
+
+def decode_listing_cursor(token):
+    """Returns (last_value, seen_ids) for a token from encode_listing_cursor."""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return cursor["v"], list(cursor["ids"])
+    except Exception:
+        raise ValueError("Invalid continuation_token")
+
+
+def query_keyset_page(container, where_clause, parameters, page_size, continuation_token=None, order_field="_ts"):
+    """
+    Reads up to page_size items ordered by order_field (newest first), starting
+    after the cursor in continuation_token.
+
+    Returns (items, continuation_token); the token is None when there are no
+    more results.
+    """
+    parameters = list(parameters)
+    conditions = f"({where_clause})"
+    previous_value, seen_ids = None, []
+    if continuation_token:
+        previous_value, seen_ids = decode_listing_cursor(continuation_token)
+        conditions += (
+            f" AND (c.{order_field} < @cursor_value"
+            f" OR (c.{order_field} = @cursor_value AND NOT ARRAY_CONTAINS(@cursor_ids, c.id)))"
+        )
+        parameters += [
+            {"name": "@cursor_value", "value": previous_value},
+            {"name": "@cursor_ids", "value": seen_ids},
+        ]
+
+    # One extra item tells whether there is a next page
+    items = list(container.query_items(
+        query=f"SELECT TOP {int(page_size) + 1} * FROM c WHERE {conditions} ORDER BY c.{order_field} DESC",
+        parameters=parameters,
+        enable_cross_partition_query=True
+    ))
+    if len(items) <= page_size:
+        return items, None
+
+    items = items[:page_size]
+    last_value = items[-1].get(order_field)
+    tied_ids = [item["id"] for item in items if item.get(order_field) == last_value]
+    if continuation_token and previous_value == last_value:
+        # The page didn't get past the previous page's sort value
+        tied_ids = seen_ids + tied_ids
+    return items, encode_listing_cursor(last_value, tied_ids)
+
+
+def document_count_key(user_id=None, group_id=None, public_workspace_id=None):
+    """Counter key for the documents visible in a personal, group or public workspace."""
+    if public_workspace_id:
+        return f"documents:public:{public_workspace_id}"
+    if group_id:
+        return f"documents:group:{group_id}"
+    return f"documents:user:{user_id}"
+
+
+def prompt_count_key(prompt_type, scope_id):
+    """Counter key for a prompt listing (scope_id is the user, group or public workspace id)."""
+    return f"prompts:{prompt_type}:{scope_id}"
+
+
+def get_listing_count(counter_key, container, count_query, parameters, counters_container=None):
+    """
+    Returns the maintained count for counter_key, seeding it with count_query
+    when it doesn't exist yet or is due for a reseed.
+    """
+    counters_container = counters_container or cosmos_listing_counters_container
+    try:
+        counter = counters_container.read_item(item=counter_key, partition_key=counter_key)
+        if time.time() - counter.get('seeded_at', 0) < LISTING_COUNTER_RESEED_SECONDS:
+            return max(counter.get('count', 0), 0)
+    except CosmosResourceNotFoundError:
+        pass
+
+    results = list(container.query_items(
+        query=count_query,
+        parameters=parameters,
+        enable_cross_partition_query=True
+    ))
+    count = results[0] if results else 0
+    try:
+        counters_container.upsert_item({'id': counter_key, 'count': count, 'seeded_at': time.time()})
+    except Exception as e:
+        print(f"[ListingCounters] Failed to store counter {counter_key}: {e}")
+    return count
+
+
+def adjust_listing_count(counter_key, delta, counters_container=None):
+    """Adds delta to a counter. Missing counters are left to be seeded by the next listing."""
+    counters_container = counters_container or cosmos_listing_counters_container
+    try:
+        counters_container.patch_item(
+            item=counter_key,
+            partition_key=counter_key,
+            patch_operations=[{"op": "incr", "path": "/count", "value": delta}]
+        )
+    except CosmosResourceNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[ListingCounters] Failed to adjust counter {counter_key}: {e}")
+        invalidate_listing_count(counter_key, counters_container)
+
+
+def invalidate_listing_count(counter_key, counters_container=None):
+    """Drops a counter so the next listing recounts it."""
+    counters_container = counters_container or cosmos_listing_counters_container
+    try:
+        counters_container.delete_item(item=counter_key, partition_key=counter_key)
+    except CosmosResourceNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[ListingCounters] Failed to invalidate counter {counter_key}: {e}")
+
+
+def fetch_listing_page(container, where_clause, parameters, page, page_size, continuation_token=None,
+                       order_field="_ts", counter_key=None):
+    """
+    Reads one page of a workspace listing, newest order_field first.
+
+    With a continuation_token (or on the first page) the page is read with
+    keyset pagination; a page number without a token falls back to OFFSET.
+    Pass counter_key for unfiltered listings to use the maintained count.
+
+    Returns (items, total_count, continuation_token, has_more). total_count is
+    None for a filtered listing continued with a token; the client keeps the
+    count from the first page.
+    """
+    count_query = f"SELECT VALUE COUNT(1) FROM c WHERE {where_clause}"
+    if counter_key:
+        total_count = get_listing_count(counter_key, container, count_query, parameters)
+    elif continuation_token:
+        total_count = None
+    else:
+        count_items = list(container.query_items(
+            query=count_query,
+            parameters=parameters,
+            enable_cross_partition_query=True
+        ))
+        total_count = count_items[0] if count_items else 0
+
+    if continuation_token or page <= 1:
+        items, next_token = query_keyset_page(container, where_clause, parameters, page_size, continuation_token, order_field)
+        return items, total_count, next_token, bool(next_token)
+
+    offset = (page - 1) * page_size
+    items = list(container.query_items(
+        query=f"SELECT * FROM c WHERE {where_clause} ORDER BY c.{order_field} DESC OFFSET {offset} LIMIT {page_size}",
+        parameters=parameters,
+        enable_cross_partition_query=True
+    ))
+    has_more = len(items) == page_size and (total_count is None or offset + page_size < total_count)
+    return items, total_count, None, has_more
@@ -1,23 +1,231 @@
 # functions_logging.py
 
+import atexit
+import queue
+import re
+from collections import defaultdict
+
 from config import *
 from functions_settings import *
 
-def add_file_task_to_file_processing_log(document_id, user_id, content):
-    settings = get_settings()
-    enable_file_processing_log = settings.get('enable_file_processing_log', True)
+# Cosmos transactional batches are limited to 100 operations per partition key
+FILE_PROCESSING_LOG_MAX_BATCH_OPERATIONS = 100
+FILE_PROCESSING_LOG_SETTINGS_TTL_SECONDS = 30
+# A warning is printed on the first dropped entry and then every this many drops
+FILE_PROCESSING_LOG_DROP_WARNING_INTERVAL = 1000
+# Status updates and errors are always logged, even from sampled call sites
+_UNSAMPLED_LOG_PATTERN = re.compile(r'^\s*status:|error|fail|exception', re.IGNORECASE)
+
+
+class FileProcessingLogSink:
+    """
+    Asynchronous, batched writer for the file_processing Cosmos container.
+
+    Callers enqueue log entries without waiting on Cosmos. A daemon thread drains
+    the bounded queue and writes entries in transactional batches grouped by
+    document_id (the container partition key). When the queue is full, new
+    entries are dropped and counted instead of blocking document ingestion.
+    """
 
-    if enable_file_processing_log:
+    def __init__(self, container, max_queue_size=10000, batch_size=FILE_PROCESSING_LOG_MAX_BATCH_OPERATIONS, flush_interval_seconds=2.0):
+        self.container = container
+        self.batch_size = max(1, min(batch_size, FILE_PROCESSING_LOG_MAX_BATCH_OPERATIONS))
+        self.flush_interval_seconds = flush_interval_seconds
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stopped = False
+        self.enqueued_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+
+    def enqueue(self, log_item):
+        """Queues a log item for writing. Returns False if it was dropped."""
+        self._ensure_worker()
         try:
-            id_value = str(uuid.uuid4())
-            log_item = {
-                "id": id_value,
-                "document_id": document_id,
-                "user_id": user_id,
-                "log": content,
-                "timestamp": datetime.utcnow().isoformat()
+            self._queue.put_nowait(log_item)
+        except queue.Full:
+            with self._lock:
+                self.dropped_count += 1
+                dropped_count = self.dropped_count
+            if dropped_count == 1 or dropped_count % FILE_PROCESSING_LOG_DROP_WARNING_INTERVAL == 0:
+                print(f"[FileProcessingLog] Queue full, {dropped_count} log entries dropped so far: {self.get_stats()}")
+            return False
+
+        with self._lock:
+            self.enqueued_count += 1
+        return True
+
+    def flush(self, timeout=None):
+        """Blocks until all queued items have been written (or timeout elapses)."""
+        deadline = time.time() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Flushes pending items and stops the worker thread."""
+        self.flush(timeout=timeout)
+        self._stopped = True
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued_count,
+                "written": self.written_count,
+                "dropped": self.dropped_count,
+                "failed": self.failed_count
             }
-            cosmos_file_processing_container.create_item(log_item)
-        except Exception as e:
-            raise e
-        
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopped = False
+            self._worker = threading.Thread(target=self._run, name="file-processing-log-sink", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                first_item = self._queue.get(timeout=self.flush_interval_seconds)
+            except queue.Empty:
+                continue
+
+            items = [first_item]
+            # Drain whatever else is already queued, up to a bounded amount per cycle
+            while len(items) < self.batch_size * 10:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write(self, items):
+        by_document = defaultdict(list)
+        for item in items:
+            by_document[item.get("document_id")].append(item)
+
+        for document_id, document_items in by_document.items():
+            for start in range(0, len(document_items), self.batch_size):
+                batch = document_items[start:start + self.batch_size]
+                try:
+                    if len(batch) == 1:
+                        self.container.create_item(batch[0])
+                    else:
+                        self.container.execute_item_batch(
+                            batch_operations=[("create", (item,)) for item in batch],
+                            partition_key=document_id
+                        )
+                    with self._lock:
+                        self.written_count += len(batch)
+                except Exception as e:
+                    self._write_individually(batch, e)
+
+    def _write_individually(self, batch, batch_error):
+        print(f"[FileProcessingLog] Batch write failed ({batch_error}); retrying {len(batch)} item(s) individually")
+        for item in batch:
+            try:
+                self.container.create_item(item)
+                with self._lock:
+                    self.written_count += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed_count += 1
+                print(f"[FileProcessingLog] Failed to write log for document {item.get('document_id')}: {e}")
+
+
+_file_processing_log_sink = None
+_file_processing_log_sink_lock = threading.Lock()
+_file_processing_log_settings = {"loaded_at": 0.0, "values": None}
+_sampled_out = {"count": 0}
+
+
+def _get_file_processing_log_settings():
+    """Returns logging settings, re-reading app settings at most every FILE_PROCESSING_LOG_SETTINGS_TTL_SECONDS."""
+    now = time.time()
+    cached = _file_processing_log_settings
+    if cached["values"] is None or now - cached["loaded_at"] > FILE_PROCESSING_LOG_SETTINGS_TTL_SECONDS:
+        settings = get_settings() or {}
+        cached["values"] = {
+            "enabled": settings.get('enable_file_processing_logs', settings.get('enable_file_processing_log', True)),
+            "max_content_chars": settings.get('file_processing_log_max_content_chars', 2000),
+            "sample_rate": settings.get('file_processing_log_sample_rate', 1.0),
+            "max_queue_size": settings.get('file_processing_log_max_queue_size', 10000)
+        }
+        cached["loaded_at"] = now
+    return cached["values"]
+
+
+def get_file_processing_log_sink():
+    """Returns the process-wide FileProcessingLogSink, creating it on first use."""
+    global _file_processing_log_sink
+    if _file_processing_log_sink is None:
+        with _file_processing_log_sink_lock:
+            if _file_processing_log_sink is None:
+                log_settings = _get_file_processing_log_settings()
+                _file_processing_log_sink = FileProcessingLogSink(
+                    cosmos_file_processing_container,
+                    max_queue_size=log_settings["max_queue_size"]
+                )
+                atexit.register(_file_processing_log_sink.stop)
+    return _file_processing_log_sink
+
+
+def get_file_processing_log_stats():
+    """Returns queue/write/drop counters for the file processing log sink, plus entries skipped by sampling."""
+    if _file_processing_log_sink is None:
+        stats = {"queued": 0, "enqueued": 0, "written": 0, "dropped": 0, "failed": 0}
+    else:
+        stats = _file_processing_log_sink.get_stats()
+    with _file_processing_log_sink_lock:
+        stats["sampled_out"] = _sampled_out["count"]
+    return stats
+
+
+def add_file_task_to_file_processing_log(document_id, user_id, content, sampled=False):
+    """
+    Queues a file processing log entry for asynchronous, batched writing.
+
+    Args:
+        document_id (str): Document being processed (container partition key).
+        user_id (str): User, group or public workspace that owns the document.
+        content (str): Log message. Truncated to file_processing_log_max_content_chars.
+        sampled (bool): High-volume entries (e.g. one per chunk) pass True so they are
+            subject to file_processing_log_sample_rate. Status updates and errors
+            are never sampled.
+    """
+    log_settings = _get_file_processing_log_settings()
+    if not log_settings["enabled"]:
+        return
+
+    content = str(content)
+    if sampled and log_settings["sample_rate"] < 1.0 and not _UNSAMPLED_LOG_PATTERN.search(content) \
+            and random.random() >= log_settings["sample_rate"]:
+        with _file_processing_log_sink_lock:
+            _sampled_out["count"] += 1
+        return
+
+    max_content_chars = log_settings["max_content_chars"]
+    if max_content_chars and len(content) > max_content_chars:
+        content = f"{content[:max_content_chars]}... [truncated {len(content) - max_content_chars} chars]"
+
+    log_item = {
+        "id": str(uuid.uuid4()),
+        "document_id": document_id,
+        "user_id": user_id,
+        "log": content,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    get_file_processing_log_sink().enqueue(log_item)
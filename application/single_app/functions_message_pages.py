@@ -0,0 +1,119 @@
+# functions_message_pages.py
+"""
+Windowed, cursor-paginated retrieval of conversation messages.
+
+The chat page used to load every message of a conversation (including image
+chunks and inactive retry threads) and filter it in Python. Pages are now read
+newest first with a Cosmos DB continuation token as the cursor:
+
+- inactive threads, deleted messages and image chunk documents are filtered in
+  the query,
+- the projection leaves out heavy fields (citations, file contents, the
+  duplicated user_message); citation counts are returned instead and the
+  citations are loaded with get_message_citations() when they are expanded,
+- inline base64 images are not returned; their content is the
+  /api/image/<message_id> URL, which serves legacy and stored images alike.
+"""
+
+from config import *
+from functions_chat import sort_messages_by_thread
+from functions_image_store import get_image_url
+
+MESSAGE_PAGE_DEFAULT_SIZE = 30
+MESSAGE_PAGE_MAX_SIZE = 100
+
+DEFERRED_CITATION_FIELDS = ('hybrid_citations', 'web_search_citations', 'agent_citations')
+
+MESSAGE_PAGE_QUERY = """
+    SELECT c.id, c.conversation_id, c.role, c.timestamp, c.created_at,
+           c.model_deployment_name, c.augmented, c.agent_display_name, c.agent_name,
+           c.filename, c.is_table, c.prompt, c.extracted_text, c.vision_analysis,
+           c.metadata, c.parent_message_id,
+           ((c.role = 'image' AND IS_STRING(c.content) AND STARTSWITH(c.content, 'data:')) ? null : c.content) AS content,
+           ARRAY_LENGTH(c.hybrid_citations) AS hybrid_citation_count,
+           ARRAY_LENGTH(c.web_search_citations) AS web_search_citation_count,
+           ARRAY_LENGTH(c.agent_citations) AS agent_citation_count
+    FROM c
+    WHERE c.conversation_id = @conversation_id
+      AND c.role != 'image_chunk'
+      AND (NOT IS_DEFINED(c.metadata.thread_info.active_thread)
+           OR IS_NULL(c.metadata.thread_info.active_thread)
+           OR c.metadata.thread_info.active_thread = true)
+      AND (NOT IS_DEFINED(c.metadata.is_deleted) OR c.metadata.is_deleted != true)
+    ORDER BY c.timestamp DESC
+"""
+
+
+def parse_message_page_size(value):
+    """Clamps the requested page size to 1..MESSAGE_PAGE_MAX_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return MESSAGE_PAGE_DEFAULT_SIZE
+    return max(1, min(size, MESSAGE_PAGE_MAX_SIZE))
+
+
+def _to_page_message(item):
+    """Shapes a projected message for the chat UI."""
+    message = {key: value for key, value in item.items() if value is not None or key == 'content'}
+
+    if message.get('role') == 'image' and not message.get('content'):
+        # Inline (legacy) image data is served by the image endpoint instead of the JSON
+        message['content'] = get_image_url(message['id'])
+
+    citation_counts = {
+        'hybrid_citations': message.pop('hybrid_citation_count', 0) or 0,
+        'web_search_citations': message.pop('web_search_citation_count', 0) or 0,
+        'agent_citations': message.pop('agent_citation_count', 0) or 0,
+    }
+    if message.get('role') == 'assistant':
+        message['citation_counts'] = citation_counts
+        message['citations_deferred'] = True
+    return message
+
+
+def query_message_page(conversation_id, page_size=MESSAGE_PAGE_DEFAULT_SIZE, continuation_token=None, container=None):
+    """
+    Reads one page of a conversation's visible messages, newest first.
+
+    Returns (messages, continuation_token). Messages are returned oldest first
+    within the page, ordered by thread. The token is None on the last page.
+    """
+    container = container or cosmos_messages_container
+    parameters = [{"name": "@conversation_id", "value": conversation_id}]
+    items = []
+    token = continuation_token
+
+    # Cosmos may return short pages; keep reading until the page is full or the results end
+    while len(items) < page_size:
+        pager = container.query_items(
+            query=MESSAGE_PAGE_QUERY,
+            parameters=parameters,
+            partition_key=conversation_id,
+            max_item_count=page_size - len(items)
+        ).by_page(token)
+        page = next(pager, None)
+        if page is None:
+            token = None
+            break
+        items.extend(page)
+        token = pager.continuation_token
+        if not token:
+            break
+
+    items.reverse()
+    messages = [_to_page_message(item) for item in sort_messages_by_thread(items)]
+    return messages, token
+
+
+def get_message_citations(conversation_id, message_id, container=None):
+    """Point-reads the citation fields left out of message pages. Returns None if the message doesn't exist."""
+    container = container or cosmos_messages_container
+    try:
+        message = container.read_item(item=message_id, partition_key=conversation_id)
+    except CosmosResourceNotFoundError:
+        return None
+    citations = {field: message.get(field) or [] for field in DEFERRED_CITATION_FIELDS}
+    citations['id'] = message_id
+    citations['augmented'] = message.get('augmented', False)
+    return citations
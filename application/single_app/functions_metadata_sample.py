@@ -0,0 +1,68 @@
+# functions_metadata_sample.py
+"""
+Content sample handed from ingestion to AI metadata extraction.
+
+extract_document_metadata() used to run a hybrid_search (query embedding plus
+index searches) after ingestion to read back the chunks the pipeline had just
+written, before prompting the model. Ingestion now keeps the text of the first
+chunks it saves, up to METADATA_SAMPLE_MAX_CHUNKS chunks and
+METADATA_SAMPLE_MAX_CHARS characters, and metadata extraction uses that sample
+instead of searching.
+
+When `enable_deferred_metadata_extraction` is on, extraction is not run inline:
+the sample is stored on the document as `metadata_sample` and a low-priority
+`metadata_extraction` job is queued, which reads it and clears it afterwards.
+"""
+
+from config import *
+
+METADATA_SAMPLE_MAX_CHUNKS = 12
+METADATA_SAMPLE_MAX_CHARS = 16000
+
+_samples = {}
+_samples_lock = threading.Lock()
+
+
+def begin_metadata_sample(document_id):
+    """Starts collecting chunk text for a document being processed."""
+    with _samples_lock:
+        _samples[document_id] = {"chunks": [], "chars": 0}
+
+
+def add_metadata_sample_chunk(document_id, page_number, text):
+    """Adds a saved chunk to the document's sample until the chunk or size budget is spent."""
+    if document_id is None or not text:
+        return
+    with _samples_lock:
+        sample = _samples.get(document_id)
+        if sample is None:
+            return
+        remaining = METADATA_SAMPLE_MAX_CHARS - sample["chars"]
+        if len(sample["chunks"]) >= METADATA_SAMPLE_MAX_CHUNKS or remaining <= 0:
+            return
+        text = text.strip()[:remaining]
+        sample["chunks"].append((page_number, text))
+        sample["chars"] += len(text)
+
+
+def get_metadata_sample(document_id):
+    """Returns the text collected so far for a document, or None."""
+    with _samples_lock:
+        sample = _samples.get(document_id)
+        if not sample or not sample["chunks"]:
+            return None
+        chunks = sorted(sample["chunks"], key=lambda chunk: chunk[0] or 0)
+    return "\n\n".join(f"[Page {page_number}]\n{text}" for page_number, text in chunks)
+
+
+def end_metadata_sample(document_id):
+    """Stops collecting and returns the document's sample text (or None)."""
+    text = get_metadata_sample(document_id)
+    with _samples_lock:
+        _samples.pop(document_id, None)
+    return text
+
+
+def is_inline_metadata_extraction_enabled(settings):
+    """True when metadata is extracted at the end of ingestion rather than by a queued job."""
+    return bool(settings.get('enable_extract_meta_data')) and not settings.get('enable_deferred_metadata_extraction', False)
@@ -0,0 +1,195 @@
+# functions_model_catalog.py
+"""
+Cached Azure OpenAI deployment catalog for the model pickers.
+
+/api/models/gpt, /api/models/embedding and /api/models/image used to build a
+credential and a CognitiveServicesManagementClient and list the account's
+deployments through ARM on every request, so model pickers waited on ARM and
+repeated clicks counted against its rate limits.
+
+The deployment list of each Azure OpenAI account is now cached in the shared
+app cache (Redis when enabled, so all workers share it), keyed by
+subscription, resource group and account. GPT, embedding and image pickers
+pointing at the same account share one entry:
+
+- entries are fresh for MODEL_CATALOG_TTL_SECONDS; an older entry is
+  refreshed on the next request and still served if ARM fails,
+- `refresh=true` on the model endpoints forces a refresh (the admin
+  "Refresh" buttons),
+- prefetch_model_catalog() fills the cache in the background at startup.
+
+Management clients are created once per subscription per process.
+"""
+
+import re
+
+import app_settings_cache
+from config import *
+
+MODEL_CATALOG_TTL_SECONDS = int(os.getenv("MODEL_CATALOG_TTL_SECONDS", "900"))
+# Stale entries are kept this long as a fallback when ARM can't be reached
+MODEL_CATALOG_MAX_STALE_SECONDS = int(os.getenv("MODEL_CATALOG_MAX_STALE_SECONDS", str(24 * 60 * 60)))
+
+# Settings prefix for each picker's subscription / resource group / endpoint
+MODEL_CATALOG_SETTING_PREFIXES = {
+    'gpt': 'azure_openai_gpt',
+    'embedding': 'azure_openai_embedding',
+    'image': 'azure_openai_image_gen',
+}
+
+
+def _is_gpt_model(model_name):
+    return ("gpt" in model_name or re.search(r"o\d+", model_name)) and "image" not in model_name
+
+
+def _is_embedding_model(model_name):
+    return "embedding" in model_name or "ada" in model_name
+
+
+def _is_image_model(model_name):
+    return "dall-e" in model_name or "image" in model_name
+
+
+_MODEL_FILTERS = {
+    'gpt': _is_gpt_model,
+    'embedding': _is_embedding_model,
+    'image': _is_image_model,
+}
+
+_management_clients = {}
+_management_clients_lock = threading.Lock()
+_refresh_locks = {}
+_refresh_locks_lock = threading.Lock()
+
+
+def get_deployment_account(settings, model_type):
+    """Returns (subscription_id, resource_group, account_name) for a picker, or None if not configured."""
+    prefix = MODEL_CATALOG_SETTING_PREFIXES[model_type]
+    subscription_id = settings.get(f'{prefix}_subscription_id', '')
+    resource_group = settings.get(f'{prefix}_resource_group', '')
+    account_name = settings.get(f'{prefix}_endpoint', '').split('.')[0].replace("https://", "")
+    if not subscription_id or not resource_group or not account_name:
+        return None
+    return subscription_id, resource_group, account_name
+
+
+def _catalog_key(account):
+    return "model_catalog:" + ":".join(part.lower() for part in account)
+
+
+def _get_management_client(subscription_id):
+    with _management_clients_lock:
+        client = _management_clients.get(subscription_id)
+        if client is None:
+            if AZURE_ENVIRONMENT == "usgovernment" or AZURE_ENVIRONMENT == "custom":
+                credential = ClientSecretCredential(TENANT_ID, CLIENT_ID, MICROSOFT_PROVIDER_AUTHENTICATION_SECRET, authority=authority)
+                client = CognitiveServicesManagementClient(
+                    credential=credential,
+                    subscription_id=subscription_id,
+                    base_url=resource_manager,
+                    credential_scopes=credential_scopes
+                )
+            else:
+                credential = ClientSecretCredential(TENANT_ID, CLIENT_ID, MICROSOFT_PROVIDER_AUTHENTICATION_SECRET)
+                client = CognitiveServicesManagementClient(
+                    credential=credential,
+                    subscription_id=subscription_id
+                )
+            _management_clients[subscription_id] = client
+        return client
+
+
+def _list_deployments(account):
+    subscription_id, resource_group, account_name = account
+    client = _get_management_client(subscription_id)
+    deployments = []
+    for d in client.deployments.list(resource_group_name=resource_group, account_name=account_name):
+        model_name = d.properties.model.name if d.properties and d.properties.model else None
+        if model_name:
+            deployments.append({"deploymentName": d.name, "modelName": model_name})
+    return deployments
+
+
+def _read_entry(key):
+    if app_settings_cache.get_shared_cache_entry is None:
+        return None
+    try:
+        return app_settings_cache.get_shared_cache_entry(key)
+    except Exception as e:
+        print(f"[ModelCatalog] Failed to read {key} from the app cache: {e}")
+        return None
+
+
+def _write_entry(key, entry):
+    if app_settings_cache.update_shared_cache_entry is None:
+        return
+    try:
+        app_settings_cache.update_shared_cache_entry(key, entry, MODEL_CATALOG_MAX_STALE_SECONDS)
+    except Exception as e:
+        print(f"[ModelCatalog] Failed to store {key} in the app cache: {e}")
+
+
+def _get_refresh_lock(key):
+    with _refresh_locks_lock:
+        return _refresh_locks.setdefault(key, threading.Lock())
+
+
+def get_account_deployments(account, refresh=False):
+    """
+    Returns the cached catalog entry {"deployments": [...], "fetched_at": ts}
+    for an account, listing its deployments through ARM when the entry is
+    missing, older than MODEL_CATALOG_TTL_SECONDS, or refresh is True.
+    """
+    key = _catalog_key(account)
+    entry = None if refresh else _read_entry(key)
+    if entry and time.time() - entry.get("fetched_at", 0) < MODEL_CATALOG_TTL_SECONDS:
+        return entry
+
+    # Requests for the same account in this process wait for one ARM call
+    with _get_refresh_lock(key):
+        if not refresh:
+            latest = _read_entry(key)
+            if latest and time.time() - latest.get("fetched_at", 0) < MODEL_CATALOG_TTL_SECONDS:
+                return latest
+        try:
+            entry = {"deployments": _list_deployments(account), "fetched_at": time.time()}
+        except Exception as e:
+            stale = _read_entry(key)
+            if stale and not refresh:
+                print(f"[ModelCatalog] Serving cached deployments for {key}, ARM request failed: {e}")
+                return stale
+            raise
+        _write_entry(key, entry)
+        return entry
+
+
+def get_model_catalog(settings, model_type, refresh=False):
+    """
+    Returns (models, fetched_at) for a model picker ('gpt', 'embedding' or
+    'image'), or None when its subscription/RG/endpoint isn't configured.
+    """
+    account = get_deployment_account(settings, model_type)
+    if account is None:
+        return None
+    entry = get_account_deployments(account, refresh=refresh)
+    model_filter = _MODEL_FILTERS[model_type]
+    models = [d for d in entry["deployments"] if model_filter(d["modelName"].lower())]
+    return models, entry["fetched_at"]
+
+
+def prefetch_model_catalog(settings):
+    """Fills the catalog for every configured picker in a background thread."""
+    accounts = {account for account in (get_deployment_account(settings, model_type) for model_type in MODEL_CATALOG_SETTING_PREFIXES) if account}
+    if not accounts:
+        return None
+
+    def prefetch():
+        for account in accounts:
+            try:
+                get_account_deployments(account)
+            except Exception as e:
+                print(f"[ModelCatalog] Prefetch failed for {account[2]}: {e}")
+
+    thread = threading.Thread(target=prefetch, daemon=True)
+    thread.start()
+    return thread
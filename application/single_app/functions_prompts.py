@@ -1,6 +1,12 @@
 # functions_prompts.py
 
 from config import *
+from functions_listing_pagination import (
+    get_continuation_token,
+    fetch_listing_page,
+    prompt_count_key,
+    adjust_listing_count,
+)
 
 def get_pagination_params(args):
     try:
@@ -24,7 +30,8 @@ def get_pagination_params(args):
 def list_prompts(user_id, prompt_type, args, group_id=None, public_workspace_id=None):
     """
     List prompts for a user or a group with pagination and optional search.
-    Returns: (items, total_count, page, page_size)
+    Pages are read with keyset pagination when args has a continuation_token.
+    Returns: (items, total_count, page, page_size, continuation_token, has_more)
     """
     is_group = group_id is not None
     is_public_workspace = public_workspace_id is not None
@@ -57,40 +64,28 @@ def list_prompts(user_id, prompt_type, args, group_id=None, public_workspace_id=
         {"name": "@prompt_type", "value": prompt_type}
     ]
 
-    # Build count and select queries
-    count_query = f"SELECT VALUE COUNT(1) FROM c WHERE {base_filter}"
-    select_query = f"SELECT * FROM c WHERE {base_filter}"
-
     if search_term:
         st = search_term[:100]
-        select_query += " AND CONTAINS(c.name, @search, true)"
-        count_query  += " AND CONTAINS(c.name, @search, true)"
+        base_filter += " AND CONTAINS(c.name, @search, true)"
         parameters.append({"name": "@search", "value": st})
 
-    select_query += " ORDER BY c.updated_at DESC"
-    offset = (page - 1) * page_size
-    select_query += f" OFFSET {offset} LIMIT {page_size}"
-
-    # Execute count
-    total_count = list(
-        cosmos_container.query_items(
-            query=count_query,
-            parameters=parameters,
-            enable_cross_partition_query=True
-        )
+    items, total_count, next_token, has_more = fetch_listing_page(
+        cosmos_container,
+        base_filter,
+        parameters,
+        page,
+        page_size,
+        continuation_token=get_continuation_token(args),
+        order_field="updated_at",
+        counter_key=None if search_term else prompt_count_key(prompt_type, id_value)
     )
-    total_count = total_count[0] if total_count else 0
 
-    # Execute select
-    items = list(
-        cosmos_container.query_items(
-            query=select_query,
-            parameters=parameters,
-            enable_cross_partition_query=True
-        )
-    )
+    return items, total_count, page, page_size, next_token, has_more
 
-    return items, total_count, page, page_size
+def _prompt_counter_key(doc):
+    """Counter key of the listing a prompt document appears in."""
+    scope_id = doc.get("public_id") or doc.get("group_id") or doc.get("user_id")
+    return prompt_count_key(doc.get("type"), scope_id)
 
 def create_prompt_doc(name, content, prompt_type, user_id, group_id=None, public_workspace_id=None):
     """
@@ -129,6 +124,7 @@ def create_prompt_doc(name, content, prompt_type, user_id, group_id=None, public
         doc["user_id"] = user_id
 
     created = cosmos_container.create_item(body=doc)
+    adjust_listing_count(_prompt_counter_key(created), 1)
     return {
         "id": created["id"],
         "name": created["name"],
@@ -242,5 +238,11 @@ def delete_prompt_doc(user_id, prompt_id, group_id=None, public_workspace_id=Non
     else:
         cosmos_container = cosmos_user_prompts_container
 
+    try:
+        item = cosmos_container.read_item(item=prompt_id, partition_key=prompt_id)
+    except CosmosResourceNotFoundError:
+        return False
+
     cosmos_container.delete_item(item=prompt_id, partition_key=prompt_id)
-    return True
\ No newline at end of file
+    adjust_listing_count(_prompt_counter_key(item), -1)
+    return True
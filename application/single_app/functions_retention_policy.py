@@ -17,7 +17,7 @@ from functions_settings import get_settings, update_settings, cosmos_user_settin
 from functions_group import get_user_groups, cosmos_groups_container
 from functions_public_workspaces import get_user_public_workspaces, cosmos_public_workspaces_container
 from functions_documents import delete_document, delete_document_chunks
-from functions_activity_logging import log_conversation_deletion, log_conversation_archival
+from functions_conversation_deletion import delete_conversation_with_messages
 from functions_notifications import create_notification, create_group_notification, create_public_workspace_notification
 from functions_debug import debug_print
 from functions_appinsights import log_event
@@ -576,80 +576,25 @@ def delete_aged_conversations(retention_days, workspace_type='personal', user_id
                 })
                 continue
             
-            # Archive if enabled
-            if archiving_enabled:
-                archived_item = dict(conversation_item)
-                archived_item["archived_at"] = datetime.now(timezone.utc).isoformat()
-                archived_item["archived_by_retention_policy"] = True
-                cosmos_archived_conversations_container.upsert_item(archived_item)
-                
-                log_conversation_archival(
-                    user_id=conversation_item.get('user_id'),
-                    conversation_id=conversation_id,
-                    title=conversation_title,
-                    workspace_type=workspace_type,
-                    context=conversation_item.get('context', []),
-                    tags=conversation_item.get('tags', []),
-                    group_id=conversation_item.get('group_id'),
-                    public_workspace_id=conversation_item.get('public_workspace_id')
-                )
-            
-            # Delete messages
-            
             if workspace_type == 'group':
                 messages_container = cosmos_group_messages_container
             elif workspace_type == 'public':
                 messages_container = cosmos_public_messages_container
             else:
                 messages_container = cosmos_messages_container
-            
-            message_query = f"SELECT * FROM c WHERE c.conversation_id = @conversation_id"
-            message_params = [{"name": "@conversation_id", "value": conversation_id}]
-            
-            messages = list(messages_container.query_items(
-                query=message_query,
-                parameters=message_params,
-                partition_key=conversation_id
-            ))
-            
-            for msg in messages:
-                if archiving_enabled:
-                    archived_msg = dict(msg)
-                    archived_msg["archived_at"] = datetime.now(timezone.utc).isoformat()
-                    archived_msg["archived_by_retention_policy"] = True
-                    cosmos_archived_messages_container.upsert_item(archived_msg)
-                
-                try:
-                    messages_container.delete_item(msg['id'], partition_key=conversation_id)
-                except CosmosResourceNotFoundError:
-                    # Message was already deleted - this is fine, continue
-                    debug_print(f"Message {msg['id']} already deleted (not found), skipping")
-            
-            # Log deletion
-            log_conversation_deletion(
-                user_id=conversation_item.get('user_id'),
-                conversation_id=conversation_id,
-                title=conversation_title,
+
+            # Archive (if enabled) and delete messages in transactional batches per partition
+            delete_conversation_with_messages(
+                conversation_item,
+                archiving_enabled=archiving_enabled,
                 workspace_type=workspace_type,
-                context=conversation_item.get('context', []),
-                tags=conversation_item.get('tags', []),
-                is_archived=archiving_enabled,
+                conversations_container=container,
+                messages_container=messages_container,
                 is_bulk_operation=True,
-                group_id=conversation_item.get('group_id'),
-                public_workspace_id=conversation_item.get('public_workspace_id'),
+                archive_fields={"archived_by_retention_policy": True},
                 additional_context={'deletion_reason': 'retention_policy'}
             )
             
-            # Delete conversation
-            try:
-                container.delete_item(
-                    item=conversation_id,
-                    partition_key=conversation_id
-                )
-            except CosmosResourceNotFoundError:
-                # Conversation was already deleted after we read it (race condition) - this is fine
-                debug_print(f"Conversation {conversation_id} already deleted (not found during delete)")
-            
             deleted_details.append({
                 'id': conversation_id,
                 'title': conversation_title,
@@ -29,6 +29,7 @@ def get_settings(use_cosmos=False):
         'max_rounds_per_agent': 1,
         'enable_semantic_kernel': False,
         'per_user_semantic_kernel': False,
+        'per_user_kernel_pool_size': 100,
         'orchestration_type': 'default_agent',
         'merge_global_semantic_kernel_with_workspace': False,
         'global_selected_agent': {
@@ -141,10 +142,17 @@ def get_settings(use_cosmos=False):
         # Metadata Extraction
         'enable_extract_meta_data': False,
         'metadata_extraction_model': '',
+        'enable_deferred_metadata_extraction': False,
         
         # Multimodal Vision
         'enable_multimodal_vision': False,
         'multimodal_vision_model': '',
+
+        # Image pre-processing (vision analysis and Document Intelligence)
+        'enable_image_preprocessing': True,
+        'image_preprocessing_vision_max_dimension': 2048,
+        'image_preprocessing_di_max_dimension': 4096,
+        'image_preprocessing_jpeg_quality': 85,
         
         'enable_summarize_content_history_for_search': False,
         'number_of_historical_messages_to_summarize': 10,
@@ -263,6 +271,15 @@ def get_settings(use_cosmos=False):
         'file_timer_value': 1,
         'file_timer_unit': 'hours',
         'file_processing_logs_turnoff_time': None,
+        'file_processing_log_max_content_chars': 2000,
+        'file_processing_log_sample_rate': 1.0,
+        'file_processing_log_max_queue_size': 10000,
+        'enable_durable_ingestion_queue': False,
+        'ingestion_embedded_workers': 4,
+        'ingestion_max_jobs_per_tenant': 5,
+        'ingestion_lease_seconds': 120,
+        'ingestion_max_attempts': 3,
+        'enable_content_hash_dedup': True,
         'enable_external_healthcheck': False,
         
         # Streaming settings
@@ -0,0 +1,292 @@
+# functions_text_chunking.py
+"""
+Streaming chunkers for plain-text style documents (TXT, LOG, XML, YAML, MD, DOC).
+
+The chunkers read the source incrementally from a binary stream and yield one
+TextChunk at a time, so memory stays proportional to a single chunk instead of
+the whole file (plus its word list). Each chunk carries the byte range it was
+read from, which lets callers report progress and refine chunk-count estimates
+while the file is still being processed.
+
+Splitting happens on ASCII whitespace / newline bytes only. In UTF-8 those bytes
+never occur inside a multi-byte sequence, so chunks always decode cleanly.
+"""
+
+import io
+import math
+import re
+from collections import namedtuple
+
+DEFAULT_READ_SIZE = 1024 * 1024  # 1 MB buffered reads
+APPROX_BYTES_PER_WORD = 6  # Same approximation used by the HTML chunker
+# Byte budget of line chunks when the caller only sets a word budget, so text
+# without whitespace (e.g. a minified one-line log) can't build huge chunks
+DEFAULT_MAX_LINE_CHUNK_BYTES = 64 * 1024
+# Longest word iter_word_chunks keeps whole; longer runs without whitespace are
+# split, so the bytes carried between reads stay bounded
+DEFAULT_MAX_WORD_BYTES = 8 * 1024
+
+_WORD_PATTERN = re.compile(rb'\S+')
+
+TextChunk = namedtuple('TextChunk', ['text', 'page_number', 'byte_start', 'byte_end'])
+
+
+def estimate_chunk_count(total_bytes, words_per_chunk=None, bytes_per_chunk=None):
+    """
+    Estimate how many chunks a file of total_bytes will produce.
+
+    Used for the initial number_of_pages progress value before any chunk exists.
+    """
+    if total_bytes <= 0:
+        return 0
+    if bytes_per_chunk:
+        return max(1, math.ceil(total_bytes / bytes_per_chunk))
+    words_per_chunk = words_per_chunk or 400
+    return max(1, math.ceil(total_bytes / (words_per_chunk * APPROX_BYTES_PER_WORD)))
+
+
+def refine_chunk_estimate(chunk, total_bytes):
+    """
+    Re-estimate the total chunk count from the byte offset reached so far.
+
+    Returns at least chunk.page_number so the estimate never drops below the
+    number of chunks already produced.
+    """
+    if total_bytes <= 0 or chunk.byte_end <= 0:
+        return chunk.page_number
+    projected = math.ceil(chunk.page_number * total_bytes / chunk.byte_end)
+    return max(chunk.page_number, projected)
+
+
+def _decode(data, encoding, errors):
+    return data.decode(encoding, errors=errors)
+
+
+def iter_word_chunks(stream, words_per_chunk=400, encoding='utf-8', errors='strict', read_size=DEFAULT_READ_SIZE,
+                     max_word_bytes=DEFAULT_MAX_WORD_BYTES, max_chunk_bytes=DEFAULT_MAX_LINE_CHUNK_BYTES):
+    """
+    Yield chunks of words_per_chunk whitespace-separated words joined by single spaces.
+
+    Produces the same chunk text as " ".join(content.split()[i:i + n]) without
+    ever holding the full content or its word list in memory. Words longer than
+    max_word_bytes (e.g. base64 blobs or text without whitespace) are split at
+    UTF-8 boundaries and counted as one word per piece, and a chunk is closed
+    early once it would exceed max_chunk_bytes.
+
+    Args:
+        stream: Binary file-like object.
+        words_per_chunk (int): Number of words per chunk.
+        encoding (str): Text encoding used to decode each chunk.
+        errors (str): Decode error handling passed to bytes.decode.
+        read_size (int): Bytes read per buffered read.
+        max_word_bytes (int): Longest word kept whole.
+        max_chunk_bytes (int): Byte budget per chunk (never below max_word_bytes).
+    """
+    if words_per_chunk <= 0:
+        raise ValueError("words_per_chunk must be positive")
+
+    max_chunk_bytes = max(max_chunk_bytes, max_word_bytes)
+    page_number = 0
+    chunk_words = []
+    chunk_bytes = 0
+    chunk_start = 0
+    chunk_end = 0
+    carry = b''
+    carry_offset = 0
+
+    while True:
+        block = stream.read(read_size)
+        at_eof = not block
+        buffer = carry + block
+        buffer_offset = carry_offset
+        carry = b''
+
+        for match in _WORD_PATTERN.finditer(buffer):
+            word = match.group()
+            word_offset = buffer_offset + match.start()
+            pieces = _split_oversized_line(word, max_word_bytes) if len(word) > max_word_bytes else [word]
+
+            # A word touching the end of the buffer may continue in the next read;
+            # only its last piece is carried, so the carry never exceeds max_word_bytes
+            if not at_eof and match.end() == len(buffer):
+                carry = pieces.pop()
+                carry_offset = buffer_offset + match.end() - len(carry)
+
+            for piece in pieces:
+                if chunk_words and chunk_bytes + 1 + len(piece) > max_chunk_bytes:
+                    page_number += 1
+                    yield TextChunk(_decode(b' '.join(chunk_words), encoding, errors), page_number, chunk_start, chunk_end)
+                    chunk_words = []
+
+                if not chunk_words:
+                    chunk_start = word_offset
+                    chunk_bytes = -1
+                chunk_words.append(piece)
+                chunk_bytes += 1 + len(piece)
+                word_offset += len(piece)
+                chunk_end = word_offset
+
+                if len(chunk_words) >= words_per_chunk:
+                    page_number += 1
+                    yield TextChunk(_decode(b' '.join(chunk_words), encoding, errors), page_number, chunk_start, chunk_end)
+                    chunk_words = []
+
+            if carry:
+                break
+
+        if not carry:
+            carry_offset = buffer_offset + len(buffer)
+
+        if at_eof:
+            break
+
+    if chunk_words:
+        page_number += 1
+        yield TextChunk(_decode(b' '.join(chunk_words), encoding, errors), page_number, chunk_start, chunk_end)
+
+
+def _split_oversized_line(line, max_bytes):
+    """Split a single line longer than max_bytes at whitespace, or at a UTF-8 boundary as a last resort."""
+    pieces = []
+    while len(line) > max_bytes:
+        cut = max(line.rfind(b' ', 0, max_bytes), line.rfind(b'\t', 0, max_bytes))
+        if cut <= 0:
+            cut = max_bytes
+            # Never cut inside a multi-byte UTF-8 sequence
+            while cut > 0 and (line[cut] & 0xC0) == 0x80:
+                cut -= 1
+            if cut == 0:
+                cut = max_bytes
+        else:
+            cut += 1
+        pieces.append(line[:cut])
+        line = line[cut:]
+    if line:
+        pieces.append(line)
+    return pieces
+
+
+def _split_line_by_words(line, max_words):
+    """Split a line holding more than max_words words before the first word of each new piece."""
+    pieces = []
+    start = 0
+    for index, match in enumerate(_WORD_PATTERN.finditer(line)):
+        if index and index % max_words == 0:
+            pieces.append(line[start:match.start()])
+            start = match.start()
+    pieces.append(line[start:])
+    return pieces
+
+
+def _iter_line_segments(stream, max_bytes):
+    """
+    Yield (segment, starts_line) for the lines of stream, reading at most
+    max_bytes of a line at a time. Lines longer than max_bytes are split with
+    _split_oversized_line, so a huge single-line file is never held in memory.
+    """
+    pending = b''
+    starts_line = True
+    while True:
+        piece = stream.readline(max_bytes)
+        line = pending + piece
+        if not line:
+            break
+        line_complete = not piece or piece.endswith(b'\n')
+        segments = _split_oversized_line(line, max_bytes) if len(line) > max_bytes else [line]
+        # The tail of an unfinished line is completed by the next read
+        pending = b'' if line_complete else segments.pop()
+        for segment in segments:
+            yield segment, starts_line
+            starts_line = False
+        if line_complete:
+            starts_line = True
+        if not piece:
+            break
+
+
+def iter_line_chunks(stream, max_words=None, max_bytes=None, min_words=None, is_boundary=None,
+                     encoding='utf-8', errors='strict'):
+    """
+    Yield chunks built from whole lines, preserving line endings.
+
+    Lines are accumulated until adding the next line would exceed max_words or
+    max_bytes. When is_boundary is given, a chunk is also closed before any line
+    for which is_boundary(line) is true, provided the chunk already holds at
+    least min_words words (used to keep Markdown sections together).
+
+    Lines are read at most max_bytes at a time. Lines longer than max_bytes, or
+    holding more than max_words words, are split like iter_word_chunks splits
+    text, so one huge line never becomes one chunk.
+
+    Args:
+        stream: Binary file-like object (read line by line).
+        max_words (int): Word budget per chunk.
+        max_bytes (int): Byte budget per chunk. Lines longer than this are split.
+            Defaults to DEFAULT_MAX_LINE_CHUNK_BYTES.
+        min_words (int): Minimum words before a boundary line starts a new chunk.
+        is_boundary (callable): Predicate on the raw line bytes.
+        encoding (str): Text encoding used to decode each chunk.
+        errors (str): Decode error handling passed to bytes.decode.
+    """
+    max_bytes = max_bytes or DEFAULT_MAX_LINE_CHUNK_BYTES
+    page_number = 0
+    chunk_lines = []
+    chunk_words = 0
+    chunk_bytes = 0
+    chunk_start = 0
+    offset = 0
+
+    def emit():
+        nonlocal page_number, chunk_lines, chunk_words, chunk_bytes
+        page_number += 1
+        data = b''.join(chunk_lines)
+        result = TextChunk(_decode(data, encoding, errors), page_number, chunk_start, chunk_start + len(data))
+        chunk_lines = []
+        chunk_words = 0
+        chunk_bytes = 0
+        return result
+
+    for segment, starts_line in _iter_line_segments(stream, max_bytes):
+        segment_words = len(segment.split())
+        pieces = _split_line_by_words(segment, max_words) if max_words and segment_words > max_words else [segment]
+
+        for index, line in enumerate(pieces):
+            line_words = len(line.split()) if len(pieces) > 1 else segment_words
+
+            starts_section = (
+                index == 0
+                and starts_line
+                and is_boundary is not None
+                and chunk_words > 0
+                and chunk_words >= (min_words or 0)
+                and is_boundary(line)
+            )
+            over_words = max_words is not None and chunk_words + line_words > max_words
+            over_bytes = chunk_bytes + len(line) > max_bytes
+
+            if chunk_lines and (starts_section or over_words or over_bytes):
+                yield emit()
+
+            if not chunk_lines:
+                chunk_start = offset
+            chunk_lines.append(line)
+            chunk_words += line_words
+            chunk_bytes += len(line)
+            offset += len(line)
+
+    if chunk_lines:
+        yield emit()
+
+
+def iter_text_chunks_from_string(text, words_per_chunk=400):
+    """Word-chunk text that is already in memory (e.g. extracted by docx2txt)."""
+    return iter_word_chunks(io.BytesIO(text.encode('utf-8')), words_per_chunk=words_per_chunk)
+
+
+def is_markdown_header(line):
+    """True for ATX Markdown headers (# through #####) used as section boundaries."""
+    stripped = line.lstrip()
+    if not stripped.startswith(b'#'):
+        return False
+    level = len(stripped) - len(stripped.lstrip(b'#'))
+    return 1 <= level <= 5 and stripped[level:level + 1] in (b' ', b'\t', b'\n', b'\r', b'')
@@ -0,0 +1,273 @@
+# functions_user_directory.py
+"""
+Directory lookup behind the user pickers (/api/userSearch).
+
+Share dialogs and member pickers used to call Microsoft Graph /users with a
+bare requests.get for every search, so each lookup paid connection setup and
+a Graph round trip, and bursts of searches ran into Graph throttling.
+search_directory_users() now answers from, in order:
+
+1. the local index: users who have signed in to the app (their
+   user_settings documents), kept in memory and reloaded every
+   USER_DIRECTORY_INDEX_REFRESH_SECONDS. A search that finds a full page of
+   results there never leaves the process;
+2. the result cache: Graph results per (tenant, query) for
+   USER_DIRECTORY_CACHE_TTL_SECONDS. A longer query is answered from a
+   cached shorter prefix when that prefix returned fewer than a full page
+   (so it already contains every match);
+3. Microsoft Graph, on the pooled "graph" session. Identical searches that
+   arrive while one is in flight wait for its result instead of sending their
+   own request.
+
+Local and Graph results are merged (local first, deduplicated by id) and
+capped at USER_SEARCH_RESULT_LIMIT.
+"""
+
+from collections import OrderedDict
+
+from config import *
+from functions_debug import debug_print
+from semantic_kernel_plugins.http_session_pool import get_requests_session, get_requests_timeout
+
+USER_SEARCH_RESULT_LIMIT = 10
+USER_DIRECTORY_CACHE_TTL_SECONDS = int(os.getenv("USER_DIRECTORY_CACHE_TTL_SECONDS", "120"))
+USER_DIRECTORY_CACHE_MAX_SIZE = int(os.getenv("USER_DIRECTORY_CACHE_MAX_SIZE", "5000"))
+USER_DIRECTORY_INDEX_REFRESH_SECONDS = int(os.getenv("USER_DIRECTORY_INDEX_REFRESH_SECONDS", "600"))
+
+
+def _normalize_query(query):
+    return " ".join((query or "").split()).lower()
+
+
+def _matches(user, query):
+    return any(
+        (user.get(field) or "").lower().startswith(query)
+        for field in ("displayName", "email", "userPrincipalName")
+    )
+
+
+def _merge_results(*result_lists, limit=USER_SEARCH_RESULT_LIMIT):
+    merged = []
+    seen = set()
+    for results in result_lists:
+        for user in results:
+            if user["id"] in seen:
+                continue
+            seen.add(user["id"])
+            merged.append(user)
+            if len(merged) >= limit:
+                return merged
+    return merged
+
+
+class DirectorySearchCache:
+    """Size-bounded LRU of Graph search results keyed by (tenant id, normalized query), with a TTL."""
+
+    def __init__(self, ttl_seconds=USER_DIRECTORY_CACHE_TTL_SECONDS, max_size=USER_DIRECTORY_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return results
+
+    def get(self, tenant_id, query, limit=USER_SEARCH_RESULT_LIMIT):
+        """Cached results for query, from its own entry or a complete shorter prefix."""
+        with self._lock:
+            results = self._get((tenant_id, query))
+            if results is not None:
+                return results
+            for length in range(len(query) - 1, 0, -1):
+                prefix_results = self._get((tenant_id, query[:length]))
+                if prefix_results is not None and len(prefix_results) < limit:
+                    return [user for user in prefix_results if _matches(user, query)]
+        return None
+
+    def set(self, tenant_id, query, results):
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        key = (tenant_id, query)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalUserIndex:
+    """In-memory list of the users stored in the user settings container."""
+
+    def __init__(self, refresh_seconds=USER_DIRECTORY_INDEX_REFRESH_SECONDS, container=None):
+        self.refresh_seconds = refresh_seconds
+        self._container = container
+        self._users = []
+        self._loaded_at = 0
+        self._refresh_lock = threading.Lock()
+
+    def _load(self):
+        container = self._container or cosmos_user_settings_container
+        users = []
+        for doc in container.query_items(
+            query="SELECT c.id, c.email, c.display_name FROM c",
+            enable_cross_partition_query=True
+        ):
+            email = doc.get("email") or ""
+            display_name = doc.get("display_name") or ""
+            if not doc.get("id") or not (email or display_name):
+                continue
+            users.append({"id": doc["id"], "displayName": display_name or "(no name)", "email": email})
+        users.sort(key=lambda user: (user["displayName"].lower(), user["email"].lower()))
+        return users
+
+    def _refresh_if_stale(self):
+        if time.time() - self._loaded_at < self.refresh_seconds:
+            return
+        # One thread reloads; the others keep searching the previous copy
+        if not self._refresh_lock.acquire(blocking=not self._loaded_at):
+            return
+        try:
+            if time.time() - self._loaded_at < self.refresh_seconds:
+                return
+            try:
+                self._users = self._load()
+            except Exception as e:
+                print(f"[UserDirectory] Failed to load local user index: {e}")
+            self._loaded_at = time.time()
+        finally:
+            self._refresh_lock.release()
+
+    def search(self, query, limit=USER_SEARCH_RESULT_LIMIT):
+        self._refresh_if_stale()
+        results = []
+        for user in self._users:
+            if _matches(user, query):
+                results.append(user)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class _InFlightSearch:
+    def __init__(self):
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+_search_cache = DirectorySearchCache()
+_local_index = LocalUserIndex()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def get_graph_users_endpoint():
+    if AZURE_ENVIRONMENT == "usgovernment":
+        return "https://graph.microsoft.us/v1.0/users"
+    if AZURE_ENVIRONMENT == "custom":
+        return CUSTOM_GRAPH_URL_VALUE
+    return "https://graph.microsoft.com/v1.0/users"
+
+
+def _fetch_graph_users(query, access_token):
+    # OData string literals escape single quotes by doubling them
+    term = query.replace("'", "''")
+    params = {
+        "$filter": (
+            f"startswith(displayName, '{term}') "
+            f"or startswith(mail, '{term}') "
+            f"or startswith(userPrincipalName, '{term}')"
+        ),
+        "$top": USER_SEARCH_RESULT_LIMIT,
+        "$select": "id,displayName,mail,userPrincipalName"
+    }
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    response = get_requests_session("graph").get(
+        get_graph_users_endpoint(),
+        headers=headers,
+        params=params,
+        timeout=get_requests_timeout("graph")
+    )
+    response.raise_for_status()
+
+    results = []
+    for user in response.json().get("value", []):
+        results.append({
+            "id": user.get("id"),
+            "displayName": user.get("displayName") or "(no name)",
+            "email": user.get("mail") or user.get("userPrincipalName") or "",
+            "userPrincipalName": user.get("userPrincipalName") or ""
+        })
+    return results
+
+
+def _search_graph_coalesced(tenant_id, query, access_token):
+    key = (tenant_id, query)
+    with _in_flight_lock:
+        search = _in_flight.get(key)
+        leader = search is None
+        if leader:
+            search = _InFlightSearch()
+            _in_flight[key] = search
+
+    if not leader:
+        search.done.wait()
+        if search.error is not None:
+            raise search.error
+        return search.results
+
+    try:
+        search.results = _fetch_graph_users(query, access_token)
+        _search_cache.set(tenant_id, query, search.results)
+        return search.results
+    except Exception as e:
+        search.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+        search.done.set()
+
+
+def search_directory_users(query, tenant_id, access_token_provider):
+    """
+    Finds users whose display name or email starts with query.
+
+    access_token_provider is called only when Graph has to be queried. Returns
+    a list of {"id", "displayName", "email"}, or None when Graph is needed and
+    no access token could be acquired. Graph request errors are raised.
+    """
+    query = _normalize_query(query)
+    if not query:
+        return []
+
+    local_results = _local_index.search(query)
+    if len(local_results) >= USER_SEARCH_RESULT_LIMIT:
+        debug_print(f"[UserDirectory] '{query}' answered from the local index")
+        return local_results
+
+    cached_results = _search_cache.get(tenant_id, query)
+    if cached_results is not None:
+        debug_print(f"[UserDirectory] '{query}' answered from the search cache")
+        return _merge_results(local_results, cached_results)
+
+    access_token = access_token_provider()
+    if not access_token:
+        return None
+    graph_results = _search_graph_coalesced(tenant_id, query, access_token)
+    return _merge_results(local_results, graph_results)
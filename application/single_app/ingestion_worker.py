@@ -0,0 +1,52 @@
+# ingestion_worker.py
+"""
+Standalone worker for the durable ingestion job queue.
+
+Run alongside (or instead of) the embedded workers started by the web app:
+
+    python ingestion_worker.py --workers 4
+
+Uploaded files are staged in the temp directory by the web process, so the
+worker must share it (mount the same /sc-temp-files volume).
+"""
+
+import argparse
+import signal
+
+from config import *
+from functions_settings import get_settings
+from functions_ingestion_queue import IngestionWorker, get_ingestion_queue, is_durable_ingestion_enabled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run durable ingestion queue workers.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INGESTION_WORKERS", "4")), help="Number of worker threads")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    settings = get_settings(use_cosmos=True)
+    initialize_clients(settings)
+    if not is_durable_ingestion_enabled(settings):
+        print("WARNING: enable_durable_ingestion_queue is off; uploads will not be queued for this worker.")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    ingestion_queue = get_ingestion_queue(settings)
+    threads = []
+    for index in range(max(1, args.workers)):
+        worker = IngestionWorker(ingestion_queue, poll_interval_seconds=args.poll_interval)
+        thread = threading.Thread(target=worker.run_forever, args=(stop_event,), name=f"ingestion-worker-{index}")
+        thread.start()
+        threads.append(thread)
+
+    print(f"Ingestion worker started with {len(threads)} thread(s).")
+    # Running jobs finish before exit; an interrupted job is re-leased by another worker
+    for thread in threads:
+        thread.join()
+    print("Ingestion worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from semantic_kernel.contents.chat_message_content import ChatMessageContent
 from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
 from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
 from semantic_kernel_fact_memory_store import FactMemoryStore
+from functions_fact_retrieval import select_facts_for_context
 from semantic_kernel_loader import initialize_semantic_kernel
 from semantic_kernel_plugins.plugin_invocation_logger import get_plugin_logger
 from foundry_agent_runtime import FoundryAgentInvocationError, execute_foundry_agent
@@ -25,6 +26,9 @@ from functions_group import find_group_by_id
 from functions_chat import *
 from functions_conversation_metadata import collect_conversation_metadata, update_conversation_with_metadata
 from functions_debug import debug_print
+from functions_image_store import get_image_url, store_image_data_url
+from functions_async_runtime import get_affinity_key, run_async
+from functions_async_stream import iterate_async_stream
 from functions_activity_logging import log_chat_activity, log_conversation_creation, log_token_usage
 from flask import current_app
 from swagger_wrapper import swagger_route, get_auth_security
@@ -1266,11 +1270,58 @@ def register_route_backend_chats(app):
 
                     image_message_id = f"{conversation_id}_image_{int(time.time())}_{random.randint(1000,9999)}"
                     
+                    # Get user_info and thread_id from the user message for ownership tracking and threading
+                    user_info_for_image = None
+                    user_thread_id = None
+                    user_previous_thread_id = None
+                    try:
+                        user_msg = cosmos_messages_container.read_item(
+                            item=user_message_id,
+                            partition_key=conversation_id
+                        )
+                        user_info_for_image = user_msg.get('metadata', {}).get('user_info')
+                        user_thread_id = user_msg.get('metadata', {}).get('thread_info', {}).get('thread_id')
+                        user_previous_thread_id = user_msg.get('metadata', {}).get('thread_info', {}).get('previous_thread_id')
+                    except Exception as e:
+                        debug_print(f"Warning: Could not retrieve user_info from user message for image: {e}")
+                    
                     # Check if image data is too large for a single Cosmos document (2MB limit)
                     # Account for JSON overhead by using 1.5MB as the safe limit for base64 content
                     max_content_size = 1500000  # 1.5MB in bytes
                     
-                    if len(generated_image_url) > max_content_size:
+                    # Base64 images go to image storage; the message only keeps a reference
+                    image_storage = store_image_data_url(generated_image_url)
+                    
+                    if image_storage:
+                        debug_print(f"Stored generated image in {image_storage['backend']} as {image_storage['key']}")
+                        
+                        image_doc = {
+                            'id': image_message_id,
+                            'conversation_id': conversation_id,
+                            'role': 'image',
+                            'content': get_image_url(image_message_id),
+                            'prompt': user_message,
+                            'created_at': datetime.utcnow().isoformat(),
+                            'timestamp': datetime.utcnow().isoformat(),
+                            'model_deployment_name': image_gen_model,
+                            'metadata': {
+                                'user_info': user_info_for_image,  # Track which user created this image
+                                'is_chunked': False,
+                                'original_size': image_storage['size'],
+                                'image_storage': image_storage,
+                                'thumbnail_url': get_image_url(image_message_id, thumbnail=True) if image_storage.get('thumbnail_key') else None,
+                                'thread_info': {
+                                    'thread_id': user_thread_id,  # Same thread as user message
+                                    'previous_thread_id': user_previous_thread_id,  # Same previous_thread_id as user message
+                                    'active_thread': True,
+                                    'thread_attempt': 1
+                                }
+                            }
+                        }
+                        cosmos_messages_container.upsert_item(image_doc)
+                        response_image_url = image_doc['content']
+                        
+                    elif len(generated_image_url) > max_content_size:
                         debug_print(f"Large image detected ({len(generated_image_url)} bytes), splitting across multiple documents")
                         
                         # Split the data URL into manageable chunks
@@ -1303,21 +1354,6 @@ def register_route_backend_chats(app):
                         
                         # Create main image document with metadata
                         
-                        # Get user_info and thread_id from the user message for ownership tracking and threading
-                        user_info_for_chunked_image = None
-                        user_thread_id = None
-                        user_previous_thread_id = None
-                        try:
-                            user_msg = cosmos_messages_container.read_item(
-                                item=user_message_id,
-                                partition_key=conversation_id
-                            )
-                            user_info_for_chunked_image = user_msg.get('metadata', {}).get('user_info')
-                            user_thread_id = user_msg.get('metadata', {}).get('thread_info', {}).get('thread_id')
-                            user_previous_thread_id = user_msg.get('metadata', {}).get('thread_info', {}).get('previous_thread_id')
-                        except Exception as e:
-                            debug_print(f"Warning: Could not retrieve user_info from user message for chunked image: {e}")
-                        
                         main_image_doc = {
                             'id': image_message_id,
                             'conversation_id': conversation_id,
@@ -1328,7 +1364,7 @@ def register_route_backend_chats(app):
                             'timestamp': datetime.utcnow().isoformat(),
                             'model_deployment_name': image_gen_model,
                             'metadata': {
-                                'user_info': user_info_for_chunked_image,  # Track which user created this image
+                                'user_info': user_info_for_image,  # Track which user created this image
                                 'is_chunked': True,
                                 'total_chunks': total_chunks,
                                 'chunk_index': 0,
@@ -1382,21 +1418,6 @@ def register_route_backend_chats(app):
                         # Small image - store normally in single document
                         debug_print(f"Small image ({len(generated_image_url)} bytes), storing in single document")
                         
-                        # Get user_info and thread_id from the user message for ownership tracking and threading
-                        user_info_for_image = None
-                        user_thread_id = None
-                        user_previous_thread_id = None
-                        try:
-                            user_msg = cosmos_messages_container.read_item(
-                                item=user_message_id,
-                                partition_key=conversation_id
-                            )
-                            user_info_for_image = user_msg.get('metadata', {}).get('user_info')
-                            user_thread_id = user_msg.get('metadata', {}).get('thread_info', {}).get('thread_id')
-                            user_previous_thread_id = user_msg.get('metadata', {}).get('thread_info', {}).get('previous_thread_id')
-                        except Exception as e:
-                            debug_print(f"Warning: Could not retrieve user_info from user message for image: {e}")
-                        
                         image_doc = {
                             'id': image_message_id,
                             'conversation_id': conversation_id,
@@ -1805,7 +1826,7 @@ def register_route_backend_chats(app):
                 return ("Sorry, I encountered an error.", gpt_model, None, None)
 
             # --- Inject facts as a system message at the top of conversation_history_for_api ---
-            def get_facts_for_context(scope_id, scope_type, conversation_id: str = None, agent_id: str = None):
+            def get_facts_for_context(scope_id, scope_type, conversation_id: str = None, agent_id: str = None, query_text: str = None):
                 settings = get_settings()
                 agents = settings.get('semantic_kernel_agents', [])
                 default_agent = next((a for a in agents if a.get('default_agent')), None)
@@ -1814,15 +1835,14 @@ def register_route_backend_chats(app):
                 if not scope_id or not scope_type:
                     return ""
                 fact_store = FactMemoryStore()
-                kwargs = dict(
+                # Only the facts most relevant to this message, within the token budget
+                facts = select_facts_for_context(
+                    fact_store,
                     scope_type=scope_type,
                     scope_id=scope_id,
+                    query_text=query_text,
+                    settings=settings
                 )
-                if agent_id:
-                    kwargs['agent_id'] = agent_id
-                if conversation_id:
-                    kwargs['conversation_id'] = conversation_id
-                facts = fact_store.get_facts(**kwargs)
                 if not facts:
                     return ""
                 fact_lines = []
@@ -1946,6 +1966,9 @@ def register_route_backend_chats(app):
                 settings_agents = settings.get('semantic_kernel_agents', [])
             kernel = get_kernel()
             all_agents = get_kernel_agents()
+            # The kernel's services and agents share its async clients (the global kernel
+            # is shared by all users), so every call through them runs on the kernel's loop
+            kernel_affinity_key = get_affinity_key(kernel if kernel is not None else all_agents)
             
             log_event(f"[SKChat] Retrieved kernel: {type(kernel)}, all_agents: {type(all_agents)} with {len(all_agents) if all_agents else 0} agents", level=logging.INFO)
             if all_agents:
@@ -2028,7 +2051,8 @@ def register_route_backend_chats(app):
                 # Allows for additional per agent and per conversation scoping.
                 facts = get_facts_for_context(
                     scope_id=scope_id,
-                    scope_type=scope_type
+                    scope_type=scope_type,
+                    query_text=user_message
                 )
                 if facts:
                     conversation_history_for_api.insert(0, {
@@ -2054,11 +2078,11 @@ def register_route_backend_chats(app):
                     def invoke_orchestrator():
                         orchestrator = all_agents["orchestrator"]
                         runtime = InProcessRuntime()
-                        return asyncio.run(run_sk_call(
+                        return run_async(run_sk_call(
                             orchestrator.invoke,
                             task=agent_message_history,
                             runtime=runtime,
-                        ))
+                        ), affinity_key=kernel_affinity_key)
                     def orchestrator_success(result):
                         msg = str(result)
                         notice = None
@@ -2080,10 +2104,10 @@ def register_route_backend_chats(app):
 
                 if selected_agent:
                     def invoke_selected_agent():
-                        return asyncio.run(run_sk_call(
+                        return run_async(run_sk_call(
                             selected_agent.invoke,
                             agent_message_history,
-                        ))
+                        ), affinity_key=kernel_affinity_key)
                     def agent_success(result):
                         nonlocal reload_messages_required
                         msg = str(result)
@@ -2288,7 +2312,7 @@ def register_route_backend_chats(app):
                                     chat_func = plugin.functions['chat']
                                     break
                         if chat_func:
-                            return asyncio.run(run_sk_call(kernel.invoke, chat_func, input=chat_history))
+                            return run_async(run_sk_call(kernel.invoke, chat_func, input=chat_history), affinity_key=kernel_affinity_key)
                         else:
                             log_event(
                                 "No dedicated chat action/plugin found. Trying kernel-native chatcompletion via service lookup.",
@@ -2303,7 +2327,7 @@ def register_route_backend_chats(app):
                                 settings_obj = PromptExecutionSettings()
                                 async def run_chatcompletion():
                                     return await chat_service.get_chat_message_contents(chat_hist, settings_obj)
-                                chat_result = asyncio.run(run_chatcompletion())
+                                chat_result = run_async(run_chatcompletion(), affinity_key=kernel_affinity_key)
                                 if chat_result and hasattr(chat_result[0], 'content'):
                                     return chat_result[0].content
                                 else:
@@ -3364,6 +3388,7 @@ def register_route_backend_chats(app):
                     # Agent selection logic (similar to non-streaming)
                     kernel = get_kernel()
                     all_agents = get_kernel_agents()
+                    kernel_affinity_key = get_affinity_key(kernel if kernel is not None else all_agents)
                     
                     if all_agents:
                         agent_name_to_select = None
@@ -3442,53 +3467,34 @@ def register_route_backend_chats(app):
                             for msg in conversation_history_for_api
                         ]
                         
-                        # Stream agent responses - collect chunks first then yield
-                        async def stream_agent_async():
-                            """Collect all streaming chunks from agent"""
-                            chunks = []
-                            usage_data = None
-                            
-                            # invoke_stream doesn't need a thread parameter - it works like invoke but streams
-                            async for response in selected_agent.invoke_stream(messages=agent_message_history):
+                        # Stream agent responses to the client as they are produced.
+                        # invoke_stream runs on the shared async runtime; closing the generator
+                        # (client disconnect) cancels it.
+                        stream_usage = None
+                        agent_stream = iterate_async_stream(
+                            lambda: selected_agent.invoke_stream(messages=agent_message_history),
+                            affinity_key=kernel_affinity_key
+                        )
+                        try:
+                            for response in agent_stream:
                                 # Extract content from StreamingChatMessageContent
                                 if hasattr(response, 'content') and response.content:
-                                    chunks.append(str(response.content))
+                                    chunk_content = str(response.content)
                                 elif isinstance(response, str):
-                                    chunks.append(response)
+                                    chunk_content = response
                                 else:
                                     # Fallback: convert to string
-                                    chunks.append(str(response))
-                                
-                                # Check for usage metadata in the last response
-                                # Don't break early - keep collecting all chunks
+                                    chunk_content = str(response)
+
+                                # Usage metadata arrives on the last response; last one wins
                                 if hasattr(response, 'metadata') and isinstance(response.metadata, dict):
                                     usage = response.metadata.get('usage')
                                     if usage:
-                                        usage_data = usage  # Keep updating, last one wins
-                            
-                            return chunks, usage_data
-                        
-                        # Execute async streaming
-                        import asyncio
-                        try:
-                            # Try to get existing event loop
-                            loop = asyncio.get_event_loop()
-                            if loop.is_closed():
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                        except RuntimeError:
-                            # No event loop in current thread
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                        
-                        try:
-                            # Run streaming and collect chunks and usage
-                            chunks, stream_usage = loop.run_until_complete(stream_agent_async())
-                            
-                            # Yield chunks to frontend
-                            for chunk_content in chunks:
-                                accumulated_content += chunk_content
-                                yield f"data: {json.dumps({'content': chunk_content})}\n\n"
+                                        stream_usage = usage
+
+                                if chunk_content:
+                                    accumulated_content += chunk_content
+                                    yield f"data: {json.dumps({'content': chunk_content})}\n\n"
                             
                             # Try to capture token usage from stream metadata
                             if stream_usage:
@@ -3514,6 +3520,8 @@ def register_route_backend_chats(app):
                             traceback.print_exc()
                             yield f"data: {json.dumps({'error': f'Agent streaming failed: {str(stream_error)}'})}\n\n"
                             return
+                        finally:
+                            agent_stream.close()
                         
                         # Collect token usage from kernel services if not captured from stream
                         if not token_usage_data:
@@ -4269,7 +4277,7 @@ def perform_web_search(
         debug_print(f"[WebSearch]   foundry_settings keys: {list(foundry_settings.keys())}")
         debug_print(f"[WebSearch]   global_settings type: {type(settings)}")
         
-        result = asyncio.run(
+        result = run_async(
             execute_foundry_agent(
                 foundry_settings=foundry_settings,
                 global_settings=settings,
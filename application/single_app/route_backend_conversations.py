@@ -4,7 +4,10 @@ from config import *
 from functions_authentication import *
 from functions_settings import *
 from functions_conversation_metadata import get_conversation_metadata
-from flask import Response, request
+from functions_image_store import get_image_url, open_image_stream
+from functions_message_pages import query_message_page, get_message_citations, parse_message_page_size
+from functions_conversation_deletion import delete_conversation_with_messages, submit_bulk_deletion_job, get_bulk_deletion_job
+from flask import Response, request, stream_with_context
 from functions_debug import debug_print
 from swagger_wrapper import swagger_route, get_auth_security
 from functions_activity_logging import log_conversation_creation, log_conversation_deletion, log_conversation_archival
@@ -123,16 +126,13 @@ def register_route_backend_conversations(app):
                     
                     debug_print(f"Final reassembled image total size: {len(complete_content)} bytes")
                     
-                    # For large images (>1MB), use a URL reference instead of embedding in JSON
+                    # For large images (>1MB), use a URL reference instead of embedding in JSON.
+                    # /api/image/<id> reassembles the chunks itself, so the data is not kept on the message.
                     if len(complete_content) > 1024 * 1024:  # 1MB threshold
                         debug_print(f"Large image detected ({len(complete_content)} bytes), using URL reference")
-                        # Store the complete content temporarily and provide a URL reference
-                        message['content'] = f"/api/image/{image_id}"
+                        message['content'] = get_image_url(image_id)
                         message['metadata']['is_large_image'] = True
                         message['metadata']['image_size'] = len(complete_content)
-                        # Store the complete content in a way that can be retrieved by the image endpoint
-                        # For now, we'll modify the message in place but this could be optimized
-                        message['_complete_image_data'] = complete_content
                     else:
                         # Small enough to embed directly
                         message['content'] = complete_content
@@ -156,14 +156,9 @@ def register_route_backend_conversations(app):
     @login_required
     @user_required
     def api_get_image(image_id):
-        """Serve large images that were stored in chunks"""
-        print(f"🔥 IMAGE ENDPOINT CALLED: {image_id}")
-        print(f"🔥 Request URL: {request.url}")
-        print(f"🔥 Request headers: {dict(request.headers)}")
-        
+        """Serve an image message's binary: streamed from image storage, or reassembled from legacy chunks"""
         user_id = get_current_user_id()
         if not user_id:
-            print(f"🔥 Authentication failed for image request")
             return jsonify({'error': 'User not authenticated'}), 401
             
         try:
@@ -177,79 +172,69 @@ def register_route_backend_conversations(app):
             
             debug_print(f"Serving image {image_id} from conversation {conversation_id}")
             
-            # Query for the main image document and chunks
-            message_query = f"SELECT * FROM c WHERE c.conversation_id = '{conversation_id}'"
-            all_items = list(cosmos_messages_container.query_items(
-                query=message_query,
-                partition_key=conversation_id
-            ))
-            
-            # Find the specific image and its chunks
-            main_image = None
-            chunks = {}
+            try:
+                conversation_item = cosmos_conversations_container.read_item(
+                    item=conversation_id,
+                    partition_key=conversation_id
+                )
+                main_image = cosmos_messages_container.read_item(
+                    item=image_id,
+                    partition_key=conversation_id
+                )
+            except CosmosResourceNotFoundError:
+                return jsonify({'error': 'Image not found'}), 404
             
-            debug_print(f"Searching through {len(all_items)} items for image {image_id}")
+            if conversation_item.get('user_id') != user_id:
+                return jsonify({'error': 'Forbidden'}), 403
+            if main_image.get('role') != 'image':
+                return jsonify({'error': 'Image not found'}), 404
             
-            for item in all_items:
-                item_id = item.get('id')
-                item_role = item.get('role')
-                debug_print(f"Checking item {item_id}, role: {item_role}")
+            image_storage = main_image.get('metadata', {}).get('image_storage')
+            if image_storage:
+                thumbnail = request.args.get('size') == 'thumbnail'
+                etag = f"{image_storage.get('sha256')}{'-thumbnail' if thumbnail else ''}"
+                # Stored images are content-addressed, so they never change
+                headers = {
+                    'Cache-Control': 'private, max-age=31536000, immutable',
+                    'ETag': f'"{etag}"'
+                }
+                if etag in request.if_none_match:
+                    return Response(status=304, headers=headers)
                 
-                if item_id == image_id and item_role == 'image':
-                    main_image = item
-                    debug_print(f"✅ Found main image document: {item_id}")
-                    debug_print(f"Main image content length: {len(item.get('content', ''))} bytes")
-                    debug_print(f"Main image metadata: {item.get('metadata', {})}")
-                elif (item_role == 'image_chunk' and 
-                      item.get('parent_message_id') == image_id):
-                    chunk_index = item.get('metadata', {}).get('chunk_index', 0)
-                    chunk_content = item.get('content', '')
-                    chunks[chunk_index] = chunk_content
-                    debug_print(f"✅ Found chunk {chunk_index}: {len(chunk_content)} bytes")
-                    debug_print(f"Chunk {chunk_index} starts with: {chunk_content[:50]}...")
-                    debug_print(f"Chunk {chunk_index} ends with: ...{chunk_content[-20:]}")
-            
-            debug_print(f"Found main_image: {main_image is not None}")
-            debug_print(f"Found chunks: {list(chunks.keys())}")
-            
-            if not main_image:
-                print(f"ERROR: Main image not found for {image_id}")
-                return jsonify({'error': 'Image not found'}), 404
+                chunks, size, content_type = open_image_stream(image_storage, thumbnail=thumbnail)
+                if size is not None:
+                    headers['Content-Length'] = str(size)
+                return Response(
+                    stream_with_context(chunks),
+                    mimetype=content_type,
+                    headers=headers
+                )
             
-            # Reassemble the image
+            # Legacy images: base64 data URL in the message, optionally split across image_chunk documents
             complete_content = main_image.get('content', '')
             total_chunks = main_image.get('metadata', {}).get('total_chunks', 1)
             
-            debug_print(f"Starting reassembly...")
-            debug_print(f"Main content length: {len(complete_content)} bytes")
-            debug_print(f"Expected total chunks: {total_chunks}")
-            debug_print(f"Available chunk indices: {list(chunks.keys())}")
-            debug_print(f"Main content starts with: {complete_content[:50]}...")
-            debug_print(f"Main content ends with: ...{complete_content[-20:]}")
-            
-            reassembly_log = []
-            original_length = len(complete_content)
-            
-            for chunk_index in range(1, total_chunks):
-                if chunk_index in chunks:
-                    chunk_content = chunks[chunk_index]
-                    complete_content += chunk_content
-                    reassembly_log.append(f"Added chunk {chunk_index}: {len(chunk_content)} bytes")
-                    debug_print(f"Added chunk {chunk_index}: {len(chunk_content)} bytes")
-                    debug_print(f"Total length now: {len(complete_content)} bytes")
-                else:
-                    error_msg = f"Missing chunk {chunk_index}"
-                    reassembly_log.append(f"❌ {error_msg}")
-                    print(f"WARNING: {error_msg}")
-            
-            final_length = len(complete_content)
-            debug_print(f"Reassembly complete!")
-            debug_print(f"Original length: {original_length} bytes")
-            debug_print(f"Final length: {final_length} bytes")
-            debug_print(f"Added: {final_length - original_length} bytes")
-            debug_print(f"Reassembly log: {reassembly_log}")
-            debug_print(f"Final content starts with: {complete_content[:50]}...")
-            debug_print(f"Final content ends with: ...{complete_content[-20:]}")
+            if main_image.get('metadata', {}).get('is_chunked') and total_chunks > 1:
+                chunk_query = "SELECT * FROM c WHERE c.parent_message_id = @image_id AND c.role = 'image_chunk'"
+                chunks = {}
+                for item in cosmos_messages_container.query_items(
+                    query=chunk_query,
+                    parameters=[{"name": "@image_id", "value": image_id}],
+                    partition_key=conversation_id
+                ):
+                    chunks[item.get('metadata', {}).get('chunk_index', 0)] = item.get('content', '')
+                
+                debug_print(f"Found chunks: {sorted(chunks.keys())} of {total_chunks}")
+                
+                content_parts = [complete_content]
+                for chunk_index in range(1, total_chunks):
+                    if chunk_index in chunks:
+                        content_parts.append(chunks[chunk_index])
+                    else:
+                        print(f"WARNING: Missing chunk {chunk_index} for image {image_id}")
+                complete_content = ''.join(content_parts)
+            
+            debug_print(f"Reassembled image {image_id}: {len(complete_content)} bytes")
             
             # Return the image data with appropriate headers
             if complete_content.startswith('data:image/'):
@@ -265,7 +250,7 @@ def register_route_backend_conversations(app):
                     mimetype=mime_type,
                     headers={
                         'Content-Length': len(image_data),
-                        'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
+                        'Cache-Control': 'private, max-age=3600'  # Cache for 1 hour
                     }
                 )
             else:
@@ -402,51 +387,16 @@ def register_route_backend_conversations(app):
                 "error": str(e)
             }), 500
 
-        if archiving_enabled:
-            archived_item = dict(conversation_item)
-            archived_item["archived_at"] = datetime.utcnow().isoformat()
-            cosmos_archived_conversations_container.upsert_item(archived_item)
-            
-            # Log conversation archival
-            log_conversation_archival(
-                user_id=conversation_item.get('user_id'),
-                conversation_id=conversation_id,
-                title=conversation_item.get('title', 'Untitled'),
-                workspace_type='personal',
-                context=conversation_item.get('context', []),
-                tags=conversation_item.get('tags', [])
-            )
-
-        message_query = f"SELECT * FROM c WHERE c.conversation_id = '{conversation_id}'"
-        results = list(cosmos_messages_container.query_items(
-            query=message_query,
-            partition_key=conversation_id
-        ))
-
-        for doc in results:
-            if archiving_enabled:
-                archived_doc = dict(doc)
-                archived_doc["archived_at"] = datetime.utcnow().isoformat()
-                cosmos_archived_messages_container.upsert_item(archived_doc)
+        if conversation_item.get('user_id') != get_current_user_id():
+            return jsonify({
+                "error": "Forbidden"
+            }), 403
 
-            cosmos_messages_container.delete_item(doc['id'], partition_key=conversation_id)
-        
-        # Log conversation deletion before actual deletion
-        log_conversation_deletion(
-            user_id=conversation_item.get('user_id'),
-            conversation_id=conversation_id,
-            title=conversation_item.get('title', 'Untitled'),
-            workspace_type='personal',
-            context=conversation_item.get('context', []),
-            tags=conversation_item.get('tags', []),
-            is_archived=archiving_enabled,
-            is_bulk_operation=False
-        )
-        
         try:
-            cosmos_conversations_container.delete_item(
-                item=conversation_id,
-                partition_key=conversation_id
+            # Messages are archived and deleted in transactional batches per partition
+            delete_conversation_with_messages(
+                conversation_item,
+                archiving_enabled=archiving_enabled
             )
             # TODO: Delete any facts that were stored with this conversation.
         except Exception as e:
@@ -465,6 +415,7 @@ def register_route_backend_conversations(app):
     def delete_multiple_conversations():
         """
         Delete multiple conversations at once. If archiving is enabled, copy them to archived_conversations first.
+        The deletion runs as a background job; poll the returned job_id for progress.
         """
         user_id = get_current_user_id()
         if not user_id:
@@ -475,91 +426,36 @@ def register_route_backend_conversations(app):
         
         if not conversation_ids:
             return jsonify({'error': 'No conversation IDs provided'}), 400
-            
-        settings = get_settings()
-        archiving_enabled = settings.get('enable_conversation_archiving', False)
-        
-        success_count = 0
-        failed_ids = []
-        
-        for conversation_id in conversation_ids:
-            try:
-                # Verify the conversation exists and belongs to the user
-                try:
-                    conversation_item = cosmos_conversations_container.read_item(
-                        item=conversation_id,
-                        partition_key=conversation_id
-                    )
-                    
-                    # Check if the conversation belongs to the current user
-                    if conversation_item.get('user_id') != user_id:
-                        failed_ids.append(conversation_id)
-                        continue
-                        
-                except CosmosResourceNotFoundError:
-                    failed_ids.append(conversation_id)
-                    continue
-                
-                # Archive if enabled
-                if archiving_enabled:
-                    archived_item = dict(conversation_item)
-                    archived_item["archived_at"] = datetime.utcnow().isoformat()
-                    cosmos_archived_conversations_container.upsert_item(archived_item)
-                    
-                    # Log conversation archival
-                    log_conversation_archival(
-                        user_id=user_id,
-                        conversation_id=conversation_id,
-                        title=conversation_item.get('title', 'Untitled'),
-                        workspace_type='personal',
-                        context=conversation_item.get('context', []),
-                        tags=conversation_item.get('tags', [])
-                    )
-                
-                # Get and archive messages if enabled
-                message_query = f"SELECT * FROM c WHERE c.conversation_id = '{conversation_id}'"
-                messages = list(cosmos_messages_container.query_items(
-                    query=message_query,
-                    partition_key=conversation_id
-                ))
-                
-                for message in messages:
-                    if archiving_enabled:
-                        archived_message = dict(message)
-                        archived_message["archived_at"] = datetime.utcnow().isoformat()
-                        cosmos_archived_messages_container.upsert_item(archived_message)
-                    
-                    cosmos_messages_container.delete_item(message['id'], partition_key=conversation_id)
-                
-                # Log conversation deletion before actual deletion
-                log_conversation_deletion(
-                    user_id=user_id,
-                    conversation_id=conversation_id,
-                    title=conversation_item.get('title', 'Untitled'),
-                    workspace_type='personal',
-                    context=conversation_item.get('context', []),
-                    tags=conversation_item.get('tags', []),
-                    is_archived=archiving_enabled,
-                    is_bulk_operation=True
-                )
-                
-                # Delete the conversation
-                cosmos_conversations_container.delete_item(
-                    item=conversation_id,
-                    partition_key=conversation_id
-                )
-                
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error deleting conversation {conversation_id}: {str(e)}")
-                failed_ids.append(conversation_id)
-        
+
+        try:
+            job = submit_bulk_deletion_job(user_id, conversation_ids)
+        except Exception as e:
+            print(f"Error starting bulk conversation deletion: {str(e)}")
+            return jsonify({'error': 'Failed to start conversation deletion'}), 500
+
         return jsonify({
             "success": True,
-            "deleted_count": success_count,
-            "failed_ids": failed_ids
-        }), 200
+            "job_id": job['id'],
+            "status": job['status'],
+            "total": job['total']
+        }), 202
+
+    @app.route('/api/delete_multiple_conversations/<job_id>', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @user_required
+    def get_delete_multiple_conversations_status(job_id):
+        """
+        Get the progress of a bulk conversation deletion job.
+        """
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+
+        job = get_bulk_deletion_job(job_id, user_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job), 200
 
     @app.route('/api/conversations/<conversation_id>/pin', methods=['POST'])
     @swagger_route(security=get_auth_security())
@@ -803,7 +699,76 @@ def register_route_backend_conversations(app):
         except Exception as e:
             print(f"Error retrieving conversation metadata: {e}")
             return jsonify({'error': 'Failed to retrieve conversation metadata'}), 500
-    
+
+    @app.route('/api/conversations/<conversation_id>/messages', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @user_required
+    def get_conversation_message_page(conversation_id):
+        """
+        Get one page of a conversation's visible messages, newest page first.
+        Pass the returned continuation_token to load the next (older) page.
+        Citations are not included; see the citations endpoint.
+        """
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+
+        try:
+            conversation_item = cosmos_conversations_container.read_item(
+                item=conversation_id,
+                partition_key=conversation_id
+            )
+            if conversation_item.get('user_id') != user_id:
+                return jsonify({'error': 'Forbidden'}), 403
+
+            page_size = parse_message_page_size(request.args.get('limit'))
+            continuation_token = request.args.get('continuation_token') or None
+            messages, next_token = query_message_page(conversation_id, page_size, continuation_token)
+
+            return jsonify({
+                'messages': messages,
+                'continuation_token': next_token,
+                'has_more': bool(next_token)
+            }), 200
+
+        except CosmosResourceNotFoundError:
+            return jsonify({'error': 'Conversation not found'}), 404
+        except Exception as e:
+            print(f"Error retrieving message page: {e}")
+            return jsonify({'error': 'Failed to retrieve messages'}), 500
+
+    @app.route('/api/conversations/<conversation_id>/messages/<message_id>/citations', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @user_required
+    def get_conversation_message_citations(conversation_id, message_id):
+        """
+        Get the citations of a message, loaded when they are expanded in the chat.
+        """
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+
+        try:
+            conversation_item = cosmos_conversations_container.read_item(
+                item=conversation_id,
+                partition_key=conversation_id
+            )
+            if conversation_item.get('user_id') != user_id:
+                return jsonify({'error': 'Forbidden'}), 403
+
+            citations = get_message_citations(conversation_id, message_id)
+            if citations is None:
+                return jsonify({'error': 'Message not found'}), 404
+            return jsonify(citations), 200
+
+        except CosmosResourceNotFoundError:
+            return jsonify({'error': 'Conversation not found'}), 404
+        except Exception as e:
+            print(f"Error retrieving message citations: {e}")
+            return jsonify({'error': 'Failed to retrieve citations'}), 500
+
     @app.route('/api/conversations/classifications', methods=['GET'])
     @swagger_route(security=get_auth_security())
     @login_required
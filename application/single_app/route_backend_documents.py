@@ -3,6 +3,9 @@
 from config import *
 from functions_authentication import *
 from functions_documents import *
+from functions_document_versions import LATEST_VERSION_CONDITION
+from functions_ingestion_queue import submit_ingestion_task, PRIORITY_LOW
+from functions_listing_pagination import get_continuation_token, fetch_listing_page, document_count_key
 from functions_settings import *
 from utils_cache import invalidate_personal_search_cache
 from functions_debug import *
@@ -205,12 +208,12 @@ def register_route_backend_documents(app):
 
                 # 3) Now run heavy-lifting in a background thread
                 # --- CHANGE: Pass original_filename ---
-                future = current_app.extensions['executor'].submit_stored(
-                    parent_document_id, 
-                    process_document_upload_background, 
-                    document_id=parent_document_id, 
-                    user_id=user_id, 
-                    temp_file_path=temp_file_path, 
+                future = submit_ingestion_task(
+                    "document_upload",
+                    parent_document_id,
+                    user_id=user_id,
+                    document_id=parent_document_id,
+                    temp_file_path=temp_file_path,
                     original_filename=original_filename
                 )
 
@@ -352,43 +355,22 @@ def register_route_backend_documents(app):
             param_count += 1
 
         # Combine conditions into the WHERE clause
-        where_clause = " AND ".join(query_conditions)
+        # Only current document versions are listed
+        where_clause = " AND ".join(query_conditions + [LATEST_VERSION_CONDITION])
 
-        # --- 3) First query: get total count based on filters ---
+        # --- 3) Fetch the page: keyset pagination with a continuation token, maintained count when unfiltered ---
+        continuation_token = get_continuation_token(request.args)
+        is_filtered = len(query_conditions) > 1
         try:
-            count_query_str = f"SELECT VALUE COUNT(1) FROM c WHERE {where_clause}"
-            # debug_print(f"Count Query: {count_query_str}") # Optional Debugging
-            # debug_print(f"Count Params: {query_params}")    # Optional Debugging
-            count_items = list(cosmos_user_documents_container.query_items(
-                query=count_query_str,
-                parameters=query_params,
-                enable_cross_partition_query=True # May be needed if user_id is not partition key
-            ))
-            total_count = count_items[0] if count_items else 0
-
-        except Exception as e:
-            print(f"Error executing count query: {e}") # Log the error
-            return jsonify({"error": f"Error counting documents: {str(e)}"}), 500
-
-
-        # --- 4) Second query: fetch the page of data based on filters ---
-        try:
-            offset = (page - 1) * page_size
-            # Note: ORDER BY c._ts DESC to show newest first
-            data_query_str = f"""
-                SELECT *
-                FROM c
-                WHERE {where_clause}
-                ORDER BY c._ts DESC
-                OFFSET {offset} LIMIT {page_size}
-            """
-            # debug_print(f"Data Query: {data_query_str}") # Optional Debugging
-            # debug_print(f"Data Params: {query_params}")    # Optional Debugging
-            docs = list(cosmos_user_documents_container.query_items(
-                query=data_query_str,
-                parameters=query_params,
-                enable_cross_partition_query=True # May be needed if user_id is not partition key
-            ))
+            docs, total_count, next_token, has_more = fetch_listing_page(
+                cosmos_user_documents_container,
+                where_clause,
+                query_params,
+                page,
+                page_size,
+                continuation_token=continuation_token,
+                counter_key=None if is_filtered else document_count_key(user_id=user_id)
+            )
 
             # Add shared_approval_status and owner_id for each doc
             for doc in docs:
@@ -408,24 +390,26 @@ def register_route_backend_documents(app):
             return jsonify({"error": f"Error fetching documents: {str(e)}"}), 500
 
         
-        # --- new: do we have any legacy documents? ---
-        try:
-            legacy_q = """
-                SELECT VALUE COUNT(1)
-                FROM c
-                WHERE c.user_id = @user_id
-                    AND NOT IS_DEFINED(c.percentage_complete)
-            """
-            legacy_docs = list(
-                cosmos_user_documents_container.query_items(
-                    query=legacy_q,
-                    parameters=[{"name":"@user_id","value":user_id}],
-                    enable_cross_partition_query=True
+        # --- new: do we have any legacy documents? (checked on the first page only) ---
+        legacy_count = 0
+        if not continuation_token:
+            try:
+                legacy_q = """
+                    SELECT VALUE COUNT(1)
+                    FROM c
+                    WHERE c.user_id = @user_id
+                        AND NOT IS_DEFINED(c.percentage_complete)
+                """
+                legacy_docs = list(
+                    cosmos_user_documents_container.query_items(
+                        query=legacy_q,
+                        parameters=[{"name":"@user_id","value":user_id}],
+                        enable_cross_partition_query=True
+                    )
                 )
-            )
-            legacy_count = legacy_docs[0] if legacy_docs else 0
-        except Exception as e:
-            print(f"Error executing legacy query: {e}")
+                legacy_count = legacy_docs[0] if legacy_docs else 0
+            except Exception as e:
+                print(f"Error executing legacy query: {e}")
 
         # --- 5) Return results ---
         return jsonify({
@@ -433,6 +417,8 @@ def register_route_backend_documents(app):
             "page": page,
             "page_size": page_size,
             "total_count": total_count,
+            "continuation_token": next_token,
+            "has_more": has_more,
             "needs_legacy_update_check": legacy_count > 0
         }), 200
 
@@ -592,11 +578,12 @@ def register_route_backend_documents(app):
             return jsonify({'error': 'Metadata extraction not enabled'}), 403
 
         # Queue the background task and store with tracking key
-        future = current_app.extensions['executor'].submit_stored(
-            f"{document_id}_metadata", 
-            process_metadata_extraction_background, 
-            document_id=document_id, 
-            user_id=user_id
+        future = submit_ingestion_task(
+            "metadata_extraction",
+            f"{document_id}_metadata",
+            user_id=user_id,
+            document_id=document_id,
+            priority=PRIORITY_LOW
         )
 
         # Return an immediate response to the user
@@ -914,25 +901,11 @@ def register_route_backend_documents(app):
                 document_item['shared_user_ids'] = new_shared_user_ids
                 document_item['last_updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
                 cosmos_user_documents_container.upsert_item(document_item)
-                # Update all chunks with the new shared_user_ids
+                # Propagate the new shared_user_ids to all chunks in the background
                 try:
-                    chunks = get_all_chunks(document_id, document_item.get('user_id'))
-                    for chunk in chunks:
-                        chunk_id = chunk.get('id')
-                        if chunk_id:
-                            try:
-                                update_chunk_metadata(
-                                    chunk_id=chunk_id,
-                                    user_id=document_item.get('user_id'),
-                                    group_id=None,
-                                    public_workspace_id=None,
-                                    document_id=document_id,
-                                    shared_user_ids=new_shared_user_ids
-                                )
-                            except Exception as chunk_e:
-                                print(f"Warning: Failed to update chunk {chunk_id}: {chunk_e}")
+                    submit_chunk_acl_propagation(document_id)
                 except Exception as e:
-                    print(f"Warning: Failed to update chunks for document {document_id}: {e}")
+                    print(f"Warning: Failed to queue chunk ACL update for document {document_id}: {e}")
             
             # Invalidate cache for user who approved (their search results changed)
             if updated:
@@ -940,4 +913,30 @@ def register_route_backend_documents(app):
             
             return jsonify({'message': 'Share approved' if updated else 'Already approved'}), 200
         except Exception as e:
-            return jsonify({'error': f'Error approving shared document: {str(e)}'}), 500
\ No newline at end of file
+            return jsonify({'error': f'Error approving shared document: {str(e)}'}), 500
+
+    @app.route('/api/documents/<document_id>/share-status', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @user_required
+    @enabled_required("enable_user_workspace")
+    def api_get_document_share_status(document_id):
+        """Return progress of the background job that applies sharing changes to a document's chunks."""
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+
+        try:
+            document_item = cosmos_user_documents_container.read_item(
+                item=document_id,
+                partition_key=document_id
+            )
+        except Exception:
+            return jsonify({'error': 'Document not found'}), 404
+
+        is_owner = document_item.get('user_id') == user_id
+        is_shared = any(entry.startswith(f"{user_id},") for entry in document_item.get('shared_user_ids', []))
+        if not is_owner and not is_shared:
+            return jsonify({'error': 'Document not found or access denied'}), 404
+
+        return jsonify(get_chunk_acl_sync_status(document_item)), 200
\ No newline at end of file
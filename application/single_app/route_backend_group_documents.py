@@ -5,6 +5,9 @@ from functions_authentication import *
 from functions_settings import *
 from functions_group import *
 from functions_documents import *
+from functions_document_versions import LATEST_VERSION_CONDITION
+from functions_ingestion_queue import submit_ingestion_task, PRIORITY_LOW
+from functions_listing_pagination import get_continuation_token, fetch_listing_page, document_count_key
 from utils_cache import invalidate_group_search_cache
 from functions_debug import *
 from functions_activity_logging import log_document_upload
@@ -109,13 +112,13 @@ def register_route_backend_group_documents(app):
                     percentage_complete=0
                 )
 
-                future = current_app.extensions['executor'].submit_stored(
-                    parent_document_id, 
-                    process_document_upload_background, 
-                    document_id=parent_document_id, 
-                    group_id=active_group_id, 
-                    user_id=user_id, 
-                    temp_file_path=temp_file_path, 
+                future = submit_ingestion_task(
+                    "document_upload",
+                    parent_document_id,
+                    user_id=user_id,
+                    group_id=active_group_id,
+                    document_id=parent_document_id,
+                    temp_file_path=temp_file_path,
                     original_filename=original_filename
                 )
 
@@ -221,59 +224,47 @@ def register_route_backend_group_documents(app):
             query_params.append({"name": param_name, "value": abstract_filter})
             param_count += 1
 
-        where_clause = " AND ".join(query_conditions)
-
-        # --- 3) Get total count ---
-        try:
-            count_query_str = f"SELECT VALUE COUNT(1) FROM c WHERE {where_clause}"
-            count_items = list(cosmos_group_documents_container.query_items(
-                query=count_query_str,
-                parameters=query_params,
-                enable_cross_partition_query=True
-            ))
-            total_count = count_items[0] if count_items else 0
-        except Exception as e:
-            print(f"Error executing count query for group: {e}")
-            return jsonify({"error": f"Error counting documents: {str(e)}"}), 500
+        # Only current document versions are listed
+        where_clause = " AND ".join(query_conditions + [LATEST_VERSION_CONDITION])
 
-        # --- 4) Get paginated data ---
+        # --- 3) Fetch the page: keyset pagination with a continuation token, maintained count when unfiltered ---
+        continuation_token = get_continuation_token(request.args)
+        is_filtered = len(query_conditions) > 1
         try:
-            offset = (page - 1) * page_size
-            data_query_str = f"""
-                SELECT *
-                FROM c
-                WHERE {where_clause}
-                ORDER BY c._ts DESC
-                OFFSET {offset} LIMIT {page_size}
-            """
-            docs = list(cosmos_group_documents_container.query_items(
-                query=data_query_str,
-                parameters=query_params,
-                enable_cross_partition_query=True
-            ))
+            docs, total_count, next_token, has_more = fetch_listing_page(
+                cosmos_group_documents_container,
+                where_clause,
+                query_params,
+                page,
+                page_size,
+                continuation_token=continuation_token,
+                counter_key=None if is_filtered else document_count_key(group_id=active_group_id)
+            )
         except Exception as e:
             print(f"Error fetching group documents: {e}")
             return jsonify({"error": f"Error fetching documents: {str(e)}"}), 500
 
         
-        # --- new: do we have any legacy documents? ---
-        try:
-            legacy_q = """
-                SELECT VALUE COUNT(1)
-                FROM c
-                WHERE c.group_id = @group_id
-                    AND NOT IS_DEFINED(c.percentage_complete)
-            """
-            legacy_docs = list(
-                cosmos_group_documents_container.query_items(
-                    query=legacy_q,
-                    parameters=[{"name":"@group_id","value":active_group_id}],
-                    enable_cross_partition_query=True
+        # --- new: do we have any legacy documents? (checked on the first page only) ---
+        legacy_count = 0
+        if not continuation_token:
+            try:
+                legacy_q = """
+                    SELECT VALUE COUNT(1)
+                    FROM c
+                    WHERE c.group_id = @group_id
+                        AND NOT IS_DEFINED(c.percentage_complete)
+                """
+                legacy_docs = list(
+                    cosmos_group_documents_container.query_items(
+                        query=legacy_q,
+                        parameters=[{"name":"@group_id","value":active_group_id}],
+                        enable_cross_partition_query=True
+                    )
                 )
-            )
-            legacy_count = legacy_docs[0] if legacy_docs else 0
-        except Exception as e:
-            print(f"Error executing legacy query: {e}")
+                legacy_count = legacy_docs[0] if legacy_docs else 0
+            except Exception as e:
+                print(f"Error executing legacy query: {e}")
 
         # --- 5) Return results ---
         return jsonify({
@@ -281,6 +272,8 @@ def register_route_backend_group_documents(app):
             "page": page,
             "page_size": page_size,
             "total_count": total_count,
+            "continuation_token": next_token,
+            "has_more": has_more,
             "needs_legacy_update_check": legacy_count > 0
         }), 200
 
@@ -515,12 +508,13 @@ def register_route_backend_group_documents(app):
             return jsonify({'error': 'You do not have permission to extract metadata for this group document'}), 403
 
         # Queue the group metadata extraction task
-        future = current_app.extensions['executor'].submit_stored(
+        future = submit_ingestion_task(
+            "metadata_extraction",
             f"{document_id}_group_metadata",
-            process_metadata_extraction_background,
-            document_id=document_id,
             user_id=user_id,
-            group_id=active_group_id
+            group_id=active_group_id,
+            document_id=document_id,
+            priority=PRIORITY_LOW
         )
 
         return jsonify({
@@ -625,6 +619,45 @@ def register_route_backend_group_documents(app):
         except Exception as e:
             return jsonify({'error': f'Error retrieving shared groups: {str(e)}'}), 500
         
+    @app.route('/api/group_documents/<document_id>/share-status', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @user_required
+    @enabled_required("enable_group_workspaces")
+    def api_get_group_document_share_status(document_id):
+        """
+        GET /api/group_documents/<document_id>/share-status
+        Returns progress of the background job that applies group sharing changes to the document's chunks.
+        """
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+
+        user_settings = get_user_settings(user_id)
+        active_group_id = user_settings["settings"].get("activeGroupOid")
+
+        if not active_group_id:
+            return jsonify({'error': 'No active group selected'}), 400
+
+        group_doc = find_group_by_id(active_group_id)
+        if not group_doc:
+            return jsonify({'error': 'Active group not found'}), 404
+
+        role = get_user_role_in_group(group_doc, user_id)
+        if not role:
+            return jsonify({'error': 'You are not a member of the active group'}), 403
+
+        try:
+            document = cosmos_group_documents_container.read_item(item=document_id, partition_key=document_id)
+        except Exception:
+            return jsonify({'error': 'Document not found'}), 404
+
+        shared_group_oids = [entry.split(',', 1)[0] for entry in document.get('shared_group_ids', [])]
+        if document.get('group_id') != active_group_id and active_group_id not in shared_group_oids:
+            return jsonify({'error': 'You do not have access to this document'}), 403
+
+        return jsonify(get_chunk_acl_sync_status(document)), 200
+
     @app.route('/api/group_documents/<document_id>/approve-share-with-group', methods=['POST'])
     @swagger_route(security=get_auth_security())
     @login_required
@@ -19,7 +19,7 @@ def register_route_backend_group_prompts(app):
             return jsonify({"error":"No active group selected"}), 400
 
         try:
-            items, total, page, page_size = list_prompts(
+            items, total, page, page_size, next_token, has_more = list_prompts(
                 user_id=user_id,
                 prompt_type="group_prompt",
                 args=request.args,
@@ -29,7 +29,9 @@ def register_route_backend_group_prompts(app):
                 "prompts":     items,
                 "page":        page,
                 "page_size":   page_size,
-                "total_count": total
+                "total_count": total,
+                "continuation_token": next_token,
+                "has_more":    has_more
             }), 200
         except Exception as e:
             app.logger.error(f"Error fetching group prompts: {e}")
@@ -15,7 +15,7 @@ def register_route_backend_prompts(app):
     def get_prompts():
         user_id = get_current_user_id()
         try:
-            items, total, page, page_size = list_prompts(
+            items, total, page, page_size, next_token, has_more = list_prompts(
                 user_id=user_id,
                 prompt_type="user_prompt",
                 args=request.args
@@ -24,7 +24,9 @@ def register_route_backend_prompts(app):
                 "prompts":     items,
                 "page":        page,
                 "page_size":   page_size,
-                "total_count": total
+                "total_count": total,
+                "continuation_token": next_token,
+                "has_more":    has_more
             }), 200
         except Exception as e:
             app.logger.error(f"Error fetching prompts: {e}")
@@ -6,6 +6,9 @@ from functions_authentication import *
 from functions_settings import *
 from functions_public_workspaces import *
 from functions_documents import *
+from functions_document_versions import LATEST_VERSION_CONDITION
+from functions_ingestion_queue import submit_ingestion_task, PRIORITY_LOW
+from functions_listing_pagination import get_continuation_token, fetch_listing_page, document_count_key
 from utils_cache import invalidate_public_workspace_search_cache
 from flask import current_app
 from functions_debug import *
@@ -84,12 +87,12 @@ def register_route_backend_public_documents(app):
                     public_workspace_id=active_ws,
                     percentage_complete=0
                 )
-                executor = current_app.extensions['executor']
-                executor.submit(
-                    process_document_upload_background,
-                    document_id=doc_id,
-                    public_workspace_id=active_ws,
+                submit_ingestion_task(
+                    "document_upload",
+                    doc_id,
                     user_id=user_id,
+                    public_workspace_id=active_ws,
+                    document_id=doc_id,
                     temp_file_path=tmp_path,
                     original_filename=orig
                 )
@@ -142,7 +145,7 @@ def register_route_backend_public_documents(app):
         except: page_size = 10
         if page < 1: page = 1
         if page_size < 1: page_size = 10
-        offset = (page - 1) * page_size
+        continuation_token = get_continuation_token(request.args)
 
         # filters
         search = request.args.get('search', '').strip()
@@ -152,35 +155,34 @@ def register_route_backend_public_documents(app):
         if search:
             conds.append('(CONTAINS(LOWER(c.file_name), LOWER(@search)) OR CONTAINS(LOWER(c.title), LOWER(@search)))')
             params.append({'name':'@search','value':search})
-        where = ' AND '.join(conds)
-
-        # count
-        count_q = f'SELECT VALUE COUNT(1) FROM c WHERE {where}'
-        total = list(cosmos_public_documents_container.query_items(
-            query=count_q, parameters=params, enable_cross_partition_query=True
-        ))
-        total_count = total[0] if total else 0
-
-        # data
-        data_q = f'SELECT * FROM c WHERE {where} ORDER BY c._ts DESC OFFSET {offset} LIMIT {page_size}'
-        docs = list(cosmos_public_documents_container.query_items(
-            query=data_q, parameters=params, enable_cross_partition_query=True
-        ))
-
-        # legacy
-        legacy_q = 'SELECT VALUE COUNT(1) FROM c WHERE c.public_workspace_id = @ws AND NOT IS_DEFINED(c.percentage_complete)'
-        legacy = list(cosmos_public_documents_container.query_items(
-            query=legacy_q,
-            parameters=[{'name':'@ws','value':active_ws}],
-            enable_cross_partition_query=True
-        ))
-        legacy_count = legacy[0] if legacy else 0
+        # only current document versions are listed
+        where = ' AND '.join(conds + [LATEST_VERSION_CONDITION])
+
+        # keyset page; the count is maintained when unfiltered
+        docs, total_count, next_token, has_more = fetch_listing_page(
+            cosmos_public_documents_container, where, params, page, page_size,
+            continuation_token=continuation_token,
+            counter_key=None if search else document_count_key(public_workspace_id=active_ws)
+        )
+
+        # legacy (first page only)
+        legacy_count = 0
+        if not continuation_token:
+            legacy_q = 'SELECT VALUE COUNT(1) FROM c WHERE c.public_workspace_id = @ws AND NOT IS_DEFINED(c.percentage_complete)'
+            legacy = list(cosmos_public_documents_container.query_items(
+                query=legacy_q,
+                parameters=[{'name':'@ws','value':active_ws}],
+                enable_cross_partition_query=True
+            ))
+            legacy_count = legacy[0] if legacy else 0
 
         return jsonify({
             'documents': docs,
             'page': page,
             'page_size': page_size,
             'total_count': total_count,
+            'continuation_token': next_token,
+            'has_more': has_more,
             'needs_legacy_update': legacy_count > 0
         }), 200
 
@@ -369,8 +371,7 @@ def register_route_backend_public_documents(app):
         role = get_user_role_in_public_workspace(ws_doc, user_id) if ws_doc else None
         if role not in ['Owner','Admin','DocumentManager']:
             return jsonify({'error':'Access denied'}), 403
-        executor = current_app.extensions['executor']
-        executor.submit(process_metadata_extraction_background, document_id=doc_id, user_id=user_id, public_workspace_id=active_ws)
+        submit_ingestion_task("metadata_extraction", f"{doc_id}_public_metadata", user_id=user_id, public_workspace_id=active_ws, document_id=doc_id, priority=PRIORITY_LOW, store_future=False)
         return jsonify({'message':'Extraction queued'}), 200
 
     @app.route('/api/public_documents/upgrade_legacy', methods=['POST'])
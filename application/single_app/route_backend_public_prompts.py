@@ -31,7 +31,7 @@ def register_route_backend_public_prompts(app):
             return jsonify({'error': 'Access denied'}), 403
 
         try:
-            items, total, page, page_size = list_prompts(
+            items, total, page, page_size, next_token, has_more = list_prompts(
                 user_id=user_id,
                 prompt_type='public_prompt',
                 args=request.args,
@@ -41,7 +41,9 @@ def register_route_backend_public_prompts(app):
                 'prompts': items,
                 'page': page,
                 'page_size': page_size,
-                'total_count': total
+                'total_count': total,
+                'continuation_token': next_token,
+                'has_more': has_more
             }), 200
         except Exception as e:
             app.logger.error(f"Error listing public prompts: {e}")
@@ -5,6 +5,9 @@ from functions_documents import *
 from functions_authentication import *
 from functions_settings import *
 from functions_appinsights import log_event
+from functions_async_runtime import get_async_runtime_stats
+from functions_kernel_pool import get_kernel_pool_stats
+from functions_logging import get_file_processing_log_stats
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
 from swagger_wrapper import swagger_route, get_auth_security
@@ -298,6 +301,39 @@ def register_route_backend_settings(app):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/admin/settings/async_runtime_stats', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @admin_required
+    def async_runtime_stats():
+        """
+        Returns per-loop pending task counts and scheduling lag for the shared
+        async runtime used by Semantic Kernel and Foundry calls.
+        """
+        return jsonify(get_async_runtime_stats()), 200
+
+    @app.route('/api/admin/settings/kernel_pool_stats', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @admin_required
+    def kernel_pool_stats():
+        """
+        Returns size, hit/miss and invalidation counts for the per-user
+        Semantic Kernel pool on this instance.
+        """
+        return jsonify(get_kernel_pool_stats()), 200
+
+    @app.route('/api/admin/settings/file_processing_log_stats', methods=['GET'])
+    @swagger_route(security=get_auth_security())
+    @login_required
+    @admin_required
+    def file_processing_log_stats():
+        """
+        Returns queued, written, dropped, failed and sampled-out counts for the
+        file processing log sink on this instance.
+        """
+        return jsonify(get_file_processing_log_stats()), 200
+
 def _test_multimodal_vision_connection(payload):
     """Test multi-modal vision analysis with a sample image."""
     enable_apim = payload.get('enable_apim', False)
@@ -3,12 +3,13 @@
 from config import *
 from functions_authentication import *
 from functions_settings import *
+from functions_user_directory import search_directory_users
 from swagger_wrapper import swagger_route, get_auth_security
 
 def register_route_backend_users(app):
     """
-    This route will expose GET /api/userSearch?query=<searchTerm> which calls
-    Microsoft Graph to find users by displayName, mail, userPrincipalName, etc.
+    This route will expose GET /api/userSearch?query=<searchTerm> which finds users
+    by displayName, mail, userPrincipalName, etc. (see functions_user_directory.py).
     """
 
     @app.route("/api/userSearch", methods=["GET"])
@@ -20,46 +21,12 @@ def register_route_backend_users(app):
         if not query:
             return jsonify([]), 200
 
-        token = get_valid_access_token()
-        if not token:
-            return jsonify({"error": "Could not acquire access token"}), 401
-
-        if AZURE_ENVIRONMENT == "usgovernment":
-            user_endpoint = "https://graph.microsoft.us/v1.0/users"
-        elif AZURE_ENVIRONMENT == "custom":
-            user_endpoint = CUSTOM_GRAPH_URL_VALUE
-        else:
-            user_endpoint = "https://graph.microsoft.com/v1.0/users"
-            
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        filter_str = (
-            f"startswith(displayName, '{query}') "
-            f"or startswith(mail, '{query}') "
-            f"or startswith(userPrincipalName, '{query}')"
-        )
-        params = {
-            "$filter": filter_str,
-            "$top": 10,
-            "$select": "id,displayName,mail,userPrincipalName"
-        }
+        tenant_id = (session.get("user") or {}).get("tid")
 
         try:
-            response = requests.get(user_endpoint, headers=headers, params=params)
-            response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-
-            user_results = response.json().get("value", [])
-            results = []
-            for user in user_results:
-                email = user.get("mail") or user.get("userPrincipalName") or ""
-                results.append({
-                    "id": user.get("id"),
-                    "displayName": user.get("displayName", "(no name)"),
-                    "email": email
-                })
+            results = search_directory_users(query, tenant_id, get_valid_access_token)
+            if results is None:
+                return jsonify({"error": "Could not acquire access token"}), 401
             return jsonify(results), 200
 
         except requests.exceptions.RequestException as e:
@@ -5,6 +5,8 @@ from functions_authentication import *
 from functions_settings import *
 from functions_public_workspaces import *
 from functions_documents import *
+from functions_document_versions import LATEST_VERSION_CONDITION
+from functions_ingestion_queue import submit_ingestion_task, PRIORITY_LOW
 from swagger_wrapper import swagger_route, get_auth_security
 from flask import current_app
 
@@ -88,13 +90,13 @@ def register_route_external_public_documents(app):
                     percentage_complete=0
                 )
 
-                future = current_app.extensions['executor'].submit_stored(
-                    parent_document_id, 
-                    process_document_upload_background, 
-                    document_id=parent_document_id, 
-                    public_workspace_id=active_workspace_id, 
-                    user_id=user_id, 
-                    temp_file_path=temp_file_path, 
+                future = submit_ingestion_task(
+                    "document_upload",
+                    parent_document_id,
+                    user_id=user_id,
+                    public_workspace_id=active_workspace_id,
+                    document_id=parent_document_id,
+                    temp_file_path=temp_file_path,
                     original_filename=original_filename
                 )
 
@@ -179,7 +181,8 @@ def register_route_external_public_documents(app):
             query_params.append({"name": param_name, "value": abstract_filter})
             param_count += 1
 
-        where_clause = " AND ".join(query_conditions)
+        # Only current document versions are listed
+        where_clause = " AND ".join(query_conditions + [LATEST_VERSION_CONDITION])
 
         # --- 3) Get total count ---
         try:
@@ -410,12 +413,13 @@ def register_route_external_public_documents(app):
         active_workspace_id = request.form.get('active_workspace_id')
 
         # Queue the public metadata extraction task
-        future = current_app.extensions['executor'].submit_stored(
+        future = submit_ingestion_task(
+            "metadata_extraction",
             f"{document_id}_public_metadata",
-            process_metadata_extraction_background,
-            document_id=document_id,
             user_id=user_id,
-            public_workspace_id=active_workspace_id
+            public_workspace_id=active_workspace_id,
+            document_id=document_id,
+            priority=PRIORITY_LOW
         )
 
         return jsonify({
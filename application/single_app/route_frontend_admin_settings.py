@@ -288,6 +288,11 @@ def register_route_frontend_admin_settings(app):
             app_title = form_data.get('app_title', 'AI Chat Application')
             max_file_size_mb = int(form_data.get('max_file_size_mb', 16))
             conversation_history_limit = int(form_data.get('conversation_history_limit', 10))
+            enable_durable_ingestion_queue = form_data.get('enable_durable_ingestion_queue') == 'on'
+            ingestion_embedded_workers = max(0, int(form_data.get('ingestion_embedded_workers', 4)))
+            ingestion_max_jobs_per_tenant = max(1, int(form_data.get('ingestion_max_jobs_per_tenant', 5)))
+            enable_content_hash_dedup = form_data.get('enable_content_hash_dedup') == 'on'
+            per_user_kernel_pool_size = max(0, int(form_data.get('per_user_kernel_pool_size', settings.get('per_user_kernel_pool_size', 100))))
             # ... (fetch all other fields using form_data.get) ...
             enable_video_file_support = form_data.get('enable_video_file_support') == 'on'
             enable_audio_file_support = form_data.get('enable_audio_file_support') == 'on'
@@ -296,6 +301,9 @@ def register_route_frontend_admin_settings(app):
             # Vision settings
             enable_multimodal_vision = form_data.get('enable_multimodal_vision') == 'on'
             multimodal_vision_model = form_data.get('multimodal_vision_model', '')
+            image_preprocessing_vision_max_dimension = min(max(int(form_data.get('image_preprocessing_vision_max_dimension', 2048)), 256), 10000)
+            image_preprocessing_di_max_dimension = min(max(int(form_data.get('image_preprocessing_di_max_dimension', 4096)), 256), 10000)
+            image_preprocessing_jpeg_quality = min(max(int(form_data.get('image_preprocessing_jpeg_quality', 85)), 30), 95)
 
             require_member_of_create_group = form_data.get('require_member_of_create_group') == 'on'
             require_member_of_create_public_workspace = form_data.get('require_member_of_create_public_workspace') == 'on'
@@ -518,6 +526,12 @@ def register_route_frontend_admin_settings(app):
             file_timer_unit = form_data.get('file_timer_unit', 'hours')
             file_processing_logs_turnoff_time = None
             enable_file_processing_logs = form_data.get('enable_file_processing_logs') == 'on'
+            file_processing_log_max_content_chars = max(0, int(form_data.get('file_processing_log_max_content_chars', 2000)))
+            try:
+                file_processing_log_sample_rate = float(form_data.get('file_processing_log_sample_rate', 1.0))
+            except ValueError:
+                file_processing_log_sample_rate = 1.0
+            file_processing_log_sample_rate = min(max(file_processing_log_sample_rate, 0.0), 1.0)
             
             # Validate file timer values
             if file_timer_unit in timer_limits:
@@ -671,6 +685,7 @@ def register_route_frontend_admin_settings(app):
                 'enable_swagger': form_data.get('enable_swagger') == 'on',
                 'enable_semantic_kernel': form_data.get('enable_semantic_kernel') == 'on',
                 'per_user_semantic_kernel': form_data.get('per_user_semantic_kernel') == 'on',
+                'per_user_kernel_pool_size': per_user_kernel_pool_size,
                 'enable_agent_template_gallery': form_data.get('enable_agent_template_gallery') == 'on',
                 'agent_templates_allow_user_submission': form_data.get('agent_templates_allow_user_submission') == 'on',
                 'agent_templates_require_approval': form_data.get('agent_templates_require_approval') == 'on',
@@ -736,6 +751,8 @@ def register_route_frontend_admin_settings(app):
                 'file_timer_value': file_timer_value,
                 'file_timer_unit': file_timer_unit,
                 'file_processing_logs_turnoff_time': file_processing_logs_turnoff_time_str,
+                'file_processing_log_max_content_chars': file_processing_log_max_content_chars,
+                'file_processing_log_sample_rate': file_processing_log_sample_rate,
                 'require_member_of_create_group': require_member_of_create_group,
                 'require_member_of_create_public_workspace': require_member_of_create_public_workspace,
                 
@@ -861,6 +878,10 @@ def register_route_frontend_admin_settings(app):
                 # Other
                 'max_file_size_mb': max_file_size_mb,
                 'conversation_history_limit': conversation_history_limit,
+                'enable_durable_ingestion_queue': enable_durable_ingestion_queue,
+                'ingestion_embedded_workers': ingestion_embedded_workers,
+                'ingestion_max_jobs_per_tenant': ingestion_max_jobs_per_tenant,
+                'enable_content_hash_dedup': enable_content_hash_dedup,
                 'default_system_prompt': form_data.get('default_system_prompt', '').strip(),
 
                 # Video file settings with Azure Video Indexer Settings
@@ -887,10 +908,15 @@ def register_route_frontend_admin_settings(app):
                 'enable_text_to_speech': form_data.get('enable_text_to_speech') == 'on',
 
                 'metadata_extraction_model': form_data.get('metadata_extraction_model', '').strip(),
+                'enable_deferred_metadata_extraction': form_data.get('enable_deferred_metadata_extraction') == 'on',
 
                 # Multi-modal vision settings
                 'enable_multimodal_vision': form_data.get('enable_multimodal_vision') == 'on',
                 'multimodal_vision_model': form_data.get('multimodal_vision_model', '').strip(),
+                'enable_image_preprocessing': form_data.get('enable_image_preprocessing') == 'on',
+                'image_preprocessing_vision_max_dimension': image_preprocessing_vision_max_dimension,
+                'image_preprocessing_di_max_dimension': image_preprocessing_di_max_dimension,
+                'image_preprocessing_jpeg_quality': image_preprocessing_jpeg_quality,
 
                 # --- Banner fields ---
                 'classification_banner_enabled': classification_banner_enabled,
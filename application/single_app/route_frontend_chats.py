@@ -9,6 +9,8 @@ from functions_group import find_group_by_id
 from functions_appinsights import log_event
 from swagger_wrapper import swagger_route, get_auth_security
 from functions_debug import debug_print
+from functions_image_store import get_image_url, store_image_data_url
+from functions_image_preprocessing import prepare_image_file_for_di
 
 def register_route_frontend_chats(app):
     @app.route('/chats', methods=['GET'])
@@ -128,13 +130,16 @@ def register_route_frontend_chats(app):
         is_table = False 
         vision_analysis = None
         image_base64_url = None  # For storing base64-encoded images
+        di_input_path = None
 
         try:
             # Check if this is an image file
             is_image_file = file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.heif']
             
             if file_ext in ['.pdf', '.docx', '.pptx', '.html', '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.heif']:
-                extracted_content_raw  = extract_content_with_azure_di(temp_file_path)
+                if is_image_file:
+                    di_input_path = prepare_image_file_for_di(temp_file_path, settings)
+                extracted_content_raw  = extract_content_with_azure_di(di_input_path or temp_file_path)
                 
                 # Convert pages_data list to string
                 if isinstance(extracted_content_raw, list):
@@ -219,17 +224,68 @@ def register_route_frontend_chats(app):
             return jsonify({'error': f'Error processing file: {str(e)}'}), 500
         finally:
             os.remove(temp_file_path)
+            if di_input_path and os.path.exists(di_input_path):
+                os.remove(di_input_path)
 
         try:
             file_message_id = f"{conversation_id}_file_{int(time.time())}_{random.randint(1000,9999)}"
             
             # For images with base64 data, store as 'image' role (like system-generated images)
             if image_base64_url:
+                # Threading logic for file upload
+                previous_thread_id = None
+                try:
+                    last_msg_query = f"SELECT TOP 1 c.metadata.thread_info.thread_id as thread_id FROM c WHERE c.conversation_id = '{conversation_id}' ORDER BY c.timestamp DESC"
+                    last_msgs = list(cosmos_messages_container.query_items(query=last_msg_query, partition_key=conversation_id))
+                    if last_msgs:
+                        previous_thread_id = last_msgs[0].get('thread_id')
+                except:
+                    pass
+
+                current_thread_id = str(uuid.uuid4())
+                
                 # Check if image data is too large for a single Cosmos document (2MB limit)
                 # Use 1.5MB as safe limit for base64 content
                 max_content_size = 1500000  # 1.5MB in bytes
                 
-                if len(image_base64_url) > max_content_size:
+                # Base64 images go to image storage; the message only keeps a reference
+                image_storage = store_image_data_url(image_base64_url)
+                
+                if image_storage:
+                    image_message = {
+                        'id': file_message_id,
+                        'conversation_id': conversation_id,
+                        'role': 'image',
+                        'content': get_image_url(file_message_id),
+                        'filename': filename,
+                        'prompt': f"User uploaded: {filename}",
+                        'created_at': datetime.utcnow().isoformat(),
+                        'timestamp': datetime.utcnow().isoformat(),
+                        'model_deployment_name': None,
+                        'metadata': {
+                            'is_chunked': False,
+                            'original_size': image_storage['size'],
+                            'is_user_upload': True,
+                            'image_storage': image_storage,
+                            'thumbnail_url': get_image_url(file_message_id, thumbnail=True) if image_storage.get('thumbnail_key') else None,
+                            'thread_info': {
+                                'thread_id': current_thread_id,
+                                'previous_thread_id': previous_thread_id,
+                                'active_thread': True,
+                                'thread_attempt': 1
+                            }
+                        }
+                    }
+                    
+                    # Add vision analysis and extracted text if available
+                    if vision_analysis:
+                        image_message['vision_analysis'] = vision_analysis
+                    if extracted_content:
+                        image_message['extracted_text'] = extracted_content
+                    
+                    cosmos_messages_container.upsert_item(image_message)
+                    print(f"Stored uploaded image {filename} in {image_storage['backend']} as {image_storage['key']}")
+                elif len(image_base64_url) > max_content_size:
                     print(f"Large image detected ({len(image_base64_url)} bytes), splitting across multiple documents")
                     
                     # Extract base64 part for splitting
@@ -243,18 +299,6 @@ def register_route_frontend_chats(app):
                     
                     print(f"Splitting into {total_chunks} chunks of max {chunk_size} bytes each")
                     
-                    # Threading logic for file upload
-                    previous_thread_id = None
-                    try:
-                        last_msg_query = f"SELECT TOP 1 c.metadata.thread_info.thread_id as thread_id FROM c WHERE c.conversation_id = '{conversation_id}' ORDER BY c.timestamp DESC"
-                        last_msgs = list(cosmos_messages_container.query_items(query=last_msg_query, partition_key=conversation_id))
-                        if last_msgs:
-                            previous_thread_id = last_msgs[0].get('thread_id')
-                    except:
-                        pass
-
-                    current_thread_id = str(uuid.uuid4())
-                    
                     # Create main image document with first chunk
                     main_image_doc = {
                         'id': file_message_id,
@@ -311,18 +355,6 @@ def register_route_frontend_chats(app):
                     print(f"Created {total_chunks} chunked image documents for {filename}")
                 else:
                     # Small enough to store in single document
-                    # Threading logic for file upload
-                    previous_thread_id = None
-                    try:
-                        last_msg_query = f"SELECT TOP 1 c.metadata.thread_info.thread_id as thread_id FROM c WHERE c.conversation_id = '{conversation_id}' ORDER BY c.timestamp DESC"
-                        last_msgs = list(cosmos_messages_container.query_items(query=last_msg_query, partition_key=conversation_id))
-                        if last_msgs:
-                            previous_thread_id = last_msgs[0].get('thread_id')
-                    except:
-                        pass
-
-                    current_thread_id = str(uuid.uuid4())
-                    
                     image_message = {
                         'id': file_message_id,
                         'conversation_id': conversation_id,
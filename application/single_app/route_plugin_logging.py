@@ -227,7 +227,7 @@ def clear_plugin_logs():
         plugin_logger = get_plugin_logger()
         
         # Get count before clearing
-        previous_count = len(plugin_logger.invocations)
+        previous_count = plugin_logger.get_invocation_count()
         
         # Clear the logs
         plugin_logger.clear_history()
@@ -272,7 +272,7 @@ def export_plugin_logs():
         
         # Format for export
         export_data = {
-            "export_timestamp": plugin_logger.invocations[-1].timestamp if plugin_logger.invocations else None,
+            "export_timestamp": user_invocations[-1].timestamp if user_invocations else None,
             "user_id": user_id,
             "total_invocations": len(user_invocations),
             "invocations": [inv.to_dict() for inv in user_invocations]
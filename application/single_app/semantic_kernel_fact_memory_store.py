@@ -3,12 +3,14 @@
 FactMemoryStore abstraction for agent fact memory in CosmosDB.
 - Scopes facts by agent, scope_type (user/group), scope_id, and conversation_id
 - Uses the 'agent_facts' CosmosDB container
+- Facts are embedded on write for relevance-ranked retrieval (see functions_fact_retrieval.py)
 """
 
 import uuid
 from datetime import datetime, timezone
 from azure.cosmos import exceptions
 from config import cosmos_agent_facts_container
+from functions_fact_retrieval import embed_fact_value, invalidate_fact_scope
 
 class FactMemoryStore:
     def __init__(self, container=cosmos_agent_facts_container):
@@ -30,7 +32,10 @@ class FactMemoryStore:
             "created_at": now,
             "updated_at": now
         }
+        item.update(embed_fact_value(value))
         self.container.upsert_item(item)
+        invalidate_fact_scope(scope_id, scope_type)
+        item.pop("embedding", None)
         return item
 
 
@@ -43,7 +48,7 @@ class FactMemoryStore:
             return None
 
 
-    def get_facts(self, scope_type, scope_id, conversation_id=None, agent_id=None):
+    def get_facts(self, scope_type, scope_id, conversation_id=None, agent_id=None, include_embeddings=False):
         partition_key = self.get_partition_key(scope_id)
         query = "SELECT * FROM c WHERE c.scope_id=@scope_id AND c.scope_type=@scope_type"
         params = [
@@ -58,12 +63,38 @@ class FactMemoryStore:
             query += " AND c.conversation_id=@conversation_id"
             params.append({"name": "@conversation_id", "value": conversation_id})
         items = list(self.container.query_items(query=query, parameters=params, partition_key=partition_key))
+        if not include_embeddings:
+            for item in items:
+                item.pop("embedding", None)
         return items
 
+    def get_scope_fingerprint(self, scope_type, scope_id):
+        """Fact count and latest _ts for a scope; changes whenever a fact is added, edited or deleted."""
+        query = "SELECT COUNT(1) AS count, MAX(c._ts) AS ts FROM c WHERE c.scope_id=@scope_id AND c.scope_type=@scope_type"
+        params = [
+            {"name": "@scope_id", "value": scope_id},
+            {"name": "@scope_type", "value": scope_type}
+        ]
+        results = list(self.container.query_items(query=query, parameters=params, partition_key=self.get_partition_key(scope_id)))
+        if not results:
+            return (0, None)
+        return (results[0].get("count", 0), results[0].get("ts"))
+
+    def set_fact_embedding(self, scope_id, fact_id, embedding_fields):
+        try:
+            self.container.patch_item(
+                item=fact_id,
+                partition_key=self.get_partition_key(scope_id),
+                patch_operations=[{"op": "set", "path": f"/{field}", "value": value} for field, value in embedding_fields.items()]
+            )
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+
     def delete_fact(self, scope_id, fact_id):
         partition_key = self.get_partition_key(scope_id)
         try:
             self.container.delete_item(item=fact_id, partition_key=partition_key)
+            invalidate_fact_scope(scope_id)
             return True
         except exceptions.CosmosResourceNotFoundError:
             return False
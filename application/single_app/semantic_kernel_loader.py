@@ -28,8 +28,10 @@ from semantic_kernel_plugins.logged_plugin_loader import create_logged_plugin_lo
 from semantic_kernel_plugins.plugin_invocation_logger import get_plugin_logger
 from semantic_kernel_plugins.smart_http_plugin import SmartHttpPlugin
 from functions_debug import debug_print
+from functions_async_runtime import offload_sync_kernel_functions
+from functions_kernel_pool import compute_kernel_fingerprint, get_kernel_pool
 from flask import g
-from functions_keyvault import validate_secret_name_dynamic, retrieve_secret_from_key_vault, retrieve_secret_from_key_vault_by_full_name, SecretReturnType
+from functions_keyvault import validate_secret_name_dynamic, retrieve_secret_from_key_vault, retrieve_secret_from_key_vault_by_full_name, SecretReturnType, collect_keyvault_secret_references, prefetch_keyvault_secrets
 from functions_global_actions import get_global_actions
 from functions_global_agents import get_global_agents
 from functions_group_agents import get_group_agent, get_group_agents
@@ -109,6 +111,10 @@ def resolve_agent_config(agent, settings):
     agent['agent_type'] = agent_type
     other_settings = agent.get("other_settings", {}) or {}
 
+    if settings.get("enable_key_vault_secret_storage", False) and settings.get("key_vault_name"):
+        # Load every secret the agent references in one parallel batch; the lookups below hit the cache
+        prefetch_keyvault_secrets(collect_keyvault_secret_references(agent))
+
     gpt_model_obj = settings.get('gpt_model', {})
     selected_model = gpt_model_obj.get('selected', [{}])[0] if gpt_model_obj.get('selected') else {}
     debug_print(f"[SK Loader] Global selected_model: {selected_model}")
@@ -453,7 +459,7 @@ def initialize_semantic_kernel(user_id: str=None, redis_client=None):
     if settings.get('per_user_semantic_kernel', False) and user_id is not None:
         debug_print(f"[SK Loader] Using per-user semantic kernel mode")
         log_event("[SK Loader] Using per-user semantic kernel mode", level=logging.INFO)
-        kernel, kernel_agents = load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+        kernel, kernel_agents = load_pooled_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
         g.kernel = kernel
         g.kernel_agents = kernel_agents
         print(f"[SK Loader] Per-user mode - stored g.kernel_agents: {type(kernel_agents)} with {len(kernel_agents) if kernel_agents else 0} agents")
@@ -466,6 +472,10 @@ def initialize_semantic_kernel(user_id: str=None, redis_client=None):
         builtins.kernel_agents = kernel_agents
         print(f"[SK Loader] Global mode - stored builtins.kernel_agents: {type(kernel_agents)} with {len(kernel_agents) if kernel_agents else 0} agents")
         log_event(f"[SK Loader] Global mode - stored builtins.kernel_agents: {type(kernel_agents)} with {len(kernel_agents) if kernel_agents else 0} agents", level=logging.INFO)
+
+    # Sync plugin functions must not block the shared async runtime loop the kernel is pinned to
+    if kernel:
+        offload_sync_kernel_functions(kernel, kernel_agents)
         
     if kernel and not kernel_agents:
         debug_print(f"[SK Loader] No agents loaded - proceeding in model-only mode")
@@ -557,6 +567,7 @@ def load_agent_specific_plugins(kernel, plugin_names, settings, mode_label="glob
         if settings.get("enable_key_vault_secret_storage", False) and settings.get("key_vault_name"):
             debug_print(f"[SK Loader] Resolving Key Vault secrets in plugin manifests if needed")
             try:
+                prefetch_keyvault_secrets(collect_keyvault_secret_references(plugin_manifests))
                 plugin_manifests = [resolve_key_vault_secrets_in_plugins(p, settings) for p in plugin_manifests]
                 debug_print(f"[SK Loader] Resolved Key Vault secrets in plugin manifests {plugin_manifests}")
             except Exception as e:
@@ -955,6 +966,7 @@ def load_plugins_for_kernel(kernel, plugin_manifests, settings, mode_label="glob
     """
     if settings.get("enable_key_vault_secret_storage", False) and settings.get("key_vault_name"):
         try:
+            prefetch_keyvault_secrets(collect_keyvault_secret_references(plugin_manifests))
             plugin_manifests = [resolve_key_vault_secrets_in_plugins(p, settings) for p in plugin_manifests]
         except Exception as e:
             log_event(f"[SK Loader] Failed to resolve Key Vault secrets in plugin manifests: {e}", level=logging.ERROR, exceptionTraceback=True)
@@ -1135,6 +1147,41 @@ def _load_plugins_original_method(kernel, plugin_manifests, settings, mode_label
     except Exception as e:
         log_event(f"[SK Loader] Error discovering plugin types for {mode_label} mode: {e}", {"error": str(e)}, level=logging.ERROR, exceptionTraceback=True)
 
+def load_pooled_user_semantic_kernel(kernel: Kernel, settings, user_id: str, redis_client):
+    """
+    load_user_semantic_kernel() backed by the per-user kernel pool. A warm kernel is
+    leased to this request (g.kernel_pool_lease) and released on request teardown.
+    """
+    pool = get_kernel_pool(settings)
+    if pool is None:
+        return load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+
+    try:
+        user_settings = get_user_settings(user_id).get('settings', {})
+        fingerprint = compute_kernel_fingerprint(
+            user_id,
+            settings,
+            user_settings,
+            force_enable_agents=getattr(g, 'force_enable_agents', False),
+            request_agent_name=getattr(g, 'request_agent_name', None)
+        )
+    except Exception as e:
+        log_event(f"[SK Loader] Kernel pool fingerprint failed for user {user_id}, loading without pool: {e}", level=logging.WARNING)
+        return load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+
+    lease = pool.checkout(user_id, fingerprint)
+    if lease is not None:
+        debug_print(f"[SK Loader] Reusing pooled kernel for user {user_id}")
+        g.redis_client = redis_client
+        g.kernel_pool_lease = lease
+        return lease.kernel, lease.kernel_agents
+
+    kernel, kernel_agents = load_user_semantic_kernel(kernel, settings, user_id=user_id, redis_client=redis_client)
+    lease = pool.add(user_id, fingerprint, kernel, kernel_agents)
+    if lease is not None:
+        g.kernel_pool_lease = lease
+    return kernel, kernel_agents
+
 def load_user_semantic_kernel(kernel: Kernel, settings, user_id: str, redis_client):
     debug_print(f"[SK Loader] Per-user Semantic Kernel mode enabled. Loading user-specific plugins and agents.")
     log_event("[SK Loader] Per-user Semantic Kernel mode enabled. Loading user-specific plugins and agents.", 
@@ -0,0 +1,186 @@
+# http_session_pool.py
+"""
+Shared, keep-alive HTTP connection pools for Semantic Kernel plugins.
+
+Plugins used to call bare requests.get/post (OpenApiPlugin) or open a new
+aiohttp.ClientSession per call (SmartHttpPlugin), so every tool call paid DNS,
+TCP and TLS setup again. Plugins now get pooled clients from here:
+
+- get_requests_session(policy): one requests.Session per policy. urllib3 keeps
+  a keep-alive pool per host, and the session's adapter applies the policy's
+  retry rules.
+- pooled_aiohttp_request(method, url, policy): a request on an aiohttp session
+  shared per event loop and policy. The session uses a TCPConnector with per-host
+  limits and a DNS cache. Retries are applied to idempotent methods.
+
+Sessions are shared by every user, so they never store cookies.
+
+Neither requests nor aiohttp speaks HTTP/2; connections are HTTP/1.1 keep-alive.
+"""
+
+import asyncio
+import contextlib
+import http.cookiejar
+import os
+import threading
+import weakref
+from dataclasses import dataclass, replace
+from typing import Dict, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_MAXSIZE = int(os.getenv("PLUGIN_HTTP_POOL_MAXSIZE", "20"))
+DEFAULT_POOL_HOSTS = int(os.getenv("PLUGIN_HTTP_POOL_HOSTS", "50"))
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclass(frozen=True)
+class HttpClientPolicy:
+    """Timeout, retry and pool sizing for a plugin's HTTP calls."""
+    timeout_seconds: float = 30.0
+    connect_timeout_seconds: float = 10.0
+    max_retries: int = 2
+    backoff_seconds: float = 0.5
+    retry_statuses: Tuple[int, ...] = (429, 502, 503, 504)
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    pool_hosts: int = DEFAULT_POOL_HOSTS
+    keepalive_seconds: float = 30.0
+
+    def with_overrides(self, **overrides):
+        """Returns a copy with the given (non-None) fields replaced."""
+        return replace(self, **{key: value for key, value in overrides.items() if value is not None})
+
+
+HTTP_POLICIES: Dict[str, HttpClientPolicy] = {
+    "default": HttpClientPolicy(),
+    "openapi": HttpClientPolicy(),
+    "smart_http": HttpClientPolicy(max_retries=1),
+    # Microsoft Graph directory lookups behind the user pickers (interactive, so fail fast)
+    "graph": HttpClientPolicy(timeout_seconds=10.0, connect_timeout_seconds=5.0, max_retries=1),
+}
+
+
+def get_http_policy(name="default"):
+    return HTTP_POLICIES.get(name) or HTTP_POLICIES["default"]
+
+
+def _resolve_policy(policy):
+    return get_http_policy(policy) if isinstance(policy, str) else (policy or get_http_policy())
+
+
+class _NoCookiePolicy(http.cookiejar.DefaultCookiePolicy):
+    """Never store cookies: pooled sessions are shared across users."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+_requests_sessions = {}
+_requests_sessions_lock = threading.Lock()
+
+
+def get_requests_session(policy="default"):
+    """Returns the shared requests.Session for a policy (name or HttpClientPolicy)."""
+    policy = _resolve_policy(policy)
+    with _requests_sessions_lock:
+        session = _requests_sessions.get(policy)
+        if session is None:
+            retry = Retry(
+                total=policy.max_retries,
+                connect=policy.max_retries,
+                read=policy.max_retries,
+                status=policy.max_retries,
+                backoff_factor=policy.backoff_seconds,
+                status_forcelist=policy.retry_statuses,
+                allowed_methods=IDEMPOTENT_METHODS,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=policy.pool_hosts, pool_maxsize=policy.pool_maxsize, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.cookies.set_policy(_NoCookiePolicy())
+            _requests_sessions[policy] = session
+        return session
+
+
+def get_requests_timeout(policy="default"):
+    """(connect, read) timeout tuple for requests calls."""
+    policy = _resolve_policy(policy)
+    return (policy.connect_timeout_seconds, policy.timeout_seconds)
+
+
+# aiohttp sessions are bound to the loop that created them: one set per loop
+_aiohttp_sessions = weakref.WeakKeyDictionary()
+_aiohttp_sessions_lock = threading.Lock()
+
+
+def get_aiohttp_session(policy="default"):
+    """Returns the shared aiohttp.ClientSession for the running loop and policy."""
+    policy = _resolve_policy(policy)
+    loop = asyncio.get_running_loop()
+    with _aiohttp_sessions_lock:
+        sessions = _aiohttp_sessions.setdefault(loop, {})
+        session = sessions.get(policy)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=policy.pool_maxsize * policy.pool_hosts,
+                limit_per_host=policy.pool_maxsize,
+                ttl_dns_cache=300,
+                keepalive_timeout=policy.keepalive_seconds,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar(),
+                timeout=aiohttp.ClientTimeout(total=policy.timeout_seconds, connect=policy.connect_timeout_seconds),
+            )
+            sessions[policy] = session
+        return session
+
+
+@contextlib.asynccontextmanager
+async def pooled_aiohttp_request(method, url, policy="default", **kwargs):
+    """
+    Makes a request on the pooled aiohttp session, retrying idempotent methods on
+    connection errors, timeouts and the policy's retry statuses. Use as
+    `async with pooled_aiohttp_request("GET", url) as response:`.
+    """
+    policy = _resolve_policy(policy)
+    session = get_aiohttp_session(policy)
+    retries = policy.max_retries if method.upper() in IDEMPOTENT_METHODS else 0
+    attempt = 0
+    while True:
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status not in policy.retry_statuses or attempt >= retries:
+                break
+            # Drain the error body so the connection goes back to the pool
+            with contextlib.suppress(aiohttp.ClientError, asyncio.TimeoutError):
+                await response.read()
+            response.release()
+        attempt += 1
+        await asyncio.sleep(policy.backoff_seconds * (2 ** (attempt - 1)))
+
+    try:
+        yield response
+    finally:
+        response.release()
+
+
+def get_http_pool_stats():
+    """Number of pooled sessions (requests and per-loop aiohttp) currently open."""
+    with _requests_sessions_lock:
+        requests_sessions = len(_requests_sessions)
+    with _aiohttp_sessions_lock:
+        aiohttp_sessions = sum(
+            1 for sessions in _aiohttp_sessions.values() for session in sessions.values() if not session.closed
+        )
+    return {"requests_sessions": requests_sessions, "aiohttp_sessions": aiohttp_sessions}
@@ -50,149 +50,156 @@ import os
 import yaml
 import json
 import time
+import types
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Union
 from semantic_kernel_plugins.base_plugin import BasePlugin
 from semantic_kernel.functions import kernel_function
 from semantic_kernel_plugins.plugin_invocation_logger import plugin_function_logger
+from semantic_kernel_plugins.http_session_pool import get_http_policy, get_requests_session, get_requests_timeout
 from functions_debug import debug_print
 
-class OpenApiPlugin(BasePlugin):
-    def __init__(self, 
-                 base_url: str,
-                 auth: Optional[Dict[str, Any]] = None,
-                 manifest: Optional[Dict[str, Any]] = None,
-                 openapi_spec_path: Optional[str] = None,
-                 openapi_spec_content: Optional[Dict[str, Any]] = None):
-        """
-        Initialize the OpenAPI plugin with user-provided configuration.
-        
-        Args:
-            base_url: Base URL of the API (e.g., 'https://api.example.com')
-            auth: Authentication configuration (e.g., {'type': 'bearer', 'token': 'xxx'})
-            manifest: Additional manifest configuration
-            openapi_spec_path: Path to the OpenAPI specification file (YAML or JSON) - DEPRECATED
-            openapi_spec_content: OpenAPI specification content as parsed dict (preferred)
-        """
-        import logging
-        logging.info(f"[OpenAPI Plugin] Initializing plugin with base_url: {base_url}")
-        
-        if not base_url:
-            raise ValueError("base_url is required")
-        if not openapi_spec_path and not openapi_spec_content:
-            raise ValueError("Either openapi_spec_path or openapi_spec_content is required")
-        
-        self.openapi_spec_path = openapi_spec_path
-        self.openapi_spec_content = openapi_spec_content
-        self.base_url = base_url.rstrip('/')  # Remove trailing slash
-        self.auth = auth or {}
-        self.manifest = manifest or {}
-        
-        # Track function calls for citations
-        self.function_calls = []
-        
-        # Load and parse the OpenAPI specification
-        logging.info(f"[OpenAPI Plugin] Loading OpenAPI specification...")
-        self.openapi = self._load_openapi_spec()
-        logging.info(f"[OpenAPI Plugin] Generating metadata...")
-        self._metadata = self._generate_metadata()
-        
-        # Dynamically create kernel functions for each API operation
-        logging.info(f"[OpenAPI Plugin] About to create dynamic functions...")
-        try:
-            self._create_operation_functions()
-            logging.info(f"[OpenAPI Plugin] Successfully completed initialization")
-        except Exception as e:
-            logging.error(f"[OpenAPI Plugin] Error creating dynamic functions: {e}")
-            import traceback
-            logging.error(f"[OpenAPI Plugin] Traceback: {traceback.format_exc()}")
-            raise
-    
-    def _load_openapi_spec(self) -> Dict[str, Any]:
-        """Load OpenAPI specification from content or file."""
-        # If we have spec content directly, use it
-        if self.openapi_spec_content:
-            return self.openapi_spec_content
-            
-        # Fall back to file-based loading for backward compatibility
-        if not self.openapi_spec_path:
-            raise ValueError("No OpenAPI specification provided")
-            
-        if not os.path.exists(self.openapi_spec_path):
-            raise FileNotFoundError(f"OpenAPI specification file not found: {self.openapi_spec_path}")
-        
+# Compiled specs are shared by every plugin instance built from the same spec content
+OPENAPI_SPEC_CACHE_SIZE = 32
+_compiled_spec_cache = OrderedDict()
+_compiled_spec_cache_lock = threading.Lock()
+
+
+def _parse_openapi_spec_text(text: str, spec_path: str) -> Dict[str, Any]:
+    """Parse OpenAPI spec file content as YAML or JSON based on the file extension."""
+    file_extension = os.path.splitext(spec_path)[1].lower()
+    if file_extension in ['.yaml', '.yml']:
+        return yaml.safe_load(text)
+    elif file_extension == '.json':
+        return json.loads(text)
+    else:
+        # Try YAML first, then JSON
         try:
-            with open(self.openapi_spec_path, "r", encoding="utf-8") as f:
-                file_extension = os.path.splitext(self.openapi_spec_path)[1].lower()
-                if file_extension in ['.yaml', '.yml']:
-                    return yaml.safe_load(f)
-                elif file_extension == '.json':
-                    return json.load(f)
-                else:
-                    # Try YAML first, then JSON
-                    content = f.read()
-                    try:
-                        f.seek(0)
-                        return yaml.safe_load(f)
-                    except yaml.YAMLError:
-                        try:
-                            return json.loads(content)
-                        except json.JSONDecodeError:
-                            raise ValueError(f"Unable to parse OpenAPI spec file. Ensure it's valid YAML or JSON: {self.openapi_spec_path}")
-        except Exception as e:
-            raise ValueError(f"Error loading OpenAPI specification: {e}")
+            return yaml.safe_load(text)
+        except yaml.YAMLError:
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                raise ValueError(f"Unable to parse OpenAPI spec file. Ensure it's valid YAML or JSON: {spec_path}")
 
-    def _resolve_ref(self, ref_obj: Any) -> Any:
+
+def _get_cached_spec(content_hash: str, build):
+    with _compiled_spec_cache_lock:
+        compiled = _compiled_spec_cache.get(content_hash)
+        if compiled is not None:
+            _compiled_spec_cache.move_to_end(content_hash)
+            return compiled
+
+    # Compile outside the lock; if two threads race, the first one stored wins
+    compiled = build()
+    with _compiled_spec_cache_lock:
+        compiled = _compiled_spec_cache.setdefault(content_hash, compiled)
+        _compiled_spec_cache.move_to_end(content_hash)
+        while len(_compiled_spec_cache) > OPENAPI_SPEC_CACHE_SIZE:
+            _compiled_spec_cache.popitem(last=False)
+    return compiled
+
+
+def get_compiled_openapi_spec(openapi_spec_content: Optional[Dict[str, Any]] = None,
+                              openapi_spec_path: Optional[str] = None) -> "CompiledOpenApiSpec":
+    """
+    Return the compiled spec for the given content or file, compiling it only the
+    first time that content is seen. The cache key is a SHA-256 of the content.
+    """
+    if openapi_spec_content:
+        if isinstance(openapi_spec_content, str):
+            raw = openapi_spec_content
+        else:
+            raw = json.dumps(openapi_spec_content, sort_keys=True, default=str)
+        content_hash = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return _get_cached_spec(content_hash, lambda: CompiledOpenApiSpec(openapi_spec_content, content_hash))
+
+    if not openapi_spec_path:
+        raise ValueError("No OpenAPI specification provided")
+    if not os.path.exists(openapi_spec_path):
+        raise FileNotFoundError(f"OpenAPI specification file not found: {openapi_spec_path}")
+
+    try:
+        with open(openapi_spec_path, "rb") as f:
+            raw_bytes = f.read()
+        content_hash = hashlib.sha256(raw_bytes).hexdigest()
+        return _get_cached_spec(
+            content_hash,
+            lambda: CompiledOpenApiSpec(_parse_openapi_spec_text(raw_bytes.decode("utf-8"), openapi_spec_path), content_hash)
+        )
+    except Exception as e:
+        raise ValueError(f"Error loading OpenAPI specification: {e}")
+
+
+def clear_compiled_openapi_spec_cache():
+    with _compiled_spec_cache_lock:
+        _compiled_spec_cache.clear()
+
+
+class CompiledOpenApiSpec:
+    """
+    A parsed OpenAPI spec with memoized $ref resolution, the operation table, the
+    UI metadata and the generated kernel functions (unbound, so each plugin
+    instance only binds them). Treated as read-only once built.
+    """
+
+    def __init__(self, spec: Dict[str, Any], content_hash: str):
+        self.spec = spec
+        self.content_hash = content_hash
+        self._resolved_refs = {}
+        # operation_id -> (path, method, operation)
+        self.operations = {}
+        for path, ops in (spec.get("paths", {}) if isinstance(spec, dict) else {}).items():
+            for method, op in ops.items():
+                if isinstance(op, dict) and op.get("operationId"):
+                    self.operations.setdefault(op["operationId"], (path, method, op))
+        self.metadata = self._generate_metadata()
+        self.functions = self._create_operation_functions()
+
+    def resolve_ref(self, ref_obj: Any) -> Any:
         """Resolve $ref references in OpenAPI specification objects."""
         if isinstance(ref_obj, dict) and "$ref" in ref_obj:
             ref_path = ref_obj["$ref"]
-            if ref_path.startswith("#/"):
-                # Handle internal references like #/components/parameters/fields
-                path_parts = ref_path[2:].split("/")  # Remove #/ prefix
-                current = self.openapi
-                try:
-                    for part in path_parts:
-                        current = current[part]
-                    return current
-                except (KeyError, TypeError):
-                    logging.warning(f"[OpenAPI Plugin] Failed to resolve reference: {ref_path}")
-                    return ref_obj
-            else:
-                logging.warning(f"[OpenAPI Plugin] External references not supported: {ref_path}")
-                return ref_obj
+            if ref_path not in self._resolved_refs:
+                self._resolved_refs[ref_path] = self._lookup_ref(ref_path)
+            resolved = self._resolved_refs[ref_path]
+            return ref_obj if resolved is None else resolved
         elif isinstance(ref_obj, list):
             # Recursively resolve references in lists
-            return [self._resolve_ref(item) for item in ref_obj]
+            return [self.resolve_ref(item) for item in ref_obj]
         elif isinstance(ref_obj, dict):
             # Recursively resolve references in dictionaries
             resolved = {}
             for key, value in ref_obj.items():
-                resolved[key] = self._resolve_ref(value)
+                resolved[key] = self.resolve_ref(value)
             return resolved
         else:
             # Return non-dict/list objects as-is
             return ref_obj
 
-    @property
-    def display_name(self) -> str:
-        api_title = self.openapi.get("info", {}).get("title", "Unknown API")
-        return f"OpenAPI: {api_title}"
-
-    @property
-    def metadata(self) -> Dict[str, Any]:
-        info = self.openapi.get("info", {})
-        return {
-            "name": info.get("title", "OpenAPIPlugin"),
-            "type": "openapi",
-            "description": info.get("description", ""),
-            "version": info.get("version", ""),
-            "base_url": self.base_url,
-            "methods": self._metadata["methods"]
-        }
+    def _lookup_ref(self, ref_path: str) -> Any:
+        """Follow one reference path; returns None when it cannot be resolved."""
+        if ref_path.startswith("#/"):
+            # Handle internal references like #/components/parameters/fields
+            path_parts = ref_path[2:].split("/")  # Remove #/ prefix
+            current = self.spec
+            try:
+                for part in path_parts:
+                    current = current[part]
+                return current
+            except (KeyError, TypeError):
+                logging.warning(f"[OpenAPI Plugin] Failed to resolve reference: {ref_path}")
+                return None
+        else:
+            logging.warning(f"[OpenAPI Plugin] External references not supported: {ref_path}")
+            return None
 
     def _generate_metadata(self) -> Dict[str, Any]:
-        info = self.openapi.get("info", {})
-        paths = self.openapi.get("paths", {})
+        info = self.spec.get("info", {})
+        paths = self.spec.get("paths", {})
         methods = []
         for path, ops in paths.items():
             for method, op in ops.items():
@@ -201,7 +208,7 @@ class OpenApiPlugin(BasePlugin):
                 parameters = []
                 # Path/query parameters - resolve $ref references first
                 raw_parameters = op.get("parameters", [])
-                resolved_parameters = self._resolve_ref(raw_parameters)
+                resolved_parameters = self.resolve_ref(raw_parameters)
                 for param in resolved_parameters:
                     parameters.append({
                         "name": param.get("name"),
@@ -238,6 +245,178 @@ class OpenApiPlugin(BasePlugin):
             "methods": methods
         }
 
+    def _create_operation_functions(self) -> Dict[str, Any]:
+        """Build an unbound kernel function for each OpenAPI operation."""
+        functions = {}
+        logging.info(f"[OpenAPI Plugin] Creating dynamic functions for {len(self.metadata['methods'])} operations")
+
+        paths = self.spec.get("paths", {})
+        for path, operations in paths.items():
+            for method, operation in operations.items():
+                if not isinstance(operation, dict):
+                    continue
+
+                operation_id = operation.get("operationId")
+                if not operation_id:
+                    # Generate operation ID if not provided
+                    operation_id = f"{method}_{path.replace('/', '_').replace('{', '').replace('}', '')}"
+
+                logging.info(f"[OpenAPI Plugin] Creating function: {operation_id} for {method.upper()} {path}")
+                functions[operation_id] = self._create_operation_function(operation_id, path, method, operation)
+
+        logging.info(f"[OpenAPI Plugin] Finished creating dynamic functions")
+        return functions
+
+    def _create_operation_function(self, op_id, op_path, op_method, op_data):
+        # Extract parameters from OpenAPI spec and resolve $ref references
+        raw_parameters = op_data.get("parameters", [])
+        parameters = self.resolve_ref(raw_parameters)
+
+        # Create function signature based on OpenAPI parameters
+        required_params = []
+        optional_params = []
+        param_descriptions = {}
+
+        for param in parameters:
+            param_name = param.get("name", "")
+            param_required = param.get("required", False)
+            param_description = param.get("description", "")
+            param_type = param.get("schema", {}).get("type", "string") if "schema" in param else "string"
+
+            # Convert kebab-case to snake_case for Python function parameters
+            python_param_name = param_name.replace("-", "_")
+
+            param_descriptions[python_param_name] = {
+                "description": param_description,
+                "type": param_type,
+                "original_name": param_name,
+                "required": param_required
+            }
+
+            if param_required:
+                required_params.append(python_param_name)
+            else:
+                optional_params.append(python_param_name)
+
+        # Create the function dynamically with proper parameters; `self` is the plugin instance it is bound to
+        def operation_function(self, **kwargs):
+            # Map Python parameter names back to OpenAPI parameter names
+            mapped_kwargs = {}
+            for python_name, value in kwargs.items():
+                if python_name in param_descriptions:
+                    original_name = param_descriptions[python_name]["original_name"]
+                    mapped_kwargs[original_name] = value
+                    logging.info(f"[OpenAPI Plugin] Mapped parameter {python_name} -> {original_name}: {value}")
+                else:
+                    mapped_kwargs[python_name] = value
+
+            return self._call_api_operation(op_id, op_path, op_method, op_data, **mapped_kwargs)
+
+        # Set the function name to the operation ID
+        operation_function.__name__ = op_id
+        operation_function.__qualname__ = f"OpenApiPlugin.{op_id}"
+
+        # Get operation description
+        description = op_data.get("description", op_data.get("summary", f"{op_method.upper()} {op_path}"))
+
+        # Add parameter information to description
+        if required_params or optional_params:
+            description += "\n\nParameters:"
+            for param_name in required_params:
+                param_info = param_descriptions[param_name]
+                description += f"\n- {param_name} (required): {param_info['description']}"
+            for param_name in optional_params:
+                param_info = param_descriptions[param_name]
+                description += f"\n- {param_name} (optional): {param_info['description']}"
+
+        # Apply plugin function logger decorator FIRST for detailed logging
+        operation_function = plugin_function_logger("OpenApiPlugin")(operation_function)
+
+        # Then add kernel_function decorator
+        operation_function = kernel_function(description=description)(operation_function)
+        return operation_function
+
+
+class OpenApiPlugin(BasePlugin):
+    def __init__(self, 
+                 base_url: str,
+                 auth: Optional[Dict[str, Any]] = None,
+                 manifest: Optional[Dict[str, Any]] = None,
+                 openapi_spec_path: Optional[str] = None,
+                 openapi_spec_content: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the OpenAPI plugin with user-provided configuration.
+        
+        Args:
+            base_url: Base URL of the API (e.g., 'https://api.example.com')
+            auth: Authentication configuration (e.g., {'type': 'bearer', 'token': 'xxx'})
+            manifest: Additional manifest configuration
+            openapi_spec_path: Path to the OpenAPI specification file (YAML or JSON) - DEPRECATED
+            openapi_spec_content: OpenAPI specification content as parsed dict (preferred)
+        """
+        import logging
+        logging.info(f"[OpenAPI Plugin] Initializing plugin with base_url: {base_url}")
+        
+        if not base_url:
+            raise ValueError("base_url is required")
+        if not openapi_spec_path and not openapi_spec_content:
+            raise ValueError("Either openapi_spec_path or openapi_spec_content is required")
+        
+        self.openapi_spec_path = openapi_spec_path
+        self.openapi_spec_content = openapi_spec_content
+        self.base_url = base_url.rstrip('/')  # Remove trailing slash
+        self.auth = auth or {}
+        self.manifest = manifest or {}
+
+        # Requests go through a pooled keep-alive session; the manifest can tune timeout and retries
+        timeout_override = self.manifest.get("http_timeout_seconds")
+        retries_override = self.manifest.get("http_max_retries")
+        self.http_policy = get_http_policy("openapi").with_overrides(
+            timeout_seconds=float(timeout_override) if timeout_override not in (None, "") else None,
+            max_retries=int(retries_override) if retries_override not in (None, "") else None
+        )
+        
+        # Track function calls for citations
+        self.function_calls = []
+        
+        # Load the compiled spec (parsed, metadata and operation functions), compiling it on first use
+        logging.info(f"[OpenAPI Plugin] Loading OpenAPI specification...")
+        try:
+            self._compiled = get_compiled_openapi_spec(openapi_spec_content, openapi_spec_path)
+        except Exception as e:
+            logging.error(f"[OpenAPI Plugin] Error compiling OpenAPI specification: {e}")
+            import traceback
+            logging.error(f"[OpenAPI Plugin] Traceback: {traceback.format_exc()}")
+            raise
+        self.openapi = self._compiled.spec
+        self._metadata = self._compiled.metadata
+
+        # Bind the kernel function for each API operation to this instance
+        for operation_id, func in self._compiled.functions.items():
+            setattr(self, operation_id, types.MethodType(func, self))
+        logging.info(f"[OpenAPI Plugin] Successfully completed initialization")
+
+    def _resolve_ref(self, ref_obj: Any) -> Any:
+        """Resolve $ref references using the compiled spec's memoized lookups."""
+        return self._compiled.resolve_ref(ref_obj)
+
+    @property
+    def display_name(self) -> str:
+        api_title = self.openapi.get("info", {}).get("title", "Unknown API")
+        return f"OpenAPI: {api_title}"
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        info = self.openapi.get("info", {})
+        return {
+            "name": info.get("title", "OpenAPIPlugin"),
+            "type": "openapi",
+            "description": info.get("description", ""),
+            "version": info.get("version", ""),
+            "base_url": self.base_url,
+            "methods": self._metadata["methods"]
+        }
+
     def get_functions(self) -> List[str]:
         # Expose all operationIds as functions (for UI listing)
         return [m["name"] for m in self._metadata["methods"]] + ["call_operation"]
@@ -320,104 +499,6 @@ class OpenApiPlugin(BasePlugin):
             }
         }
 
-    def _create_operation_functions(self):
-        """Dynamically create kernel functions for each OpenAPI operation."""
-        import types
-        import logging
-        
-        logging.info(f"[OpenAPI Plugin] Creating dynamic functions for {len(self._metadata['methods'])} operations")
-        
-        paths = self.openapi.get("paths", {})
-        for path, operations in paths.items():
-            for method, operation in operations.items():
-                if not isinstance(operation, dict):
-                    continue
-                    
-                operation_id = operation.get("operationId")
-                if not operation_id:
-                    # Generate operation ID if not provided
-                    operation_id = f"{method}_{path.replace('/', '_').replace('{', '').replace('}', '')}"
-                
-                logging.info(f"[OpenAPI Plugin] Creating function: {operation_id} for {method.upper()} {path}")
-                
-                # Create a dynamic function for this operation
-                def create_operation_function(op_id, op_path, op_method, op_data):
-                    # Extract parameters from OpenAPI spec and resolve $ref references
-                    raw_parameters = op_data.get("parameters", [])
-                    parameters = self._resolve_ref(raw_parameters)
-                    
-                    # Create function signature based on OpenAPI parameters
-                    required_params = []
-                    optional_params = []
-                    param_descriptions = {}
-                    
-                    for param in parameters:
-                        param_name = param.get("name", "")
-                        param_required = param.get("required", False)
-                        param_description = param.get("description", "")
-                        param_type = param.get("schema", {}).get("type", "string") if "schema" in param else "string"
-                        
-                        # Convert kebab-case to snake_case for Python function parameters
-                        python_param_name = param_name.replace("-", "_")
-                        
-                        param_descriptions[python_param_name] = {
-                            "description": param_description,
-                            "type": param_type,
-                            "original_name": param_name,
-                            "required": param_required
-                        }
-                        
-                        if param_required:
-                            required_params.append(python_param_name)
-                        else:
-                            optional_params.append(python_param_name)
-                    
-                    # Create the function dynamically with proper parameters
-                    def operation_function(self, **kwargs):
-                        # Map Python parameter names back to OpenAPI parameter names
-                        mapped_kwargs = {}
-                        for python_name, value in kwargs.items():
-                            if python_name in param_descriptions:
-                                original_name = param_descriptions[python_name]["original_name"]
-                                mapped_kwargs[original_name] = value
-                                logging.info(f"[OpenAPI Plugin] Mapped parameter {python_name} -> {original_name}: {value}")
-                            else:
-                                mapped_kwargs[python_name] = value
-                        
-                        return self._call_api_operation(op_id, op_path, op_method, op_data, **mapped_kwargs)
-                    
-                    # Set the function name to the operation ID
-                    operation_function.__name__ = op_id
-                    operation_function.__qualname__ = f"OpenApiPlugin.{op_id}"
-                    
-                    # Get operation description
-                    description = op_data.get("description", op_data.get("summary", f"{op_method.upper()} {op_path}"))
-                    
-                    # Add parameter information to description
-                    if required_params or optional_params:
-                        description += "\n\nParameters:"
-                        for param_name in required_params:
-                            param_info = param_descriptions[param_name]
-                            description += f"\n- {param_name} (required): {param_info['description']}"
-                        for param_name in optional_params:
-                            param_info = param_descriptions[param_name]
-                            description += f"\n- {param_name} (optional): {param_info['description']}"
-                    
-                    # Apply plugin function logger decorator FIRST for detailed logging
-                    operation_function = plugin_function_logger("OpenApiPlugin")(operation_function)
-                    
-                    # Then add kernel_function decorator
-                    operation_function = kernel_function(description=description)(operation_function)
-                    return operation_function
-                
-                # Create and bind the function to this instance
-                func = create_operation_function(operation_id, path, method, operation)
-                bound_func = types.MethodType(func, self)
-                setattr(self, operation_id, bound_func)
-                logging.info(f"[OpenAPI Plugin] Successfully created and bound function: {operation_id}")
-        
-        logging.info(f"[OpenAPI Plugin] Finished creating dynamic functions")
-
     def get_kernel_plugin(self, plugin_name="openapi_plugin"):
         """
         Create and return a properly configured KernelPlugin with all dynamic functions.
@@ -969,27 +1050,29 @@ class OpenApiPlugin(BasePlugin):
             logging.info(f"[OpenAPI Plugin] Headers: {headers}")
             logging.info(f"[OpenAPI Plugin] Query params: {query_params}")
             
+            session = get_requests_session(self.http_policy)
+            timeout = get_requests_timeout(self.http_policy)
             if method.lower() == 'get':
-                response = requests.get(full_url, headers=headers, params=query_params, timeout=30)
+                response = session.get(full_url, headers=headers, params=query_params, timeout=timeout)
                 # Log the actual URL that was requested
                 debug_print(f"Actual GET request URL: {response.url}")
                 debug_print(f"Response status: {response.status_code}")
                 logging.info(f"[OpenAPI Plugin] Actual GET request URL: {response.url}")
             elif method.lower() == 'post':
-                response = requests.post(full_url, headers=headers, params=query_params, json=kwargs, timeout=30)
+                response = session.post(full_url, headers=headers, params=query_params, json=kwargs, timeout=timeout)
                 logging.info(f"[OpenAPI Plugin] Actual POST request URL: {response.url}")
             elif method.lower() == 'put':
-                response = requests.put(full_url, headers=headers, params=query_params, json=kwargs, timeout=30)
+                response = session.put(full_url, headers=headers, params=query_params, json=kwargs, timeout=timeout)
                 logging.info(f"[OpenAPI Plugin] Actual PUT request URL: {response.url}")
             elif method.lower() == 'delete':
-                response = requests.delete(full_url, headers=headers, params=query_params, timeout=30)
+                response = session.delete(full_url, headers=headers, params=query_params, timeout=timeout)
                 logging.info(f"[OpenAPI Plugin] Actual DELETE request URL: {response.url}")
             elif method.lower() == 'patch':
-                response = requests.patch(full_url, headers=headers, params=query_params, json=kwargs, timeout=30)
+                response = session.patch(full_url, headers=headers, params=query_params, json=kwargs, timeout=timeout)
                 logging.info(f"[OpenAPI Plugin] Actual PATCH request URL: {response.url}")
             else:
                 # Default to GET for unknown methods
-                response = requests.get(full_url, headers=headers, params=query_params, timeout=30)
+                response = session.get(full_url, headers=headers, params=query_params, timeout=timeout)
                 logging.info(f"[OpenAPI Plugin] Actual GET request URL: {response.url}")
             
             debug_print(f"Response status: {response.status_code}")
@@ -1184,16 +1267,9 @@ class OpenApiPlugin(BasePlugin):
         operation_method = None
         
         # Try exact match first
-        for path, ops in self.openapi.get("paths", {}).items():
-            for method, op in ops.items():
-                if op.get("operationId") == operation_id:
-                    operation_found = True
-                    operation_data = op
-                    operation_path = path
-                    operation_method = method
-                    break
-            if operation_found:
-                break
+        if operation_id in self._compiled.operations:
+            operation_path, operation_method, operation_data = self._compiled.operations[operation_id]
+            operation_found = True
         
         # If not found, try common operation name variations
         if not operation_found:
@@ -48,10 +48,13 @@ class OpenApiPluginFactory:
         if not openapi_spec_content and 'additionalFields' in config:
             openapi_spec_content = config['additionalFields'].get('openapi_spec_content')
         
+        manifest = cls._extract_http_policy_config(config)
+
         if openapi_spec_content:
             return OpenApiPlugin(
                 base_url=base_url,
                 auth=auth,
+                manifest=manifest,
                 openapi_spec_content=openapi_spec_content
             )
         
@@ -73,6 +76,7 @@ class OpenApiPluginFactory:
         return OpenApiPlugin(
             base_url=base_url,
             auth=auth,
+            manifest=manifest,
             openapi_spec_path=openapi_spec_path
         )
     
@@ -122,6 +126,17 @@ class OpenApiPluginFactory:
         
         return file_path
     
+    @classmethod
+    def _extract_http_policy_config(cls, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract optional HTTP timeout/retry overrides from plugin config."""
+        additional_fields = config.get('additionalFields') or {}
+        manifest = {}
+        for key in ('http_timeout_seconds', 'http_max_retries'):
+            value = config.get(key, additional_fields.get(key))
+            if value not in (None, ''):
+                manifest[key] = value
+        return manifest
+
     @classmethod
     def _extract_auth_config(cls, config: Dict[str, Any]) -> Dict[str, Any]:
         """Extract authentication configuration from plugin config."""
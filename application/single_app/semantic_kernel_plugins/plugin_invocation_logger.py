@@ -6,10 +6,13 @@ This module provides comprehensive logging for all plugin invocations in Semanti
 capturing function calls, parameters, results, and execution times before they're sent to the model.
 """
 
+import bisect
 import json
 import time
 import logging
 import functools
+import threading
+from collections import deque
 from typing import Any, Dict, List, Optional, Callable
 from datetime import datetime
 from dataclasses import dataclass, asdict
@@ -43,32 +46,143 @@ class PluginInvocation:
         return json.dumps(self.to_dict(), default=str, indent=2)
 
 
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+LATENCY_BUCKET_LABELS = tuple(f"<={bound}" for bound in LATENCY_BUCKETS_MS) + (f">{LATENCY_BUCKETS_MS[-1]}",)
+
+
+def _latency_bucket(duration_ms: float) -> int:
+    return bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)
+
+
+class _CallStats:
+    """Running counters and latency histogram for a plugin or plugin function."""
+    __slots__ = ("total_calls", "successful_calls", "failed_calls", "total_duration_ms", "histogram")
+
+    def __init__(self):
+        self.total_calls = 0
+        self.successful_calls = 0
+        self.failed_calls = 0
+        self.total_duration_ms = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKET_LABELS)
+
+    def update(self, invocation: PluginInvocation, sign: int):
+        """Add (sign=1) or remove (sign=-1) an invocation."""
+        self.total_calls += sign
+        if invocation.success:
+            self.successful_calls += sign
+        else:
+            self.failed_calls += sign
+        self.total_duration_ms += sign * invocation.duration_ms
+        self.histogram[_latency_bucket(invocation.duration_ms)] += sign
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_calls": self.total_calls,
+            "successful_calls": self.successful_calls,
+            "failed_calls": self.failed_calls,
+            "total_duration_ms": self.total_duration_ms,
+            "average_duration_ms": self.total_duration_ms / self.total_calls if self.total_calls else 0,
+            "latency_histogram_ms": dict(zip(LATENCY_BUCKET_LABELS, self.histogram)),
+        }
+
+
+class _BufferedInvocation:
+    """Ring buffer slot. Cleared invocations stay in the buffer as dead slots until they are evicted."""
+    __slots__ = ("invocation", "alive")
+
+    def __init__(self, invocation: PluginInvocation):
+        self.invocation = invocation
+        self.alive = True
+
+
 class PluginInvocationLogger:
-    """Centralized logger for all Semantic Kernel plugin invocations."""
+    """
+    Centralized logger for all Semantic Kernel plugin invocations.
+
+    Recent invocations are kept in a thread-safe ring buffer indexed by user and by
+    (user, conversation). Usage stats are updated as invocations enter and leave the
+    buffer, so stats and per-conversation lookups don't scan the history.
+    """
     
-    def __init__(self):
-        self.invocations: List[PluginInvocation] = []
-        self.max_history = 1000  # Keep last 1000 invocations in memory
+    def __init__(self, max_history: int = 1000):
+        self.max_history = max_history  # Keep last 1000 invocations in memory
         self.logger = get_appinsights_logger() or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._buffer = deque(maxlen=self.max_history)
+        self._by_user: Dict[Optional[str], deque] = {}
+        self._by_conversation: Dict[tuple, deque] = {}
+        self._live_count = 0
+        self._totals = _CallStats()
+        self._plugin_stats: Dict[str, _CallStats] = {}
+        self._function_stats: Dict[str, Dict[str, _CallStats]] = {}
+
+    @property
+    def invocations(self) -> List[PluginInvocation]:
+        """Snapshot of the invocations currently held, oldest first."""
+        with self._lock:
+            return [entry.invocation for entry in self._buffer if entry.alive]
+
+    def _update_stats(self, invocation: PluginInvocation, sign: int):
+        self._totals.update(invocation, sign)
+        plugin_stats = self._plugin_stats.get(invocation.plugin_name)
+        if plugin_stats is None:
+            plugin_stats = self._plugin_stats[invocation.plugin_name] = _CallStats()
+            self._function_stats[invocation.plugin_name] = {}
+        plugin_stats.update(invocation, sign)
+        functions = self._function_stats[invocation.plugin_name]
+        func_stats = functions.get(invocation.function_name)
+        if func_stats is None:
+            func_stats = functions[invocation.function_name] = _CallStats()
+        func_stats.update(invocation, sign)
+        if plugin_stats.total_calls == 0:
+            del self._plugin_stats[invocation.plugin_name]
+            del self._function_stats[invocation.plugin_name]
+        elif func_stats.total_calls == 0:
+            del functions[invocation.function_name]
+
+    @staticmethod
+    def _drop_from_index(index: Dict[Any, deque], key, entry: _BufferedInvocation):
+        # The evicted entry is the oldest in the buffer, so it can only be at the left of its index
+        entries = index.get(key)
+        if entries and entries[0] is entry:
+            entries.popleft()
+            if not entries:
+                del index[key]
+
+    def _append(self, invocation: PluginInvocation):
+        entry = _BufferedInvocation(invocation)
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                evicted = self._buffer[0]
+                self._drop_from_index(self._by_user, evicted.invocation.user_id, evicted)
+                self._drop_from_index(self._by_conversation, (evicted.invocation.user_id, evicted.invocation.conversation_id), evicted)
+                self._update_stats(evicted.invocation, -1)
+                if evicted.alive:
+                    self._live_count -= 1
+            self._buffer.append(entry)
+            self._by_user.setdefault(invocation.user_id, deque()).append(entry)
+            self._by_conversation.setdefault((invocation.user_id, invocation.conversation_id), deque()).append(entry)
+            self._update_stats(invocation, 1)
+            self._live_count += 1
         
     def log_invocation(self, invocation: PluginInvocation):
         """Log a plugin invocation to Application Insights and local history."""
-        # Add to local history
-        self.invocations.append(invocation)
-        
-        # Trim history if needed
-        if len(self.invocations) > self.max_history:
-            self.invocations = self.invocations[-self.max_history:]
-        
+        # Add to local history (the ring buffer drops the oldest invocation when full)
+        self._append(invocation)
+
         # Enhanced terminal logging
         self._log_to_terminal(invocation)
-        
+
         # Log to Application Insights
         self._log_to_appinsights(invocation)
-        
+
         # Log to standard logging
         self._log_to_standard(invocation)
-    
+
     def _log_to_terminal(self, invocation: PluginInvocation):
         """Log detailed invocation information to terminal."""
         try:
@@ -179,102 +293,80 @@ class PluginInvocationLogger:
         except Exception as e:
             self.logger.error(f"Failed to log plugin invocation to standard logging: {e}")
     
+    @staticmethod
+    def _latest(entries, limit: int) -> List[PluginInvocation]:
+        """Up to `limit` live invocations from the end of `entries`, oldest first."""
+        latest = []
+        for entry in reversed(entries):
+            if len(latest) >= limit:
+                break
+            if entry.alive:
+                latest.append(entry.invocation)
+        latest.reverse()
+        return latest
+
     def get_recent_invocations(self, limit: int = 50) -> List[PluginInvocation]:
         """Get recent plugin invocations."""
-        return self.invocations[-limit:] if self.invocations else []
+        with self._lock:
+            return self._latest(self._buffer, limit)
     
     def get_invocations_for_user(self, user_id: str, limit: int = 50) -> List[PluginInvocation]:
         """Get recent plugin invocations for a specific user."""
-        user_invocations = [inv for inv in self.invocations if inv.user_id == user_id]
-        return user_invocations[-limit:] if user_invocations else []
+        with self._lock:
+            return self._latest(self._by_user.get(user_id, ()), limit)
     
     def get_invocations_for_conversation(self, user_id: str, conversation_id: str, limit: int = 50) -> List[PluginInvocation]:
         """Get recent plugin invocations for a specific user and conversation."""
-        conversation_invocations = [
-            inv for inv in self.invocations 
-            if inv.user_id == user_id and inv.conversation_id == conversation_id
-        ]
-        return conversation_invocations[-limit:] if conversation_invocations else []
+        with self._lock:
+            return self._latest(self._by_conversation.get((user_id, conversation_id), ()), limit)
+    
+    def get_invocation_count(self) -> int:
+        """Number of invocations currently held."""
+        with self._lock:
+            return self._live_count
     
     def clear_invocations_for_conversation(self, user_id: str, conversation_id: str):
         """Clear plugin invocations for a specific user and conversation.
         
         This ensures each message only shows citations for tools executed 
         during that specific interaction, not accumulated from the entire conversation.
+        Usage stats still count the cleared invocations until they leave the buffer.
         """
-        self.invocations = [
-            inv for inv in self.invocations 
-            if not (inv.user_id == user_id and inv.conversation_id == conversation_id)
-        ]
+        with self._lock:
+            entries = self._by_conversation.pop((user_id, conversation_id), ())
+            for entry in entries:
+                entry.alive = False
+            self._live_count -= len(entries)
     
     def get_plugin_stats(self) -> Dict[str, Any]:
-        """Get statistics about plugin usage."""
-        if not self.invocations:
-            return {}
-        
-        stats = {
-            "total_invocations": len(self.invocations),
-            "successful_invocations": sum(1 for inv in self.invocations if inv.success),
-            "failed_invocations": sum(1 for inv in self.invocations if not inv.success),
-            "average_duration_ms": sum(inv.duration_ms for inv in self.invocations) / len(self.invocations),
-            "plugins": {},
-        }
-        
-        # Per-plugin stats
-        for invocation in self.invocations:
-            plugin_name = invocation.plugin_name
-            if plugin_name not in stats["plugins"]:
-                stats["plugins"][plugin_name] = {
-                    "total_calls": 0,
-                    "successful_calls": 0,
-                    "failed_calls": 0,
-                    "average_duration_ms": 0,
-                    "functions": {}
-                }
+        """Get statistics about plugin usage (invocations currently in the buffer)."""
+        with self._lock:
+            if self._totals.total_calls == 0:
+                return {}
             
-            plugin_stats = stats["plugins"][plugin_name]
-            plugin_stats["total_calls"] += 1
-            
-            if invocation.success:
-                plugin_stats["successful_calls"] += 1
-            else:
-                plugin_stats["failed_calls"] += 1
-            
-            # Function-level stats
-            func_name = invocation.function_name
-            if func_name not in plugin_stats["functions"]:
-                plugin_stats["functions"][func_name] = {
-                    "total_calls": 0,
-                    "successful_calls": 0,
-                    "failed_calls": 0,
-                    "total_duration_ms": 0
+            totals = self._totals.to_dict()
+            stats = {
+                "total_invocations": totals["total_calls"],
+                "successful_invocations": totals["successful_calls"],
+                "failed_invocations": totals["failed_calls"],
+                "average_duration_ms": totals["average_duration_ms"],
+                "latency_histogram_ms": totals["latency_histogram_ms"],
+                "plugins": {},
+            }
+            for plugin_name, plugin_stats in self._plugin_stats.items():
+                plugin_dict = plugin_stats.to_dict()
+                del plugin_dict["total_duration_ms"]
+                plugin_dict["functions"] = {
+                    func_name: func_stats.to_dict()
+                    for func_name, func_stats in self._function_stats[plugin_name].items()
                 }
-            
-            func_stats = plugin_stats["functions"][func_name]
-            func_stats["total_calls"] += 1
-            func_stats["total_duration_ms"] += invocation.duration_ms
-            
-            if invocation.success:
-                func_stats["successful_calls"] += 1
-            else:
-                func_stats["failed_calls"] += 1
-        
-        # Calculate averages
-        for plugin_name, plugin_stats in stats["plugins"].items():
-            if plugin_stats["total_calls"] > 0:
-                plugin_durations = [inv.duration_ms for inv in self.invocations 
-                                  if inv.plugin_name == plugin_name]
-                plugin_stats["average_duration_ms"] = sum(plugin_durations) / len(plugin_durations)
-            
-            for func_name, func_stats in plugin_stats["functions"].items():
-                if func_stats["total_calls"] > 0:
-                    func_stats["average_duration_ms"] = func_stats["total_duration_ms"] / func_stats["total_calls"]
-        
-        return stats
+                stats["plugins"][plugin_name] = plugin_dict
+            return stats
     
     def clear_history(self):
         """Clear the invocation history."""
-        self.invocations.clear()
+        with self._lock:
+            self._reset()
 
 
 # Global instance
@@ -0,0 +1,215 @@
+# smart_http_cache.py
+"""
+Process-wide response cache for SmartHttpPlugin.
+
+Popular pages and PDFs were fetched, HTML-cleaned, run through Document
+Intelligence and sometimes summarized again for every user and turn. This
+cache keeps two tiers, each a size-bounded LRU with a TTL:
+
+- raw: URL -> response body, content type and validators (ETag / Last-Modified)
+- processed: (URL, processing options) -> the text returned to the agent
+
+When an entry's TTL has passed, the plugin revalidates it with If-None-Match /
+If-Modified-Since. A 304 refreshes the entry without downloading or processing
+again. Processed text can also be rebuilt from the raw body after a 304 when the
+processing options differ.
+
+Responses marked Cache-Control no-store or private are not cached.
+max-age (when shorter) caps the TTL, and no-cache forces revalidation.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = int(os.getenv("SMART_HTTP_CACHE_TTL_SECONDS", "900"))
+DEFAULT_MAX_RAW_BYTES = int(os.getenv("SMART_HTTP_CACHE_MAX_RAW_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_MAX_PROCESSED_CHARS = int(os.getenv("SMART_HTTP_CACHE_MAX_PROCESSED_CHARS", str(8 * 1024 * 1024)))
+# Single bodies larger than this are not kept in the raw tier (their processed text still is)
+MAX_RAW_ENTRY_BYTES = 16 * 1024 * 1024
+
+_MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)")
+
+
+class CachedResponse:
+    """Raw body of a fetched URL with its HTTP validators."""
+
+    def __init__(self, body, content_type, etag, last_modified, expires_at):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def size(self):
+        return len(self.body) if self.body else 0
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CachedResult:
+    """Processed (cleaned / extracted / summarized) text for a URL and options."""
+
+    def __init__(self, text, content_type, etag, last_modified, expires_at):
+        self.text = text
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def size(self):
+        return len(self.text)
+
+    def conditional_headers(self):
+        return CachedResponse.conditional_headers(self)
+
+
+def _cache_ttl(headers, default_ttl):
+    """TTL for a response, or None when it must not be cached."""
+    cache_control = (headers.get("Cache-Control") or headers.get("cache-control") or "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    if match:
+        return min(default_ttl, int(match.group(1)))
+    return default_ttl
+
+
+class _SizedLRU:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.total_size = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.pop(key)
+        if entry.size > self.max_size:
+            return
+        self.entries[key] = entry
+        self.total_size += entry.size
+        while self.total_size > self.max_size:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_size -= evicted.size
+
+    def pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_size -= entry.size
+        return entry
+
+
+class SmartHttpCache:
+    """Two-tier (raw bytes / processed text) LRU cache with TTL and HTTP revalidation."""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_raw_bytes=DEFAULT_MAX_RAW_BYTES,
+                 max_processed_chars=DEFAULT_MAX_PROCESSED_CHARS):
+        self.ttl_seconds = ttl_seconds
+        self._raw = _SizedLRU(max_raw_bytes)
+        self._processed = _SizedLRU(max_processed_chars)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def lookup(self, url, options_key):
+        """
+        Returns (result, raw, fresh): the processed entry and raw entry for the URL
+        (either may be None) and whether the processed entry can be used without
+        revalidation.
+        """
+        now = time.time()
+        with self._lock:
+            result = self._processed.get((url, options_key))
+            raw = self._raw.get(url)
+            fresh = result is not None and result.expires_at > now
+            if fresh:
+                self.hits += 1
+            return result, raw, fresh
+
+    def store(self, url, options_key, headers, body, content_type, text):
+        """Caches a 200 response and its processed text, if the response allows it."""
+        ttl = _cache_ttl(headers, self.ttl_seconds)
+        if ttl is None:
+            return False
+        etag = headers.get("ETag") or headers.get("etag")
+        last_modified = headers.get("Last-Modified") or headers.get("last-modified")
+        expires_at = time.time() + ttl
+        with self._lock:
+            self.misses += 1
+            if body is not None and len(body) <= MAX_RAW_ENTRY_BYTES and (etag or last_modified):
+                self._raw.put(url, CachedResponse(body, content_type, etag, last_modified, expires_at))
+            if text is not None:
+                self._processed.put((url, options_key), CachedResult(text, content_type, etag, last_modified, expires_at))
+        return True
+
+    def store_processed(self, url, options_key, raw, text):
+        """Caches text processed from a raw entry (e.g. for new options after a 304)."""
+        with self._lock:
+            self._processed.put((url, options_key), CachedResult(text, raw.content_type, raw.etag, raw.last_modified, raw.expires_at))
+
+    def mark_revalidated(self, url, options_key, headers):
+        """Extends the TTL of a URL's entries after a 304 Not Modified."""
+        ttl = _cache_ttl(headers, self.ttl_seconds)
+        with self._lock:
+            if ttl is None:
+                self._raw.pop(url)
+                self._processed.pop((url, options_key))
+                return
+            expires_at = time.time() + ttl
+            self.revalidated += 1
+            for entry in (self._raw.get(url), self._processed.get((url, options_key))):
+                if entry is not None:
+                    entry.expires_at = expires_at
+
+    def invalidate(self, url):
+        with self._lock:
+            self._raw.pop(url)
+            for key in [key for key in self._processed.entries if key[0] == url]:
+                self._processed.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._raw = _SizedLRU(self._raw.max_size)
+            self._processed = _SizedLRU(self._processed.max_size)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "raw_entries": len(self._raw.entries),
+                "raw_bytes": self._raw.total_size,
+                "processed_entries": len(self._processed.entries),
+                "processed_chars": self._processed.total_size,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+
+_smart_http_cache = None
+_smart_http_cache_lock = threading.Lock()
+
+
+def get_smart_http_cache():
+    global _smart_http_cache
+    with _smart_http_cache_lock:
+        if _smart_http_cache is None:
+            _smart_http_cache = SmartHttpCache()
+        return _smart_http_cache
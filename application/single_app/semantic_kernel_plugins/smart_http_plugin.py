@@ -35,12 +35,13 @@ import tempfile
 import time
 import os
 from typing import Optional
-import aiohttp
 import html2text
 from bs4 import BeautifulSoup
 from semantic_kernel.functions import kernel_function
 from semantic_kernel.functions.kernel_function_decorator import kernel_function
 from semantic_kernel_plugins.plugin_invocation_logger import plugin_function_logger, get_plugin_logger, log_plugin_invocation
+from semantic_kernel_plugins.http_session_pool import get_http_policy, pooled_aiohttp_request
+from semantic_kernel_plugins.smart_http_cache import get_smart_http_cache
 import re
 import functools
 
@@ -114,6 +115,12 @@ class SmartHttpPlugin:
         self.max_content_size = max_content_size
         self.extract_text_only = extract_text_only
         self.logger = logging.getLogger(__name__)
+
+        # Pooled keep-alive connections shared by all SmartHttpPlugin instances on a loop
+        self.http_policy = get_http_policy("smart_http")
+
+        # Fetched and processed content shared by all instances, revalidated with ETag / Last-Modified
+        self.response_cache = get_smart_http_cache()
         
         # Track function calls for citations
         self.function_calls = []
@@ -214,68 +221,66 @@ class SmartHttpPlugin:
         call_start = time.time()
         parameters = {"uri": uri}
         content_type = "unknown"
+        options_key = (self.max_content_size, self.extract_text_only)
+        cached_result, cached_raw, fresh = self.response_cache.lookup(uri, options_key)
+        if fresh:
+            self._track_function_call("get_web_content", parameters, cached_result.text, call_start, uri, cached_result.content_type)
+            return cached_result.text
         
         try:
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            }
+            # Revalidate an expired entry instead of downloading and processing it again
+            validator = cached_result or cached_raw
+            if validator is not None:
+                headers.update(validator.conditional_headers())
+            
+            async with pooled_aiohttp_request("GET", uri, policy=self.http_policy, headers=headers) as response:
+                if response.status == 304 and validator is not None:
+                    if cached_result is not None:
+                        result, content_type = cached_result.text, cached_result.content_type
+                    elif cached_raw is not None:
+                        result, content_type = await self._process_fetched_content(cached_raw.body, uri, cached_raw.content_type)
+                        if self._is_cacheable_result(result):
+                            self.response_cache.store_processed(uri, options_key, cached_raw, result)
+                    self.response_cache.mark_revalidated(uri, options_key, response.headers)
+                    self._track_function_call("get_web_content", parameters, result, call_start, uri, content_type)
+                    return result
+                
+                if response.status != 200:
+                    error_result = f"Error: HTTP {response.status} - {response.reason}"
+                    self._track_function_call("get_web_content", parameters, error_result, call_start, uri, "error")
+                    return error_result
                 
-                async with session.get(uri, headers=headers) as response:
-                    if response.status != 200:
-                        error_result = f"Error: HTTP {response.status} - {response.reason}"
+                # Check content length header - allow larger PDFs for summarization
+                content_length = response.headers.get('content-length')
+                content_type = response.headers.get('content-type', '').lower()
+                is_pdf = self._is_pdf_url(uri) or 'application/pdf' in content_type
+                
+                # Use Azure Document Intelligence limits for PDFs vs conservative limits for other content
+                # Azure DI supports 500MB for S0 tier, 4MB for F0 tier - we'll use a conservative 100MB
+                size_limit = 100 * 1024 * 1024 if is_pdf else self.max_content_size * 2  # 100MB for PDFs
+                
+                if content_length and int(content_length) > size_limit:
+                    if is_pdf:
+                        self.logger.info(f"Large PDF detected ({content_length} bytes), will attempt processing with summarization")
+                    else:
+                        error_result = f"Error: Content too large ({content_length} bytes). Try a different URL or specific page."
                         self._track_function_call("get_web_content", parameters, error_result, call_start, uri, "error")
                         return error_result
+                
+                # Read content with size limit
+                raw_content = await self._read_limited_content(response)
+                
+                # Process based on content type
+                content_type = response.headers.get('content-type', '').lower()
+                result, tracked_type = await self._process_fetched_content(raw_content, uri, content_type, response)
+                if self._is_cacheable_result(result):
+                    self.response_cache.store(uri, options_key, response.headers, raw_content, content_type, result)
+                self._track_function_call("get_web_content", parameters, result, call_start, uri, tracked_type)
+                return result
                     
-                    # Check content length header - allow larger PDFs for summarization
-                    content_length = response.headers.get('content-length')
-                    content_type = response.headers.get('content-type', '').lower()
-                    is_pdf = self._is_pdf_url(uri) or 'application/pdf' in content_type
-                    
-                    # Use Azure Document Intelligence limits for PDFs vs conservative limits for other content
-                    # Azure DI supports 500MB for S0 tier, 4MB for F0 tier - we'll use a conservative 100MB
-                    size_limit = 100 * 1024 * 1024 if is_pdf else self.max_content_size * 2  # 100MB for PDFs
-                    
-                    if content_length and int(content_length) > size_limit:
-                        if is_pdf:
-                            self.logger.info(f"Large PDF detected ({content_length} bytes), will attempt processing with summarization")
-                        else:
-                            error_result = f"Error: Content too large ({content_length} bytes). Try a different URL or specific page."
-                            self._track_function_call("get_web_content", parameters, error_result, call_start, uri, "error")
-                            return error_result
-                    
-                    # Read content with size limit
-                    raw_content = await self._read_limited_content(response)
-                    
-                    # Process based on content type
-                    content_type = response.headers.get('content-type', '').lower()
-                    
-                    # Check for PDF content
-                    if (self._is_pdf_url(uri) or 'application/pdf' in content_type):
-                        result = await self._process_pdf_content(raw_content, uri, response)
-                        self._track_function_call("get_web_content", parameters, result, call_start, uri, "application/pdf")
-                        return result
-                    else:
-                        # Convert bytes to string for non-PDF content
-                        if isinstance(raw_content, bytes):
-                            content = raw_content.decode('utf-8', errors='ignore')
-                        else:
-                            content = raw_content
-                            
-                        if 'text/html' in content_type:
-                            result = self._process_html_content(content, uri)
-                            self._track_function_call("get_web_content", parameters, result, call_start, uri, "text/html")
-                            return result
-                        elif 'application/json' in content_type:
-                            result = self._process_json_content(content)
-                            self._track_function_call("get_web_content", parameters, result, call_start, uri, "application/json")
-                            return result
-                        else:
-                            result = self._truncate_content(content, "Plain text content")
-                            self._track_function_call("get_web_content", parameters, result, call_start, uri, "text/plain")
-                            return result
-                        
         except asyncio.TimeoutError:
             error_result = "Error: Request timed out (30 seconds). The website may be slow or unresponsive."
             self._track_function_call("get_web_content", parameters, error_result, call_start, uri, "timeout")
@@ -286,6 +291,31 @@ class SmartHttpPlugin:
             self._track_function_call("get_web_content", parameters, error_result, call_start, uri, "error")
             return error_result
     
+    async def _process_fetched_content(self, raw_content: bytes, uri: str, content_type: str, response=None):
+        """Process a response body by content type. Returns (result, content type label for tracking)."""
+        # Check for PDF content
+        if (self._is_pdf_url(uri) or 'application/pdf' in content_type):
+            return await self._process_pdf_content(raw_content, uri, response), "application/pdf"
+        
+        # Convert bytes to string for non-PDF content
+        if isinstance(raw_content, bytes):
+            content = raw_content.decode('utf-8', errors='ignore')
+        else:
+            content = raw_content
+            
+        if 'text/html' in content_type:
+            return self._process_html_content(content, uri), "text/html"
+        elif 'application/json' in content_type:
+            return self._process_json_content(content), "application/json"
+        else:
+            return self._truncate_content(content, "Plain text content"), "text/plain"
+    
+    def _is_cacheable_result(self, result: str) -> bool:
+        """Don't cache failed or degraded processing (e.g. Document Intelligence or summarization errors)."""
+        if not isinstance(result, str) or result.startswith("Error"):
+            return False
+        return not any(marker in result for marker in ("❌ Error", "CONFIGURATION ERROR", "summarization failed", "summarization dependencies unavailable"))
+    
     def _process_html_content(self, html_content: str, uri: str) -> str:
         """Process HTML content to extract meaningful text."""
         try:
@@ -715,29 +745,27 @@ class SmartHttpPlugin:
         parameters = {"uri": uri, "body": body[:100] + "..." if len(body) > 100 else body}  # Truncate body for display
         
         try:
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Content-Type': 'application/json'
-                }
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Content-Type': 'application/json'
+            }
+            
+            async with pooled_aiohttp_request("POST", uri, policy=self.http_policy, data=body, headers=headers) as response:
+                if response.status not in [200, 201, 202]:
+                    error_result = f"Error: HTTP {response.status} - {response.reason}"
+                    self._track_function_call("post_web_content", parameters, error_result, call_start, uri, "error")
+                    return error_result
+                
+                raw_content = await self._read_limited_content(response)
+                # Convert bytes to string for POST responses
+                if isinstance(raw_content, bytes):
+                    content = raw_content.decode('utf-8', errors='ignore')
+                else:
+                    content = raw_content
+                result = self._truncate_content(content, "POST response")
+                self._track_function_call("post_web_content", parameters, result, call_start, uri, "application/json")
+                return result
                 
-                async with session.post(uri, data=body, headers=headers) as response:
-                    if response.status not in [200, 201, 202]:
-                        error_result = f"Error: HTTP {response.status} - {response.reason}"
-                        self._track_function_call("post_web_content", parameters, error_result, call_start, uri, "error")
-                        return error_result
-                    
-                    raw_content = await self._read_limited_content(response)
-                    # Convert bytes to string for POST responses
-                    if isinstance(raw_content, bytes):
-                        content = raw_content.decode('utf-8', errors='ignore')
-                    else:
-                        content = raw_content
-                    result = self._truncate_content(content, "POST response")
-                    self._track_function_call("post_web_content", parameters, result, call_start, uri, "application/json")
-                    return result
-                    
         except Exception as e:
             self.logger.error(f"Error posting to {uri}: {str(e)}")
             error_result = f"Error posting content: {str(e)}"
@@ -0,0 +1,263 @@
+# sql_connection_pool.py
+"""
+Shared database connections and schema-metadata cache for the SQL plugins.
+
+SQLQueryPlugin and SQLSchemaPlugin used to open one connection per plugin
+instance, and every kernel build created new instances. Both plugins now borrow
+connections from a process-wide pool per connection target (database type plus
+connection string, or server/database/user):
+
+- connections are leased to one caller at a time and rolled back on return,
+- a connection idle longer than HEALTH_CHECK_INTERVAL_SECONDS is pinged
+  (SELECT 1) before reuse and replaced if the ping fails,
+- connections idle longer than the pool's idle timeout are closed.
+
+Schema introspection (table lists, column and relationship queries) is cached per
+connection target with a TTL, so agents that call get_database_schema on every
+turn stop re-running catalog queries.
+
+fetch_limited_rows() streams results with fetchmany batches on every dialect, so
+memory stays bounded by max_rows.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_IDLE_TIMEOUT_SECONDS = 300
+DEFAULT_ACQUIRE_TIMEOUT_SECONDS = 30
+HEALTH_CHECK_INTERVAL_SECONDS = 30
+DEFAULT_SCHEMA_CACHE_TTL_SECONDS = 600
+FETCH_BATCH_SIZE = 500
+
+
+def sql_pool_key(database_type, connection_string=None, server=None, database=None, username=None, password=None, driver=None):
+    """Identifies a connection target. Hashed so credentials are not kept as dict keys."""
+    target = json.dumps([database_type, connection_string, server, database, username, password, driver])
+    return hashlib.sha256(target.encode("utf-8")).hexdigest()
+
+
+class _PooledConnection:
+    def __init__(self, connection):
+        self.connection = connection
+        self.last_used = time.time()
+
+
+class SQLConnectionPool:
+    """Bounded pool of DB-API connections to one target."""
+
+    def __init__(self, connect, max_size=DEFAULT_POOL_SIZE, idle_timeout_seconds=DEFAULT_IDLE_TIMEOUT_SECONDS,
+                 acquire_timeout_seconds=DEFAULT_ACQUIRE_TIMEOUT_SECONDS):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.acquire_timeout_seconds = acquire_timeout_seconds
+        self._idle = deque()
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _close(self, pooled):
+        self.discarded += 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self):
+        """Closes connections idle longer than the idle timeout. Caller holds the lock."""
+        cutoff = time.time() - self.idle_timeout_seconds
+        while self._idle and self._idle[0].last_used < cutoff:
+            self._close(self._idle.popleft())
+
+    @staticmethod
+    def _is_healthy(connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        deadline = time.time() + self.acquire_timeout_seconds
+        with self._condition:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    # Most recently used first: it is the least likely to have been dropped by the server
+                    pooled = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No database connection available within {self.acquire_timeout_seconds}s (pool size {self.max_size})")
+                self._condition.wait(remaining)
+
+        try:
+            if pooled is not None and time.time() - pooled.last_used > HEALTH_CHECK_INTERVAL_SECONDS:
+                if not self._is_healthy(pooled.connection):
+                    self._close(pooled)
+                    pooled = None
+            if pooled is None:
+                pooled = _PooledConnection(self._connect())
+                self.created += 1
+            else:
+                self.reused += 1
+            return pooled
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, pooled, failed):
+        keep = True
+        try:
+            # End the read transaction so the next borrower starts clean and no locks are held
+            pooled.connection.rollback()
+        except Exception:
+            keep = False
+        if keep and failed:
+            keep = self._is_healthy(pooled.connection)
+        with self._condition:
+            self._in_use -= 1
+            if keep:
+                pooled.last_used = time.time()
+                self._idle.append(pooled)
+            else:
+                self._close(pooled)
+            self._evict_idle()
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Leases a connection: `with pool.connection() as conn:`."""
+        pooled = self._acquire()
+        failed = False
+        try:
+            yield pooled.connection
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._release(pooled, failed)
+
+    def close(self):
+        with self._condition:
+            while self._idle:
+                self._close(self._idle.popleft())
+
+    def get_stats(self):
+        with self._condition:
+            return {
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_size": self.max_size,
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_sql_connection_pool(pool_key, connect, max_size=DEFAULT_POOL_SIZE, idle_timeout_seconds=DEFAULT_IDLE_TIMEOUT_SECONDS):
+    """Returns the shared pool for a connection target, creating it with `connect` on first use."""
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = SQLConnectionPool(connect, max_size=max_size, idle_timeout_seconds=idle_timeout_seconds)
+            _pools[pool_key] = pool
+        return pool
+
+
+def close_sql_connection_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def get_sql_pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.get_stats() for pool in pools]
+
+
+class SQLSchemaCache:
+    """TTL cache of schema-introspection results per connection target."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, pool_key, operation, args):
+        key = (pool_key, operation, tuple(args))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                self._entries.pop(key, None)
+                return None
+        # Callers get their own copy so they can't modify the cached schema
+        return copy.deepcopy(value)
+
+    def set(self, pool_key, operation, args, value, ttl_seconds):
+        if not ttl_seconds or ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[(pool_key, operation, tuple(args))] = (time.time() + ttl_seconds, copy.deepcopy(value))
+
+    def invalidate(self, pool_key=None):
+        with self._lock:
+            if pool_key is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == pool_key]:
+                    self._entries.pop(key)
+
+
+_schema_cache = SQLSchemaCache()
+
+
+def get_sql_schema_cache():
+    return _schema_cache
+
+
+def fetch_limited_rows(cursor, max_rows, convert_row=None, batch_size=FETCH_BATCH_SIZE):
+    """
+    Fetches at most max_rows rows in fetchmany batches, converting each row as it
+    arrives. Never calls fetchall, so large results don't have to fit in memory.
+    """
+    rows = []
+    while len(rows) < max_rows:
+        requested = min(batch_size, max_rows - len(rows))
+        batch = cursor.fetchmany(requested)
+        if convert_row:
+            rows.extend(convert_row(row) for row in batch)
+        else:
+            rows.extend(batch)
+        if len(batch) < requested:
+            break
+    return rows
@@ -13,6 +13,12 @@ from semantic_kernel_plugins.base_plugin import BasePlugin
 from semantic_kernel.functions import kernel_function
 from functions_appinsights import log_event
 from semantic_kernel_plugins.plugin_invocation_logger import plugin_function_logger
+from semantic_kernel_plugins.sql_connection_pool import (
+    DEFAULT_POOL_SIZE,
+    fetch_limited_rows,
+    get_sql_connection_pool,
+    sql_pool_key,
+)
 
 # Helper class to wrap results with metadata
 class ResultWithMetadata:
@@ -45,6 +51,7 @@ class SQLQueryPlugin(BasePlugin):
         self.read_only = manifest.get('read_only') or additional_fields.get('read_only', True)  # Default to read-only for safety
         self.max_rows = manifest.get('max_rows') or additional_fields.get('max_rows', 1000)  # Limit result size
         self.timeout = manifest.get('timeout') or additional_fields.get('timeout', 30)  # Query timeout in seconds
+        self.pool_size = manifest.get('pool_size') or additional_fields.get('pool_size', DEFAULT_POOL_SIZE)  # Shared connections per database
         self._metadata = manifest.get('metadata', {})
         
         # Add comprehensive logging
@@ -72,8 +79,8 @@ class SQLQueryPlugin(BasePlugin):
         # Set up database-specific configurations
         self._setup_database_config()
         
-        # Initialize connection (lazy loading)
-        self._connection = None
+        # Connections are borrowed from a pool shared by every plugin using the same database
+        self._pool_key = sql_pool_key(self.database_type, self.connection_string, self.server, self.database, self.username, self.password, self.driver)
         print(f"[SQLQueryPlugin] Initialization complete")
 
     def _setup_database_config(self):
@@ -104,11 +111,9 @@ class SQLQueryPlugin(BasePlugin):
         if self.database_type not in self.supported_databases:
             raise ValueError(f"Unsupported database type: {self.database_type}. Supported types: {list(self.supported_databases.keys())}")
 
-    def _get_connection(self):
-        """Lazy initialization of database connection"""
-        if self._connection is None:
-            self._connection = self._create_connection()
-        return self._connection
+    def _connection_pool(self):
+        """Shared connection pool for this plugin's database"""
+        return get_sql_connection_pool(self._pool_key, self._create_connection, max_size=self.pool_size)
 
     def _create_connection(self):
         """Create database connection based on database type"""
@@ -156,10 +161,8 @@ class SQLQueryPlugin(BasePlugin):
             elif self.database_type == 'sqlite':
                 import sqlite3
                 database_path = self.connection_string or self.database
-                conn = sqlite3.connect(database_path, timeout=self.timeout)
-                # Enable row factory for better column access
-                conn.row_factory = sqlite3.Row
-                return conn
+                # Pooled connections are used by one thread at a time, but not always the same one
+                return sqlite3.connect(database_path, timeout=self.timeout, check_same_thread=False)
                 
         except ImportError as e:
             raise ImportError(f"Required database driver not installed for {self.database_type}: {e}")
@@ -239,44 +242,31 @@ class SQLQueryPlugin(BasePlugin):
             if not validation_result["is_valid"]:
                 raise ValueError(f"Invalid query: {validation_result['issues']}")
             
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Set query timeout
-            if hasattr(cursor, 'settimeout'):
-                cursor.settimeout(self.timeout)
-            
-            # Execute query with parameters if provided
-            if parameters:
-                cursor.execute(cleaned_query, parameters)
-            else:
-                cursor.execute(cleaned_query)
-            
-            # Get column names
-            if hasattr(cursor, 'description') and cursor.description:
-                columns = [desc[0] for desc in cursor.description]
-            else:
-                columns = []
-            
-            # Fetch results with row limit
             effective_max_rows = max_rows or self.max_rows
-            
-            if self.database_type == 'sqlite':
-                # SQLite doesn't support fetchmany limit directly
-                rows = cursor.fetchall()
-                if len(rows) > effective_max_rows:
-                    rows = rows[:effective_max_rows]
-                # Convert sqlite3.Row to dict for consistency
-                results = [dict(row) for row in rows]
-            else:
-                # For other databases, fetch with limit
-                rows = cursor.fetchmany(effective_max_rows)
-                results = []
-                for row in rows:
-                    if isinstance(row, (list, tuple)):
-                        results.append(dict(zip(columns, row)))
-                    else:
-                        results.append(row)
+            with self._connection_pool().connection() as conn:
+                cursor = conn.cursor()
+                
+                # Set query timeout
+                if hasattr(cursor, 'settimeout'):
+                    cursor.settimeout(self.timeout)
+                
+                # Execute query with parameters if provided
+                if parameters:
+                    cursor.execute(cleaned_query, parameters)
+                else:
+                    cursor.execute(cleaned_query)
+                
+                # Get column names
+                if hasattr(cursor, 'description') and cursor.description:
+                    columns = [desc[0] for desc in cursor.description]
+                else:
+                    columns = []
+                
+                # Stream rows in fetchmany batches up to the row limit (every dialect, including SQLite)
+                def to_dict(row):
+                    return dict(zip(columns, row)) if isinstance(row, (list, tuple)) else row
+                results = fetch_limited_rows(cursor, effective_max_rows, to_dict)
+                cursor.close()
             
             # Prepare result data
             result_data = {
@@ -317,21 +307,22 @@ class SQLQueryPlugin(BasePlugin):
             if not validation_result["is_valid"]:
                 raise ValueError(f"Invalid query: {validation_result['issues']}")
             
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Set query timeout
-            if hasattr(cursor, 'settimeout'):
-                cursor.settimeout(self.timeout)
-            
-            # Execute query with parameters if provided
-            if parameters:
-                cursor.execute(cleaned_query, parameters)
-            else:
-                cursor.execute(cleaned_query)
-            
-            # Fetch single value
-            result = cursor.fetchone()
+            with self._connection_pool().connection() as conn:
+                cursor = conn.cursor()
+                
+                # Set query timeout
+                if hasattr(cursor, 'settimeout'):
+                    cursor.settimeout(self.timeout)
+                
+                # Execute query with parameters if provided
+                if parameters:
+                    cursor.execute(cleaned_query, parameters)
+                else:
+                    cursor.execute(cleaned_query)
+                
+                # Fetch single value
+                result = cursor.fetchone()
+                cursor.close()
             
             if result:
                 if isinstance(result, (list, tuple)):
@@ -466,7 +457,7 @@ class SQLQueryPlugin(BasePlugin):
             columns = []
         
         # Fetch data
-        rows = cursor.fetchmany(max_rows)
+        rows = fetch_limited_rows(cursor, max_rows)
         data = []
         
         for row in rows:
@@ -486,11 +477,3 @@ class SQLQueryPlugin(BasePlugin):
             "row_count": len(data),
             "is_truncated": len(data) >= max_rows
         }
-
-    def __del__(self):
-        """Clean up database connection"""
-        if hasattr(self, '_connection') and self._connection:
-            try:
-                self._connection.close()
-            except:
-                pass
@@ -12,6 +12,13 @@ from semantic_kernel.functions import kernel_function
 from functions_appinsights import log_event
 from semantic_kernel_plugins.plugin_invocation_logger import plugin_function_logger
 from functions_debug import debug_print
+from semantic_kernel_plugins.sql_connection_pool import (
+    DEFAULT_POOL_SIZE,
+    DEFAULT_SCHEMA_CACHE_TTL_SECONDS,
+    get_sql_connection_pool,
+    get_sql_schema_cache,
+    sql_pool_key,
+)
 
 # Helper class to wrap results with metadata
 class ResultWithMetadata:
@@ -41,6 +48,9 @@ class SQLSchemaPlugin(BasePlugin):
         self.username = manifest.get('username') or additional_fields.get('username')
         self.password = manifest.get('password') or additional_fields.get('password')
         self.driver = manifest.get('driver') or additional_fields.get('driver')
+        self.pool_size = manifest.get('pool_size') or additional_fields.get('pool_size', DEFAULT_POOL_SIZE)  # Shared connections per database
+        # Seconds to reuse schema metadata before querying the catalog again (0 disables caching)
+        self.schema_cache_ttl = manifest.get('schema_cache_ttl', additional_fields.get('schema_cache_ttl', DEFAULT_SCHEMA_CACHE_TTL_SECONDS))
         self._metadata = manifest.get('metadata', {})
         
         # Add comprehensive logging
@@ -65,8 +75,9 @@ class SQLSchemaPlugin(BasePlugin):
         # Set up database-specific configurations
         self._setup_database_config()
         
-        # Initialize connection (lazy loading)
-        self._connection = None
+        # Connections and schema metadata are shared by every plugin using the same database
+        self._pool_key = sql_pool_key(self.database_type, self.connection_string, self.server, self.database, self.username, self.password, self.driver)
+        self._schema_cache = get_sql_schema_cache()
         print(f"[SQLSchemaPlugin] Initialization complete")
 
     def _setup_database_config(self):
@@ -97,11 +108,23 @@ class SQLSchemaPlugin(BasePlugin):
         if self.database_type not in self.supported_databases:
             raise ValueError(f"Unsupported database type: {self.database_type}. Supported types: {list(self.supported_databases.keys())}")
 
-    def _get_connection(self):
-        """Lazy initialization of database connection"""
-        if self._connection is None:
-            self._connection = self._create_connection()
-        return self._connection
+    def _connection_pool(self):
+        """Shared connection pool for this plugin's database"""
+        return get_sql_connection_pool(self._pool_key, self._create_connection, max_size=self.pool_size)
+
+    def _cached_schema(self, operation: str, args: tuple, load):
+        """Return cached schema metadata for this database, loading and caching it on a miss"""
+        cached = self._schema_cache.get(self._pool_key, operation, args)
+        if cached is not None:
+            debug_print(f"[SQLSchemaPlugin] Schema cache hit for {operation}{args}")
+            return cached
+        value = load()
+        self._schema_cache.set(self._pool_key, operation, args, value, self.schema_cache_ttl)
+        return value
+
+    def invalidate_schema_cache(self):
+        """Drop cached schema metadata for this database (e.g. after a migration)"""
+        self._schema_cache.invalidate(self._pool_key)
 
     def _create_connection(self):
         """Create database connection based on database type"""
@@ -148,7 +171,8 @@ class SQLSchemaPlugin(BasePlugin):
             elif self.database_type == 'sqlite':
                 import sqlite3
                 database_path = self.connection_string or self.database
-                return sqlite3.connect(database_path)
+                # Pooled connections are used by one thread at a time, but not always the same one
+                return sqlite3.connect(database_path, check_same_thread=False)
                 
         except ImportError as e:
             raise ImportError(f"Required database driver not installed for {self.database_type}: {e}")
@@ -235,54 +259,58 @@ class SQLSchemaPlugin(BasePlugin):
         print(f"[SQLSchemaPlugin] Getting database schema - DB: {self.database}, Include System: {include_system_tables}")
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            def load_schema():
+                with self._connection_pool().connection() as conn:
+                    cursor = conn.cursor()
             
-            schema_data = {
-                "database_type": self.database_type,
-                "database_name": self.database,
-                "tables": {},
-                "relationships": []
-            }
+                    schema_data = {
+                        "database_type": self.database_type,
+                        "database_name": self.database,
+                        "tables": {},
+                        "relationships": []
+                    }
             
-            # Get tables list
-            tables_query = self._get_tables_query(include_system_tables, table_filter)
-            debug_print(f"[SQLSchemaPlugin] Executing tables query: {tables_query}")
-            cursor.execute(tables_query)
-            tables = cursor.fetchall()
+                    # Get tables list
+                    tables_query = self._get_tables_query(include_system_tables, table_filter)
+                    debug_print(f"[SQLSchemaPlugin] Executing tables query: {tables_query}")
+                    cursor.execute(tables_query)
+                    tables = cursor.fetchall()
             
-            print(f"[SQLSchemaPlugin] Found {len(tables)} tables")
+                    print(f"[SQLSchemaPlugin] Found {len(tables)} tables")
             
-            # Get schema for each table
-            for table in tables:
-                if isinstance(table, tuple) and len(table) >= 2:
-                    table_name = table[0]
-                    schema_name = table[1]
-                    qualified_table_name = f"{schema_name}.{table_name}"
-                else:
-                    table_name = table[0] if isinstance(table, tuple) else table
-                    schema_name = None
-                    qualified_table_name = table_name
+                    # Get schema for each table
+                    for table in tables:
+                        if isinstance(table, tuple) and len(table) >= 2:
+                            table_name = table[0]
+                            schema_name = table[1]
+                            qualified_table_name = f"{schema_name}.{table_name}"
+                        else:
+                            table_name = table[0] if isinstance(table, tuple) else table
+                            schema_name = None
+                            qualified_table_name = table_name
                     
-                try:
-                    table_schema = self._get_table_schema_data(cursor, table_name, schema_name)
-                    schema_data["tables"][table_name] = table_schema
-                    print(f"[SQLSchemaPlugin] Got schema for table: {qualified_table_name}")
-                except Exception as e:
-                    print(f"[SQLSchemaPlugin] Error getting schema for table {qualified_table_name}: {e}")
-                    log_event(f"[SQLSchemaPlugin] Error getting table schema", extra={
-                        "table_name": qualified_table_name,
-                        "error": str(e)
-                    })
+                        try:
+                            table_schema = self._get_table_schema_data(cursor, table_name, schema_name)
+                            schema_data["tables"][table_name] = table_schema
+                            print(f"[SQLSchemaPlugin] Got schema for table: {qualified_table_name}")
+                        except Exception as e:
+                            print(f"[SQLSchemaPlugin] Error getting schema for table {qualified_table_name}: {e}")
+                            log_event(f"[SQLSchemaPlugin] Error getting table schema", extra={
+                                "table_name": qualified_table_name,
+                                "error": str(e)
+                            })
+            
+                    # Get relationships
+                    try:
+                        relationships = self._get_relationships_data(cursor)
+                        schema_data["relationships"] = relationships
+                        print(f"[SQLSchemaPlugin] Found {len(relationships)} relationships")
+                    except Exception as e:
+                        print(f"[SQLSchemaPlugin] Error getting relationships: {e}")
+                return schema_data
+
+            schema_data = self._cached_schema("database_schema", (include_system_tables, table_filter), load_schema)
             
-            # Get relationships
-            try:
-                relationships = self._get_relationships_data(cursor)
-                schema_data["relationships"] = relationships
-                print(f"[SQLSchemaPlugin] Found {len(relationships)} relationships")
-            except Exception as e:
-                print(f"[SQLSchemaPlugin] Error getting relationships: {e}")
-                
             log_event(f"[SQLSchemaPlugin] get_database_schema completed", extra={
                 "tables_count": len(schema_data["tables"]),
                 "relationships_count": len(schema_data["relationships"])
@@ -338,10 +366,11 @@ class SQLSchemaPlugin(BasePlugin):
     def get_table_schema(self, table_name: str) -> ResultWithMetadata:
         """Get detailed schema for a specific table"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            table_schema = self._get_table_schema_data(cursor, table_name)
+            def load_table_schema():
+                with self._connection_pool().connection() as conn:
+                    return self._get_table_schema_data(conn.cursor(), table_name)
+
+            table_schema = self._cached_schema("table_schema", (table_name,), load_table_schema)
             
             log_event(f"[SQLSchemaPlugin] Retrieved schema for table: {table_name}")
             return ResultWithMetadata(table_schema, self.metadata)
@@ -359,12 +388,13 @@ class SQLSchemaPlugin(BasePlugin):
     ) -> ResultWithMetadata:
         """Get list of all tables in the database"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            tables_query = self._get_tables_query(include_system_tables, table_filter)
-            cursor.execute(tables_query)
-            tables = cursor.fetchall()
+            def load_tables():
+                with self._connection_pool().connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(self._get_tables_query(include_system_tables, table_filter))
+                    return [tuple(row) for row in cursor.fetchall()]
+
+            tables = self._cached_schema("table_list", (include_system_tables, table_filter), load_tables)
             
             table_list = []
             for table_row in tables:
@@ -389,10 +419,11 @@ class SQLSchemaPlugin(BasePlugin):
     def get_relationships(self, table_name: Optional[str] = None) -> ResultWithMetadata:
         """Get foreign key relationships between tables"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            relationships = self._get_relationships_data(cursor, table_name)
+            def load_relationships():
+                with self._connection_pool().connection() as conn:
+                    return self._get_relationships_data(conn.cursor(), table_name)
+
+            relationships = self._cached_schema("relationships", (table_name,), load_relationships)
             
             log_event(f"[SQLSchemaPlugin] Retrieved {len(relationships)} relationships")
             return ResultWithMetadata(relationships, self.metadata)
@@ -613,11 +644,3 @@ class SQLSchemaPlugin(BasePlugin):
             log_event(f"[SQLSchemaPlugin] Error getting relationships: {e}")
         
         return relationships
-
-    def __del__(self):
-        """Clean up database connection"""
-        if hasattr(self, '_connection') and self._connection:
-            try:
-                self._connection.close()
-            except:
-                pass
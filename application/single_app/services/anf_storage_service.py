@@ -184,7 +184,8 @@ class ANFStorageService:
         data: bytes,
         bucket: str,
         key: str,
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Upload bytes data to ANF Object Storage.
@@ -194,6 +195,7 @@ class ANFStorageService:
             bucket: Target bucket name
             key: Object key (path within bucket)
             metadata: Optional metadata dictionary
+            content_type: Optional MIME type stored with the object
 
         Returns:
             Dict containing upload result with ETag
@@ -202,6 +204,8 @@ class ANFStorageService:
             extra_args = {}
             if metadata:
                 extra_args['Metadata'] = metadata
+            if content_type:
+                extra_args['ContentType'] = content_type
 
             response = self.s3_client.put_object(
                 Bucket=bucket,
@@ -262,6 +266,38 @@ class ANFStorageService:
                 logger.error(f"Failed to download file from ANF: {e}")
             raise
 
+    def open_stream(
+        self,
+        bucket: str,
+        key: str,
+        chunk_size: int = 256 * 1024
+    ) -> Dict[str, Any]:
+        """
+        Open an object for streaming without reading it into memory.
+
+        Args:
+            bucket: Source bucket name
+            key: Object key to read
+            chunk_size: Size of the chunks yielded by the stream
+
+        Returns:
+            Dict with 'chunks' (iterator of bytes), 'size' and 'content_type'
+
+        Raises:
+            ClientError: If the object cannot be read (e.g., object not found)
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            return {
+                'chunks': response['Body'].iter_chunks(chunk_size),
+                'size': response.get('ContentLength'),
+                'content_type': response.get('ContentType')
+            }
+
+        except ClientError as e:
+            logger.error(f"Failed to open ANF object stream {bucket}/{key}: {e}")
+            raise
+
     def delete_file(self, bucket: str, key: str) -> bool:
         """
         Delete a file from ANF Object Storage.
@@ -385,33 +385,40 @@ function renderImageModels() {
     listDiv.innerHTML = html;
 }
 
+// Models come from the cached deployment catalog; Refresh re-reads them from Azure
+async function loadGptModels(refresh = false) {
+    const listDiv = document.getElementById('gpt_models_list');
+    listDiv.innerHTML = 'Fetching...';
+    try {
+        const resp = await fetch(`/api/models/gpt${refresh ? '?refresh=true' : ''}`);
+        const data = await resp.json();
+        if (resp.ok && data.models && data.models.length > 0) {
+            // Clear old models and replace with new ones
+            gptAll = data.models;
+            
+            // Filter out selected models that no longer exist in the newly fetched list
+            gptSelected = gptSelected.filter(selected => 
+                gptAll.some(model => model.deploymentName === selected.deploymentName)
+            );
+            
+            renderGPTModels();
+            updateGptHiddenInput();
+            markFormAsModified();
+        } else {
+            listDiv.innerHTML = `<p class="text-danger">Error: ${data.error || 'No GPT models found'}</p>`;
+        }
+    } catch (err) {
+        listDiv.innerHTML = `<p class="text-danger">Error fetching GPT models: ${err.message}</p>`;
+    }
+}
+
 const fetchGptBtn = document.getElementById('fetch_gpt_models_btn');
 if (fetchGptBtn) {
-    fetchGptBtn.addEventListener('click', async () => {
-        const listDiv = document.getElementById('gpt_models_list');
-        listDiv.innerHTML = 'Fetching...';
-        try {
-            const resp = await fetch('/api/models/gpt');
-            const data = await resp.json();
-            if (resp.ok && data.models && data.models.length > 0) {
-                // Clear old models and replace with new ones
-                gptAll = data.models;
-                
-                // Filter out selected models that no longer exist in the newly fetched list
-                gptSelected = gptSelected.filter(selected => 
-                    gptAll.some(model => model.deploymentName === selected.deploymentName)
-                );
-                
-                renderGPTModels();
-                updateGptHiddenInput();
-                markFormAsModified();
-            } else {
-                listDiv.innerHTML = `<p class="text-danger">Error: ${data.error || 'No GPT models found'}</p>`;
-            }
-        } catch (err) {
-            listDiv.innerHTML = `<p class="text-danger">Error fetching GPT models: ${err.message}</p>`;
-        }
-    });
+    fetchGptBtn.addEventListener('click', () => loadGptModels(false));
+}
+const refreshGptBtn = document.getElementById('refresh_gpt_models_btn');
+if (refreshGptBtn) {
+    refreshGptBtn.addEventListener('click', () => loadGptModels(true));
 }
 
 window.selectGptModel = (deploymentName, modelName) => {
@@ -440,33 +447,40 @@ function updateGptHiddenInput() {
     gptInput.value = JSON.stringify(payload);
 }
 
+// Models come from the cached deployment catalog; Refresh re-reads them from Azure
+async function loadEmbeddingModels(refresh = false) {
+    const listDiv = document.getElementById('embedding_models_list');
+    listDiv.innerHTML = 'Fetching...';
+    try {
+        const resp = await fetch(`/api/models/embedding${refresh ? '?refresh=true' : ''}`);
+        const data = await resp.json();
+        if (resp.ok && data.models && data.models.length > 0) {
+            // Clear old models and replace with new ones
+            embeddingAll = data.models;
+            
+            // Filter out selected models that no longer exist in the newly fetched list
+            embeddingSelected = embeddingSelected.filter(selected => 
+                embeddingAll.some(model => model.deploymentName === selected.deploymentName)
+            );
+            
+            renderEmbeddingModels();
+            updateEmbeddingHiddenInput();
+            markFormAsModified();
+        } else {
+            listDiv.innerHTML = `<p class="text-danger">Error: ${data.error || 'No embedding models found'}</p>`;
+        }
+    } catch (err) {
+        listDiv.innerHTML = `<p class="text-danger">Error fetching embedding models: ${err.message}</p>`;
+    }
+}
+
 const fetchEmbeddingBtn = document.getElementById('fetch_embedding_models_btn');
 if (fetchEmbeddingBtn) {
-    fetchEmbeddingBtn.addEventListener('click', async () => {
-        const listDiv = document.getElementById('embedding_models_list');
-        listDiv.innerHTML = 'Fetching...';
-        try {
-            const resp = await fetch('/api/models/embedding');
-            const data = await resp.json();
-            if (resp.ok && data.models && data.models.length > 0) {
-                // Clear old models and replace with new ones
-                embeddingAll = data.models;
-                
-                // Filter out selected models that no longer exist in the newly fetched list
-                embeddingSelected = embeddingSelected.filter(selected => 
-                    embeddingAll.some(model => model.deploymentName === selected.deploymentName)
-                );
-                
-                renderEmbeddingModels();
-                updateEmbeddingHiddenInput();
-                markFormAsModified();
-            } else {
-                listDiv.innerHTML = `<p class="text-danger">Error: ${data.error || 'No embedding models found'}</p>`;
-            }
-        } catch (err) {
-            listDiv.innerHTML = `<p class="text-danger">Error fetching embedding models: ${err.message}</p>`;
-        }
-    });
+    fetchEmbeddingBtn.addEventListener('click', () => loadEmbeddingModels(false));
+}
+const refreshEmbeddingBtn = document.getElementById('refresh_embedding_models_btn');
+if (refreshEmbeddingBtn) {
+    refreshEmbeddingBtn.addEventListener('click', () => loadEmbeddingModels(true));
 }
 
 window.selectEmbeddingModel = (deploymentName, modelName) => {
@@ -487,33 +501,40 @@ function updateEmbeddingHiddenInput() {
     embInput.value = JSON.stringify(payload);
 }
 
+// Models come from the cached deployment catalog; Refresh re-reads them from Azure
+async function loadImageModels(refresh = false) {
+    const listDiv = document.getElementById('image_models_list');
+    listDiv.innerHTML = 'Fetching...';
+    try {
+        const resp = await fetch(`/api/models/image${refresh ? '?refresh=true' : ''}`);
+        const data = await resp.json();
+        if (resp.ok && data.models && data.models.length > 0) {
+            // Clear old models and replace with new ones
+            imageAll = data.models;
+            
+            // Filter out selected models that no longer exist in the newly fetched list
+            imageSelected = imageSelected.filter(selected => 
+                imageAll.some(model => model.deploymentName === selected.deploymentName)
+            );
+            
+            renderImageModels();
+            updateImageHiddenInput();
+            markFormAsModified();
+        } else {
+            listDiv.innerHTML = `<p class="text-danger">Error: ${data.error || 'No image models found'}</p>`;
+        }
+    } catch (err) {
+        listDiv.innerHTML = `<p class="text-danger">Error fetching image models: ${err.message}</p>`;
+    }
+}
+
 const fetchImageBtn = document.getElementById('fetch_image_models_btn');
 if (fetchImageBtn) {
-    fetchImageBtn.addEventListener('click', async () => {
-        const listDiv = document.getElementById('image_models_list');
-        listDiv.innerHTML = 'Fetching...';
-        try {
-            const resp = await fetch('/api/models/image');
-            const data = await resp.json();
-            if (resp.ok && data.models && data.models.length > 0) {
-                // Clear old models and replace with new ones
-                imageAll = data.models;
-                
-                // Filter out selected models that no longer exist in the newly fetched list
-                imageSelected = imageSelected.filter(selected => 
-                    imageAll.some(model => model.deploymentName === selected.deploymentName)
-                );
-                
-                renderImageModels();
-                updateImageHiddenInput();
-                markFormAsModified();
-            } else {
-                listDiv.innerHTML = `<p class="text-danger">Error: ${data.error || 'No image models found'}</p>`;
-            }
-        } catch (err) {
-            listDiv.innerHTML = `<p class="text-danger">Error fetching image models: ${err.message}</p>`;
-        }
-    });
+    fetchImageBtn.addEventListener('click', () => loadImageModels(false));
+}
+const refreshImageBtn = document.getElementById('refresh_image_models_btn');
+if (refreshImageBtn) {
+    refreshImageBtn.addEventListener('click', () => loadImageModels(true));
 }
 
 window.selectImageModel = (deploymentName, modelName) => {
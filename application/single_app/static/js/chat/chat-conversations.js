@@ -1225,6 +1225,36 @@ async function bulkHideConversations() {
   }
 }
 
+const BULK_DELETE_POLL_INTERVAL_MS = 1000;
+const BULK_DELETE_MAX_POLL_INTERVAL_MS = 5000;
+// Stop waiting when the job has made no progress for this long
+const BULK_DELETE_MAX_WAIT_MS = 10 * 60 * 1000;
+
+// Bulk deletion runs as a background job on the server; poll until it finishes.
+// Returns null when the job stops making progress (it keeps running server-side).
+async function waitForBulkDeletionJob(jobId) {
+  let interval = BULK_DELETE_POLL_INTERVAL_MS;
+  let lastProgress = null;
+  let lastProgressAt = Date.now();
+  while (Date.now() - lastProgressAt < BULK_DELETE_MAX_WAIT_MS) {
+    const response = await fetch(`/api/delete_multiple_conversations/${jobId}`);
+    if (!response.ok) {
+      throw new Error('Failed to get deletion progress');
+    }
+    const job = await response.json();
+    if (job.status === 'completed' || job.status === 'failed') {
+      return job;
+    }
+    if (job.updated_at !== lastProgress) {
+      lastProgress = job.updated_at;
+      lastProgressAt = Date.now();
+    }
+    await new Promise(resolve => setTimeout(resolve, interval));
+    interval = Math.min(interval * 2, BULK_DELETE_MAX_POLL_INTERVAL_MS);
+  }
+  return null;
+}
+
 // Function to delete multiple conversations
 async function deleteSelectedConversations() {
   if (selectedConversations.size === 0) return;
@@ -1248,8 +1278,9 @@ async function deleteSelectedConversations() {
       const error = await response.json();
       throw new Error(error.error || 'Failed to delete conversations');
     }
+    const { job_id: jobId } = await response.json();
     
-    // Remove deleted conversations from the UI
+    // Remove deleted conversations from the UI while the deletion job runs
     conversationIds.forEach(id => {
       const convoItem = document.querySelector(`.conversation-item[data-conversation-id="${id}"]`);
       if (convoItem) convoItem.remove();
@@ -1272,12 +1303,23 @@ async function deleteSelectedConversations() {
     if (hideSelectedBtn) hideSelectedBtn.style.display = "none";
     exitSelectionMode();
     
+    const job = await waitForBulkDeletionJob(jobId);
+
     // Also reload sidebar conversations if the sidebar exists
     if (window.chatSidebarConversations && window.chatSidebarConversations.loadSidebarConversations) {
       window.chatSidebarConversations.loadSidebarConversations();
     }
-    
-    showToast(`${conversationIds.length} conversation(s) deleted.`, "success");
+
+    if (!job) {
+      loadConversations();
+      showToast("Conversation deletion is taking longer than expected and will continue in the background.", "warning");
+    } else if (job.status === 'failed' || job.failed_ids.length > 0) {
+      // Restore conversations that could not be deleted
+      loadConversations();
+      showToast(`${job.deleted_count} of ${job.total} conversation(s) deleted.`, "warning");
+    } else {
+      showToast(`${job.deleted_count} conversation(s) deleted.`, "success");
+    }
   } catch (error) {
     console.error("Error deleting conversations:", error);
     showToast(`Error deleting conversations: ${error.message}`, "danger");
@@ -459,81 +459,87 @@ function createCitationsHtml(
   }
 }
 
+// Messages are loaded newest page first; older pages are loaded when the chat is scrolled to the top
+const MESSAGE_PAGE_SIZE = 30;
+const OLDER_MESSAGES_SCROLL_THRESHOLD = 100;
+let messagePaging = { conversationId: null, continuationToken: null, loading: false };
+
+function fetchMessagePage(conversationId, continuationToken = null) {
+  const params = new URLSearchParams({ limit: MESSAGE_PAGE_SIZE });
+  if (continuationToken) {
+    params.set("continuation_token", continuationToken);
+  }
+  return fetch(`/api/conversations/${conversationId}/messages?${params.toString()}`)
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`Failed to load messages (${response.status})`);
+      }
+      return response.json();
+    });
+}
+
+function renderLoadedMessage(msg) {
+  // Deleted messages and inactive threads are filtered by the server
+  if (msg.role === "user") {
+    appendMessage("You", msg.content, null, msg.id, false, [], [], [], null, null, msg);
+  } else if (msg.role === "assistant") {
+    // Citations are loaded on demand when the sources are expanded (see citations_deferred)
+    appendMessage(
+      "AI",
+      msg.content,
+      msg.model_deployment_name,
+      msg.id,
+      msg.augmented,
+      msg.hybrid_citations || [],
+      msg.web_search_citations || [],
+      msg.agent_citations || [],
+      msg.agent_display_name,
+      msg.agent_name,
+      msg
+    );
+  } else if (msg.role === "file") {
+    // Pass file message with proper parameters including message ID
+    appendMessage("File", msg, null, msg.id, false, [], [], [], null, null, msg);
+  } else if (msg.role === "image") {
+    // Validate image URL before calling appendMessage
+    if (msg.content && msg.content !== 'null' && msg.content.trim() !== '') {
+      // Pass the full message object for images that may have metadata (uploaded images)
+      appendMessage("image", msg.content, msg.model_deployment_name, msg.id, false, [], [], [], msg.agent_display_name, msg.agent_name, msg);
+    } else {
+      console.error(`[loadMessages] Invalid image URL for message ${msg.id}: "${msg.content}"`);
+      // Show error message instead of broken image
+      appendMessage("Error", "Failed to load generated image - invalid URL", msg.model_deployment_name, msg.id, false, [], [], [], msg.agent_display_name, msg.agent_name);
+    }
+  } else if (msg.role === "safety") {
+    appendMessage("safety", msg.content, null, msg.id, false, [], [], [], null, null);
+  }
+}
+
 export function loadMessages(conversationId) {
   // Clear search highlights when loading a different conversation
   clearSearchHighlight();
-  
-  fetch(`/conversation/${conversationId}/messages`)
-    .then((response) => response.json())
+
+  messagePaging = { conversationId, continuationToken: null, loading: true };
+
+  return fetchMessagePage(conversationId)
     .then((data) => {
       const chatbox = document.getElementById("chatbox");
-      if (!chatbox) return;
+      if (!chatbox || messagePaging.conversationId !== conversationId) return;
 
       chatbox.innerHTML = "";
-      console.log(`--- Loading messages for ${conversationId} ---`);
-      data.messages.forEach((msg) => {
-        // Skip deleted messages (when conversation archiving is enabled)
-        if (msg.metadata && msg.metadata.is_deleted === true) {
-          console.log(`Skipping deleted message: ${msg.id}`);
-          return;
-        }
-        console.log(`[loadMessages Loop] -------- START Message ID: ${msg.id} --------`);
-        console.log(`[loadMessages Loop] Role: ${msg.role}`);
-        if (msg.role === "user") {
-          appendMessage("You", msg.content, null, msg.id, false, [], [], [], null, null, msg);
-        } else if (msg.role === "assistant") {
-          console.log(`  [loadMessages Loop] Full Assistant msg object:`, JSON.stringify(msg)); // Stringify to see exact keys
-          console.log(`  [loadMessages Loop] Checking keys: msg.id=${msg.id}, msg.augmented=${msg.augmented}, msg.hybrid_citations exists=${'hybrid_citations' in msg}, msg.web_search_citations exists=${'web_search_citations' in msg}, msg.agent_citations exists=${'agent_citations' in msg}`);
-          const senderType = msg.role === "user" ? "You" :
-                       msg.role === "assistant" ? "AI" :
-                       msg.role === "file" ? "File" :
-                       msg.role === "image" ? "image" :
-                       msg.role === "safety" ? "safety" : "System";
-
-          const arg2 = msg.content;
-          const arg3 = msg.model_deployment_name;
-          const arg4 = msg.id;
-          const arg5 = msg.augmented; // Get value
-          const arg6 = msg.hybrid_citations; // Get value
-          const arg7 = msg.web_search_citations; // Get value
-          const arg8 = msg.agent_citations; // Get value
-          const arg9 = msg.agent_display_name; // Get agent display name
-          const arg10 = msg.agent_name; // Get agent name
-          console.log(`  [loadMessages Loop] Calling appendMessage with -> sender: ${senderType}, id: ${arg4}, augmented: ${arg5} (type: ${typeof arg5}), hybrid_len: ${arg6?.length}, web_len: ${arg7?.length}, agent_len: ${arg8?.length}, agent_display: ${arg9}`);
-          console.log(`  [loadMessages Loop] Message metadata:`, msg.metadata);
-
-          appendMessage(senderType, arg2, arg3, arg4, arg5, arg6, arg7, arg8, arg9, arg10, msg); 
-          console.log(`[loadMessages Loop] -------- END Message ID: ${msg.id} --------`);
-        } else if (msg.role === "file") {
-          // Pass file message with proper parameters including message ID
-          appendMessage("File", msg, null, msg.id, false, [], [], [], null, null, msg);
-        } else if (msg.role === "image") {
-          // Validate image URL before calling appendMessage
-          if (msg.content && msg.content !== 'null' && msg.content.trim() !== '') {
-            // Debug logging for image message metadata
-            console.log(`[loadMessages] Image message ${msg.id}:`, {
-              hasExtractedText: !!msg.extracted_text,
-              hasVisionAnalysis: !!msg.vision_analysis,
-              isUserUpload: msg.metadata?.is_user_upload,
-              filename: msg.filename
-            });
-            // Pass the full message object for images that may have metadata (uploaded images)
-            appendMessage("image", msg.content, msg.model_deployment_name, msg.id, false, [], [], [], msg.agent_display_name, msg.agent_name, msg);
-          } else {
-            console.error(`[loadMessages] Invalid image URL for message ${msg.id}: "${msg.content}"`);
-            // Show error message instead of broken image
-            appendMessage("Error", "Failed to load generated image - invalid URL", msg.model_deployment_name, msg.id, false, [], [], [], msg.agent_display_name, msg.agent_name);
-          }
-        } else if (msg.role === "safety") {
-          appendMessage("safety", msg.content, null, msg.id, false, [], [], [], null, null);
-        }
-      });
+      console.log(`--- Loading messages for ${conversationId} (has more: ${data.has_more}) ---`);
+      data.messages.forEach(renderLoadedMessage);
+      messagePaging.continuationToken = data.continuation_token || null;
     })
     .catch((error) => {
       console.error("Error loading messages:", error);
       if (chatbox) chatbox.innerHTML = `<div class="text-center p-3 text-danger">Error loading messages.</div>`;
     })
     .finally(() => {
+      if (messagePaging.conversationId === conversationId) {
+        messagePaging.loading = false;
+        loadOlderMessagesUntilScrollable();
+      }
       // Check if there's a search highlight to apply
       if (window.searchHighlight && window.searchHighlight.term) {
         const elapsed = Date.now() - window.searchHighlight.timestamp;
@@ -547,6 +553,101 @@ export function loadMessages(conversationId) {
     });
 }
 
+export function hasOlderMessages() {
+  return !!messagePaging.continuationToken;
+}
+
+/**
+ * Load the next older page of the current conversation and insert it above the
+ * loaded messages, keeping the user's scroll position. Resolves to true if a page was loaded.
+ */
+export function loadOlderMessages() {
+  const { conversationId, continuationToken, loading } = messagePaging;
+  if (!conversationId || !continuationToken || loading || !chatbox) {
+    return Promise.resolve(false);
+  }
+
+  messagePaging.loading = true;
+  return fetchMessagePage(conversationId, continuationToken)
+    .then((data) => {
+      if (messagePaging.conversationId !== conversationId) return false;
+
+      const firstExisting = chatbox.firstChild;
+      const previousScrollHeight = chatbox.scrollHeight;
+      const previousScrollTop = chatbox.scrollTop;
+
+      // appendMessage adds to the end of the chatbox; move the new nodes above the existing ones
+      const renderedBefore = chatbox.childNodes.length;
+      data.messages.forEach(renderLoadedMessage);
+      const olderNodes = Array.from(chatbox.childNodes).slice(renderedBefore);
+      olderNodes.forEach((node) => {
+        // Older images must not scroll the chat to the bottom when they finish loading
+        node.querySelectorAll?.("img[onload]").forEach((img) => img.removeAttribute("onload"));
+        chatbox.insertBefore(node, firstExisting);
+      });
+
+      chatbox.scrollTop = chatbox.scrollHeight - previousScrollHeight + previousScrollTop;
+      messagePaging.continuationToken = data.continuation_token || null;
+
+      if (window.searchHighlight && window.searchHighlight.term) {
+        applySearchHighlight(window.searchHighlight.term);
+      }
+      return true;
+    })
+    .catch((error) => {
+      console.error("Error loading older messages:", error);
+      showToast("Failed to load older messages.", "danger");
+      return false;
+    })
+    .finally(() => {
+      if (messagePaging.conversationId === conversationId) {
+        messagePaging.loading = false;
+      }
+    });
+}
+
+// Short pages don't make the chatbox scrollable, so the scroll listener would never fire
+function loadOlderMessagesUntilScrollable() {
+  if (!chatbox || chatbox.scrollHeight > chatbox.clientHeight || !hasOlderMessages()) return;
+  loadOlderMessages().then((loaded) => {
+    if (loaded) loadOlderMessagesUntilScrollable();
+  });
+}
+
+if (chatbox) {
+  chatbox.addEventListener("scroll", () => {
+    if (chatbox.scrollTop <= OLDER_MESSAGES_SCROLL_THRESHOLD && hasOlderMessages()) {
+      loadOlderMessages();
+    }
+  });
+}
+
+function loadDeferredCitations(conversationId, messageId, citationsContainer) {
+  citationsContainer.removeAttribute("data-citations-deferred");
+  fetch(`/api/conversations/${conversationId}/messages/${messageId}/citations`)
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`Failed to load citations (${response.status})`);
+      }
+      return response.json();
+    })
+    .then((data) => {
+      const citationsHtml = createCitationsHtml(
+        data.hybrid_citations,
+        data.web_search_citations,
+        data.agent_citations,
+        messageId
+      );
+      citationsContainer.innerHTML = citationsHtml || `<div class="text-muted small">No sources available.</div>`;
+    })
+    .catch((error) => {
+      console.error("Error loading citations:", error);
+      // Allow another attempt on the next expand
+      citationsContainer.setAttribute("data-citations-deferred", "true");
+      citationsContainer.innerHTML = `<div class="text-danger small">Failed to load sources.</div>`;
+    });
+}
+
 export function appendMessage(
   sender,
   messageContent,
@@ -725,7 +826,13 @@ export function appendMessage(
     console.log("Agent Check Result:", agentCheck);
     const overallCondition = augmented && (hybridCheck || webCheck || agentCheck);
     console.log("Overall Condition Result:", overallCondition);
-    const shouldShowCitations = (augmented && citationsButtonsHtml) || agentCheck;
+    // Loaded pages only carry citation counts; the citations are fetched when expanded
+    const deferredCitationCounts = fullMessageObject?.citations_deferred ? fullMessageObject.citation_counts : null;
+    const hasDeferredCitations = !!deferredCitationCounts && (
+      (augmented && (deferredCitationCounts.hybrid_citations > 0 || deferredCitationCounts.web_search_citations > 0)) ||
+      deferredCitationCounts.agent_citations > 0
+    );
+    const shouldShowCitations = (augmented && citationsButtonsHtml) || agentCheck || hasDeferredCitations;
     console.log(
       `Condition check ((augmented && citationsButtonsHtml) || agentCheck): ${shouldShowCitations}`
     );
@@ -736,7 +843,9 @@ export function appendMessage(
       citationToggleHtml = `<button class="btn btn-sm btn-link text-muted citation-toggle-btn" title="Show sources" aria-expanded="false" aria-controls="${citationsContainerId}"><i class="bi bi-journal-text"></i></button>`;
       // citationsButtonsHtml already contains a <div class="citations-container"> wrapper
       // Just add ID and display style by wrapping minimally
-      citationContentContainerHtml = `<div id="${citationsContainerId}" style="display: none;">${citationsButtonsHtml}</div>`;
+      citationContentContainerHtml = hasDeferredCitations && !citationsButtonsHtml
+        ? `<div id="${citationsContainerId}" style="display: none;" data-citations-deferred="true"><div class="text-muted small">Loading sources...</div></div>`
+        : `<div id="${citationsContainerId}" style="display: none;">${citationsButtonsHtml}</div>`;
     } else {
       console.log(">>> Will NOT generate citation elements.");
     }
@@ -920,6 +1029,7 @@ export function appendMessage(
         });
     });
     const toggleBtn = messageDiv.querySelector(".citation-toggle-btn");
+    const citationsConversationId = messagePaging.conversationId;
     if (toggleBtn) {
       toggleBtn.addEventListener("click", () => {
         /* ... toggle logic ... */
@@ -931,6 +1041,9 @@ export function appendMessage(
         const currentScrollTop = document.getElementById('chat-messages-container')?.scrollTop || window.pageYOffset;
         
         const isExpanded = citationsContainer.style.display !== "none";
+        if (!isExpanded && citationsContainer.hasAttribute("data-citations-deferred")) {
+          loadDeferredCitations(citationsConversationId, messageId, citationsContainer);
+        }
         citationsContainer.style.display = isExpanded ? "none" : "block";
         toggleBtn.setAttribute("aria-expanded", !isExpanded);
         toggleBtn.title = isExpanded ? "Show sources" : "Hide sources";
@@ -2802,6 +2915,13 @@ export function scrollToMessageSmooth(messageId) {
   // Find message by data-message-id attribute
   const messageElement = chatbox.querySelector(`[data-message-id="${messageId}"]`);
   if (!messageElement) {
+    // The message may be on an older page that hasn't been loaded yet
+    if (hasOlderMessages()) {
+      loadOlderMessages().then((loaded) => {
+        if (loaded) scrollToMessageSmooth(messageId);
+      });
+      return;
+    }
     console.warn(`Message with ID ${messageId} not found`);
     return;
   }
@@ -17,6 +17,17 @@ let publicPromptsCurrentPage = 1;
 let publicPromptsPageSize = 10;
 let publicPromptsSearchTerm = '';
 
+// Keyset pagination: continuation tokens by page number, reset when the workspace or query changes
+function createPageTokens(){
+  let scope='', tokens={}, total=0;
+  return {
+    apply(params,page,scopeKey=''){ const s=new URLSearchParams(params); s.delete('page'); const key=`${scopeKey}|${s}`; if(key!==scope){ scope=key; tokens={}; } if(page>1&&tokens[page]) params.append('continuation_token',tokens[page]); },
+    store(d){ if(d.continuation_token) tokens[d.page+1]=d.continuation_token; if(d.total_count!=null) total=d.total_count; return total; }
+  };
+}
+const publicDocsPageTokens = createPageTokens();
+const publicPromptsPageTokens = createPageTokens();
+
 // Polling set for documents
 const publicActivePolls = new Set();
 
@@ -258,13 +269,14 @@ async function fetchPublicDocs(){
   publicDocsPagination.innerHTML='';
   const params=new URLSearchParams({page:publicDocsCurrentPage,page_size:publicDocsPageSize});
   if(publicDocsSearchTerm) params.append('search',publicDocsSearchTerm);
+  publicDocsPageTokens.apply(params,publicDocsCurrentPage,activePublicId);
   try {
     const r=await fetch(`/api/public_documents?${params}`);
     if(!r.ok) throw await r.json(); const data=await r.json();
     publicDocsTableBody.innerHTML='';
     if(!data.documents.length){ publicDocsTableBody.innerHTML=`<tr><td colspan="4" class="text-center p-4 text-muted">${publicDocsSearchTerm?'No documents found.':'No documents in this workspace.'}</td></tr>`; }
     else data.documents.forEach(doc=> renderPublicDocumentRow(doc));
-    renderPublicDocsPagination(data.page,data.page_size,data.total_count);
+    renderPublicDocsPagination(data.page,data.page_size,publicDocsPageTokens.store(data));
   } catch(err){ console.error(err); publicDocsTableBody.innerHTML=`<tr><td colspan="4" class="text-center text-danger p-4">Error: ${escapeHtml(err.error||err.message)}</td></tr>`; }
 }
 
@@ -642,8 +654,8 @@ window.searchPublicDocumentInChat = function(docId) {
 // Prompts
 async function fetchPublicPrompts(){
   publicPromptsTableBody.innerHTML='<tr class="table-loading-row"><td colspan="2"><div class="spinner-border spinner-border-sm me-2"></div> Loading prompts...</td></tr>';
-  publicPromptsPagination.innerHTML=''; const params=new URLSearchParams({page:publicPromptsCurrentPage,page_size:publicPromptsPageSize}); if(publicPromptsSearchTerm) params.append('search',publicPromptsSearchTerm);
-  try{ const r=await fetch(`/api/public_prompts?${params}`); if(!r.ok) throw await r.json(); const d=await r.json(); publicPromptsTableBody.innerHTML=''; if(!d.prompts.length) publicPromptsTableBody.innerHTML='<tr><td colspan="2" class="text-center p-4 text-muted">No prompts.</td></tr>'; else d.prompts.forEach(p=>renderPublicPromptRow(p)); renderPublicPromptsPagination(d.page,d.page_size,d.total_count); }catch(e){ publicPromptsTableBody.innerHTML=`<tr><td colspan="2" class="text-center text-danger p-3">Error: ${escapeHtml(e.error||e.message)}</td></tr>`; }
+  publicPromptsPagination.innerHTML=''; const params=new URLSearchParams({page:publicPromptsCurrentPage,page_size:publicPromptsPageSize}); if(publicPromptsSearchTerm) params.append('search',publicPromptsSearchTerm); publicPromptsPageTokens.apply(params,publicPromptsCurrentPage,activePublicId);
+  try{ const r=await fetch(`/api/public_prompts?${params}`); if(!r.ok) throw await r.json(); const d=await r.json(); publicPromptsTableBody.innerHTML=''; if(!d.prompts.length) publicPromptsTableBody.innerHTML='<tr><td colspan="2" class="text-center p-4 text-muted">No prompts.</td></tr>'; else d.prompts.forEach(p=>renderPublicPromptRow(p)); renderPublicPromptsPagination(d.page,d.page_size,publicPromptsPageTokens.store(d)); }catch(e){ publicPromptsTableBody.innerHTML=`<tr><td colspan="2" class="text-center text-danger p-3">Error: ${escapeHtml(e.error||e.message)}</td></tr>`; }
 }
 function renderPublicPromptRow(p){ const tr=document.createElement('tr'); tr.innerHTML=`<td title="${escapeHtml(p.name)}">${escapeHtml(p.name)}</td><td><button class="btn btn-sm btn-primary" onclick="onEditPublicPrompt('${p.id}')"><i class="bi bi-pencil-fill"></i></button><button class="btn btn-sm btn-danger ms-1" onclick="onDeletePublicPrompt('${p.id}')"><i class="bi bi-trash-fill"></i></button></td>`; publicPromptsTableBody.append(tr); }
 function renderPublicPromptsPagination(page,pageSize,totalCount){ const container=publicPromptsPagination; container.innerHTML=''; const totalPages=Math.ceil(totalCount/pageSize); if(totalPages<=1) return; const ul=document.createElement('ul'); ul.className='pagination pagination-sm mb-0'; function mk(p,t,d,a){ const li=document.createElement('li'); li.className=`page-item${d?' disabled':''}${a?' active':''}`; const aEl=document.createElement('a'); aEl.className='page-link'; aEl.href='#'; aEl.textContent=t; if(!d&&!a) aEl.onclick=e=>{e.preventDefault();publicPromptsCurrentPage=p;fetchPublicPrompts();}; li.append(aEl); return li;} ul.append(mk(page-1,'«',page<=1,false)); for(let p=1;p<=totalPages;p++) ul.append(mk(p,p,false,p===page)); ul.append(mk(page+1,'»',page>=totalPages,false)); container.append(ul);} 
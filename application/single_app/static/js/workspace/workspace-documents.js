@@ -1,6 +1,6 @@
 // static/js/workspace/workspace-documents.js
 
-import { escapeHtml } from "./workspace-utils.js";
+import { escapeHtml, createPageTokens } from "./workspace-utils.js";
 
 // ------------- State Variables -------------
 let docsCurrentPage = 1;
@@ -11,6 +11,7 @@ let docsAuthorFilter = ''; // Added for Author filter
 let docsKeywordsFilter = ''; // Added for Keywords filter
 let docsAbstractFilter = ''; // Added for Abstract filter
 const activePolls = new Set();
+const docsPageTokens = createPageTokens();
 
 // ------------- DOM Elements (Documents Tab) -------------
 const documentsTableBody = document.querySelector("#documents-table tbody");
@@ -455,6 +456,8 @@ function fetchUserDocuments() {
         params.append('shared_only', 'true');
     }
 
+    docsPageTokens.apply(params, docsCurrentPage);
+
     console.log("Fetching documents with params:", params.toString()); // Debugging: Check params
 
     fetch(`/api/documents?${params.toString()}`)
@@ -499,7 +502,7 @@ function fetchUserDocuments() {
                 window.lastFetchedDocs = docs;
                 docs.forEach(doc => renderDocumentRow(doc));
             }
-            renderDocsPaginationControls(data.page, data.page_size, data.total_count);
+            renderDocsPaginationControls(data.page, data.page_size, docsPageTokens.store(data));
         })
         .catch(error => {
             console.error("Error fetching documents:", error);
@@ -1,11 +1,12 @@
 // static/js/workspace/workspace-prompts.js
 
-import { escapeHtml } from "./workspace-utils.js";
+import { escapeHtml, createPageTokens } from "./workspace-utils.js";
 
 // ------------- State Variables (Prompts Tab) -------------
 let promptsCurrentPage = 1;
 let promptsPageSize = 10;
 let promptsSearchTerm = '';
+const promptsPageTokens = createPageTokens();
 
 // ------------- DOM Elements (Prompts Tab) -------------
 const promptsTableBody = document.querySelector("#prompts-table tbody");
@@ -66,6 +67,7 @@ function fetchUserPrompts() {
     if (promptsSearchTerm) {
         params.append('search', promptsSearchTerm);
     }
+    promptsPageTokens.apply(params, promptsCurrentPage);
 
     fetch(`/api/prompts?${params.toString()}`)
         .then(r => r.ok ? r.json() : r.json().then(err => Promise.reject(err)))
@@ -90,7 +92,7 @@ function fetchUserPrompts() {
                 data.prompts.forEach(p => renderPromptRow(p));
             }
             // Render pagination controls using data from response
-            renderPromptsPaginationControls(data.page, data.page_size, data.total_count);
+            renderPromptsPaginationControls(data.page, data.page_size, promptsPageTokens.store(data));
         })
         .catch(err => {
             console.error("Error fetching prompts:", err);
@@ -8,4 +8,38 @@ export function escapeHtml(unsafe) {
         .replace(/>/g, "&gt;")
         .replace(/"/g, "&quot;")
         .replace(/'/g, "&#39;");
-  }
\ No newline at end of file
+  }
+
+// Continuation tokens of a keyset-paginated listing, by page number.
+// Tokens are dropped whenever the query (filters, page size, scopeKey) changes.
+export function createPageTokens() {
+    let scope = '';
+    let tokens = {};
+    let totalCount = 0;
+    return {
+        // Adds the continuation token for `page` to params when one is known
+        apply(params, page, scopeKey = '') {
+            const scopeParams = new URLSearchParams(params);
+            scopeParams.delete('page');
+            const key = `${scopeKey}|${scopeParams}`;
+            if (key !== scope) {
+                scope = key;
+                tokens = {};
+            }
+            if (page > 1 && tokens[page]) {
+                params.append('continuation_token', tokens[page]);
+            }
+        },
+        // Records the token for the next page; returns the total count, kept from
+        // the first page when a continued filtered page doesn't include one
+        store(data) {
+            if (data.continuation_token) {
+                tokens[data.page + 1] = data.continuation_token;
+            }
+            if (data.total_count !== null && data.total_count !== undefined) {
+                totalCount = data.total_count;
+            }
+            return totalCount;
+        }
+    };
+}
@@ -14,6 +14,8 @@ Key Features:
 - Memory-efficient metadata storage (~1KB per documented route)
 - Zero runtime performance impact on business logic
 - Comprehensive cache management and monitoring
+- Lazy schema analysis: route source is only inspected when the spec is first built
+- Optional prebuilt spec artifact (openapi-<VERSION>.json) loaded instead of generating
 
 Performance Characteristics:
 - Swagger spec generation: ~47ms for 166 endpoints
@@ -79,8 +81,14 @@ Available Endpoints:
 - GET /api/swagger/cache - Cache statistics and management
 - DELETE /api/swagger/cache - Clear swagger spec cache
 
+Prebuilt Spec Artifact:
+- `flask --app app export-swagger` writes the spec to SWAGGER_SPEC_ARTIFACT_DIR
+  (default: ./swagger_specs) as openapi-<VERSION>.json
+- When a file for the running VERSION exists, /swagger.json serves it without
+  analyzing any route source
+
 Cache Management:
-- Automatic invalidation when routes or metadata change
+- Automatic invalidation when routes are added
 - Force refresh with ?refresh=true parameter
 - Manual cache clearing via DELETE /api/swagger/cache
 - Thread-safe operations with proper locking
@@ -90,7 +98,9 @@ Cache Management:
 from flask import Flask, jsonify, render_template_string, request, make_response
 from functools import wraps
 from typing import Dict, List, Optional, Any, Union
+import copy
 import json
+import os
 import re
 import inspect
 import ast
@@ -100,11 +110,51 @@ import hashlib
 import time
 import threading
 import yaml
+from collections.abc import Mapping
 from functions_authentication import *
 
 # Global registry to store route documentation
 _swagger_registry: Dict[str, Dict[str, Any]] = {}
 
+SWAGGER_SPEC_ARTIFACT_DIR = os.getenv(
+    'SWAGGER_SPEC_ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'swagger_specs')
+)
+
+
+def get_swagger_spec_artifact_path(version: str) -> str:
+    """Path of the prebuilt spec for an app version."""
+    return os.path.join(SWAGGER_SPEC_ARTIFACT_DIR, f"openapi-{version}.json")
+
+
+def load_swagger_spec_artifact(version: str) -> Optional[Dict[str, Any]]:
+    """Load the prebuilt spec for this version, or None if there is no usable artifact."""
+    path = get_swagger_spec_artifact_path(version)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+    except Exception as e:
+        debug_print(f"Could not load swagger spec artifact {path}: {e}")
+        return None
+    # A spec built for another release would document the wrong routes
+    if spec.get('info', {}).get('version') != version:
+        debug_print(f"Ignoring swagger spec artifact {path}: built for {spec.get('info', {}).get('version')}")
+        return None
+    return spec
+
+
+def export_swagger_spec(app: Flask, path: Optional[str] = None) -> str:
+    """Generate the OpenAPI spec offline and write it as a versioned JSON artifact."""
+    version = app.config.get('VERSION', '1.0.0')
+    path = path or get_swagger_spec_artifact_path(version)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    spec = extract_route_info(app)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f, indent=2)
+    return path
+
 # Swagger spec cache with rate limiting
 class SwaggerCache:
     def __init__(self):
@@ -112,6 +162,8 @@ class SwaggerCache:
         self._cache_lock = threading.Lock()
         self._request_counts = {}  # IP -> (count, reset_time)
         self._rate_limit_lock = threading.Lock()
+        self._cache_keys = {}  # id(app) -> (view function count, key)
+        self._artifacts = {}  # app version -> prebuilt spec or None
         
         # Cache configuration
         self.cache_ttl = 300  # 5 minutes
@@ -119,20 +171,50 @@ class SwaggerCache:
         self.rate_limit_window = 60  # seconds
         
     def _get_cache_key(self, app):
-        """Generate cache key based on app routes and their metadata."""
+        """Generate cache key based on app routes.
+        
+        Route metadata is fixed once a route is decorated, so the key only changes
+        when routes are added. It is computed once per process and recomputed only
+        if the number of registered view functions changes.
+        """
+        route_count = len(app.view_functions)
+        cached = self._cache_keys.get(id(app))
+        if cached and cached[0] == route_count:
+            return cached[1]
+        
         # Create a hash of route signatures to detect changes
         route_signatures = []
         for rule in app.url_map.iter_rules():
             if rule.endpoint == 'static':
                 continue
-            view_func = app.view_functions.get(rule.endpoint)
-            if view_func:
-                swagger_doc = getattr(view_func, '_swagger_doc', None)
-                sig = f"{rule.rule}:{rule.methods}:{hash(str(swagger_doc))}"
+            if rule.endpoint in app.view_functions:
+                sig = f"{rule.rule}:{sorted(rule.methods or [])}:{rule.endpoint}"
                 route_signatures.append(sig)
         
         combined = ''.join(sorted(route_signatures))
-        return hashlib.md5(combined.encode()).hexdigest()
+        key = hashlib.md5(combined.encode()).hexdigest()
+        self._cache_keys[id(app)] = (route_count, key)
+        return key
+    
+    def _get_prebuilt_spec(self, app):
+        """Prebuilt spec for the running version, loaded at most once per process."""
+        version = app.config.get('VERSION', '1.0.0')
+        if version not in self._artifacts:
+            self._artifacts[version] = load_swagger_spec_artifact(version)
+            if self._artifacts[version]:
+                print(f"📄 Loaded prebuilt swagger spec {get_swagger_spec_artifact_path(version)}")
+        artifact = self._artifacts[version]
+        if artifact is None:
+            return None
+        spec = copy.deepcopy(artifact)
+        try:
+            spec['servers'] = [{
+                "url": f"{request.scheme}://{request.host}",
+                "description": f"SimpleChat API Server ({request.host})"
+            }]
+        except RuntimeError:
+            pass
+        return spec
     
     def _is_rate_limited(self, client_ip):
         """Check if client is rate limited."""
@@ -188,7 +270,9 @@ class SwaggerCache:
             
             # Generate fresh spec
             try:
-                openapi_dict = extract_route_info(app)
+                openapi_dict = None if force_refresh else self._get_prebuilt_spec(app)
+                if openapi_dict is None:
+                    openapi_dict = extract_route_info(app)
                 
                 if format == 'yaml':
                     # Convert to YAML format
@@ -215,6 +299,8 @@ class SwaggerCache:
         """Clear the cache (useful for development)."""
         with self._cache_lock:
             self._cache.clear()
+            self._cache_keys.clear()
+            self._artifacts.clear()
     
     def get_cache_stats(self):
         """Get cache statistics for monitoring."""
@@ -229,6 +315,7 @@ class SwaggerCache:
             
             return {
                 'cached_specs': len(self._cache),
+                'prebuilt_artifact_loaded': any(self._artifacts.values()),
                 'cache_ttl_seconds': self.cache_ttl,
                 'rate_limit_per_minute': self.rate_limit_requests,
                 'formats': {
@@ -1195,6 +1282,83 @@ def _extract_tags_from_route_path(route_path: str) -> List[str]:
     
     return filtered_segments
 
+class _LazySwaggerDoc(Mapping):
+    """
+    Route documentation metadata attached by swagger_route as `_swagger_doc`.
+    
+    Analyzing a route means inspect.getsource plus AST walks, which used to run for
+    every decorated route at import time. Here the schema fields are only analyzed
+    the first time they are read (when the spec is built) and the result is kept.
+    """
+    _LAZY_KEYS = ('responses', 'parameters', 'request_body')
+    
+    def __init__(self, func, static_doc, responses=None, parameters=None, request_body=None,
+                 auto_schema=True, auto_request_body=True):
+        self._func = func
+        self._doc = dict(static_doc)
+        self._explicit = {'responses': responses, 'parameters': parameters, 'request_body': request_body}
+        self._auto_schema = auto_schema
+        self._auto_request_body = auto_request_body
+        self._resolved = False
+        self._analyzed_request_body = None
+        self._request_body_analyzed = False
+        self._lock = threading.Lock()
+    
+    def _resolve(self):
+        if self._resolved:
+            return
+        with self._lock:
+            if self._resolved:
+                return
+            
+            # Auto-generate responses if not provided
+            final_responses = self._explicit['responses']
+            if self._auto_schema and not final_responses:
+                final_responses = _analyze_function_returns(self._func)
+            
+            # Auto-generate parameters if not provided
+            final_parameters = self._explicit['parameters']
+            if self._auto_schema and not final_parameters:
+                final_parameters = _analyze_function_parameters(self._func)
+            
+            # Auto-generate request body if not provided
+            final_request_body = self._explicit['request_body']
+            if self._auto_request_body and self._auto_schema and not final_request_body:
+                final_request_body = self._analyze_request_body()
+            
+            self._doc['request_body'] = final_request_body
+            self._doc['responses'] = final_responses or {}
+            self._doc['parameters'] = final_parameters or []
+            self._resolved = True
+    
+    def _analyze_request_body(self):
+        if not self._request_body_analyzed:
+            self._analyzed_request_body = _analyze_function_request_body(self._func)
+            self._request_body_analyzed = True
+        return self._analyzed_request_body
+    
+    def analyzed_request_body(self):
+        """Request body detected from the route source, analyzed at most once."""
+        with self._lock:
+            return self._analyze_request_body()
+    
+    def __getitem__(self, key):
+        if key in self._LAZY_KEYS:
+            self._resolve()
+        return self._doc[key]
+    
+    def __iter__(self):
+        self._resolve()
+        return iter(self._doc)
+    
+    def __len__(self):
+        self._resolve()
+        return len(self._doc)
+    
+    def __repr__(self):
+        self._resolve()
+        return repr(self._doc)
+
 def swagger_route(
     summary: str = "",
     description: str = "",
@@ -1246,33 +1410,24 @@ def swagger_route(
         if auto_description and not description and func.__doc__:
             final_description = func.__doc__.strip()
         
-        # Auto-generate responses if not provided
-        final_responses = responses
-        if auto_schema and not responses:
-            final_responses = _analyze_function_returns(func)
-        
-        # Auto-generate parameters if not provided
-        final_parameters = parameters
-        if auto_schema and not parameters:
-            final_parameters = _analyze_function_parameters(func)
-        
-        # Auto-generate request body if not provided
-        final_request_body = request_body
-        if auto_request_body and auto_schema and not request_body:
-            final_request_body = _analyze_function_request_body(func)
-        
-        # Store the documentation metadata (tags will be resolved later in extract_route_info)
-        setattr(wrapper, '_swagger_doc', {
-            'summary': final_summary,
-            'description': final_description,
-            'tags': tags,  # Keep original tags, will be processed in extract_route_info
-            'request_body': final_request_body,
-            'responses': final_responses or {},
-            'parameters': final_parameters or [],
-            'deprecated': deprecated,
-            'security': security or [],
-            'auto_tags': auto_tags  # Store the auto_tags setting for later use
-        })
+        # Store the documentation metadata (tags will be resolved later in extract_route_info).
+        # Responses, parameters and request body are analyzed from source on first access.
+        setattr(wrapper, '_swagger_doc', _LazySwaggerDoc(
+            func,
+            {
+                'summary': final_summary,
+                'description': final_description,
+                'tags': tags,  # Keep original tags, will be processed in extract_route_info
+                'deprecated': deprecated,
+                'security': security or [],
+                'auto_tags': auto_tags  # Store the auto_tags setting for later use
+            },
+            responses=responses,
+            parameters=parameters,
+            request_body=request_body,
+            auto_schema=auto_schema,
+            auto_request_body=auto_request_body
+        ))
         
         return wrapper
     return decorator
@@ -1432,6 +1587,9 @@ def extract_route_info(app: Flask) -> Dict[str, Any]:
                     # 1. Try to analyze the actual view function for request body
                     if swagger_doc.get('request_body'):
                         request_body_schema = swagger_doc['request_body']
+                    elif isinstance(swagger_doc, _LazySwaggerDoc):
+                        # Analyze the actual route implementation (memoized per route)
+                        request_body_schema = swagger_doc.analyzed_request_body()
                     else:
                         # Analyze the actual route implementation
                         request_body_schema = _analyze_function_request_body(view_func)
@@ -1556,6 +1714,12 @@ def register_swagger_routes(app: Flask):
         print("Swagger documentation is disabled in admin settings.")
         return
     
+    @app.cli.command('export-swagger')
+    def export_swagger_command():
+        """Write the OpenAPI spec for this version to the prebuilt artifact directory."""
+        path = export_swagger_spec(app)
+        print(f"Swagger spec written to {path}")
+    
     @app.route('/swagger')
     @swagger_route(
         summary="Interactive Swagger UI",
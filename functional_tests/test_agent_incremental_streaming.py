@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Functional test for incremental Semantic Kernel agent streaming.
+Version: 0.237.010
+Implemented in: 0.237.010
+
+This test ensures that the async-to-sync stream bridge used by chat_stream_api
+hands agent chunks to the SSE generator as soon as they are produced (instead
+of after the whole reply), applies backpressure with a bounded buffer, re-raises
+agent errors, and cancels the agent stream when the client disconnects.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+from functions_async_stream import iterate_async_stream
+
+
+def test_chunks_arrive_before_stream_finishes():
+    """The first chunk is received while the agent is still generating."""
+    print("🔍 Testing first-chunk latency of the stream bridge...")
+
+    try:
+        release_rest = threading.Event()
+
+        async def slow_agent():
+            yield "Hello"
+            while not release_rest.is_set():
+                await asyncio.sleep(0.01)
+            yield " world"
+
+        stream = iterate_async_stream(slow_agent)
+        assert next(stream) == "Hello", "First chunk should arrive before the agent finishes"
+        release_rest.set()
+        assert list(stream) == [" world"]
+
+        print("✅ Incremental delivery test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_backpressure_errors_and_cancellation():
+    """A slow consumer bounds buffering; errors propagate; close() cancels the agent."""
+    print("🔍 Testing backpressure, error propagation and cancellation...")
+
+    try:
+        produced = []
+        stopped = threading.Event()
+
+        async def chatty_agent():
+            try:
+                for n in range(1000):
+                    produced.append(n)
+                    yield n
+            finally:
+                stopped.set()
+
+        stream = iterate_async_stream(chatty_agent, max_buffered_items=4)
+        assert next(stream) == 0
+        time.sleep(0.1)
+        assert len(produced) <= 7, f"Producer ran ahead of the consumer: {len(produced)}"
+        stream.close()
+        assert stopped.wait(2), "Closing the generator should stop the agent stream"
+        assert len(produced) < 1000
+
+        async def failing_agent():
+            yield "partial"
+            raise RuntimeError("model overloaded")
+
+        received = []
+        try:
+            for chunk in iterate_async_stream(failing_agent):
+                received.append(chunk)
+            raise AssertionError("Agent error was swallowed")
+        except RuntimeError as e:
+            assert str(e) == "model overloaded" and received == ["partial"]
+
+        def broken_factory():
+            raise LookupError("agent not configured")
+
+        try:
+            list(iterate_async_stream(broken_factory))
+            raise AssertionError("Stream setup error was swallowed")
+        except LookupError:
+            pass
+
+        print("✅ Backpressure and cancellation test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_chunks_arrive_before_stream_finishes, test_backpressure_errors_and_cancellation]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Functional test for batched, background conversation deletion.
+Version: 0.237.022
+Implemented in: 0.237.022
+
+This test ensures that conversation messages are archived and deleted with
+Cosmos transactional batches per partition (bounded by operation count and
+request size), that a batch failing on an already-deleted message falls back
+to per-item deletes, that bulk deletion jobs record progress and skip
+conversations that don't belong to the requesting user, and that jobs left
+without progress by a worker restart are resubmitted once and eventually
+marked failed.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeContainer:
+    """Dict-backed container supporting the calls used by the deletion module."""
+
+    def __init__(self, items=None):
+        self.items = {item["id"]: dict(item) for item in (items or [])}
+        self.batches = []
+        self.single_deletes = 0
+
+    def query_items(self, query, parameters, partition_key):
+        docs = [doc for doc in self.items.values() if doc.get("conversation_id") == partition_key]
+        if query.startswith("SELECT c.id "):
+            return [{"id": doc["id"]} for doc in docs]
+        return [dict(doc) for doc in docs]
+
+    def execute_item_batch(self, batch_operations, partition_key):
+        from azure.cosmos.exceptions import CosmosBatchOperationError
+        self.batches.append(len(batch_operations))
+        missing = [i for i, (op, args) in enumerate(batch_operations) if op == "delete" and args[0] not in self.items]
+        if missing:
+            # Like the service: the first failing operation gets its own status, the rest 424 (failed dependency)
+            raise CosmosBatchOperationError(
+                error_index=missing[0],
+                headers={},
+                status_code=404,
+                message=f"There was an error in the transactional batch on index {missing[0]}.",
+                operation_responses=[{"statusCode": 404 if i == missing[0] else 424} for i in range(len(batch_operations))]
+            )
+        for op, args in batch_operations:
+            if op == "delete":
+                del self.items[args[0]]
+            else:
+                self.items[args[0]["id"]] = dict(args[0])
+        return []
+
+    def delete_item(self, item, partition_key):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        self.single_deletes += 1
+        if item not in self.items:
+            raise CosmosResourceNotFoundError()
+        del self.items[item]
+
+    def read_item(self, item, partition_key):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        if item not in self.items:
+            raise CosmosResourceNotFoundError()
+        return dict(self.items[item])
+
+    def create_item(self, body):
+        self.items[body["id"]] = dict(body)
+        return dict(body)
+
+    def upsert_item(self, body):
+        self.items[body["id"]] = dict(body)
+        return dict(body)
+
+
+class FakeJobsContainer(FakeContainer):
+    """Jobs container that tracks etags for conditional replaces."""
+
+    def _store(self, body):
+        body = dict(body)
+        body["_etag"] = str(int(self.items.get(body["id"], {}).get("_etag", "0")) + 1)
+        self.items[body["id"]] = body
+        return dict(body)
+
+    def create_item(self, body):
+        return self._store(body)
+
+    def upsert_item(self, body):
+        return self._store(body)
+
+    def replace_item(self, item, body, etag=None, match_condition=None):
+        from azure.cosmos.exceptions import CosmosAccessConditionFailedError
+        if etag is not None and self.items[item]["_etag"] != etag:
+            raise CosmosAccessConditionFailedError()
+        return self._store(body)
+
+
+def make_messages(conversation_id, count, content="hello"):
+    return [
+        {"id": f"{conversation_id}-msg-{i}", "conversation_id": conversation_id, "role": "user",
+         "content": content, "_rid": "rid", "_etag": "etag"}
+        for i in range(count)
+    ]
+
+
+def setup_module(messages):
+    import functions_conversation_deletion as deletion
+    deletion.cosmos_messages_container = FakeContainer(messages)
+    deletion.cosmos_archived_messages_container = FakeContainer()
+    deletion.cosmos_archived_conversations_container = FakeContainer()
+    deletion.cosmos_conversations_container = FakeContainer()
+    deletion.log_conversation_deletion = lambda **kwargs: None
+    deletion.log_conversation_archival = lambda **kwargs: None
+    return deletion
+
+
+def test_messages_are_purged_in_batches():
+    """Messages are archived and deleted in batches of at most 100 operations."""
+    print("🔍 Testing batched purge...")
+
+    try:
+        deletion = setup_module(make_messages("conv-1", 250) + make_messages("conv-2", 3))
+
+        deleted = deletion.purge_conversation_messages("conv-1", archive=True, archive_fields={"archived_by_retention_policy": True})
+
+        archived = deletion.cosmos_archived_messages_container
+        messages = deletion.cosmos_messages_container
+        if deleted != 250 or len(messages.items) != 3:
+            print(f"❌ Unexpected deletion result: {deleted} / {len(messages.items)} left")
+            return False
+        if messages.batches != [100, 100, 50] or archived.batches != [100, 100, 50]:
+            print(f"❌ Unexpected batches: {messages.batches} / {archived.batches}")
+            return False
+        copy = archived.items["conv-1-msg-0"]
+        if "_rid" in copy or not copy.get("archived_at") or not copy.get("archived_by_retention_policy"):
+            print(f"❌ Unexpected archived copy: {copy}")
+            return False
+
+        # Large documents are split by request size as well
+        batches = list(deletion._iter_batches(make_messages("conv-3", 5, content="x" * 600 * 1024)))
+        if [len(batch) for batch in batches] != [2, 2, 1]:
+            print(f"❌ Size limit not applied: {[len(batch) for batch in batches]}")
+            return False
+
+        print("✅ Messages are purged in transactional batches")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_failed_batch_falls_back_to_single_deletes():
+    """A batch that hits an already-deleted message is retried item by item."""
+    print("🔍 Testing batch fallback...")
+
+    try:
+        deletion = setup_module(make_messages("conv-1", 5))
+        messages = deletion.cosmos_messages_container
+
+        deletion._delete_batch(messages, "conv-1", ["conv-1-msg-0", "missing", "conv-1-msg-1"])
+        if set(messages.items) != {"conv-1-msg-2", "conv-1-msg-3", "conv-1-msg-4"} or messages.single_deletes != 3:
+            print(f"❌ Unexpected fallback result: {sorted(messages.items)} / {messages.single_deletes}")
+            return False
+
+        print("✅ Failed batches fall back to per-item deletes")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_bulk_deletion_job_tracks_progress():
+    """A bulk job deletes the user's conversations and records progress."""
+    print("🔍 Testing bulk deletion job...")
+
+    try:
+        deletion = setup_module(make_messages("conv-1", 120) + make_messages("conv-2", 4) + make_messages("conv-3", 2))
+        conversations = deletion.cosmos_conversations_container
+        for conversation_id, user_id in (("conv-1", "user-1"), ("conv-2", "user-1"), ("conv-3", "user-2")):
+            conversations.items[conversation_id] = {"id": conversation_id, "user_id": user_id, "title": conversation_id}
+        jobs = FakeContainer()
+
+        job = deletion.create_bulk_deletion_job("user-1", ["conv-1", "conv-2", "conv-3", "missing", "conv-1"], jobs_container=jobs)
+        if job["status"] != deletion.BULK_JOB_STATUS_QUEUED or job["total"] != 4:
+            print(f"❌ Unexpected queued job: {job}")
+            return False
+
+        finished = deletion.run_bulk_deletion_job(job["id"], jobs_container=jobs, settings={"enable_conversation_archiving": True})
+        progress = deletion.get_bulk_deletion_job(job["id"], "user-1", jobs_container=jobs)
+
+        if progress["status"] != "completed" or progress["processed"] != 4 or progress["deleted_count"] != 2:
+            print(f"❌ Unexpected progress: {progress}")
+            return False
+        if progress["failed_ids"] != ["conv-3", "missing"] or progress["messages_deleted"] != 124:
+            print(f"❌ Unexpected failures or message count: {progress}")
+            return False
+        if set(conversations.items) != {"conv-3"} or len(deletion.cosmos_messages_container.items) != 2:
+            print("❌ Other users' conversations must not be deleted")
+            return False
+        if set(deletion.cosmos_archived_conversations_container.items) != {"conv-1", "conv-2"}:
+            print("❌ Deleted conversations were not archived")
+            return False
+        if not finished.get("ttl") or deletion.get_bulk_deletion_job(job["id"], "user-2", jobs_container=jobs) is not None:
+            print("❌ Finished jobs need a TTL and must only be visible to their owner")
+            return False
+
+        print("✅ Bulk deletion job records progress")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_stale_jobs_are_resubmitted_or_failed():
+    """Jobs abandoned by a worker restart are resubmitted once per stale period, then failed."""
+    print("🔍 Testing stale job recovery...")
+
+    try:
+        from datetime import datetime, timedelta
+        deletion = setup_module([])
+        jobs = FakeJobsContainer()
+        resubmitted = []
+
+        job = deletion.create_bulk_deletion_job("user-1", ["conv-1"], jobs_container=jobs)
+        progress = deletion.get_bulk_deletion_job(job["id"], "user-1", jobs_container=jobs, resubmit=resubmitted.append)
+        if progress["status"] != "queued" or resubmitted:
+            print(f"❌ Fresh jobs must be left alone: {progress} / {resubmitted}")
+            return False
+
+        def make_stale():
+            stale = dict(jobs.items[job["id"]])
+            stale["updated_at"] = (datetime.utcnow() - timedelta(seconds=deletion.BULK_JOB_STALE_SECONDS + 1)).isoformat()
+            jobs.upsert_item(stale)
+
+        make_stale()
+        stale_copy = dict(jobs.items[job["id"]])
+        deletion.get_bulk_deletion_job(job["id"], "user-1", jobs_container=jobs, resubmit=resubmitted.append)
+        # A second reader holding the old etag must not resubmit it again
+        deletion.recover_stale_bulk_deletion_job(stale_copy, jobs_container=jobs, resubmit=resubmitted.append)
+        if resubmitted != [job["id"]] or jobs.items[job["id"]]["resume_count"] != 1:
+            print(f"❌ Stale job should be resubmitted exactly once: {resubmitted}")
+            return False
+
+        for _ in range(deletion.BULK_JOB_MAX_RESUMES):
+            make_stale()
+            progress = deletion.get_bulk_deletion_job(job["id"], "user-1", jobs_container=jobs, resubmit=resubmitted.append)
+        if progress["status"] != "failed" or len(resubmitted) != deletion.BULK_JOB_MAX_RESUMES or not jobs.items[job["id"]].get("ttl"):
+            print(f"❌ Job should fail after {deletion.BULK_JOB_MAX_RESUMES} resumes: {progress} / {resubmitted}")
+            return False
+
+        # A resubmitted run of a finished job does nothing
+        if deletion.run_bulk_deletion_job(job["id"], jobs_container=jobs, settings={})["status"] != "failed":
+            print("❌ Finished jobs must not run again")
+            return False
+
+        print("✅ Stale jobs are resubmitted, then failed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_messages_are_purged_in_batches,
+        test_failed_batch_falls_back_to_single_deletes,
+        test_bulk_deletion_job_tracks_progress,
+        test_stale_jobs_are_resubmitted_or_failed,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Functional test for the chat image store.
+Version: 0.237.020
+Implemented in: 0.237.020
+
+This test ensures that generated and uploaded chat images are written to the
+storage backend under content-addressed keys with a thumbnail, that identical
+images are stored once, that stored images and thumbnails can be streamed back
+in chunks, and that callers fall back to Cosmos when no backend is configured.
+"""
+
+import sys
+import os
+import base64
+import hashlib
+from io import BytesIO
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeDownloader:
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    def chunks(self):
+        for i in range(0, len(self.data), 1024):
+            yield self.data[i:i + 1024]
+
+
+class FakeBlobClient:
+    def __init__(self, service, container, blob):
+        self.service = service
+        self.path = f"{container}/{blob}"
+
+    def exists(self):
+        return self.path in self.service.blobs
+
+    def upload_blob(self, data, overwrite=False, content_settings=None, **kwargs):
+        self.service.uploads.append(self.path)
+        self.service.blobs[self.path] = (bytes(data), content_settings.content_type if content_settings else None)
+
+    def download_blob(self, **kwargs):
+        return FakeDownloader(self.service.blobs[self.path][0])
+
+
+class FakeBlobServiceClient:
+    def __init__(self):
+        self.blobs = {}
+        self.uploads = []
+
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(self, container, blob)
+
+
+def make_png_data_url(size=(800, 600)):
+    from PIL import Image
+    img = Image.new('RGB', size, (30, 120, 200))
+    output = BytesIO()
+    img.save(output, format='PNG')
+    return "data:image/png;base64," + base64.b64encode(output.getvalue()).decode()
+
+
+def setup_blob_store():
+    import functions_image_store
+    service = FakeBlobServiceClient()
+    functions_image_store.CLIENTS["storage_account_office_docs_client"] = service
+    return functions_image_store, service
+
+
+def test_store_image_with_thumbnail():
+    """A data URL image is stored under its SHA-256 with a thumbnail, and deduplicated."""
+    print("🔍 Testing content-addressed image storage...")
+
+    try:
+        store, service = setup_blob_store()
+        data_url = make_png_data_url()
+        image_bytes = base64.b64decode(data_url.split(',', 1)[1])
+        digest = hashlib.sha256(image_bytes).hexdigest()
+
+        reference = store.store_image_data_url(data_url)
+        if not reference or reference['backend'] != 'blob' or reference['sha256'] != digest:
+            print(f"❌ Unexpected reference: {reference}")
+            return False
+        if reference['key'] != f"{digest[:2]}/{digest}.png" or not reference['thumbnail_key']:
+            print(f"❌ Keys are not content-addressed: {reference}")
+            return False
+        if (reference['width'], reference['height'], reference['size']) != (800, 600, len(image_bytes)):
+            print(f"❌ Unexpected image details: {reference}")
+            return False
+        if len(service.uploads) != 2:
+            print(f"❌ Expected image and thumbnail uploads, got {service.uploads}")
+            return False
+
+        again = store.store_image_data_url(data_url)
+        if len(service.uploads) != 2 or again != reference:
+            print(f"❌ Identical image was uploaded again: {service.uploads}")
+            return False
+
+        print("✅ Images are stored once under content-addressed keys with a thumbnail")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_stream_image_and_thumbnail():
+    """Stored images and thumbnails stream back in chunks."""
+    print("🔍 Testing image streaming...")
+
+    try:
+        from PIL import Image
+        store, service = setup_blob_store()
+        data_url = make_png_data_url((1600, 400))
+        image_bytes = base64.b64decode(data_url.split(',', 1)[1])
+        reference = store.store_image_data_url(data_url)
+
+        chunks, size, content_type = store.open_image_stream(reference)
+        streamed = b''.join(chunks)
+        if streamed != image_bytes or size != len(image_bytes) or content_type != 'image/png':
+            print("❌ Streamed image does not match the original")
+            return False
+
+        chunks, size, content_type = store.open_image_stream(reference, thumbnail=True)
+        thumbnail = Image.open(BytesIO(b''.join(chunks)))
+        if content_type != 'image/png' or max(thumbnail.size) > max(store.THUMBNAIL_MAX_SIZE) or thumbnail.size[0] <= thumbnail.size[1]:
+            print(f"❌ Unexpected thumbnail: {thumbnail.size} {content_type}")
+            return False
+
+        if store.get_image_url("conv_image_1_2", thumbnail=True) != "/api/image/conv_image_1_2?size=thumbnail":
+            print("❌ Unexpected thumbnail URL")
+            return False
+
+        print("✅ Images and thumbnails are streamed from storage")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_fallback_without_backend():
+    """Without a storage backend, or for non-data URLs, callers keep the Cosmos path."""
+    print("🔍 Testing fallback when no image storage is configured...")
+
+    try:
+        import functions_image_store as store
+        store.CLIENTS.pop("storage_account_office_docs_client", None)
+
+        if store.get_image_storage_backend() is not None:
+            print("❌ A backend was reported without a storage client")
+            return False
+        if store.store_image_data_url(make_png_data_url()) is not None:
+            print("❌ Image was stored without a backend")
+            return False
+
+        store, service = setup_blob_store()
+        if store.store_image_data_url("https://example.com/image.png") is not None or service.uploads:
+            print("❌ Remote image URL should not be stored")
+            return False
+        if store.parse_image_data_url("data:image/png;base64,not base64!") != (None, None):
+            print("❌ Invalid base64 was accepted")
+            return False
+
+        print("✅ Callers fall back to Cosmos when images can't be stored")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_store_image_with_thumbnail,
+        test_stream_image_and_thumbnail,
+        test_fallback_without_backend,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Functional test for bulk chunk ACL propagation.
+Version: 0.237.007
+Implemented in: 0.237.007
+
+This test ensures that sharing ACL changes are applied to search chunks with
+merge actions in batches of at most 1000, that only the ACL field is sent (no
+embeddings or chunk text), and that a propagation job converges on the latest
+ACL when the document is shared again while the job is running.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class _Result:
+    def __init__(self, key, succeeded):
+        self.key = key
+        self.succeeded = succeeded
+        self.status_code = 200 if succeeded else 400
+        self.error_message = None if succeeded else "Document not found."
+
+
+class FakeSearchClient:
+    """Minimal stand-in for an Azure SearchClient holding one document's chunks."""
+
+    def __init__(self, chunk_count, failing_ids=()):
+        self.chunk_ids = [f"doc-1_{n}" for n in range(chunk_count)]
+        self.failing_ids = set(failing_ids)
+        self.batches = []
+        self.on_batch = None
+
+    def search(self, search_text, filter, select, top):
+        return [{"id": chunk_id} for chunk_id in self.chunk_ids[:top]]
+
+    def index_documents(self, batch):
+        assert all(action.action_type == "merge" for action in batch.actions)
+        actions = [dict(action.additional_properties) for action in batch.actions]
+        self.batches.append(actions)
+        if self.on_batch:
+            self.on_batch()
+        return [_Result(action["id"], action["id"] not in self.failing_ids) for action in actions]
+
+
+class FakeDocumentContainer:
+    """Minimal stand-in for a Cosmos documents container supporting read/patch."""
+
+    def __init__(self, document):
+        self.document = document
+        self.patches = []
+
+    def read_item(self, item, partition_key):
+        return dict(self.document)
+
+    def patch_item(self, item, partition_key, patch_operations):
+        for operation in patch_operations:
+            self.document[operation["path"].lstrip("/")] = operation["value"]
+        self.patches.append(patch_operations)
+
+
+def test_merge_batches_only_send_acl_fields():
+    """2,500 chunks are merged in three batches carrying only id + ACL field."""
+    print("🔍 Testing batched merge actions for chunk ACLs...")
+
+    try:
+        from functions_chunk_acl import list_chunk_ids, merge_fields_into_chunks
+
+        client = FakeSearchClient(2500, failing_ids={"doc-1_7"})
+        progress = []
+        chunk_ids = list_chunk_ids(client, "doc-1")
+        result = merge_fields_into_chunks(
+            client,
+            chunk_ids,
+            {"shared_user_ids": ["u2,approved"]},
+            progress_callback=lambda processed, total: progress.append((processed, total))
+        )
+
+        assert [len(batch) for batch in client.batches] == [1000, 1000, 500], [len(b) for b in client.batches]
+        assert all(set(action) == {"id", "shared_user_ids"} for batch in client.batches for action in batch)
+        assert result == {"total": 2500, "succeeded": 2499, "failed": 1}, result
+        assert progress == [(1000, 2500), (2000, 2500), (2500, 2500)], progress
+
+        from azure.core.exceptions import HttpResponseError
+
+        def throttled(batch):
+            raise HttpResponseError(message="Service unavailable")
+
+        client.index_documents = throttled
+        result = merge_fields_into_chunks(client, chunk_ids[:1500], {"shared_user_ids": []})
+        assert result == {"total": 1500, "succeeded": 0, "failed": 1500}, result
+
+        print("✅ Batched merge test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_propagation_converges_on_latest_acl():
+    """A share made while the job runs is picked up before the job completes."""
+    print("🔍 Testing ACL propagation convergence and progress state...")
+
+    try:
+        import functions_chunk_acl
+
+        client = FakeSearchClient(1200)
+        container = FakeDocumentContainer({"id": "doc-1", "shared_user_ids": ["u2,not_approved"]})
+        functions_chunk_acl._get_scope = lambda group_id=None, public_workspace_id=None: (client, container, "shared_user_ids")
+
+        def share_again():
+            # Simulate a concurrent approval landing during the first pass
+            container.document["shared_user_ids"] = ["u2,approved"]
+            client.on_batch = None
+
+        client.on_batch = share_again
+        state = functions_chunk_acl.propagate_chunk_acl("doc-1", job_id="job-1")
+
+        assert state["status"] == "completed", state
+        assert state["processed"] == state["total"] == 1200, state
+        assert client.batches[-1][0]["shared_user_ids"] == ["u2,approved"]
+        assert len(client.batches) == 4, len(client.batches)
+        assert container.document["acl_sync"]["status"] == "completed"
+        assert functions_chunk_acl.get_chunk_acl_sync_status({})["status"] == "idle"
+
+        container.document["acl_sync"] = {"job_id": "job-2", "status": "queued"}
+        assert functions_chunk_acl.propagate_chunk_acl("doc-1", job_id="job-1")["status"] == "superseded"
+
+        print("✅ Propagation convergence test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_merge_batches_only_send_acl_fields, test_propagation_converges_on_latest_acl]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Functional test for content-hash deduplication of uploads and chunk embeddings.
+Version: 0.237.009
+Implemented in: 0.237.009
+
+This test ensures that identical chunk text is embedded only once per embedding
+deployment, that identical files reuse cached Document Intelligence output, and
+that the per-document dedup counters report what was reused.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeCacheContainer:
+    """Minimal stand-in for the Cosmos content_hash_cache container."""
+
+    def __init__(self):
+        self.items = {}
+
+    def read_item(self, item, partition_key):
+        from functions_content_hash import CosmosResourceNotFoundError
+        stored = self.items.get((partition_key, item))
+        if stored is None:
+            raise CosmosResourceNotFoundError("not found")
+        return dict(stored)
+
+    def upsert_item(self, body):
+        self.items[(body["content_hash"], body["id"])] = dict(body)
+
+    def query_items(self, query, parameters, partition_key):
+        manifest_id = parameters[0]["value"]
+        return [dict(item) for (pk, _), item in self.items.items()
+                if pk == partition_key and item.get("manifest_id") == manifest_id]
+
+
+SETTINGS = {"enable_content_hash_dedup": True, "embedding_model": {"selected": [{"deploymentName": "embed-a"}]}}
+
+
+def test_chunk_embeddings_are_reused():
+    """Same text + same deployment hits the cache; a different deployment does not."""
+    print("🔍 Testing chunk embedding reuse by content hash...")
+
+    try:
+        import functions_content_hash as dedup
+
+        calls = []
+
+        def fake_embedding(text):
+            calls.append(text)
+            return [float(len(text))], {"prompt_tokens": 3, "total_tokens": 3, "model_deployment_name": "embed-a"}
+
+        dedup.generate_embedding = fake_embedding
+        container = FakeCacheContainer()
+
+        dedup.begin_content_dedup("doc-v2")
+        first, usage = dedup.get_or_create_embedding("page one", document_id="doc-v2", settings=SETTINGS, container=container)
+        again, cached_usage = dedup.get_or_create_embedding("page one", document_id="doc-v2", settings=SETTINGS, container=container)
+        dedup.get_or_create_embedding("page two", document_id="doc-v2", settings=SETTINGS, container=container)
+        counters = dedup.end_content_dedup("doc-v2")
+
+        assert calls == ["page one", "page two"], calls
+        assert first == again and usage["total_tokens"] == 3
+        assert cached_usage["total_tokens"] == 0 and cached_usage["cached"] is True
+        assert counters == {"chunks_reused": 1, "chunks_embedded": 2, "di_reused": False}, counters
+
+        other_model = dict(SETTINGS, embedding_model={"selected": [{"deploymentName": "embed-b"}]})
+        dedup.get_or_create_embedding("page one", settings=other_model, container=container)
+        assert len(calls) == 3, "A different deployment must not reuse another model's vectors"
+        assert dedup.compute_chunk_hash("x", "embed-a") != dedup.compute_chunk_hash("x", "embed-b")
+
+        print("✅ Embedding reuse test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_document_intelligence_output_is_reused():
+    """A byte-identical file skips Azure DI; a changed file does not."""
+    print("🔍 Testing Document Intelligence reuse by file hash...")
+
+    try:
+        import functions_content_hash as dedup
+
+        calls = []
+
+        def fake_di(path):
+            calls.append(path)
+            return [{"page_number": n, "content": f"page {n}"} for n in range(1, 4)]
+
+        dedup.extract_content_with_azure_di = fake_di
+        container = FakeCacheContainer()
+
+        paths = []
+        for data in (b"%PDF same bytes", b"%PDF same bytes", b"%PDF edited bytes"):
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+                tmp.write(data)
+                paths.append(tmp.name)
+
+        try:
+            original = dedup.extract_content_with_azure_di_cached(paths[0], settings=SETTINGS, container=container)
+            dedup.begin_content_dedup("duplicate")
+            duplicate = dedup.extract_content_with_azure_di_cached(paths[1], document_id="duplicate", settings=SETTINGS, container=container)
+            assert dedup.end_content_dedup("duplicate")["di_reused"] is True
+            dedup.extract_content_with_azure_di_cached(paths[2], settings=SETTINGS, container=container)
+        finally:
+            for path in paths:
+                os.remove(path)
+
+        assert calls == [paths[0], paths[2]], calls
+        assert duplicate == original, duplicate
+
+        print("✅ Document Intelligence reuse test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_chunk_embeddings_are_reused, test_document_intelligence_output_is_reused]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
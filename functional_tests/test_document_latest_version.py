@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Functional test for the maintained latest-version flag on documents.
+Version: 0.237.024
+Implemented in: 0.237.024
+
+This test ensures that a new document version takes the is_latest flag from
+the versions it supersedes (including legacy documents without the flag),
+that deleting the current version hands the flag back to the highest
+remaining version, and that latest-version lookups only consider documents
+in the same workspace.
+"""
+
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeDocumentsContainer:
+    """Evaluates the version queries used by functions_document_versions."""
+
+    def __init__(self, documents):
+        self.items = {doc["id"]: dict(doc) for doc in documents}
+        self.patches = []
+
+    def query_items(self, query, parameters, enable_cross_partition_query=False):
+        from functions_document_versions import LATEST_VERSION_CONDITION
+        params = {p["name"]: p["value"] for p in parameters}
+        scope_field = re.search(r"c\.(\w+) = @scope_value", query).group(1)
+        docs = [
+            doc for doc in self.items.values()
+            if doc["file_name"] == params["@file_name"] and doc.get(scope_field) == params["@scope_value"]
+        ]
+        if LATEST_VERSION_CONDITION in query:
+            docs = [doc for doc in docs if doc.get("is_latest", True) is True]
+        for name in ("@exclude_id", "@deleted_id"):
+            if name in params:
+                docs = [doc for doc in docs if doc["id"] != params[name]]
+        docs.sort(key=lambda doc: doc["version"], reverse=True)
+        if "TOP 1" in query:
+            docs = docs[:1]
+        return [dict(doc) for doc in docs]
+
+    def patch_item(self, item, partition_key, patch_operations):
+        for operation in patch_operations:
+            self.items[item][operation["path"].lstrip("/")] = operation["value"]
+        self.patches.append(item)
+        return dict(self.items[item])
+
+
+def doc(doc_id, version, is_latest=None, user_id="user-1", file_name="report.pdf"):
+    document = {"id": doc_id, "file_name": file_name, "version": version, "user_id": user_id}
+    if is_latest is not None:
+        document["is_latest"] = is_latest
+    return document
+
+
+def test_new_version_supersedes_previous():
+    """Creating a version clears the flag on older versions of the same file only."""
+    print("🔍 Testing supersede...")
+
+    try:
+        import functions_document_versions as versions
+        container = FakeDocumentsContainer([
+            doc("legacy-1", 1),
+            doc("legacy-2", 2),
+            doc("other-user", 7, True, user_id="user-2"),
+            doc("other-file", 1, True, file_name="notes.txt"),
+        ])
+
+        scope_field, scope_value = versions.get_version_scope(user_id="user-1")
+        latest = versions.get_latest_document(container, "report.pdf", scope_field, scope_value)
+        if latest["id"] != "legacy-2":
+            print(f"❌ Unexpected latest legacy document: {latest}")
+            return False
+
+        new_doc = doc("v3", latest["version"] + 1, True)
+        container.items["v3"] = dict(new_doc)
+        superseded = versions.supersede_previous_versions(container, new_doc, scope_field)
+
+        if sorted(d["id"] for d in superseded) != ["legacy-1", "legacy-2"]:
+            print(f"❌ Unexpected superseded documents: {superseded}")
+            return False
+        if {"other-user", "other-file"} & set(container.patches):
+            print("❌ Versions of other files or workspaces must not change")
+            return False
+        if versions.get_latest_document(container, "report.pdf", scope_field, scope_value)["id"] != "v3":
+            print("❌ The new version should be the latest")
+            return False
+
+        print("✅ New versions supersede previous ones")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_deleting_latest_promotes_previous():
+    """Deleting the current version promotes the highest remaining version."""
+    print("🔍 Testing promote...")
+
+    try:
+        import functions_document_versions as versions
+        container = FakeDocumentsContainer([doc("v1", 1, False), doc("v2", 2, False), doc("v3", 3, True)])
+
+        deleted = container.items.pop("v3")
+        promoted = versions.promote_previous_version(container, deleted, "user_id")
+        if not promoted or promoted["id"] != "v2" or container.items["v2"]["is_latest"] is not True:
+            print(f"❌ Unexpected promotion: {promoted}")
+            return False
+
+        # Deleting an older version leaves the flag alone
+        deleted = container.items.pop("v1")
+        if versions.promote_previous_version(container, deleted, "user_id") is not None or container.patches != ["v2"]:
+            print("❌ Deleting a superseded version must not move the flag")
+            return False
+
+        # Deleting the last version promotes nothing
+        deleted = container.items.pop("v2")
+        if versions.promote_previous_version(container, deleted, "user_id") is not None:
+            print("❌ Nothing should be promoted when no versions remain")
+            return False
+
+        print("✅ Deleting the latest version promotes the previous one")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_new_version_supersedes_previous,
+        test_deleting_latest_promotes_previous,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
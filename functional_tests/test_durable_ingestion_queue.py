@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Functional test for the durable ingestion job queue.
+Version: 0.237.008
+Implemented in: 0.237.008
+
+This test ensures that ingestion jobs are claimed in priority order, that a
+tenant cannot exceed its concurrent job cap, that a capped tenant's backlog
+larger than the candidate batch does not starve other tenants, that jobs whose
+worker stops heartbeating are recovered and eventually marked failed, and that
+a worker runs handlers and retries failures. It uses the in-memory job store.
+Without the durable queue, tasks submitted with store_future=False can be
+queued again for the same job key.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+def test_priority_order_and_tenant_cap():
+    """Higher priority first; a busy tenant's extra jobs wait behind other tenants."""
+    print("🔍 Testing priority ordering and per-tenant concurrency caps...")
+
+    try:
+        from functions_ingestion_queue import (
+            InMemoryJobStore, IngestionQueue, PRIORITY_HIGH, PRIORITY_LOW, get_tenant_id
+        )
+
+        queue = IngestionQueue(InMemoryJobStore(), max_jobs_per_tenant=2)
+        bulk_tenant = get_tenant_id("u1")
+        for n in range(5):
+            queue.enqueue("document_upload", bulk_tenant, {"document_id": f"bulk-{n}"})
+        queue.enqueue("metadata_extraction", get_tenant_id("u2"), {"document_id": "meta"}, priority=PRIORITY_LOW)
+        queue.enqueue("document_upload", get_tenant_id("u3", group_id="g1"), {"document_id": "urgent"}, priority=PRIORITY_HIGH)
+
+        claimed = [queue.claim(f"w{n}") for n in range(5)]
+        order = [job["payload"]["document_id"] if job else None for job in claimed]
+        assert order == ["urgent", "bulk-0", "bulk-1", "meta", None], order
+        assert queue.get_stats()["running_by_tenant"][bulk_tenant] == 2
+
+        assert queue.complete(claimed[1])
+        assert queue.claim("w5")["payload"]["document_id"] == "bulk-2"
+        assert not queue.complete(claimed[1]), "Completing twice should be rejected"
+
+        print("✅ Priority and tenant cap test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_capped_tenant_backlog_does_not_starve_others():
+    """A capped tenant with more queued jobs than the candidate batch doesn't block other tenants."""
+    print("🔍 Testing fairness with a large capped backlog...")
+
+    try:
+        from functions_ingestion_queue import InMemoryJobStore, IngestionQueue, get_tenant_id
+
+        queue = IngestionQueue(InMemoryJobStore(), max_jobs_per_tenant=5, candidate_batch_size=50)
+        for n in range(500):
+            queue.enqueue("document_upload", get_tenant_id("A"), {"document_id": f"a-{n}"})
+        queue.enqueue("document_upload", get_tenant_id("B"), {"document_id": "b-0"})
+
+        claimed = [queue.claim(f"w{n}") for n in range(10)]
+        tenants = [job["tenant_id"] if job else None for job in claimed]
+        assert tenants == ["user:A"] * 5 + ["user:B"] + [None] * 4, tenants
+
+        print("✅ Capped backlog test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_expired_leases_are_recovered():
+    """A job whose worker died is re-queued, then failed after max attempts."""
+    print("🔍 Testing lease expiry recovery...")
+
+    try:
+        from functions_ingestion_queue import InMemoryJobStore, IngestionQueue, JOB_STATUS_FAILED
+
+        queue = IngestionQueue(InMemoryJobStore(), lease_seconds=0.05, max_attempts=2)
+        queue.enqueue("document_upload", "user:u1", {"document_id": "d1"})
+
+        first = queue.claim("crashed-worker")
+        assert queue.heartbeat(first) is not None
+        time.sleep(0.1)
+        assert queue.recover_expired_leases() == []
+
+        second = queue.claim("other-worker")
+        assert second["id"] == first["id"] and second["attempts"] == 2, second
+        time.sleep(0.1)
+        exhausted = queue.recover_expired_leases()
+        assert len(exhausted) == 1 and exhausted[0]["status"] == JOB_STATUS_FAILED, exhausted
+        assert queue.heartbeat(second) is None, "Stale worker must lose its lease"
+        assert queue.claim("w") is None
+
+        print("✅ Lease recovery test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_worker_runs_and_retries_jobs():
+    """The worker invokes handlers with the payload and retries failures until exhausted."""
+    print("🔍 Testing ingestion worker execution and retries...")
+
+    try:
+        import functions_ingestion_queue
+        from functions_ingestion_queue import InMemoryJobStore, IngestionQueue, IngestionWorker
+
+        calls = []
+        failed_jobs = []
+
+        def ok_handler(**kwargs):
+            calls.append(kwargs)
+
+        def bad_handler(**kwargs):
+            raise RuntimeError("extraction service down")
+
+        test_module = type(sys)("ingestion_test_handlers")
+        test_module.ok_handler = ok_handler
+        test_module.bad_handler = bad_handler
+        sys.modules["ingestion_test_handlers"] = test_module
+        handlers = {
+            "ok": ("ingestion_test_handlers", "ok_handler"),
+            "bad": ("ingestion_test_handlers", "bad_handler"),
+        }
+
+        functions_ingestion_queue.RETRY_BACKOFF_SECONDS = 0
+        queue = IngestionQueue(InMemoryJobStore(), max_attempts=2)
+        worker = IngestionWorker(queue, handlers=handlers, on_job_failed=failed_jobs.append)
+        queue.enqueue("ok", "user:u1", {"document_id": "d1", "user_id": "u1"})
+        queue.enqueue("bad", "user:u1", {"document_id": "d2", "user_id": "u1"})
+
+        while worker.run_once():
+            pass
+
+        assert calls == [{"document_id": "d1", "user_id": "u1"}], calls
+        assert len(failed_jobs) == 1 and failed_jobs[0]["attempts"] == 2, failed_jobs
+        assert "extraction service down" in failed_jobs[0]["last_error"]
+        assert queue.get_stats()["queued"] == 0
+
+        print("✅ Worker execution test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_non_durable_submission_keys():
+    """Without the durable queue, repeatable tasks are submitted without a stored future key."""
+    print("🔍 Testing flask_executor submission...")
+
+    try:
+        import functions_ingestion_queue
+
+        class FakeExecutor:
+            def __init__(self):
+                self.stored = {}
+                self.submitted = []
+
+            def submit(self, fn, **kwargs):
+                self.submitted.append(kwargs)
+
+            def submit_stored(self, future_key, fn, **kwargs):
+                # flask_executor rejects a key that is already stored
+                if future_key in self.stored:
+                    raise ValueError("future_key already exists")
+                self.stored[future_key] = kwargs
+
+        class FakeApp:
+            extensions = {"executor": FakeExecutor()}
+
+        executor = FakeApp.extensions["executor"]
+        functions_ingestion_queue.current_app = FakeApp
+        functions_ingestion_queue.is_durable_ingestion_enabled = lambda settings=None: False
+        functions_ingestion_queue.resolve_ingestion_handler = lambda job_type: (lambda **kwargs: None)
+
+        for _ in range(2):
+            functions_ingestion_queue.submit_ingestion_task(
+                "metadata_extraction", "doc-1_public_metadata", user_id="u1",
+                public_workspace_id="ws-1", document_id="doc-1", store_future=False
+            )
+        assert executor.stored == {} and len(executor.submitted) == 2, executor.submitted
+        assert executor.submitted[0] == {"document_id": "doc-1", "user_id": "u1", "public_workspace_id": "ws-1"}
+
+        functions_ingestion_queue.submit_ingestion_task("document_upload", "doc-2", user_id="u1", document_id="doc-2")
+        assert list(executor.stored) == ["doc-2"]
+
+        print("✅ Non-durable submission test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_priority_order_and_tenant_cap, test_capped_tenant_backlog_does_not_starve_others, test_expired_leases_are_recovered, test_worker_runs_and_retries_jobs, test_non_durable_submission_keys]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Functional test for relevance-ranked, budgeted fact memory retrieval.
+Version: 0.237.029
+Implemented in: 0.237.029
+
+This test ensures that facts are embedded when written and stored as compact
+base64 float32 vectors, that only the top-k facts most relevant to the user's
+message are injected within the token budget, that scope indexes are cached
+in process and reloaded when facts change, that facts written without an
+embedding are backfilled in one batched request (and not at all without an
+embedding deployment), and that the message is embedded without the bulk
+ingestion pacing delay.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+# Toy embedding space: one dimension per topic keyword
+TOPICS = ["coffee", "python", "travel", "music"]
+SETTINGS = {"embedding_model": {"selected": [{"deploymentName": "text-embedding-3-small"}]}}
+
+
+def fake_embedding(text):
+    text = text.lower()
+    vector = [float(text.count(topic)) for topic in TOPICS]
+    if not any(vector):
+        vector = [0.1] * len(TOPICS)
+    return vector, {"prompt_tokens": 1, "total_tokens": 1}
+
+
+class FakeFactsContainer:
+    """Dict-backed agent_facts container supporting the calls used by FactMemoryStore."""
+
+    def __init__(self):
+        self.items = {}
+        self.ts = 0
+        self.fact_queries = 0
+
+    def _touch(self, item):
+        self.ts += 1
+        item["_ts"] = self.ts
+
+    def upsert_item(self, item):
+        item = dict(item)
+        self._touch(item)
+        self.items[item["id"]] = item
+
+    def patch_item(self, item, partition_key, patch_operations):
+        doc = self.items[item]
+        for op in patch_operations:
+            doc[op["path"].lstrip("/")] = op["value"]
+        self._touch(doc)
+
+    def delete_item(self, item, partition_key):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        if item not in self.items:
+            raise CosmosResourceNotFoundError()
+        del self.items[item]
+
+    def query_items(self, query, parameters, partition_key):
+        values = {p["name"]: p["value"] for p in parameters}
+        docs = [doc for doc in self.items.values()
+                if doc["scope_id"] == values["@scope_id"] and doc["scope_type"] == values["@scope_type"]]
+        if "COUNT(1)" in query:
+            return [{"count": len(docs), "ts": max((doc["_ts"] for doc in docs), default=None)}]
+        self.fact_queries += 1
+        return [dict(doc) for doc in docs]
+
+
+def setup_store():
+    import functions_fact_retrieval as retrieval
+    from semantic_kernel_fact_memory_store import FactMemoryStore
+
+    embedded = []
+
+    def counting_embedding(text, pace_requests=True, **kwargs):
+        if pace_requests:
+            raise AssertionError("Facts and messages must be embedded without the pacing delay")
+        embedded.append(text)
+        return fake_embedding(text)
+
+    def counting_embeddings(texts, **kwargs):
+        embedded.append(list(texts))
+        return [fake_embedding(text)[0] for text in texts], None
+
+    retrieval.generate_embedding = counting_embedding
+    retrieval.generate_embeddings = counting_embeddings
+    retrieval.get_settings = lambda: SETTINGS
+    retrieval._scope_indexes.clear()
+    retrieval._backfill_failures.clear()
+    return retrieval, FactMemoryStore(container=FakeFactsContainer()), embedded
+
+
+def test_top_k_relevant_facts_within_budget():
+    """Only the most relevant facts are injected, capped by count and token budget."""
+    print("🔍 Testing relevance ranking...")
+
+    try:
+        retrieval, store, embedded = setup_store()
+        values = [
+            "Prefers oat milk in coffee",
+            "Writes python for data pipelines",
+            "Travel: flies out of Seattle",
+            "Listens to jazz music while working",
+            "Uses python 3.12 and poetry",
+            "Drinks decaf coffee after 3pm",
+        ]
+        for value in values:
+            fact = store.set_fact("user", "user-1", value, conversation_id="conv-1", agent_id="agent-1")
+            if "embedding" in fact:
+                print("❌ Embeddings must not be returned to callers")
+                return False
+
+        stored = next(iter(store.container.items.values()))
+        vector = retrieval.decode_embedding(stored["embedding"])
+        if len(embedded) != 6 or vector.dtype.name != "float32" or vector.shape != (4,):
+            print(f"❌ Facts not embedded on write: {len(embedded)} / {vector}")
+            return False
+        if any("embedding" in fact for fact in store.get_facts("user", "user-1")):
+            print("❌ get_facts must strip embeddings by default")
+            return False
+
+        facts = retrieval.select_facts_for_context(store, "user", "user-1", "Any python tips?", top_k=2, token_budget=500, settings=SETTINGS)
+        if [fact["value"] for fact in facts] != ["Writes python for data pipelines", "Uses python 3.12 and poetry"]:
+            print(f"❌ Unexpected ranking: {[fact['value'] for fact in facts]}")
+            return False
+
+        budget = retrieval.estimate_fact_tokens("Prefers oat milk in coffee")
+        facts = retrieval.select_facts_for_context(store, "user", "user-1", "coffee order", top_k=5, token_budget=budget, settings=SETTINGS)
+        if [fact["value"] for fact in facts] != ["Prefers oat milk in coffee"]:
+            print(f"❌ Token budget not applied: {[fact['value'] for fact in facts]}")
+            return False
+
+        embedded.clear()
+        facts = retrieval.select_facts_for_context(store, "user", "user-1", "hello", top_k=10, token_budget=1000, settings=SETTINGS)
+        if len(facts) != 6 or embedded:
+            print("❌ Scopes that fit the budget should be injected without embedding the message")
+            return False
+
+        print("✅ Top-k relevant facts are injected within the budget")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_scope_index_cache_and_backfill():
+    """Scope indexes are reused until facts change; legacy facts are embedded on load."""
+    print("🔍 Testing scope cache and backfill...")
+
+    try:
+        retrieval, store, embedded = setup_store()
+        container = store.container
+        container.upsert_item({"id": "legacy", "scope_type": "user", "scope_id": "user-2", "value": "Loves travel to Japan", "created_at": "2024-01-01"})
+        container.upsert_item({"id": "legacy-2", "scope_type": "user", "scope_id": "user-2", "value": "Drinks coffee black", "created_at": "2024-01-02"})
+        store.set_fact("user", "user-2", "Plays music on weekends")
+
+        # No embedding deployment configured: nothing is backfilled
+        embedded.clear()
+        index = retrieval.get_scope_fact_index(store, "user", "user-2", settings={"embedding_model": {"selected": []}})
+        if embedded or container.items["legacy"].get("embedding"):
+            print(f"❌ Backfill attempted without an embedding deployment: {embedded}")
+            return False
+
+        retrieval._scope_indexes.clear()
+        index = retrieval.get_scope_fact_index(store, "user", "user-2", settings=SETTINGS)
+        if not container.items["legacy"].get("embedding") or index.matrix.shape != (3, 4):
+            print("❌ Legacy fact was not backfilled")
+            return False
+        if embedded != [["Loves travel to Japan", "Drinks coffee black"]]:
+            print(f"❌ Legacy facts should be embedded in one batched request: {embedded}")
+            return False
+
+        queries = container.fact_queries
+        retrieval.get_scope_fact_index(store, "user", "user-2", settings=SETTINGS)
+        if container.fact_queries != queries:
+            print("❌ Unchanged scope should be served from the in-process cache")
+            return False
+
+        # A fact written by another worker changes the scope fingerprint
+        container.upsert_item({"id": "other-worker", "scope_type": "user", "scope_id": "user-2", "value": "Enjoys coffee", "created_at": "9999-01-01"})
+        index = retrieval.get_scope_fact_index(store, "user", "user-2", settings=SETTINGS)
+        if len(index.facts) != 4 or container.fact_queries != queries + 1:
+            print("❌ Scope not reloaded after a fact was added elsewhere")
+            return False
+
+        store.delete_fact("user-2", "legacy")
+        index = retrieval.get_scope_fact_index(store, "user", "user-2", settings=SETTINGS)
+        if [fact["id"] for fact in index.facts if fact["id"] == "legacy"]:
+            print("❌ Deleted fact still cached")
+            return False
+
+        def failing_embedding(text, **kwargs):
+            raise RuntimeError("embedding unavailable")
+
+        retrieval.generate_embedding = failing_embedding
+        facts = retrieval.select_facts_for_context(store, "user", "user-2", "coffee", top_k=1, token_budget=100, settings=SETTINGS)
+        if [fact["id"] for fact in facts] != ["other-worker"]:
+            print(f"❌ Newest facts expected when the message can't be embedded: {facts}")
+            return False
+
+        # A failed backfill is not retried on every reload of the scope
+        batches = []
+
+        def failing_embeddings(texts, **kwargs):
+            batches.append(list(texts))
+            raise RuntimeError("embedding unavailable")
+
+        retrieval.generate_embeddings = failing_embeddings
+        for value in ("Likes travel by train", "Hums music"):
+            container.upsert_item({"id": value, "scope_type": "user", "scope_id": "user-3", "value": value, "created_at": "2024-01-01"})
+            retrieval.get_scope_fact_index(store, "user", "user-3", settings=SETTINGS)
+        if len(batches) != 1:
+            print(f"❌ Failed backfill retried before the retry interval: {batches}")
+            return False
+
+        print("✅ Scope indexes are cached, refreshed and backfilled")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_top_k_relevant_facts_within_budget,
+        test_scope_index_cache_and_backfill,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Functional test for the batched file processing log sink.
+Version: 0.237.006
+Implemented in: 0.237.006
+
+This test ensures that file processing log entries are written asynchronously in
+per-document transactional batches, that the bounded queue drops (and counts)
+entries instead of blocking ingestion, that failed batches fall back to
+individual writes, and that sampling never skips status updates or errors and
+is reported with the sink counters.
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class RecordingContainer:
+    """Minimal stand-in for a Cosmos ContainerProxy that records writes."""
+
+    def __init__(self, fail_batches=False, block_event=None):
+        self.created = []
+        self.batches = []
+        self.fail_batches = fail_batches
+        self.block_event = block_event
+
+    def create_item(self, item):
+        if self.block_event:
+            self.block_event.wait()
+        self.created.append(item)
+
+    def execute_item_batch(self, batch_operations, partition_key):
+        if self.block_event:
+            self.block_event.wait()
+        if self.fail_batches:
+            raise RuntimeError("batch rejected")
+        self.batches.append((partition_key, [op[1][0] for op in batch_operations]))
+
+
+def _item(document_id, n):
+    return {"id": f"{document_id}-{n}", "document_id": document_id, "user_id": "u", "log": f"entry {n}"}
+
+
+def test_batches_grouped_by_document():
+    """Entries are written in batches of at most 100 per partition key."""
+    print("🔍 Testing batched writes grouped by document_id...")
+
+    try:
+        from functions_logging import FileProcessingLogSink
+
+        container = RecordingContainer()
+        sink = FileProcessingLogSink(container, max_queue_size=1000, flush_interval_seconds=0.05)
+        for n in range(250):
+            sink.enqueue(_item("doc-a", n))
+        for n in range(3):
+            sink.enqueue(_item("doc-b", n))
+
+        assert sink.flush(timeout=5), "Sink did not flush in time"
+        stats = sink.get_stats()
+        assert stats["written"] == 253, stats
+        assert stats["dropped"] == 0, stats
+        assert all(len(items) <= 100 for _, items in container.batches)
+        assert all(all(i["document_id"] == pk for i in items) for pk, items in container.batches)
+        sink.stop()
+
+        print("✅ Batched write test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_bounded_queue_drops_and_fallback():
+    """A full queue drops entries; a rejected batch is retried item by item."""
+    print("🔍 Testing bounded queue drop counter and batch fallback...")
+
+    try:
+        from functions_logging import FileProcessingLogSink
+
+        release = threading.Event()
+        blocked = RecordingContainer(block_event=release)
+        sink = FileProcessingLogSink(blocked, max_queue_size=5, flush_interval_seconds=0.05)
+        accepted = sum(1 for n in range(50) if sink.enqueue(_item("doc-c", n)))
+        release.set()
+        sink.flush(timeout=5)
+        stats = sink.get_stats()
+        assert stats["dropped"] == 50 - accepted and stats["dropped"] > 0, stats
+        assert stats["written"] == accepted, stats
+        sink.stop()
+
+        failing = RecordingContainer(fail_batches=True)
+        sink = FileProcessingLogSink(failing, flush_interval_seconds=0.05)
+        for n in range(10):
+            sink.enqueue(_item("doc-d", n))
+        sink.flush(timeout=5)
+        assert len(failing.created) == 10, len(failing.created)
+        assert sink.get_stats()["written"] == 10
+        sink.stop()
+
+        print("✅ Drop counter and fallback test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_status_and_errors_are_never_sampled():
+    """Sampled call sites still log status updates and errors; skipped entries are counted."""
+    print("🔍 Testing sampling exemptions and stats...")
+
+    try:
+        import time
+        import functions_logging as logging_module
+
+        container = RecordingContainer()
+        logging_module._file_processing_log_sink = logging_module.FileProcessingLogSink(container, flush_interval_seconds=0.05)
+        logging_module._file_processing_log_settings.update({
+            "loaded_at": time.time() + 3600,
+            "values": {"enabled": True, "max_content_chars": 2000, "sample_rate": 0.0, "max_queue_size": 100}
+        })
+        logging_module._sampled_out["count"] = 0
+
+        for content in ("Status: Processing 3 of 10 chunks", "Error saving chunk 4: timeout",
+                        "Failed to extract metadata", "Saving chunk, page_number:5"):
+            logging_module.add_file_task_to_file_processing_log("doc-e", "u", content, sampled=True)
+        logging_module._file_processing_log_sink.flush(timeout=5)
+
+        written = [item["log"] for item in container.created] + [item["log"] for _, items in container.batches for item in items]
+        assert sorted(written) == sorted(["Status: Processing 3 of 10 chunks", "Error saving chunk 4: timeout",
+                                          "Failed to extract metadata"]), written
+        stats = logging_module.get_file_processing_log_stats()
+        assert stats["sampled_out"] == 1 and stats["written"] == 3 and stats["dropped"] == 0, stats
+        logging_module._file_processing_log_sink.stop()
+
+        print("✅ Sampling exemption test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_batches_grouped_by_document, test_bounded_queue_drops_and_fallback, test_status_and_errors_are_never_sampled]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
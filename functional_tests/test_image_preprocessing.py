@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Functional test for image pre-processing before vision analysis and DI.
+Version: 0.237.026
+Implemented in: 0.237.026
+
+This test ensures that large images are downsampled to the configured maximum
+dimension, re-encoded as JPEG (or PNG when transparent) without EXIF metadata,
+that EXIF orientation is applied first, and that images which can't be
+improved, multi-page TIFFs and disabled pre-processing fall back to the
+original file.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+from io import BytesIO
+from PIL import Image
+
+
+def make_photo(width, height, exif_orientation=None):
+    """Returns a noisy photo as PNG bytes, or as JPEG bytes with EXIF when an orientation is given."""
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    output = BytesIO()
+    if exif_orientation:
+        exif = Image.Exif()
+        exif[0x0112] = exif_orientation
+        exif[0x010F] = "Phone Maker"
+        image.save(output, format='JPEG', quality=100, exif=exif.tobytes())
+    else:
+        image.save(output, format='PNG')
+    return output.getvalue()
+
+
+def write_temp(data, suffix):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        tmp_file.write(data)
+    return tmp_file.name
+
+
+def test_large_images_are_downsampled_and_stripped():
+    """Vision and DI copies are limited to their own maximum dimensions and carry no EXIF."""
+    print("🔍 Testing downsampling and metadata stripping...")
+
+    paths = []
+    try:
+        import functions_image_preprocessing as preprocessing
+
+        settings = {
+            'enable_image_preprocessing': True,
+            'image_preprocessing_vision_max_dimension': 512,
+            'image_preprocessing_di_max_dimension': 1024,
+            'image_preprocessing_jpeg_quality': 80,
+        }
+        # 6 = rotated 90 degrees: the stored 1600x1200 image is displayed as 1200x1600
+        original = make_photo(1600, 1200, exif_orientation=6)
+        path = write_temp(original, '.jpg')
+        paths.append(path)
+
+        vision_bytes, mime_type = preprocessing.prepare_image_for_vision(path, settings)
+        with Image.open(BytesIO(vision_bytes)) as image:
+            if mime_type != 'image/jpeg' or image.size != (384, 512):
+                print(f"❌ Unexpected vision image: {mime_type} {image.size}")
+                return False
+            if dict(image.getexif()):
+                print(f"❌ EXIF metadata was not stripped: {dict(image.getexif())}")
+                return False
+        if len(vision_bytes) >= len(original):
+            print("❌ Vision image was not reduced")
+            return False
+
+        di_path = preprocessing.prepare_image_file_for_di(path, settings)
+        paths.append(di_path)
+        with Image.open(di_path) as image:
+            if image.size != (768, 1024):
+                print(f"❌ Unexpected DI image size: {image.size}")
+                return False
+        with open(path, 'rb') as original_file:
+            if original_file.read() != original:
+                print("❌ The original image must be left untouched")
+                return False
+
+        transparent = Image.new('RGBA', (3000, 1000), (255, 0, 0, 0))
+        output = BytesIO()
+        transparent.save(output, format='PNG')
+        processed, mime_type = preprocessing.preprocess_image_bytes(output.getvalue(), 512, 80) or (None, None)
+        if mime_type != 'image/png':
+            print(f"❌ Transparent images should stay PNG: {mime_type}")
+            return False
+
+        print("✅ Images are downsampled, re-encoded and stripped")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def test_originals_are_used_when_preprocessing_does_not_apply():
+    """Disabled settings, small images, multi-page TIFFs and undecodable files keep the original."""
+    print("🔍 Testing pass-through cases...")
+
+    paths = []
+    try:
+        import functions_image_preprocessing as preprocessing
+
+        enabled = {'enable_image_preprocessing': True}
+
+        small = Image.effect_noise((64, 64), 64).convert('RGB')
+        output = BytesIO()
+        small.save(output, format='JPEG', quality=30)
+        small_path = write_temp(output.getvalue(), '.jpg')
+        paths.append(small_path)
+        if preprocessing.prepare_image_file_for_di(small_path, enabled) is not None:
+            print("❌ A copy that isn't smaller should not be sent")
+            return False
+
+        large_path = write_temp(make_photo(3000, 2000), '.png')
+        paths.append(large_path)
+        if preprocessing.prepare_image_file_for_di(large_path, {'enable_image_preprocessing': False}) is not None:
+            print("❌ Disabled pre-processing must send the original")
+            return False
+        vision_bytes, mime_type = preprocessing.prepare_image_for_vision(large_path, {})
+        if mime_type != 'image/png' or len(vision_bytes) != os.path.getsize(large_path):
+            print(f"❌ Disabled pre-processing must send the original to vision: {mime_type}")
+            return False
+
+        pages = [Image.effect_noise((2000, 2000), 64).convert('L') for _ in range(2)]
+        output = BytesIO()
+        pages[0].save(output, format='TIFF', save_all=True, append_images=pages[1:])
+        tiff_path = write_temp(output.getvalue(), '.tiff')
+        paths.append(tiff_path)
+        if preprocessing.prepare_image_file_for_di(tiff_path, enabled) is not None:
+            print("❌ Multi-page TIFFs must keep every page")
+            return False
+
+        broken_path = write_temp(b"not an image", '.jpg')
+        paths.append(broken_path)
+        vision_bytes, _ = preprocessing.prepare_image_for_vision(broken_path, enabled)
+        if vision_bytes != b"not an image" or preprocessing.prepare_image_file_for_di(broken_path, enabled) is not None:
+            print("❌ Undecodable images must fall back to the original")
+            return False
+
+        limits = preprocessing.get_image_preprocessing_limits({'image_preprocessing_di_max_dimension': 'x', 'image_preprocessing_jpeg_quality': 500}, 'di')
+        if limits != (4096, 95):
+            print(f"❌ Invalid settings not clamped: {limits}")
+            return False
+
+        print("✅ Originals are used when pre-processing doesn't apply")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    tests = [
+        test_large_images_are_downsampled_and_stripped,
+        test_originals_are_used_when_preprocessing_does_not_apply,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
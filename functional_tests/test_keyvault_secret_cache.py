@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Functional test for the Key Vault secret cache and shared credential.
+Version: 0.237.017
+Implemented in: 0.237.017
+
+This test ensures that Key Vault secret reads share one credential and
+SecretClient, that resolved secrets are served from the TTL cache, that storing
+or deleting a secret invalidates its cached value, and that all secrets
+referenced by an agent or plugin manifest can be prefetched in one batch.
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeSecret:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeSecretClient:
+    instances = 0
+    reads = []
+    store = {}
+    lock = threading.Lock()
+
+    def __init__(self, vault_url=None, credential=None):
+        FakeSecretClient.instances += 1
+
+    def get_secret(self, name):
+        with FakeSecretClient.lock:
+            FakeSecretClient.reads.append(name)
+        return FakeSecret(FakeSecretClient.store[name])
+
+    def set_secret(self, name, value):
+        FakeSecretClient.store[name] = value
+
+    def begin_delete_secret(self, name):
+        FakeSecretClient.store.pop(name, None)
+
+
+class FakeCredential:
+    instances = 0
+
+    def __init__(self, **kwargs):
+        FakeCredential.instances += 1
+
+
+def setup_keyvault():
+    import app_settings_cache
+    import functions_keyvault
+
+    settings = {"enable_key_vault_secret_storage": True, "key_vault_name": "test-vault"}
+    app_settings_cache.configure_app_cache(settings)
+    app_settings_cache.update_settings_cache(settings)
+    functions_keyvault.SecretClient = FakeSecretClient
+    functions_keyvault.DefaultAzureCredential = FakeCredential
+    functions_keyvault._secret_clients.clear()
+    functions_keyvault._keyvault_credentials.clear()
+    functions_keyvault.invalidate_keyvault_secret_cache()
+    FakeSecretClient.instances = 0
+    FakeSecretClient.reads = []
+    FakeSecretClient.store = {}
+    FakeCredential.instances = 0
+    return functions_keyvault
+
+
+def test_secret_reads_are_cached():
+    """Repeated reads share one client and hit Key Vault once."""
+    print("🔍 Testing cached secret reads...")
+
+    try:
+        kv = setup_keyvault()
+        name = kv.build_full_secret_name("my-agent", "agent-1", "agent", "user")
+        FakeSecretClient.store[name] = "secret-value"
+
+        values = [kv.retrieve_secret_from_key_vault_by_full_name(name) for _ in range(5)]
+
+        if values != ["secret-value"] * 5:
+            print(f"❌ Unexpected values: {values}")
+            return False
+        if FakeSecretClient.reads != [name]:
+            print(f"❌ Expected one Key Vault read, got {len(FakeSecretClient.reads)}")
+            return False
+        if FakeSecretClient.instances != 1 or FakeCredential.instances != 1:
+            print(f"❌ Expected one shared client and credential, got {FakeSecretClient.instances} and {FakeCredential.instances}")
+            return False
+
+        print("✅ Secret reads are cached with one shared client")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_store_and_delete_invalidate_cache():
+    """Storing a new value or deleting a plugin's secrets invalidates the cache."""
+    print("🔍 Testing cache invalidation on store and delete...")
+
+    try:
+        kv = setup_keyvault()
+        name = kv.store_secret_in_key_vault("weather", "old-key", "user-1", source="action", scope="user")
+        if kv.retrieve_secret_from_key_vault_by_full_name(name) != "old-key":
+            print("❌ Stored secret was not readable")
+            return False
+
+        kv.store_secret_in_key_vault("weather", "new-key", "user-1", source="action", scope="user")
+        if kv.retrieve_secret_from_key_vault_by_full_name(name) != "new-key":
+            print("❌ Cache returned the old value after a store")
+            return False
+
+        kv.keyvault_plugin_delete_helper({"name": "weather", "auth": {"type": "key", "key": name}}, "user-1", scope="user")
+        reads_before = len(FakeSecretClient.reads)
+        try:
+            kv.retrieve_secret_from_key_vault_by_full_name(name)
+        except Exception:
+            pass
+        if len(FakeSecretClient.reads) != reads_before + 1:
+            print("❌ Deleted secret was still served from the cache")
+            return False
+
+        print("✅ Store and delete invalidate cached secrets")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_prefetch_agent_and_plugin_secrets():
+    """All secret references in manifests are loaded in one prefetch."""
+    print("🔍 Testing batch prefetch...")
+
+    try:
+        kv = setup_keyvault()
+        agent_key = kv.build_full_secret_name("agent", "agent-1", "agent", "user")
+        plugin_key = kv.build_full_secret_name("sql", "user-1", "action", "user")
+        extra_key = kv.build_full_secret_name("sql-password", "user-1", "action-addset", "user")
+        FakeSecretClient.store.update({agent_key: "a", plugin_key: "b", extra_key: "c"})
+
+        manifests = [
+            {"name": "agent", "azure_openai_gpt_key": agent_key},
+            {"name": "sql", "auth": {"type": "key", "key": plugin_key}, "additionalFields": {"password__Secret": extra_key, "database": "db"}},
+        ]
+        references = kv.collect_keyvault_secret_references(manifests)
+        if references != {agent_key, plugin_key, extra_key}:
+            print(f"❌ Unexpected references: {references}")
+            return False
+
+        resolved = kv.prefetch_keyvault_secrets(references)
+        if resolved != {agent_key: "a", plugin_key: "b", extra_key: "c"}:
+            print(f"❌ Unexpected prefetch result: {resolved}")
+            return False
+
+        for name in references:
+            kv.retrieve_secret_from_key_vault_by_full_name(name)
+        if sorted(FakeSecretClient.reads) != sorted(references):
+            print(f"❌ Secrets were read again after prefetch: {FakeSecretClient.reads}")
+            return False
+
+        print("✅ Manifest secrets are prefetched in one batch")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_secret_reads_are_cached,
+        test_store_and_delete_invalidate_cache,
+        test_prefetch_agent_and_plugin_secrets,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
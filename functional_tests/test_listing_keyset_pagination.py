@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Functional test for keyset pagination and maintained listing counts.
+Version: 0.237.023
+Implemented in: 0.237.023
+
+This test ensures that workspace listings are read page by page with a keyset
+cursor instead of OFFSET, that pages neither skip nor repeat documents sharing
+a _ts when ties come back in any order, that page jumps without a token still
+fall back to OFFSET, and that unfiltered listing totals come from a counter
+that is seeded once, adjusted on create/delete, dropped on invalidation and
+reseeded once it is stale.
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeListingContainer:
+    """
+    Evaluates the listing queries over in-memory documents and records them.
+
+    Like a cross-partition ORDER BY, documents with the same _ts come back in a
+    different order on every query.
+    """
+
+    def __init__(self, count, per_second=4):
+        # Several documents share each _ts, as with bulk uploads
+        self.documents = [{"id": f"doc-{i}", "_ts": 1000 - i // per_second} for i in range(count)]
+        self.queries = []
+        self.shuffle = random.Random(7)
+
+    def query_items(self, query, parameters, enable_cross_partition_query=False):
+        self.queries.append(query)
+        if "COUNT(1)" in query:
+            return [len(self.documents)]
+        params = {p["name"]: p["value"] for p in parameters}
+        docs = list(self.documents)
+        if "@cursor_value" in params:
+            docs = [
+                d for d in docs
+                if d["_ts"] < params["@cursor_value"]
+                or (d["_ts"] == params["@cursor_value"] and d["id"] not in params["@cursor_ids"])
+            ]
+        self.shuffle.shuffle(docs)
+        docs.sort(key=lambda d: d["_ts"], reverse=True)
+        if "OFFSET" in query:
+            offset, limit = [int(x) for x in query.split("OFFSET ")[1].split(" LIMIT ")]
+            return docs[offset:offset + limit]
+        if "SELECT TOP " in query:
+            return docs[:int(query.split("SELECT TOP ")[1].split()[0])]
+        return docs
+
+
+class FakeCounterContainer:
+    def __init__(self):
+        self.items = {}
+
+    def read_item(self, item, partition_key):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        if item not in self.items:
+            raise CosmosResourceNotFoundError()
+        return dict(self.items[item])
+
+    def upsert_item(self, body):
+        self.items[body["id"]] = dict(body)
+        return dict(body)
+
+    def patch_item(self, item, partition_key, patch_operations):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        if item not in self.items:
+            raise CosmosResourceNotFoundError()
+        for operation in patch_operations:
+            self.items[item]["count"] += operation["value"]
+        return dict(self.items[item])
+
+    def delete_item(self, item, partition_key):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        if item not in self.items:
+            raise CosmosResourceNotFoundError()
+        del self.items[item]
+
+
+def count_queries(container):
+    return sum(1 for query in container.queries if "COUNT(1)" in query)
+
+
+def test_keyset_pages_follow_continuation_tokens():
+    """Pages are read with keyset cursors and never use OFFSET."""
+    print("🔍 Testing keyset pages...")
+
+    try:
+        import functions_listing_pagination as listing
+        listing.cosmos_listing_counters_container = FakeCounterContainer()
+        container = FakeListingContainer(25)
+        where = "c.user_id = @user_id"
+
+        seen = []
+        token = None
+        page = 1
+        while True:
+            items, total, token, has_more = listing.fetch_listing_page(
+                container, where, [], page, 10, continuation_token=token
+            )
+            seen.extend(item["id"] for item in items)
+            if page == 1 and total != 25:
+                print(f"❌ First page should include the count, got {total}")
+                return False
+            if page > 1 and total is not None:
+                print(f"❌ Filtered pages continued with a token should not recount, got {total}")
+                return False
+            if not has_more:
+                break
+            page += 1
+
+        if sorted(seen) != sorted(f"doc-{i}" for i in range(25)) or len(seen) != 25 or page != 3:
+            print(f"❌ Unexpected pages: {page} pages, {seen}")
+            return False
+        if any("OFFSET" in query for query in container.queries) or count_queries(container) != 1:
+            print(f"❌ Unexpected queries: {container.queries}")
+            return False
+
+        # Jumping straight to a page without a token falls back to OFFSET
+        items, total, token, has_more = listing.fetch_listing_page(container, where, [], 3, 10)
+        if len(items) != 5 or has_more or total != 25:
+            print(f"❌ Unexpected OFFSET fallback: {items} / {total} / {has_more}")
+            return False
+
+        # A tie group larger than a page is carried across pages in the cursor
+        container = FakeListingContainer(23, per_second=10)
+        seen, token = [], None
+        while True:
+            items, _, token, has_more = listing.fetch_listing_page(container, where, [], 1, 4, continuation_token=token)
+            seen.extend(item["id"] for item in items)
+            if not has_more:
+                break
+        if sorted(seen) != sorted(f"doc-{i}" for i in range(23)) or len(seen) != 23:
+            print(f"❌ Tied documents skipped or repeated: {seen}")
+            return False
+
+        try:
+            listing.fetch_listing_page(container, where, [], 2, 10, continuation_token="not-a-cursor")
+            print("❌ Invalid cursor accepted")
+            return False
+        except ValueError:
+            pass
+
+        print("✅ Listings are paged with keyset cursors")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_counter_is_seeded_and_adjusted():
+    """Unfiltered totals come from a counter adjusted on create/delete."""
+    print("🔍 Testing maintained counts...")
+
+    try:
+        import functions_listing_pagination as listing
+        counters = FakeCounterContainer()
+        listing.cosmos_listing_counters_container = counters
+        container = FakeListingContainer(12)
+        key = listing.document_count_key(user_id="user-1")
+
+        # Adjusting a counter that was never seeded is a no-op
+        listing.adjust_listing_count(key, 1)
+        if counters.items:
+            print("❌ Missing counters must be left for the next listing to seed")
+            return False
+
+        for _ in range(3):
+            _, total, _, _ = listing.fetch_listing_page(container, "c.user_id = @user_id", [], 1, 10, counter_key=key)
+        if total != 12 or count_queries(container) != 1:
+            print(f"❌ Counter should be seeded once: {total} / {count_queries(container)} count queries")
+            return False
+
+        listing.adjust_listing_count(key, 1)
+        listing.adjust_listing_count(key, 1)
+        listing.adjust_listing_count(key, -1)
+        _, total, _, _ = listing.fetch_listing_page(container, "c.user_id = @user_id", [], 1, 10, counter_key=key)
+        if total != 13 or count_queries(container) != 1:
+            print(f"❌ Counter not adjusted: {total}")
+            return False
+
+        # Invalidated counters are recounted
+        listing.invalidate_listing_count(key)
+        _, total, _, _ = listing.fetch_listing_page(container, "c.user_id = @user_id", [], 1, 10, counter_key=key)
+        if total != 12 or count_queries(container) != 2:
+            print(f"❌ Invalidated counter not recounted: {total}")
+            return False
+
+        # Stale counters are reseeded
+        counters.items[key]["count"] = 99
+        counters.items[key]["seeded_at"] -= listing.LISTING_COUNTER_RESEED_SECONDS + 1
+        _, total, _, _ = listing.fetch_listing_page(container, "c.user_id = @user_id", [], 1, 10, counter_key=key)
+        if total != 12 or count_queries(container) != 3:
+            print(f"❌ Stale counter not reseeded: {total}")
+            return False
+
+        if listing.document_count_key(group_id="g") != "documents:group:g" or \
+                listing.document_count_key(user_id="u", public_workspace_id="p") != "documents:public:p":
+            print("❌ Unexpected counter keys")
+            return False
+
+        print("✅ Listing counts are maintained incrementally")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_keyset_pages_follow_continuation_tokens,
+        test_counter_is_seeded_and_adjusted,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Functional test for windowed, cursor-paginated message retrieval.
+Version: 0.237.021
+Implemented in: 0.237.021
+
+This test ensures that conversation messages are read newest page first with a
+continuation token as the cursor, that short Cosmos pages are topped up to the
+requested size, that pages are returned oldest first, that inline image data
+and citations are left out of pages (citation counts are returned instead),
+and that the citations can be loaded for a single message when expanded.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakePager:
+    def __init__(self, items, start, count):
+        self.items = items
+        self.start = start
+        self.count = count
+        self.continuation_token = None
+        self.returned = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.returned or self.start >= len(self.items):
+            raise StopIteration
+        self.returned = True
+        end = self.start + self.count
+        self.continuation_token = str(end) if end < len(self.items) else None
+        return iter(self.items[self.start:end])
+
+
+class FakeQueryResult:
+    def __init__(self, container, max_item_count):
+        self.container = container
+        self.max_item_count = max_item_count
+
+    def by_page(self, continuation_token=None):
+        start = int(continuation_token) if continuation_token else 0
+        # Simulate Cosmos returning fewer items than requested
+        count = min(self.max_item_count, self.container.max_page_items)
+        return FakePager(self.container.items, start, count)
+
+
+class FakeMessagesContainer:
+    """Holds the projected query results, newest first."""
+
+    def __init__(self, items, documents=None, max_page_items=1000):
+        self.items = items
+        self.documents = documents or {}
+        self.max_page_items = max_page_items
+        self.queries = []
+
+    def query_items(self, query, parameters, partition_key, max_item_count):
+        self.queries.append({"query": query, "partition_key": partition_key, "max_item_count": max_item_count})
+        return FakeQueryResult(self, max_item_count)
+
+    def read_item(self, item, partition_key):
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+        if item not in self.documents:
+            raise CosmosResourceNotFoundError()
+        return self.documents[item]
+
+
+def make_projected_messages(count):
+    items = []
+    for i in range(count):
+        role = "user" if i % 2 == 0 else "assistant"
+        items.append({
+            "id": f"msg-{i:03d}",
+            "conversation_id": "conv-1",
+            "role": role,
+            "content": f"message {i}",
+            "timestamp": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}",
+            "metadata": {},
+            "hybrid_citation_count": 2 if role == "assistant" else None,
+            "web_search_citation_count": None,
+            "agent_citation_count": None,
+        })
+    items.reverse()
+    return items
+
+
+def test_pages_are_read_newest_first():
+    """Pages follow the continuation token from the newest messages back."""
+    print("🔍 Testing cursor pagination...")
+
+    try:
+        from functions_message_pages import query_message_page
+
+        container = FakeMessagesContainer(make_projected_messages(25))
+        first, token = query_message_page("conv-1", 10, container=container)
+        second, token2 = query_message_page("conv-1", 10, token, container=container)
+        third, token3 = query_message_page("conv-1", 10, token2, container=container)
+
+        if [m["id"] for m in first] != [f"msg-{i:03d}" for i in range(15, 25)]:
+            print(f"❌ First page is not the newest messages in order: {[m['id'] for m in first]}")
+            return False
+        if [m["id"] for m in second] != [f"msg-{i:03d}" for i in range(5, 15)]:
+            print(f"❌ Second page is wrong: {[m['id'] for m in second]}")
+            return False
+        if len(third) != 5 or token3 is not None:
+            print(f"❌ Last page should have 5 messages and no token: {len(third)} / {token3}")
+            return False
+        if any(q["partition_key"] != "conv-1" for q in container.queries):
+            print("❌ Page queries must be scoped to the conversation partition")
+            return False
+
+        print("✅ Messages are paged newest first")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_short_cosmos_pages_are_topped_up():
+    """A page is filled from several Cosmos pages when Cosmos returns fewer items."""
+    print("🔍 Testing short Cosmos pages...")
+
+    try:
+        from functions_message_pages import query_message_page, parse_message_page_size, MESSAGE_PAGE_MAX_SIZE
+
+        container = FakeMessagesContainer(make_projected_messages(12), max_page_items=4)
+        messages, token = query_message_page("conv-1", 10, container=container)
+
+        if len(messages) != 10 or token is None:
+            print(f"❌ Expected a full page with a token, got {len(messages)} / {token}")
+            return False
+        if [q["max_item_count"] for q in container.queries] != [10, 6, 2]:
+            print(f"❌ Unexpected page requests: {[q['max_item_count'] for q in container.queries]}")
+            return False
+
+        if parse_message_page_size("500") != MESSAGE_PAGE_MAX_SIZE or parse_message_page_size("0") != 1:
+            print("❌ Page size was not clamped")
+            return False
+        if parse_message_page_size(None) != 30 or parse_message_page_size("abc") != 30:
+            print("❌ Invalid page sizes should use the default")
+            return False
+
+        print("✅ Short Cosmos pages are topped up")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_projection_defers_heavy_fields():
+    """Pages carry citation counts and image URLs instead of the heavy fields."""
+    print("🔍 Testing message projection...")
+
+    try:
+        from functions_message_pages import query_message_page, get_message_citations, MESSAGE_PAGE_QUERY
+
+        items = [
+            {"id": "img-1", "conversation_id": "conv-1", "role": "image", "content": None,
+             "timestamp": "2025-01-01T00:00:02", "metadata": {}},
+            {"id": "ai-1", "conversation_id": "conv-1", "role": "assistant", "content": "answer",
+             "augmented": True, "timestamp": "2025-01-01T00:00:01", "metadata": {},
+             "hybrid_citation_count": 3, "web_search_citation_count": 1, "agent_citation_count": None},
+        ]
+        documents = {"ai-1": {"id": "ai-1", "augmented": True, "hybrid_citations": [{"file_name": "a.pdf"}],
+                              "web_search_citations": [{"url": "https://example.com"}]}}
+        container = FakeMessagesContainer(items, documents)
+        messages, _ = query_message_page("conv-1", 10, container=container)
+        answer, image = messages
+
+        if image["content"] != "/api/image/img-1":
+            print(f"❌ Inline image data should be replaced by the image URL: {image['content']}")
+            return False
+        if answer["citation_counts"] != {"hybrid_citations": 3, "web_search_citations": 1, "agent_citations": 0}:
+            print(f"❌ Unexpected citation counts: {answer.get('citation_counts')}")
+            return False
+        if not answer.get("citations_deferred") or "hybrid_citations" in answer:
+            print("❌ Citations should be deferred")
+            return False
+        for field in ("hybrid_citations", "user_message", "file_content"):
+            if f"c.{field}," in MESSAGE_PAGE_QUERY or f"c.{field}\n" in MESSAGE_PAGE_QUERY:
+                print(f"❌ Heavy field {field} is projected")
+                return False
+        if "active_thread" not in MESSAGE_PAGE_QUERY or "ORDER BY c.timestamp DESC" not in MESSAGE_PAGE_QUERY:
+            print("❌ Inactive threads must be filtered server-side, newest first")
+            return False
+
+        citations = get_message_citations("conv-1", "ai-1", container=container)
+        if citations["hybrid_citations"] != [{"file_name": "a.pdf"}] or citations["agent_citations"] != []:
+            print(f"❌ Unexpected citations: {citations}")
+            return False
+        if get_message_citations("conv-1", "missing", container=container) is not None:
+            print("❌ Missing message should return None")
+            return False
+
+        print("✅ Heavy fields are deferred until expanded")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_pages_are_read_newest_first,
+        test_short_cosmos_pages_are_topped_up,
+        test_projection_defers_heavy_fields,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Functional test for the ingestion content sample used by metadata extraction.
+Version: 0.237.025
+Implemented in: 0.237.025
+
+This test ensures that ingestion keeps the text of the first saved chunks for
+metadata extraction within the chunk and character budget, only while a
+document is being processed, and that deferred extraction turns off the
+inline extraction step.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+def test_sample_respects_budget():
+    """Only the first chunks, up to the size budget, are kept."""
+    print("🔍 Testing sample budget...")
+
+    try:
+        import functions_metadata_sample as sample
+
+        # Chunks of documents that aren't being ingested are ignored
+        sample.add_metadata_sample_chunk("doc-0", 1, "ignored")
+        if sample.get_metadata_sample("doc-0") is not None:
+            print("❌ Chunks should only be collected between begin and end")
+            return False
+
+        sample.begin_metadata_sample("doc-1")
+        for page in range(sample.METADATA_SAMPLE_MAX_CHUNKS + 5, 0, -1):
+            sample.add_metadata_sample_chunk("doc-1", page, f"page {page} text")
+        text = sample.get_metadata_sample("doc-1")
+        if text.count("[Page ") != sample.METADATA_SAMPLE_MAX_CHUNKS or not text.startswith("[Page 6]"):
+            print(f"❌ Unexpected chunk budget handling: {text[:80]}")
+            return False
+
+        sample.begin_metadata_sample("doc-2")
+        sample.add_metadata_sample_chunk("doc-2", 1, "a" * (sample.METADATA_SAMPLE_MAX_CHARS - 10))
+        sample.add_metadata_sample_chunk("doc-2", 2, "b" * 100)
+        sample.add_metadata_sample_chunk("doc-2", 3, "c" * 100)
+        text = sample.end_metadata_sample("doc-2")
+        if text.count("b") != 10 or "c" in text:
+            print("❌ Character budget not applied")
+            return False
+        if sample.end_metadata_sample("doc-2") is not None or sample.end_metadata_sample("doc-1") is None:
+            print("❌ end_metadata_sample should return the sample once")
+            return False
+
+        print("✅ Sample stays within budget")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_deferred_extraction_disables_inline():
+    """Inline extraction runs only when metadata extraction is on and not deferred."""
+    print("🔍 Testing extraction mode...")
+
+    try:
+        from functions_metadata_sample import is_inline_metadata_extraction_enabled
+
+        cases = [
+            ({}, False),
+            ({"enable_extract_meta_data": True}, True),
+            ({"enable_extract_meta_data": True, "enable_deferred_metadata_extraction": True}, False),
+            ({"enable_deferred_metadata_extraction": True}, False),
+        ]
+        for settings, expected in cases:
+            if is_inline_metadata_extraction_enabled(settings) != expected:
+                print(f"❌ Unexpected result for {settings}")
+                return False
+
+        print("✅ Extraction mode follows settings")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_sample_respects_budget,
+        test_deferred_extraction_disables_inline,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Functional test for the cached model deployment catalog.
+Version: 0.237.028
+Implemented in: 0.237.028
+
+This test ensures that the GPT, embedding and image model pickers share one
+cached deployment list per Azure OpenAI account in the shared app cache,
+that entries are re-read from ARM after the TTL or on an explicit refresh,
+that a stale entry is served when ARM fails, and that unconfigured pickers
+are reported without calling ARM.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+DEPLOYMENTS = [
+    {"deploymentName": "chat", "modelName": "gpt-4o"},
+    {"deploymentName": "reasoning", "modelName": "o3-mini"},
+    {"deploymentName": "embed", "modelName": "text-embedding-3-large"},
+    {"deploymentName": "images", "modelName": "gpt-image-1"},
+    {"deploymentName": "dalle", "modelName": "dall-e-3"},
+]
+
+SETTINGS = {
+    "azure_openai_gpt_subscription_id": "sub-1",
+    "azure_openai_gpt_resource_group": "rg-1",
+    "azure_openai_gpt_endpoint": "https://aoai-one.openai.azure.com/",
+    "azure_openai_embedding_subscription_id": "sub-1",
+    "azure_openai_embedding_resource_group": "rg-1",
+    "azure_openai_embedding_endpoint": "https://AOAI-one.openai.azure.com/",
+    "azure_openai_image_gen_subscription_id": "",
+}
+
+
+def setup_catalog():
+    import app_settings_cache
+    import functions_model_catalog as catalog
+
+    app_settings_cache.configure_app_cache({"enable_redis_cache": False})
+    calls = []
+
+    def fake_list(account):
+        calls.append(account)
+        return [dict(d) for d in DEPLOYMENTS]
+
+    catalog._list_deployments = fake_list
+    return catalog, calls
+
+
+def test_pickers_share_cached_account_catalog():
+    """GPT and embedding pickers on the same account share one ARM call until the TTL passes."""
+    print("🔍 Testing shared catalog entries...")
+
+    try:
+        catalog, calls = setup_catalog()
+
+        gpt_models, fetched_at = catalog.get_model_catalog(SETTINGS, "gpt")
+        embedding_models, _ = catalog.get_model_catalog(SETTINGS, "embedding")
+        if [m["deploymentName"] for m in gpt_models] != ["chat", "reasoning"]:
+            print(f"❌ Unexpected GPT models: {gpt_models}")
+            return False
+        if [m["deploymentName"] for m in embedding_models] != ["embed"] or len(calls) != 1:
+            print(f"❌ Pickers did not share the account entry: {embedding_models} / {calls}")
+            return False
+
+        catalog.get_model_catalog(SETTINGS, "gpt", refresh=True)
+        if len(calls) != 2:
+            print("❌ refresh=True must re-read the deployments")
+            return False
+
+        original_ttl = catalog.MODEL_CATALOG_TTL_SECONDS
+        catalog.MODEL_CATALOG_TTL_SECONDS = 0
+        try:
+            _, refreshed_at = catalog.get_model_catalog(SETTINGS, "gpt")
+        finally:
+            catalog.MODEL_CATALOG_TTL_SECONDS = original_ttl
+        if len(calls) != 3 or refreshed_at < fetched_at:
+            print(f"❌ Expired entry not refreshed: {calls}")
+            return False
+
+        if catalog.get_model_catalog(SETTINGS, "image") is not None or len(calls) != 3:
+            print("❌ Unconfigured picker must return None without calling ARM")
+            return False
+
+        image_settings = dict(SETTINGS, azure_openai_image_gen_subscription_id="sub-1",
+                              azure_openai_image_gen_resource_group="rg-1",
+                              azure_openai_image_gen_endpoint="https://aoai-one.openai.azure.com/")
+        image_models, _ = catalog.get_model_catalog(image_settings, "image")
+        if [m["deploymentName"] for m in image_models] != ["images", "dalle"] or len(calls) != 3:
+            print(f"❌ Unexpected image models: {image_models}")
+            return False
+
+        print("✅ Pickers share cached account catalogs")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_stale_entry_served_when_arm_fails():
+    """An expired entry is served when ARM fails, but an explicit refresh reports the error."""
+    print("🔍 Testing stale fallback and prefetch...")
+
+    try:
+        catalog, calls = setup_catalog()
+        thread = catalog.prefetch_model_catalog(SETTINGS)
+        thread.join(timeout=5)
+        if len(calls) != 1:
+            print(f"❌ Prefetch should list each configured account once: {calls}")
+            return False
+
+        def failing_list(account):
+            raise RuntimeError("ARM throttled")
+
+        catalog._list_deployments = failing_list
+        original_ttl = catalog.MODEL_CATALOG_TTL_SECONDS
+        catalog.MODEL_CATALOG_TTL_SECONDS = 0
+        try:
+            models, _ = catalog.get_model_catalog(SETTINGS, "gpt")
+            if [m["deploymentName"] for m in models] != ["chat", "reasoning"]:
+                print(f"❌ Stale entry not served: {models}")
+                return False
+            try:
+                catalog.get_model_catalog(SETTINGS, "gpt", refresh=True)
+                print("❌ Explicit refresh should surface the ARM error")
+                return False
+            except RuntimeError:
+                pass
+        finally:
+            catalog.MODEL_CATALOG_TTL_SECONDS = original_ttl
+
+        if catalog.prefetch_model_catalog({}) is not None:
+            print("❌ Prefetch without configured accounts should not start a thread")
+            return False
+
+        print("✅ Stale entries cover ARM failures")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_pickers_share_cached_account_catalog,
+        test_stale_entry_served_when_arm_fails,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
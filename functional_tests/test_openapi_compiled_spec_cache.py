@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Functional test for the compiled OpenAPI spec cache.
+Version: 0.237.013
+Implemented in: 0.237.013
+
+This test ensures that OpenApiPlugin instances built from the same spec share
+one compiled spec (parsed spec, operation table, metadata and generated
+functions), that $ref resolution is memoized per reference, that each instance
+still gets its own bound operation functions, and that changed spec content
+compiles separately.
+"""
+
+import sys
+import os
+import copy
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+def build_spec(operation_count=50):
+    paths = {}
+    for n in range(operation_count):
+        paths[f"/items/{n}/{{id}}"] = {
+            "get": {
+                "operationId": f"getItem{n}",
+                "description": f"Get item {n}",
+                "parameters": [{"$ref": "#/components/parameters/id"}, {"$ref": "#/components/parameters/fields"}],
+                "responses": {"200": {"description": "OK"}}
+            }
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Inventory", "version": "1.0"},
+        "paths": paths,
+        "components": {
+            "parameters": {
+                "id": {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}},
+                "fields": {"name": "fields", "in": "query", "description": "Fields to return", "schema": {"type": "string"}}
+            }
+        }
+    }
+
+
+def test_plugins_share_compiled_spec():
+    """Two plugins from identical content reuse one compilation with memoized refs."""
+    print("🔍 Testing compiled OpenAPI spec reuse...")
+
+    try:
+        from semantic_kernel_plugins import openapi_plugin
+        from semantic_kernel_plugins.openapi_plugin import OpenApiPlugin, CompiledOpenApiSpec, clear_compiled_openapi_spec_cache
+
+        clear_compiled_openapi_spec_cache()
+        lookups = []
+        original_lookup = CompiledOpenApiSpec._lookup_ref
+
+        def counting_lookup(self, ref_path):
+            lookups.append(ref_path)
+            return original_lookup(self, ref_path)
+
+        CompiledOpenApiSpec._lookup_ref = counting_lookup
+        try:
+            first = OpenApiPlugin(base_url="https://api.example.com", openapi_spec_content=build_spec())
+            second = OpenApiPlugin(base_url="https://other.example.com/", openapi_spec_content=build_spec())
+        finally:
+            CompiledOpenApiSpec._lookup_ref = original_lookup
+
+        assert first._compiled is second._compiled, "Identical specs should share one compiled spec"
+        assert sorted(lookups) == ["#/components/parameters/fields", "#/components/parameters/id"], lookups
+
+        assert len(first.get_functions()) == 51
+        assert first.getItem7.__self__ is first and second.getItem7.__self__ is second
+        assert second.base_url == "https://other.example.com"
+        method = first.get_operation_details("getItem3")
+        assert [p["name"] for p in method["parameters"]] == ["id", "fields"], method
+        assert first._compiled.operations["getItem3"][0] == "/items/3/{id}"
+
+        changed = build_spec()
+        changed["info"]["title"] = "Inventory v2"
+        third = OpenApiPlugin(base_url="https://api.example.com", openapi_spec_content=changed)
+        assert third._compiled is not first._compiled
+        assert third.display_name == "OpenAPI: Inventory v2"
+        assert len(openapi_plugin._compiled_spec_cache) == 2
+
+        print("✅ Compiled spec reuse test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_spec_file_cache_and_unresolved_refs():
+    """File specs are cached by file content; unresolvable refs are left in place."""
+    print("🔍 Testing file-based spec caching and unresolved references...")
+
+    try:
+        import json
+        import tempfile
+        from semantic_kernel_plugins.openapi_plugin import OpenApiPlugin, clear_compiled_openapi_spec_cache
+
+        clear_compiled_openapi_spec_cache()
+        spec = build_spec(3)
+        spec["paths"]["/items/0/{id}"]["get"]["parameters"].append({"$ref": "#/components/parameters/missing"})
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(spec, f)
+            spec_path = f.name
+        try:
+            first = OpenApiPlugin(base_url="https://api.example.com", openapi_spec_path=spec_path)
+            second = OpenApiPlugin(base_url="https://api.example.com", openapi_spec_path=spec_path)
+            assert first._compiled is second._compiled
+
+            unresolved = {"$ref": "#/components/parameters/missing"}
+            assert first._resolve_ref(unresolved) is unresolved
+            assert first._resolve_ref([{"$ref": "#/components/parameters/id"}])[0]["name"] == "id"
+
+            with open(spec_path, "w") as f:
+                json.dump(copy.deepcopy(build_spec(2)), f)
+            third = OpenApiPlugin(base_url="https://api.example.com", openapi_spec_path=spec_path)
+            assert third._compiled is not first._compiled and len(third.get_functions()) == 3
+        finally:
+            os.remove(spec_path)
+
+        print("✅ File spec cache test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_plugins_share_compiled_spec, test_spec_file_cache_and_unresolved_refs]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
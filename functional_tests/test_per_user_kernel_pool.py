@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Functional test for the per-user Semantic Kernel pool.
+Version: 0.237.012
+Implemented in: 0.237.012
+
+This test ensures that a user's built kernel is reused while its fingerprint is
+unchanged, rebuilt when an agent or action document changes (new _etag) or is
+deleted, leased to only one request at a time, and evicted in LRU order when
+the pool is full.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeContainer:
+    """Minimal Cosmos container returning id/_etag projections for one partition."""
+
+    def __init__(self, items=None):
+        self.items = list(items or [])
+        self.queries = 0
+
+    def query_items(self, query, parameters=None, partition_key=None, enable_cross_partition_query=False):
+        self.queries += 1
+        return [{"id": item["id"], "_etag": item["_etag"]} for item in self.items]
+
+
+def test_pool_reuse_lease_and_eviction():
+    """Matching fingerprints reuse the kernel; leases are exclusive; LRU evicts the oldest user."""
+    print("🔍 Testing kernel pool reuse, leasing and eviction...")
+
+    try:
+        from functions_kernel_pool import KernelPool
+
+        pool = KernelPool(max_size=2)
+        assert pool.checkout("alice", "fp1") is None
+
+        lease = pool.add("alice", "fp1", "kernel-a", {"researcher": "agent"})
+        assert pool.checkout("alice", "fp1") is None, "A leased kernel must not be shared"
+        assert pool.add("alice", "fp1", "kernel-a2", None) is None, "A leased entry must not be replaced"
+        pool.release(lease)
+
+        reused = pool.checkout("alice", "fp1")
+        assert reused is lease and reused.kernel == "kernel-a"
+        pool.release(reused)
+
+        assert pool.checkout("alice", "fp2") is None, "Changed fingerprint should force a rebuild"
+        assert lease.discarded
+
+        for user in ("alice", "bob", "carol"):
+            pool.release(pool.add(user, "fp", f"kernel-{user}", None))
+        assert pool.checkout("alice", "fp") is None, "Least recently used user should be evicted"
+        stats = pool.get_stats()
+        assert stats["size"] == 2 and stats["evictions"] == 1 and stats["hits"] == 1, stats
+
+        print("✅ Kernel pool test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_fingerprint_tracks_agent_and_action_changes():
+    """Saving or deleting an agent/action, or changing the selected agent, changes the fingerprint."""
+    print("🔍 Testing kernel fingerprint invalidation...")
+
+    try:
+        import functions_kernel_pool
+
+        agents = FakeContainer([{"id": "a1", "_etag": "e1"}])
+        actions = FakeContainer([{"id": "p1", "_etag": "e1"}])
+        global_agents = FakeContainer([{"id": "g1", "_etag": "e1"}])
+        functions_kernel_pool.cosmos_personal_agents_container = agents
+        functions_kernel_pool.cosmos_personal_actions_container = actions
+        functions_kernel_pool.cosmos_global_agents_container = global_agents
+        functions_kernel_pool.cosmos_global_actions_container = FakeContainer()
+
+        settings = {"merge_global_semantic_kernel_with_workspace": False}
+        user_settings = {"enable_agents": True, "selected_agent": {"name": "researcher", "is_global": False}}
+        fingerprint = functions_kernel_pool.compute_kernel_fingerprint
+        base = fingerprint("alice", settings, user_settings)
+        assert fingerprint("alice", settings, user_settings) == base
+        assert global_agents.queries == 0, "Global agents are only read when merged"
+
+        agents.items[0]["_etag"] = "e2"
+        saved_agent = fingerprint("alice", settings, user_settings)
+        assert saved_agent != base
+
+        actions.items.clear()
+        deleted_action = fingerprint("alice", settings, user_settings)
+        assert deleted_action != saved_agent
+
+        other_agent = dict(user_settings, selected_agent={"name": "writer", "is_global": False})
+        assert fingerprint("alice", settings, other_agent) != deleted_action
+
+        assert fingerprint("alice", settings, user_settings, request_agent_name="writer") != deleted_action
+        assert fingerprint("alice", settings, user_settings, force_enable_agents=True) != deleted_action
+
+        merged = dict(settings, merge_global_semantic_kernel_with_workspace=True)
+        merged_fingerprint = fingerprint("alice", merged, user_settings)
+        global_agents.items[0]["_etag"] = "e2"
+        assert fingerprint("alice", merged, user_settings) != merged_fingerprint
+
+        print("✅ Kernel fingerprint test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_pool_reuse_lease_and_eviction, test_fingerprint_tracks_agent_and_action_changes]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
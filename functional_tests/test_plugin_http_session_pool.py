@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Functional test for pooled plugin HTTP sessions.
+Version: 0.237.014
+Implemented in: 0.237.014
+
+This test ensures that plugin HTTP calls reuse keep-alive connections through
+the shared requests and aiohttp sessions, that idempotent requests are retried
+on 503 responses according to the plugin's policy, and that the shared
+sessions never keep cookies between users.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+    flaky_calls = 0
+
+    def do_GET(self):
+        RecordingHandler.client_ports.append(self.client_address[1])
+        if self.path == "/flaky" and RecordingHandler.flaky_calls < 1:
+            RecordingHandler.flaky_calls += 1
+            self._reply(503, b"busy")
+            return
+        self._reply(200, b"ok", cookie=True)
+
+    def _reply(self, status, body, cookie=False):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if cookie:
+            self.send_header("Set-Cookie", "session=user-a; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_requests_session_reuses_connections():
+    """Sequential calls share one connection; 503 is retried; cookies are not stored."""
+    print("🔍 Testing pooled requests session...")
+
+    server = None
+    try:
+        from semantic_kernel_plugins.http_session_pool import (
+            HttpClientPolicy, get_requests_session, get_requests_timeout
+        )
+
+        server, base_url = start_server()
+        RecordingHandler.client_ports.clear()
+        policy = HttpClientPolicy(backoff_seconds=0)
+        session = get_requests_session(policy)
+        assert get_requests_session(policy) is session, "Same policy should share a session"
+
+        for _ in range(5):
+            assert session.get(f"{base_url}/ok", timeout=get_requests_timeout(policy)).status_code == 200
+        assert len(set(RecordingHandler.client_ports)) == 1, f"Expected one keep-alive connection: {RecordingHandler.client_ports}"
+        assert len(session.cookies) == 0, "Shared sessions must not keep cookies"
+
+        RecordingHandler.flaky_calls = 0
+        assert session.get(f"{base_url}/flaky", timeout=get_requests_timeout(policy)).status_code == 200
+        assert RecordingHandler.flaky_calls == 1
+
+        print("✅ Pooled requests session test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if server:
+            server.shutdown()
+
+
+def test_aiohttp_requests_share_loop_session():
+    """aiohttp calls on one loop share a session and connection and retry 503s."""
+    print("🔍 Testing pooled aiohttp session...")
+
+    server = None
+    try:
+        from semantic_kernel_plugins.http_session_pool import (
+            HttpClientPolicy, get_aiohttp_session, pooled_aiohttp_request
+        )
+
+        server, base_url = start_server()
+        RecordingHandler.client_ports.clear()
+        RecordingHandler.flaky_calls = 0
+        policy = HttpClientPolicy(backoff_seconds=0)
+
+        async def run_calls():
+            statuses = []
+            for path in ("/ok", "/ok", "/flaky", "/ok"):
+                async with pooled_aiohttp_request("GET", f"{base_url}{path}", policy=policy) as response:
+                    statuses.append(response.status)
+                    await response.read()
+            session = get_aiohttp_session(policy)
+            cookie_count = len(session.cookie_jar)
+            await session.close()
+            return statuses, cookie_count
+
+        statuses, cookie_count = asyncio.run(run_calls())
+        assert statuses == [200, 200, 200, 200], statuses
+        assert RecordingHandler.flaky_calls == 1
+        assert len(set(RecordingHandler.client_ports)) == 1, f"Expected one keep-alive connection: {RecordingHandler.client_ports}"
+        assert cookie_count == 0, "Shared sessions must not keep cookies"
+
+        print("✅ Pooled aiohttp session test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    tests = [test_requests_session_reuses_connections, test_aiohttp_requests_share_loop_session]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Functional test for the ring-buffer plugin invocation store.
+Version: 0.237.018
+Implemented in: 0.237.018
+
+This test ensures that PluginInvocationLogger keeps the most recent invocations
+in a bounded ring buffer indexed by user and conversation, that clearing a
+conversation's citations does not disturb other conversations, that the
+incrementally maintained stats and latency histograms match the buffer
+contents after eviction, that log_invocation still writes to the terminal,
+Application Insights and standard logging, and that concurrent logging is
+thread-safe.
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+def make_invocation(plugin, function, user_id, conversation_id, duration_ms, success=True):
+    from semantic_kernel_plugins.plugin_invocation_logger import PluginInvocation
+    return PluginInvocation(
+        plugin_name=plugin,
+        function_name=function,
+        parameters={},
+        result="ok",
+        start_time=0.0,
+        end_time=duration_ms / 1000,
+        duration_ms=duration_ms,
+        user_id=user_id,
+        timestamp="2025-01-01T00:00:00",
+        success=success,
+        conversation_id=conversation_id,
+    )
+
+
+def test_ring_buffer_indexes():
+    """Lookups by user and conversation survive eviction and clearing."""
+    print("🔍 Testing ring buffer indexes...")
+
+    try:
+        from semantic_kernel_plugins.plugin_invocation_logger import PluginInvocationLogger
+
+        logger = PluginInvocationLogger(max_history=5)
+        for i in range(4):
+            logger._append(make_invocation("Math", "add", "user1", "conv1", i))
+        for i in range(3):
+            logger._append(make_invocation("Http", "get", "user1", "conv2", 100 + i))
+
+        # Two conv1 invocations were evicted by the ring buffer
+        conv1 = logger.get_invocations_for_conversation("user1", "conv1")
+        conv2 = logger.get_invocations_for_conversation("user1", "conv2")
+        if [inv.duration_ms for inv in conv1] != [2, 3] or len(conv2) != 3:
+            print(f"❌ Unexpected conversation results: {[inv.duration_ms for inv in conv1]} / {len(conv2)}")
+            return False
+
+        logger.clear_invocations_for_conversation("user1", "conv1")
+        if logger.get_invocations_for_conversation("user1", "conv1") or logger.get_invocation_count() != 3:
+            print("❌ Conversation was not cleared")
+            return False
+        if [inv.duration_ms for inv in logger.get_invocations_for_user("user1")] != [100, 101, 102]:
+            print("❌ Cleared invocations still returned for the user")
+            return False
+        if len(logger.get_recent_invocations(2)) != 2 or len(logger.invocations) != 3:
+            print("❌ Recent invocations include cleared entries")
+            return False
+
+        # Push the cleared (dead) entries out of the buffer
+        for i in range(3):
+            logger._append(make_invocation("Math", "add", "user1", "conv1", 10 + i))
+        if [inv.duration_ms for inv in logger.get_invocations_for_conversation("user1", "conv1")] != [10, 11, 12]:
+            print("❌ New invocations for a cleared conversation were lost")
+            return False
+        if logger.get_invocation_count() != 5:
+            print(f"❌ Unexpected live count {logger.get_invocation_count()}")
+            return False
+
+        print("✅ User and conversation indexes follow the ring buffer")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_incremental_stats():
+    """Stats and histograms are updated as invocations enter and leave the buffer."""
+    print("🔍 Testing incremental plugin stats...")
+
+    try:
+        from semantic_kernel_plugins.plugin_invocation_logger import PluginInvocationLogger
+
+        logger = PluginInvocationLogger(max_history=3)
+        if logger.get_plugin_stats() != {}:
+            print("❌ Empty logger should have empty stats")
+            return False
+
+        logger._append(make_invocation("Math", "add", "u", "c", 5))
+        logger._append(make_invocation("Http", "get", "u", "c", 300, success=False))
+        logger._append(make_invocation("Http", "get", "u", "c", 700))
+        logger._append(make_invocation("Http", "post", "u", "c", 20))  # evicts Math.add
+
+        stats = logger.get_plugin_stats()
+        if "Math" in stats["plugins"]:
+            print("❌ Evicted plugin still in stats")
+            return False
+        http = stats["plugins"]["Http"]
+        get_stats = http["functions"]["get"]
+        if (stats["total_invocations"], stats["failed_invocations"]) != (3, 1):
+            print(f"❌ Unexpected totals: {stats}")
+            return False
+        if http["total_calls"] != 3 or abs(http["average_duration_ms"] - 340) > 1e-6:
+            print(f"❌ Unexpected plugin stats: {http}")
+            return False
+        if get_stats["total_calls"] != 2 or get_stats["average_duration_ms"] != 500:
+            print(f"❌ Unexpected function stats: {get_stats}")
+            return False
+        if get_stats["latency_histogram_ms"]["<=500"] != 1 or get_stats["latency_histogram_ms"]["<=1000"] != 1:
+            print(f"❌ Unexpected histogram: {get_stats['latency_histogram_ms']}")
+            return False
+
+        logger.clear_history()
+        if logger.get_plugin_stats() != {} or logger.get_invocation_count() != 0:
+            print("❌ clear_history did not reset the store")
+            return False
+
+        sinks = []
+        logger._log_to_terminal = lambda invocation: sinks.append("terminal")
+        logger._log_to_appinsights = lambda invocation: sinks.append("appinsights")
+        logger._log_to_standard = lambda invocation: sinks.append("standard")
+        logger.log_invocation(make_invocation("Math", "add", "u", "c", 5))
+        if sinks != ["terminal", "appinsights", "standard"] or logger.get_invocation_count() != 1:
+            print(f"❌ log_invocation did not reach every log sink: {sinks}")
+            return False
+
+        print("✅ Stats match the buffer contents")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_concurrent_logging():
+    """Concurrent writers and readers keep the store consistent."""
+    print("🔍 Testing concurrent logging...")
+
+    try:
+        from semantic_kernel_plugins.plugin_invocation_logger import PluginInvocationLogger
+
+        logger = PluginInvocationLogger(max_history=200)
+        errors = []
+
+        def writer(thread_id):
+            try:
+                for i in range(500):
+                    logger._append(make_invocation("P", f"f{thread_id}", f"user{thread_id}", f"conv{i % 5}", i % 50))
+                    if i % 50 == 0:
+                        logger.clear_invocations_for_conversation(f"user{thread_id}", f"conv{i % 5}")
+                        logger.get_plugin_stats()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = logger.get_plugin_stats()
+        if errors:
+            print(f"❌ Errors during concurrent logging: {errors[:3]}")
+            return False
+        if stats["total_invocations"] != 200 or sum(stats["latency_histogram_ms"].values()) != 200:
+            print(f"❌ Stats out of sync with the buffer: {stats['total_invocations']}")
+            return False
+        live = sum(len(logger.get_invocations_for_user(f"user{t}", 1000)) for t in range(8))
+        if live != logger.get_invocation_count() or live != len(logger.invocations):
+            print(f"❌ Index and buffer disagree: {live} vs {logger.get_invocation_count()}")
+            return False
+
+        print("✅ Store stays consistent under concurrent use")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_ring_buffer_indexes,
+        test_incremental_stats,
+        test_concurrent_logging,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Functional test for the shared async runtime.
+Version: 0.237.011
+Implemented in: 0.237.011
+
+This test ensures that Semantic Kernel calls made through run_async() reuse
+long-lived event loops instead of creating one per request, that the caller's
+contextvars (which carry the Flask request context) reach the coroutine, that
+affinity keys pin work to one loop (so a kernel's loop-bound clients shared by
+several users stay on one loop), that sync plugin functions run off the loop,
+and that blocking on the runtime from a running loop is rejected instead of
+deadlocking.
+"""
+
+import sys
+import os
+import asyncio
+import contextvars
+import inspect
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+from functions_async_runtime import AsyncRuntime, get_affinity_key, offload_sync_kernel_functions
+
+current_user = contextvars.ContextVar("current_user", default=None)
+
+
+async def current_loop_id():
+    return id(asyncio.get_running_loop())
+
+
+def test_loops_are_reused_and_context_propagates():
+    """Repeated calls run on the same persistent loops and see the caller's context."""
+    print("🔍 Testing loop reuse and context propagation...")
+
+    try:
+        runtime = AsyncRuntime(num_loops=2, name="test-runtime")
+        try:
+            loop_ids = {runtime.run(current_loop_id()) for _ in range(20)}
+            assert 1 <= len(loop_ids) <= 2, f"Expected at most 2 loops, saw {len(loop_ids)}"
+
+            pinned = {runtime.run(current_loop_id(), affinity_key="user-1") for _ in range(10)}
+            assert len(pinned) == 1, "Affinity key should always map to the same loop"
+
+            async def read_user():
+                return current_user.get()
+
+            token = current_user.set("alice")
+            try:
+                assert runtime.run(read_user()) == "alice"
+            finally:
+                current_user.reset(token)
+            assert runtime.run(read_user()) is None
+
+            async def fail():
+                raise ValueError("kernel error")
+
+            try:
+                runtime.run(fail())
+                raise AssertionError("Coroutine error was swallowed")
+            except ValueError:
+                pass
+        finally:
+            runtime.stop()
+
+        print("✅ Loop reuse test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_nested_run_rejected_and_stats_reported():
+    """run() from a loop thread raises; stats expose pending work and lag."""
+    print("🔍 Testing nested run rejection and runtime stats...")
+
+    try:
+        runtime = AsyncRuntime(num_loops=1, name="test-runtime")
+        try:
+            async def nested():
+                inner = current_loop_id()
+                try:
+                    runtime.run(inner)
+                except RuntimeError:
+                    return "rejected"
+                return "deadlock risk"
+
+            assert runtime.run(nested(), timeout=2) == "rejected"
+
+            async def block_loop():
+                # Longer than the lag probe interval, so a probe is always delayed
+                time.sleep(1.2)
+
+            runtime.run(block_loop(), timeout=5)
+            time.sleep(0.1)
+            stats = runtime.get_stats()
+            assert stats["pending"] == 0, stats
+            assert stats["loops"][0]["completed"] == 2, stats
+            assert stats["max_lag_ms"] >= 100, f"Blocking call should show up as lag: {stats}"
+
+            slow = runtime.submit(asyncio.sleep(10))
+            assert runtime.get_stats()["pending"] == 1
+            slow.cancel()
+            deadline = time.time() + 2
+            while runtime.get_stats()["pending"] and time.time() < deadline:
+                time.sleep(0.01)
+            assert runtime.get_stats()["pending"] == 0, "Cancelling the future should cancel the task"
+        finally:
+            runtime.stop()
+
+        print("✅ Nested run and stats test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+class LoopBoundClient:
+    """Stand-in for an async HTTP client whose connection pool belongs to the first loop it runs on."""
+
+    def __init__(self):
+        self.loop = None
+
+    async def request(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("client used from a different event loop")
+        await asyncio.sleep(0.001)
+        return id(loop)
+
+
+def test_shared_kernel_clients_stay_on_one_loop():
+    """Calls from many users through one shared kernel all run on that kernel's loop."""
+    print("🔍 Testing kernel affinity for shared clients...")
+
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+
+        runtime = AsyncRuntime(num_loops=4, name="test-runtime")
+        try:
+            global_kernel = object()
+            client = LoopBoundClient()
+            key = get_affinity_key(global_kernel)
+            assert key == get_affinity_key(global_kernel) and get_affinity_key(None) is None
+
+            def chat(user_index):
+                # Different users, same kernel: keyed on the kernel, not the user
+                return runtime.run(client.request(), timeout=5, affinity_key=key)
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                loop_ids = set(pool.map(chat, range(40)))
+            assert len(loop_ids) == 1, f"Shared kernel calls ran on {len(loop_ids)} loops"
+
+            pooled_kernels = [object() for _ in range(8)]
+            loops = {runtime.run(current_loop_id(), affinity_key=get_affinity_key(k)) for k in pooled_kernels}
+            assert len(loops) > 1, "Separate kernels should be spread over the loops"
+        finally:
+            runtime.stop()
+
+        print("✅ Kernel affinity test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+class FakeKernelFunction:
+    """Mimics KernelFunctionFromMethod, which calls self.method(**arguments) and awaits awaitables."""
+
+    def __init__(self, method):
+        self.method = method
+
+    async def invoke(self, **arguments):
+        result = self.method(**arguments)
+        return await result if inspect.isawaitable(result) else result
+
+
+class FakePlugin:
+    def __init__(self, **functions):
+        self.functions = {name: FakeKernelFunction(method) for name, method in functions.items()}
+
+
+class FakeKernel:
+    def __init__(self, **plugins):
+        self.plugins = plugins
+
+
+def test_sync_plugin_functions_do_not_block_the_loop():
+    """A slow sync plugin call on the shared kernel's loop doesn't delay other users' calls."""
+    print("🔍 Testing sync plugin offloading...")
+
+    try:
+        runtime = AsyncRuntime(num_loops=1, name="test-runtime")
+        try:
+            def slow_query(query):
+                time.sleep(0.5)
+                return f"rows for {query}"
+
+            async def fetch():
+                return "async"
+
+            kernel = FakeKernel(sql=FakePlugin(query=slow_query, fetch=fetch))
+            agent_kernel = FakeKernel(sql=FakePlugin(query=slow_query))
+            agents = {"researcher": type("Agent", (), {"kernel": agent_kernel})()}
+            assert offload_sync_kernel_functions(kernel, agents) == 2
+            assert offload_sync_kernel_functions(kernel, agents) == 0, "Offloading must be idempotent"
+
+            key = get_affinity_key(kernel)
+            query_function = kernel.plugins["sql"].functions["query"]
+            slow = runtime.submit(query_function.invoke(query="orders"), affinity_key=key)
+            time.sleep(0.05)
+            started = time.time()
+            runtime.run(current_loop_id(), timeout=5, affinity_key=key)
+            assert time.time() - started < 0.3, "Sync plugin call blocked the loop"
+            assert slow.result(timeout=5) == "rows for orders"
+            assert runtime.run(kernel.plugins["sql"].functions["fetch"].invoke()) == "async"
+        finally:
+            runtime.stop()
+
+        print("✅ Sync plugin offloading test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [test_loops_are_reused_and_context_propagates, test_nested_run_rejected_and_stats_reported, test_shared_kernel_clients_stay_on_one_loop, test_sync_plugin_functions_do_not_block_the_loop]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Functional test for the SmartHttpPlugin response cache.
+Version: 0.237.015
+Implemented in: 0.237.015
+
+This test ensures that SmartHttpPlugin serves repeated fetches of a page from
+its processed-content cache, revalidates expired entries with If-None-Match so
+a 304 skips the download and processing, reprocesses the cached raw body for
+different processing options, and does not cache no-store responses.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+PAGE = b"<html><head><title>Cached page</title></head><body><main><p>Hello from the cache test.</p></main></body></html>"
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    full_responses = 0
+    not_modified = 0
+
+    def do_GET(self):
+        if self.path == "/page" and self.headers.get("If-None-Match") == '"v1"':
+            CountingHandler.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        CountingHandler.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        if self.path == "/page":
+            self.send_header("ETag", '"v1"')
+        else:
+            self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def reset_counts():
+    CountingHandler.full_responses = 0
+    CountingHandler.not_modified = 0
+
+
+def test_fresh_hit_and_revalidation():
+    """A fresh entry is served without a request; an expired one is revalidated with a 304."""
+    print("🔍 Testing cache hits and ETag revalidation...")
+
+    server = None
+    try:
+        from semantic_kernel_plugins.smart_http_cache import get_smart_http_cache
+        from semantic_kernel_plugins.smart_http_plugin import SmartHttpPlugin
+
+        server, base_url = start_server()
+        reset_counts()
+        cache = get_smart_http_cache()
+        cache.clear()
+        plugin = SmartHttpPlugin()
+
+        async def scenario():
+            first = await plugin.get_web_content_async(f"{base_url}/page")
+            second = await plugin.get_web_content_async(f"{base_url}/page")
+            # Expire the entries so the next call has to revalidate
+            for entry in list(cache._processed.entries.values()) + list(cache._raw.entries.values()):
+                entry.expires_at = 0
+            third = await plugin.get_web_content_async(f"{base_url}/page")
+            return first, second, third
+
+        first, second, third = asyncio.run(scenario())
+
+        if "Hello from the cache test." not in first:
+            print(f"❌ Unexpected content: {first[:200]}")
+            return False
+        if first != second or first != third:
+            print("❌ Cached results differ from the original")
+            return False
+        if CountingHandler.full_responses != 1 or CountingHandler.not_modified != 1:
+            print(f"❌ Expected 1 full response and 1 revalidation, got {CountingHandler.full_responses} and {CountingHandler.not_modified}")
+            return False
+        if len(plugin.function_calls) != 3:
+            print("❌ Cached calls were not tracked for citations")
+            return False
+
+        stats = cache.get_stats()
+        if stats["hits"] != 1 or stats["revalidated"] != 1:
+            print(f"❌ Unexpected cache stats: {stats}")
+            return False
+
+        print("✅ Fresh hits skip the request and expired entries revalidate with a 304")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if server:
+            server.shutdown()
+
+
+def test_reprocess_raw_body_for_other_options():
+    """A different max_content_size reuses the cached raw body after a 304."""
+    print("🔍 Testing reprocessing of cached raw bodies...")
+
+    server = None
+    try:
+        from semantic_kernel_plugins.smart_http_cache import get_smart_http_cache
+        from semantic_kernel_plugins.smart_http_plugin import SmartHttpPlugin
+
+        server, base_url = start_server()
+        reset_counts()
+        cache = get_smart_http_cache()
+        cache.clear()
+
+        async def scenario():
+            await SmartHttpPlugin().get_web_content_async(f"{base_url}/page")
+            return await SmartHttpPlugin(max_content_size=50000).get_web_content_async(f"{base_url}/page")
+
+        result = asyncio.run(scenario())
+
+        if "Hello from the cache test." not in result:
+            print(f"❌ Unexpected content: {result[:200]}")
+            return False
+        if CountingHandler.full_responses != 1 or CountingHandler.not_modified != 1:
+            print(f"❌ Expected the raw body to be revalidated, got {CountingHandler.full_responses} full responses")
+            return False
+        if cache.get_stats()["processed_entries"] != 2:
+            print("❌ Processed text was not cached per options")
+            return False
+
+        print("✅ Cached raw body was reprocessed for new options")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if server:
+            server.shutdown()
+
+
+def test_no_store_is_not_cached():
+    """Responses with Cache-Control: no-store are fetched every time."""
+    print("🔍 Testing Cache-Control: no-store...")
+
+    server = None
+    try:
+        from semantic_kernel_plugins.smart_http_cache import get_smart_http_cache
+        from semantic_kernel_plugins.smart_http_plugin import SmartHttpPlugin
+
+        server, base_url = start_server()
+        reset_counts()
+        get_smart_http_cache().clear()
+        plugin = SmartHttpPlugin()
+
+        async def scenario():
+            await plugin.get_web_content_async(f"{base_url}/private")
+            await plugin.get_web_content_async(f"{base_url}/private")
+
+        asyncio.run(scenario())
+
+        if CountingHandler.full_responses != 2:
+            print(f"❌ no-store response was cached ({CountingHandler.full_responses} requests)")
+            return False
+
+        print("✅ no-store responses are not cached")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    tests = [
+        test_fresh_hit_and_revalidation,
+        test_reprocess_raw_body_for_other_options,
+        test_no_store_is_not_cached,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Functional test for SQL plugin connection pooling and schema caching.
+Version: 0.237.016
+Implemented in: 0.237.016
+
+This test ensures that SQLQueryPlugin and SQLSchemaPlugin instances targeting the
+same database share pooled connections, that unhealthy and idle connections are
+replaced, that query results are streamed with fetchmany up to max_rows on
+SQLite, and that schema introspection is served from the TTL cache.
+"""
+
+import sys
+import os
+import tempfile
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+def create_database():
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [(f"item {i}",) for i in range(2500)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_plugins_share_pooled_connections():
+    """New plugin instances reuse the pooled connection and stream limited results."""
+    print("🔍 Testing shared SQL connection pool...")
+
+    path = None
+    try:
+        from semantic_kernel_plugins.sql_connection_pool import close_sql_connection_pools, get_sql_pool_stats
+        from semantic_kernel_plugins.sql_query_plugin import SQLQueryPlugin
+
+        close_sql_connection_pools()
+        path = create_database()
+        manifest = {"database_type": "sqlite", "connection_string": path, "max_rows": 1200}
+
+        first = SQLQueryPlugin(manifest).execute_query("SELECT id, name FROM items ORDER BY id").data
+        second = SQLQueryPlugin(manifest).execute_query("SELECT id, name FROM items ORDER BY id", max_rows=10).data
+
+        if "error" in first or first["row_count"] != 1200 or not first["is_truncated"]:
+            print(f"❌ Unexpected result: { {k: v for k, v in first.items() if k != 'data'} }")
+            return False
+        if first["data"][0] != {"id": 1, "name": "item 0"} or second["row_count"] != 10:
+            print("❌ Rows were not converted or limited correctly")
+            return False
+
+        stats = get_sql_pool_stats()
+        if len(stats) != 1 or stats[0]["created"] != 1 or stats[0]["reused"] != 1 or stats[0]["in_use"] != 0:
+            print(f"❌ Connections were not shared: {stats}")
+            return False
+
+        print("✅ Plugin instances share one pooled connection")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        from semantic_kernel_plugins.sql_connection_pool import close_sql_connection_pools
+        close_sql_connection_pools()
+        if path:
+            os.remove(path)
+
+
+def test_fetch_limited_rows_uses_batches():
+    """fetch_limited_rows never asks the cursor for more than the limit."""
+    print("🔍 Testing batched fetching...")
+
+    try:
+        from semantic_kernel_plugins.sql_connection_pool import fetch_limited_rows
+
+        class RecordingCursor:
+            def __init__(self, total):
+                self.remaining = total
+                self.requests = []
+
+            def fetchmany(self, size):
+                self.requests.append(size)
+                count = min(size, self.remaining)
+                self.remaining -= count
+                return [(i,) for i in range(count)]
+
+            def fetchall(self):
+                raise AssertionError("fetchall must not be used")
+
+        cursor = RecordingCursor(total=10000)
+        rows = fetch_limited_rows(cursor, 1200, batch_size=500)
+        if len(rows) != 1200 or cursor.requests != [500, 500, 200]:
+            print(f"❌ Unexpected batches: {cursor.requests}")
+            return False
+
+        short = RecordingCursor(total=30)
+        if len(fetch_limited_rows(short, 1000, batch_size=500)) != 30 or short.requests != [500]:
+            print(f"❌ Short result was not detected: {short.requests}")
+            return False
+
+        print("✅ Results are fetched in bounded batches")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_unhealthy_and_idle_connections_are_replaced():
+    """Broken connections are discarded and idle ones are evicted."""
+    print("🔍 Testing health checks and idle eviction...")
+
+    try:
+        from semantic_kernel_plugins import sql_connection_pool
+        from semantic_kernel_plugins.sql_connection_pool import SQLConnectionPool
+
+        class FakeConnection:
+            def __init__(self):
+                self.broken = False
+                self.closed = False
+
+            def cursor(self):
+                if self.broken:
+                    raise RuntimeError("connection reset")
+                return sqlite3.connect(":memory:").cursor()
+
+            def rollback(self):
+                if self.broken:
+                    raise RuntimeError("connection reset")
+
+            def close(self):
+                self.closed = True
+
+        pool = SQLConnectionPool(FakeConnection, max_size=2, idle_timeout_seconds=60)
+
+        with pool.connection() as conn:
+            first = conn
+        # The server dropped the connection while it sat idle past the health-check interval
+        first.broken = True
+        pool._idle[0].last_used -= sql_connection_pool.HEALTH_CHECK_INTERVAL_SECONDS + 1
+        with pool.connection() as conn:
+            if conn is first or not first.closed:
+                print("❌ Broken connection was reused")
+                return False
+            second = conn
+
+        # Idle past the pool's idle timeout: closed instead of reused
+        pool._idle[0].last_used -= 61
+        with pool.connection() as conn:
+            if conn is second or not second.closed:
+                print("❌ Idle connection was not evicted")
+                return False
+
+        stats = pool.get_stats()
+        if stats["created"] != 3 or stats["discarded"] != 2 or stats["idle"] != 1:
+            print(f"❌ Unexpected pool stats: {stats}")
+            return False
+
+        print("✅ Unhealthy and idle connections are replaced")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_schema_metadata_is_cached():
+    """Schema introspection is served from the cache until it is invalidated."""
+    print("🔍 Testing schema metadata cache...")
+
+    path = None
+    try:
+        from semantic_kernel_plugins.sql_connection_pool import close_sql_connection_pools, get_sql_pool_stats
+        from semantic_kernel_plugins.sql_schema_plugin import SQLSchemaPlugin
+
+        close_sql_connection_pools()
+        path = create_database()
+        manifest = {"database_type": "sqlite", "connection_string": path}
+
+        plugin = SQLSchemaPlugin(manifest)
+        first = plugin.get_table_list().data
+        leases_after_first = get_sql_pool_stats()[0]["created"] + get_sql_pool_stats()[0]["reused"]
+        second = SQLSchemaPlugin(manifest).get_table_list().data
+        leases_after_second = get_sql_pool_stats()[0]["created"] + get_sql_pool_stats()[0]["reused"]
+
+        if first != second or first[0]["table_name"] != "items":
+            print(f"❌ Unexpected table list: {first} / {second}")
+            return False
+        if leases_after_second != leases_after_first:
+            print("❌ Cached table list still queried the database")
+            return False
+
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY)")
+        conn.commit()
+        conn.close()
+
+        plugin.invalidate_schema_cache()
+        refreshed = plugin.get_table_list().data
+        if len(refreshed) != 2:
+            print(f"❌ Invalidated cache returned stale tables: {refreshed}")
+            return False
+
+        print("✅ Schema metadata is cached and can be invalidated")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        from semantic_kernel_plugins.sql_connection_pool import close_sql_connection_pools, get_sql_schema_cache
+        close_sql_connection_pools()
+        get_sql_schema_cache().invalidate()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    tests = [
+        test_plugins_share_pooled_connections,
+        test_fetch_limited_rows_uses_batches,
+        test_unhealthy_and_idle_connections_are_replaced,
+        test_schema_metadata_is_cached,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
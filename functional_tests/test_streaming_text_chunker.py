@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Functional test for the streaming plain-text chunker.
+Version: 0.237.005
+Implemented in: 0.237.005
+
+This test ensures that the generator-based chunkers in functions_text_chunking
+produce the same chunks as the previous read-everything implementations while
+reading the file incrementally, that byte offsets map back to the source, and
+that a file holding one huge line, or no whitespace at all, is split and read
+in bounded pieces.
+"""
+
+import io
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+from functions_text_chunking import (
+    DEFAULT_MAX_LINE_CHUNK_BYTES,
+    DEFAULT_MAX_WORD_BYTES,
+    estimate_chunk_count,
+    is_markdown_header,
+    iter_line_chunks,
+    iter_text_chunks_from_string,
+    iter_word_chunks,
+    refine_chunk_estimate,
+)
+
+
+def _sample_text(word_count=12000):
+    random.seed(42)
+    alphabet = 'abcdefé漢字 \n\t'
+    words = [''.join(random.choice(alphabet) for _ in range(random.randint(1, 12))) for _ in range(word_count)]
+    return ' '.join(words)
+
+
+def test_word_chunks_match_legacy_split():
+    """Word chunks equal the old " ".join(words[i:i+n]) output for any read size."""
+    print("🔍 Testing word chunker parity with legacy split()...")
+
+    try:
+        text = _sample_text()
+        data = text.encode('utf-8')
+        words = text.split()
+        expected = [" ".join(words[i:i + 400]) for i in range(0, len(words), 400)]
+
+        for read_size in (1, 13, 4096, 1024 * 1024):
+            chunks = list(iter_word_chunks(io.BytesIO(data), words_per_chunk=400, read_size=read_size))
+            assert [c.text for c in chunks] == expected, f"Mismatch with read_size={read_size}"
+            assert [c.page_number for c in chunks] == list(range(1, len(expected) + 1))
+            for chunk in chunks:
+                assert data[chunk.byte_start:chunk.byte_end].split() == chunk.text.encode('utf-8').split()
+
+        assert list(iter_word_chunks(io.BytesIO(b''))) == []
+        assert [c.text for c in iter_text_chunks_from_string("a b  c", words_per_chunk=2)] == ["a b", "c"]
+
+        print("✅ Word chunker parity test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_line_chunks_match_legacy_log_chunking():
+    """Line chunks reproduce the old LOG accumulation and respect byte budgets."""
+    print("🔍 Testing line chunker for LOG/XML/YAML...")
+
+    try:
+        text = _sample_text()
+        data = text.encode('utf-8')
+
+        legacy = []
+        current_lines = []
+        current_words = 0
+        for line in text.splitlines(keepends=True):
+            line_words = len(line.split())
+            if current_words + line_words > 1000 and current_lines:
+                legacy.append("".join(current_lines))
+                current_lines = [line]
+                current_words = line_words
+            else:
+                current_lines.append(line)
+                current_words += line_words
+        if current_lines:
+            legacy.append("".join(current_lines))
+
+        chunks = [c.text for c in iter_line_chunks(io.BytesIO(data), max_words=1000)]
+        assert chunks == legacy, "LOG chunking differs from legacy algorithm"
+
+        sized = list(iter_line_chunks(io.BytesIO(data), max_bytes=4000))
+        assert all(len(c.text.encode('utf-8')) <= 4000 for c in sized), "Chunk exceeded byte budget"
+        assert "".join(c.text for c in sized) == text, "Byte-capped chunks lost content"
+
+        long_line = ("é" * 5000 + "\n").encode('utf-8')
+        pieces = list(iter_line_chunks(io.BytesIO(long_line), max_bytes=4000))
+        assert "".join(p.text for p in pieces) == long_line.decode('utf-8')
+
+        print("✅ Line chunker test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+class _ReadTrackingStream(io.BytesIO):
+    """BytesIO that records the largest single read, to check reads stay bounded."""
+
+    largest_read = 0
+
+    def readline(self, size=-1):
+        data = super().readline(size)
+        self.largest_read = max(self.largest_read, len(data))
+        return data
+
+    def __iter__(self):
+        raise AssertionError("Unbounded line iteration")
+
+
+def test_single_huge_line_is_split():
+    """A multi-megabyte line is read in bounded pieces and split at the word and byte caps."""
+    print("🔍 Testing line chunker on a single huge line...")
+
+    try:
+        words = [f"event{i}=ok" for i in range(400000)]
+        text = " ".join(words)
+        data = text.encode('utf-8')
+        stream = _ReadTrackingStream(data)
+
+        chunks = list(iter_line_chunks(stream, max_words=1000))
+        assert stream.largest_read <= DEFAULT_MAX_LINE_CHUNK_BYTES, stream.largest_read
+        assert len(chunks) >= len(words) // 1000, len(chunks)
+        assert all(len(c.text.split()) <= 1000 for c in chunks), "Chunk exceeded word budget"
+        assert "".join(c.text for c in chunks) == text, "Split line lost content"
+        assert all(data[c.byte_start:c.byte_end].decode('utf-8') == c.text for c in chunks), "Byte offsets do not match"
+        assert [c.page_number for c in chunks] == list(range(1, len(chunks) + 1))
+
+        no_spaces = ("漢" * 200000).encode('utf-8')
+        pieces = list(iter_line_chunks(_ReadTrackingStream(no_spaces), max_words=1000))
+        assert all(len(p.text.encode('utf-8')) <= DEFAULT_MAX_LINE_CHUNK_BYTES for p in pieces), "Chunk exceeded byte cap"
+        assert "".join(p.text for p in pieces).encode('utf-8') == no_spaces
+
+        md = b"intro " * 20 + b"# not a header\n# Header\nbody\n"
+        sections = list(iter_line_chunks(io.BytesIO(md), max_words=20, min_words=1, is_boundary=is_markdown_header))
+        assert [c.text for c in sections] == ["intro " * 20, "# not a header\n", "# Header\nbody\n"], sections
+
+        print("✅ Huge line test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_text_without_whitespace_is_split():
+    """Runs without whitespace are split into bounded words and chunks instead of one growing carry."""
+    print("🔍 Testing word chunker on text without whitespace...")
+
+    try:
+        data = ("x" * 3000000 + " tail " + "漢" * 1000000).encode('utf-8')
+        stream = _ReadTrackingStream(data)
+
+        chunks = list(iter_word_chunks(stream, words_per_chunk=4, read_size=256 * 1024))
+        words = [word for c in chunks for word in c.text.split(" ")]
+        assert all(len(word.encode('utf-8')) <= DEFAULT_MAX_WORD_BYTES for word in words), "Word exceeded byte cap"
+        assert all(len(c.text.encode('utf-8')) <= DEFAULT_MAX_LINE_CHUNK_BYTES for c in chunks), "Chunk exceeded byte cap"
+        assert all(len(c.text.split(" ")) <= 4 for c in chunks), "Chunk exceeded word budget"
+        assert "".join(words).encode('utf-8') == data.replace(b" ", b""), "Split words lost content"
+        assert "tail" in words, "Words after a forced split were merged"
+        assert all(data[c.byte_start:c.byte_end].replace(b" ", b"") == c.text.replace(" ", "").encode('utf-8') for c in chunks), \
+            "Byte offsets do not match"
+        assert [c.page_number for c in chunks] == list(range(1, len(chunks) + 1))
+
+        # Words that fit stay whole even when they straddle a read
+        assert [c.text for c in iter_word_chunks(io.BytesIO(b"ab cdef gh"), words_per_chunk=2, read_size=3, max_word_bytes=4)] == \
+            ["ab cdef", "gh"]
+
+        print("✅ Text without whitespace test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_markdown_sections_and_estimates():
+    """Markdown headers start new chunks once the minimum size is reached."""
+    print("🔍 Testing Markdown section boundaries and chunk estimates...")
+
+    try:
+        md = b"# Title\nintro words here\n## Section\nbody\nnot # a header\n### Deep\nend\n"
+        chunks = list(iter_line_chunks(io.BytesIO(md), max_words=1200, min_words=3, is_boundary=is_markdown_header))
+        assert [c.text.splitlines()[0] for c in chunks] == ["# Title", "## Section", "### Deep"], chunks
+        merged = list(iter_line_chunks(io.BytesIO(md), max_words=1200, min_words=20, is_boundary=is_markdown_header))
+        assert len(merged) == 1 and merged[0].text == md.decode('utf-8'), merged
+        assert not is_markdown_header(b"#hashtag\n")
+        assert not is_markdown_header(b"###### too deep\n")
+
+        assert estimate_chunk_count(0) == 0
+        assert estimate_chunk_count(24000, words_per_chunk=400) == 10
+        first = next(iter_word_chunks(io.BytesIO(b"a " * 1000), words_per_chunk=100))
+        assert first.byte_end == 199 and refine_chunk_estimate(first, 2000) == 11
+
+        print("✅ Markdown and estimate test passed!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_word_chunks_match_legacy_split,
+        test_line_chunks_match_legacy_log_chunking,
+        test_single_huge_line_is_split,
+        test_text_without_whitespace_is_split,
+        test_markdown_sections_and_estimates,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
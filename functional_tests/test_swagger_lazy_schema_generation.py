@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Functional test for lazy swagger schema generation and the prebuilt spec artifact.
+Version: 0.237.019
+Implemented in: 0.237.019
+
+This test ensures that swagger_route no longer analyzes route source at import
+time, that the analysis runs once when the spec is first built, that the spec
+cache key is computed once per process and only recomputed when routes are
+added, and that a prebuilt openapi-<VERSION>.json artifact is served without
+generating the spec.
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+def count_analysis(swagger_wrapper):
+    """Wrap the analysis helpers so calls can be counted."""
+    counts = {'returns': 0, 'parameters': 0, 'request_body': 0}
+    originals = {
+        'returns': swagger_wrapper._analyze_function_returns,
+        'parameters': swagger_wrapper._analyze_function_parameters,
+        'request_body': swagger_wrapper._analyze_function_request_body,
+    }
+
+    def counted(name):
+        def inner(func):
+            counts[name] += 1
+            return originals[name](func)
+        return inner
+
+    swagger_wrapper._analyze_function_returns = counted('returns')
+    swagger_wrapper._analyze_function_parameters = counted('parameters')
+    swagger_wrapper._analyze_function_request_body = counted('request_body')
+
+    def restore():
+        swagger_wrapper._analyze_function_returns = originals['returns']
+        swagger_wrapper._analyze_function_parameters = originals['parameters']
+        swagger_wrapper._analyze_function_request_body = originals['request_body']
+
+    return counts, restore
+
+
+def build_app(swagger_wrapper):
+    from flask import Flask, jsonify, request
+
+    app = Flask(__name__)
+    app.config['VERSION'] = '9.9.9'
+
+    @app.route('/api/items', methods=['POST'])
+    @swagger_wrapper.swagger_route(security=swagger_wrapper.get_auth_security())
+    def create_item():
+        """Create an item."""
+        data = request.get_json()
+        name = data.get('name')
+        return jsonify({"name": name}), 201
+
+    @app.route('/api/items/<item_id>', methods=['GET'])
+    @swagger_wrapper.swagger_route(security=swagger_wrapper.get_auth_security())
+    def get_item(item_id):
+        """Get an item."""
+        return jsonify({"id": item_id})
+
+    return app
+
+
+def test_schema_analysis_is_deferred():
+    """Decorating a route does no source analysis; building the spec does it once."""
+    print("🔍 Testing deferred schema analysis...")
+
+    restore = None
+    try:
+        import swagger_wrapper
+
+        counts, restore = count_analysis(swagger_wrapper)
+        app = build_app(swagger_wrapper)
+
+        if sum(counts.values()) != 0:
+            print(f"❌ Routes were analyzed at import time: {counts}")
+            return False
+
+        doc = app.view_functions['create_item']._swagger_doc
+        if doc.get('summary') != 'Create Item' or sum(counts.values()) != 0:
+            print(f"❌ Reading static metadata triggered analysis: {counts}")
+            return False
+
+        with app.test_request_context('/swagger.json'):
+            first = swagger_wrapper.extract_route_info(app)
+            after_first = dict(counts)
+            second = swagger_wrapper.extract_route_info(app)
+
+        if after_first != {'returns': 2, 'parameters': 2, 'request_body': 2}:
+            print(f"❌ Expected one analysis per route, got {after_first}")
+            return False
+        if counts != after_first:
+            print(f"❌ Analysis was repeated on the second build: {counts}")
+            return False
+        if first != second:
+            print("❌ Spec changed between builds")
+            return False
+
+        body = first['paths']['/api/items']['post']['requestBody']['content']['application/json']['schema']
+        if 'name' not in body.get('properties', {}):
+            print(f"❌ Request body was not detected: {body}")
+            return False
+
+        print("✅ Schemas are analyzed once, when the spec is first built")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if restore:
+            restore()
+
+
+def test_cache_key_computed_once():
+    """The cache key is memoized and only recomputed when routes are added."""
+    print("🔍 Testing memoized cache key...")
+
+    try:
+        import swagger_wrapper
+
+        app = build_app(swagger_wrapper)
+        cache = swagger_wrapper.SwaggerCache()
+
+        walks = []
+        original_iter_rules = app.url_map.iter_rules
+
+        def counting_iter_rules(*args, **kwargs):
+            walks.append(1)
+            return original_iter_rules(*args, **kwargs)
+
+        app.url_map.iter_rules = counting_iter_rules
+
+        first = cache._get_cache_key(app)
+        for _ in range(10):
+            if cache._get_cache_key(app) != first:
+                print("❌ Cache key changed without route changes")
+                return False
+        if len(walks) != 1:
+            print(f"❌ Routes were walked {len(walks)} times")
+            return False
+
+        @app.route('/api/extra')
+        def extra():
+            return "extra"
+
+        if cache._get_cache_key(app) == first or len(walks) != 2:
+            print("❌ Adding a route did not refresh the cache key")
+            return False
+
+        print("✅ Cache key is computed once per process")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_prebuilt_artifact_is_served():
+    """A versioned artifact is served instead of generating the spec."""
+    print("🔍 Testing prebuilt spec artifact...")
+
+    original_dir = None
+    original_extract = None
+    try:
+        import swagger_wrapper
+
+        original_dir = swagger_wrapper.SWAGGER_SPEC_ARTIFACT_DIR
+        original_extract = swagger_wrapper.extract_route_info
+        swagger_wrapper.SWAGGER_SPEC_ARTIFACT_DIR = tempfile.mkdtemp()
+
+        app = build_app(swagger_wrapper)
+        path = swagger_wrapper.export_swagger_spec(app)
+        if not path.endswith('openapi-9.9.9.json'):
+            print(f"❌ Unexpected artifact path: {path}")
+            return False
+        with open(path) as f:
+            exported = json.load(f)
+
+        def fail_extract(app):
+            raise AssertionError("spec should not be generated")
+
+        swagger_wrapper.extract_route_info = fail_extract
+        cache = swagger_wrapper.SwaggerCache()
+        with app.test_request_context('/swagger.json', base_url='https://chat.example.com'):
+            spec, status_code, _ = cache.get_spec(app)
+
+        if status_code != 200 or spec['paths'] != exported['paths']:
+            print(f"❌ Artifact was not served: {status_code}")
+            return False
+        if spec['servers'][0]['url'] != 'https://chat.example.com':
+            print(f"❌ Server URL was not set from the request: {spec['servers']}")
+            return False
+
+        # An artifact from another release is ignored
+        app.config['VERSION'] = '9.9.10'
+        os.rename(path, swagger_wrapper.get_swagger_spec_artifact_path('9.9.10'))
+        if swagger_wrapper.load_swagger_spec_artifact('9.9.10') is not None:
+            print("❌ Artifact for another version was loaded")
+            return False
+
+        print("✅ Prebuilt artifact is served for its version only")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        import swagger_wrapper
+        if original_dir is not None:
+            swagger_wrapper.SWAGGER_SPEC_ARTIFACT_DIR = original_dir
+        if original_extract is not None:
+            swagger_wrapper.extract_route_info = original_extract
+
+
+if __name__ == "__main__":
+    tests = [
+        test_schema_analysis_is_deferred,
+        test_cache_key_computed_once,
+        test_prebuilt_artifact_is_served,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)
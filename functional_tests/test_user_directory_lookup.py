@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Functional test for the cached directory lookup behind /api/userSearch.
+Version: 0.237.027
+Implemented in: 0.237.027
+
+This test ensures that user searches are answered from the local index of
+signed-in users when it has a full page, that Graph results are cached per
+tenant and reused for longer queries when the shorter prefix was complete,
+that identical concurrent searches share one Graph request, and that Graph
+is only asked for an access token when it is actually queried.
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'application', 'single_app'))
+
+
+class FakeUserSettingsContainer:
+    """Returns user settings documents for the local index query."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = 0
+
+    def query_items(self, query, enable_cross_partition_query=True):
+        self.queries += 1
+        return [dict(doc) for doc in self.docs]
+
+
+def setup_directory(local_docs, graph_users):
+    import functions_user_directory as directory
+
+    calls = []
+
+    def fake_fetch(query, access_token):
+        calls.append((query, access_token))
+        time.sleep(0.2)
+        return [user for user in graph_users if directory._matches(user, query)][:directory.USER_SEARCH_RESULT_LIMIT]
+
+    directory._fetch_graph_users = fake_fetch
+    directory._search_cache = directory.DirectorySearchCache(ttl_seconds=60)
+    directory._local_index = directory.LocalUserIndex(refresh_seconds=60, container=FakeUserSettingsContainer(local_docs))
+    return directory, calls
+
+
+def graph_user(user_id, name, email):
+    return {"id": user_id, "displayName": name, "email": email, "userPrincipalName": email}
+
+
+def test_local_index_and_prefix_cache():
+    """Full local pages skip Graph; complete cached prefixes answer longer queries."""
+    print("🔍 Testing local index and prefix cache...")
+
+    try:
+        local_docs = [{"id": f"local-{i}", "email": f"alex{i}@contoso.com", "display_name": f"Alex {i}"} for i in range(12)]
+        local_docs.append({"id": "no-name", "email": "", "display_name": ""})
+        graph_users = [
+            graph_user("g-1", "Bea Smith", "bea@contoso.com"),
+            graph_user("g-2", "Ben Jones", "ben@contoso.com"),
+            graph_user("local-0", "Alex 0", "alex0@contoso.com"),
+        ]
+        directory, calls = setup_directory(local_docs, graph_users)
+        tokens = []
+
+        def token_provider():
+            tokens.append(1)
+            return "token"
+
+        results = directory.search_directory_users("  ALEX ", "tenant-1", token_provider)
+        if len(results) != 10 or calls or tokens:
+            print(f"❌ Full local page should not reach Graph: {len(results)} results, {calls}")
+            return False
+
+        results = directory.search_directory_users("b", "tenant-1", token_provider)
+        if [user["id"] for user in results] != ["g-1", "g-2"] or len(calls) != 1:
+            print(f"❌ Unexpected Graph search: {results} / {calls}")
+            return False
+
+        results = directory.search_directory_users("be", "tenant-1", token_provider)
+        if [user["id"] for user in results] != ["g-1", "g-2"] or len(calls) != 1:
+            print(f"❌ Complete prefix should answer longer query: {results} / {calls}")
+            return False
+        results = directory.search_directory_users("bea", "tenant-1", token_provider)
+        if [user["id"] for user in results] != ["g-1"] or len(calls) != 1:
+            print(f"❌ Prefix results not filtered: {results}")
+            return False
+
+        directory.search_directory_users("b", "tenant-2", token_provider)
+        if len(calls) != 2:
+            print("❌ Cache must be scoped per tenant")
+            return False
+
+        results = directory.search_directory_users("alex 0", "tenant-1", token_provider)
+        if [user["id"] for user in results] != ["local-0"]:
+            print(f"❌ Local and Graph results not deduplicated: {results}")
+            return False
+
+        if directory.search_directory_users("zed", "tenant-1", lambda: None) is not None:
+            print("❌ Missing token must be reported when Graph is needed")
+            return False
+
+        print("✅ Local index and cache avoid Graph round trips")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_identical_searches_are_coalesced():
+    """Concurrent identical searches share one Graph request and its errors."""
+    print("🔍 Testing request coalescing...")
+
+    try:
+        directory, calls = setup_directory([], [graph_user("g-1", "Dana Lee", "dana@contoso.com")])
+        results = []
+
+        def search():
+            results.append(directory.search_directory_users("dana", "tenant-1", lambda: "token"))
+
+        threads = [threading.Thread(target=search) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if len(calls) != 1 or len(results) != 5 or any([user["id"] for user in r] != ["g-1"] for r in results):
+            print(f"❌ Searches not coalesced: {len(calls)} Graph calls, {results}")
+            return False
+
+        def failing_fetch(query, access_token):
+            time.sleep(0.2)
+            raise RuntimeError("throttled")
+
+        directory._fetch_graph_users = failing_fetch
+        errors = []
+
+        def failing_search():
+            try:
+                directory.search_directory_users("erin", "tenant-1", lambda: "token")
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=failing_search) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors != ["throttled"] * 3 or directory._in_flight:
+            print(f"❌ Errors not shared with waiting searches: {errors}")
+            return False
+
+        print("✅ Identical in-flight searches are coalesced")
+        return True
+
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    tests = [
+        test_local_index_and_prefix_cache,
+        test_identical_searches_are_coalesced,
+    ]
+    results = []
+
+    for test in tests:
+        print(f"\n🧪 Running {test.__name__}...")
+        results.append(test())
+
+    success = all(results)
+    print(f"\n📊 Results: {sum(results)}/{len(results)} tests passed")
+    sys.exit(0 if success else 1)